@@ -1,32 +1,106 @@
+import asyncio
 import logging
-from telegram import Bot
+import time
+from collections import deque
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.error import TelegramError
 from shared.utils.config import get_bot_token
+from shared.utils.telegram_client import get_bot
+from shared.utils.telegram_media import fan_out_media_group
+from apps.parsing.utils.rate_limiter import telegram_rate_limiter
 
 # ✅ Создаем логгер для менеджера групп
 logger = logging.getLogger('bot.group_manager')
 
 
+class SlidingWindowCounter:
+    """🪟 Счётчик событий по ключу за последние window секунд
+
+    Альбом — столько событий, сколько в нём фото: так же считает Telegram
+    и общий telegram_rate_limiter.
+    """
+
+    def __init__(self, window, limit):
+        self.window = float(window)
+        self.limit = limit
+        self._events = {}  # key -> deque времён событий
+
+    def _trim(self, key, now):
+        events = self._events.get(key)
+        if events is None:
+            return None
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return None
+        return events
+
+    def count(self, key, now=None):
+        events = self._trim(key, time.monotonic() if now is None else now)
+        return len(events) if events else 0
+
+    def allowed(self, key, events=1, now=None):
+        """Есть ли место ещё для events событий (без учёта)"""
+        return self.count(key, now) + events <= self.limit
+
+    def hit(self, key, events=1, now=None):
+        """Учитывает events событий, если все помещаются в лимит; True — учтены"""
+        now = time.monotonic() if now is None else now
+        if self.count(key, now) + events > self.limit:
+            return False
+        self._events.setdefault(key, deque()).extend([now] * events)
+        return True
+
+    def retry_after(self, key, events=1, now=None):
+        """Секунд до освобождения места для events событий (0 — можно сейчас)"""
+        now = time.monotonic() if now is None else now
+        queued = self._trim(key, now)
+        if events > self.limit:
+            return float('inf')
+        if not queued or len(queued) + events <= self.limit:
+            return 0.0
+        return queued[len(queued) + events - 1 - self.limit] + self.window - now
+
+
 class GroupManager:
+    GROUP_INFO_TTL = 300  # Секунд кэшируем get_chat + число участников
+    MESSAGES_PER_MINUTE = 20  # Лимит Telegram на сообщения в группу
+    WARNING_INTERVAL = 3600  # Не чаще одного предупреждения о лимите в час
+
     def __init__(self):
         self.bot_token = get_bot_token()
-        self.bot = Bot(token=self.bot_token) if self.bot_token else None
         self.max_members = 4  # Максимальное количество участников (включая бота)
 
-    async def can_send_to_group(self, group_id):
-        """Проверяет, можно ли отправлять в группу"""
+        # 🔥 Счётчики и кэш в памяти процесса: поток сделок не ходит в Telegram за проверками
+        self.sent_messages = SlidingWindowCounter(60, self.MESSAGES_PER_MINUTE)
+        self.warnings_sent = SlidingWindowCounter(self.WARNING_INTERVAL, 1)
+        self._group_info = {}  # group_id -> (info, expires)
+        self._info_locks = {}
+
+    async def can_send_to_group(self, group_id, messages=1):
+        """Проверяет, можно ли отправлять в группу (messages — сообщений, у альбома — по числу фото)"""
         try:
-            if not self.bot:
+            if not self.bot_token:
                 logger.error("❌ Бот не инициализирован для проверки группы")
                 return False
 
-            chat = await self.bot.get_chat(group_id)
-            members_count = await chat.get_member_count()
+            key = str(group_id)
+            if not self.sent_messages.allowed(key, messages):
+                logger.warning(f"⏳ Группа {group_id}: лимит {self.MESSAGES_PER_MINUTE} сообщений в минуту, "
+                               f"освободится через {self.sent_messages.retry_after(key, messages):.0f} с")
+                return False
+
+            group_info = await self._cached_group_info(group_id)
+            if group_info is None:
+                return True  # Разрешаем отправку при ошибке проверки
 
-            logger.info(f"👥 Группа {group_id}: {members_count} участников")
+            members_count = group_info['members_count']
+            logger.debug(f"👥 Группа {group_id}: {members_count} участников")
 
             if members_count > self.max_members:
-                await self.send_warning(group_id, members_count)
+                if self.warnings_sent.hit(key):
+                    await self.send_warning(group_id, members_count)
                 return False
             return True
 
@@ -34,6 +108,37 @@ class GroupManager:
             logger.error(f"❌ Ошибка проверки группы {group_id}: {e}")
             return True  # Разрешаем отправку при ошибке проверки
 
+    async def _bot(self):
+        """Общий Bot процесса (пул соединений, лимиты — как у уведомлений парсера)"""
+        return await get_bot(self.bot_token)
+
+    def record_sent(self, group_id, messages=1):
+        """Учитывает отправленные в группу сообщения"""
+        self.sent_messages.hit(str(group_id), messages)
+
+    def invalidate_group(self, group_id):
+        """Сбрасывает кэш группы (например, после изменения состава)"""
+        self._group_info.pop(str(group_id), None)
+
+    async def _cached_group_info(self, group_id):
+        """get_group_info с TTL: за GROUP_INFO_TTL — не больше одного запроса на группу"""
+        key = str(group_id)
+        cached = self._group_info.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        lock = self._info_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Параллельные проверки той же группы ждут один запрос
+            cached = self._group_info.get(key)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+            group_info = await self._fetch_group_info(group_id)
+            if group_info is not None:
+                self._group_info[key] = (group_info, time.monotonic() + self.GROUP_INFO_TTL)
+            return group_info
+
     async def send_warning(self, group_id, current_count):
         """Отправляет предупреждение в группу"""
         try:
@@ -49,7 +154,9 @@ class GroupManager:
 
 🔒 *Бот временно приостановил отправку уведомлений*
             """
-            await self.bot.send_message(
+            bot = await self._bot()
+            await telegram_rate_limiter.acquire(group_id)
+            await bot.send_message(
                 chat_id=group_id,
                 text=warning_text,
                 parse_mode='Markdown'
@@ -61,40 +168,88 @@ class GroupManager:
 
     async def safe_send_message(self, group_id, message_text, image_data=None, button_text="", button_url=""):
         """Безопасная отправка с проверкой группы"""
+        results = await self.safe_send_to_groups([group_id], message_text, image_data, button_text, button_url)
+        return results.get(str(group_id), False)
+
+    async def safe_send_to_groups(self, group_ids, message_text, image_data=None, button_text="", button_url=""):
+        """Одно уведомление нескольким группам: фото загружаются один раз, дальше — по file_id"""
+        results = {}
         try:
-            # Проверяем можно ли отправлять в группу
-            if not await self.can_send_to_group(group_id):
-                logger.warning(f"🚫 Отправка в группу {group_id} заблокирована (превышен лимит участников)")
-                return False
+            if not self.bot_token:
+                logger.error("❌ Бот не инициализирован для отправки в группы")
+                return {str(group_id): False for group_id in group_ids}
 
-            # Ленивый импорт чтобы избежать циклической зависимости
-            import sys
-            if 'bot.bot' not in sys.modules:
-                from apps.bot.bot import bot_instance
-            else:
-                # Альтернативный способ если модуль уже загружен
-                bot_instance = sys.modules['bot.bot'].bot_instance
-
-            if bot_instance:
-                return await bot_instance.send_notification_with_image(
-                    message_text, image_data, button_text, button_url
-                )
-            else:
-                logger.error("❌ Экземпляр бота не доступен")
-                return False
+            photos = self._photos(image_data)
+            messages = max(1, len(photos))  # Каждое фото альбома — отдельное сообщение для Telegram
+
+            allowed = []
+            for group_id in group_ids:
+                # Проверяем можно ли отправлять в группу
+                # Место в окне занимаем сразу: параллельные отправки не превысят лимит
+                if (await self.can_send_to_group(group_id, messages)
+                        and self.sent_messages.hit(str(group_id), messages)):
+                    allowed.append(group_id)
+                else:
+                    logger.warning(f"🚫 Отправка в группу {group_id} заблокирована (лимит участников или сообщений)")
+                    results[str(group_id)] = False
+
+            bot = await self._bot()
+            if photos:
+                # Медиа-группа не поддерживает кнопки — как и в уведомлениях парсера
+                results.update(await fan_out_media_group(
+                    bot, allowed, photos, caption=message_text, limiter=telegram_rate_limiter
+                ))
+                return results
+
+            reply_markup = None
+            if button_text and button_url:
+                reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton(button_text, url=button_url)]])
+
+            for group_id in allowed:
+                try:
+                    # Общие лимиты бота — вместе с очередью уведомлений парсера
+                    await telegram_rate_limiter.acquire(group_id)
+                    await bot.send_message(
+                        chat_id=group_id,
+                        text=message_text,
+                        parse_mode='HTML',
+                        reply_markup=reply_markup,
+                        disable_web_page_preview=True
+                    )
+                    results[str(group_id)] = True
+                except TelegramError as e:
+                    logger.error(f"❌ Ошибка отправки в группу {group_id}: {e}")
+                    results[str(group_id)] = False
+            return results
 
         except Exception as e:
             logger.error(f"❌ Ошибка безопасной отправки: {e}")
-            return False
+            for group_id in group_ids:
+                results.setdefault(str(group_id), False)
+            return results
+
+    @staticmethod
+    def _photos(image_data):
+        """image_data: байты, URL/file_id или их список (не больше 10 — лимит альбома)"""
+        if not image_data:
+            return []
+        if isinstance(image_data, (bytes, bytearray, str)):
+            return [image_data]
+        return [image for image in image_data if image][:10]
 
     async def get_group_info(self, group_id):
-        """Получает информацию о группе"""
+        """Получает информацию о группе (из кэша, если свежая)"""
+        return await self._cached_group_info(group_id)
+
+    async def _fetch_group_info(self, group_id):
+        """Запрос информации о группе в Telegram"""
         try:
-            if not self.bot:
+            if not self.bot_token:
                 logger.error("❌ Бот не инициализирован для получения информации о группе")
                 return None
 
-            chat = await self.bot.get_chat(group_id)
+            bot = await self._bot()
+            chat = await bot.get_chat(group_id)
             members_count = await chat.get_member_count()
 
             group_info = {
@@ -117,9 +272,11 @@ class GroupManager:
         try:
             logger.info(f"🔍 Проверяем статус {len(group_ids)} групп...")
 
+            # Из кэша — сразу, остальные группы запрашиваются параллельно
+            group_infos = await asyncio.gather(*(self.get_group_info(group_id) for group_id in group_ids))
+
             results = {}
-            for group_id in group_ids:
-                group_info = await self.get_group_info(group_id)
+            for group_id, group_info in zip(group_ids, group_infos):
                 if group_info:
                     results[group_id] = group_info
                     status = "✅ В норме" if not group_info['is_over_limit'] else "🚫 Превышен лимит"
@@ -157,12 +314,15 @@ class GroupManager:
 #тест #группа #проверка
             """
 
-            await self.bot.send_message(
+            bot = await self._bot()
+            await telegram_rate_limiter.acquire(group_id)
+            await bot.send_message(
                 chat_id=group_id,
                 text=message,
                 parse_mode='Markdown'
             )
 
+            self.record_sent(group_id)
             logger.info(f"✅ Тестовое сообщение отправлено в группу {group_id}")
             return True
 
@@ -1,4 +1,18 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+from telegram import InputFile
+from telegram.error import BadRequest
+
+from apps.bot.group_manager import GroupManager, SlidingWindowCounter
+from shared.utils.telegram_client import CONNECTION_POOL_SIZE, TelegramClientFactory
+from shared.utils.telegram_media import MediaFileCache, fan_out_media_group, send_media_group_cached
+
 
 def safe_console_log(message):
     """Безопасное логирование до инициализации Django"""
@@ -9,3 +23,312 @@ def safe_console_log(message):
         print(f"[SAFE_LOG] {message}")
         print(f"[SAFE_LOG] {message}")
 # Create your tests here.
+
+
+class SlidingWindowCounterTests(SimpleTestCase):
+    """🪟 Окно считает каждое сообщение, у альбома — каждое фото"""
+
+    def test_limit_within_window(self):
+        counter = SlidingWindowCounter(60, 3)
+        self.assertTrue(all(counter.hit('g', now=moment) for moment in (0, 1, 2)))
+        self.assertFalse(counter.hit('g', now=3))
+        self.assertEqual(counter.count('g', now=3), 3)
+
+    def test_window_slides(self):
+        counter = SlidingWindowCounter(60, 2)
+        counter.hit('g', now=0)
+        counter.hit('g', now=30)
+        self.assertFalse(counter.allowed('g', now=59))
+        self.assertTrue(counter.allowed('g', now=60))
+        self.assertEqual(counter.count('g', now=90), 0)
+
+    def test_album_counts_every_photo(self):
+        counter = SlidingWindowCounter(60, 20)
+        self.assertTrue(counter.hit('g', 10, now=0))
+        self.assertTrue(counter.hit('g', 10, now=1))
+        self.assertEqual(counter.count('g', now=2), 20)
+        self.assertFalse(counter.allowed('g', now=2))
+        # Неподходящий альбом не учитывается частично
+        counter = SlidingWindowCounter(60, 20)
+        counter.hit('g', 15, now=0)
+        self.assertFalse(counter.hit('g', 10, now=1))
+        self.assertEqual(counter.count('g', now=1), 15)
+
+    def test_retry_after(self):
+        counter = SlidingWindowCounter(60, 3)
+        self.assertEqual(counter.retry_after('g', now=0), 0.0)
+        for moment in (0, 10, 20):
+            counter.hit('g', now=moment)
+        self.assertEqual(counter.retry_after('g', now=30), 30.0)  # Освободится событие из 0
+        self.assertEqual(counter.retry_after('g', 2, now=30), 40.0)  # ...и из 10
+        self.assertEqual(counter.retry_after('g', 4, now=30), float('inf'))
+
+    def test_keys_are_independent(self):
+        counter = SlidingWindowCounter(60, 1)
+        counter.hit('a', now=0)
+        self.assertTrue(counter.allowed('b', now=0))
+
+
+class GroupManagerLimitTests(SimpleTestCase):
+    """👥 Отправки в группы идут через общий лимитер бота"""
+
+    def setUp(self):
+        self.manager = GroupManager()
+        self.manager.bot_token = 'token'
+        self.bot = mock.AsyncMock()
+        patcher = mock.patch('apps.bot.group_manager.get_bot', mock.AsyncMock(return_value=self.bot))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        info = {'id': -100, 'title': 'Группа', 'type': 'group', 'members_count': 2, 'is_over_limit': False}
+        patcher = mock.patch.object(self.manager, '_cached_group_info', mock.AsyncMock(return_value=info))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('apps.bot.group_manager.telegram_rate_limiter')
+        self.limiter = patcher.start()
+        self.limiter.acquire = mock.AsyncMock(return_value=0.0)
+        self.addCleanup(patcher.stop)
+
+    def test_album_takes_a_slot_per_photo(self):
+        photos = [b'jpeg%d' % index for index in range(10)]
+        with mock.patch('shared.utils.telegram_media.send_media_group_cached', mock.AsyncMock()):
+            results = async_to_sync(self.manager.safe_send_to_groups)(['-100'], 'Сделка', photos)
+
+        self.assertEqual(results, {'-100': True})
+        self.assertEqual(self.manager.sent_messages.count('-100'), 10)
+        self.limiter.acquire.assert_awaited_once_with('-100', 10)
+
+    def test_album_over_window_is_refused(self):
+        self.manager.record_sent('-100', 15)
+        photos = [b'jpeg%d' % index for index in range(10)]
+        results = async_to_sync(self.manager.safe_send_to_groups)(['-100'], 'Сделка', photos)
+
+        self.assertEqual(results, {'-100': False})
+        self.assertEqual(self.manager.sent_messages.count('-100'), 15)
+        self.limiter.acquire.assert_not_awaited()
+
+    def test_text_goes_through_shared_limiter(self):
+        results = async_to_sync(self.manager.safe_send_to_groups)(['-100', '-200'], 'Сделка')
+
+        self.assertEqual(results, {'-100': True, '-200': True})
+        self.assertEqual(self.limiter.acquire.await_args_list, [mock.call('-100'), mock.call('-200')])
+        self.assertEqual(self.bot.send_message.await_count, 2)
+
+
+class AlbumBot:
+    """Bot без сети: запоминает, какие фото альбома пришли байтами, а какие — file_id"""
+
+    def __init__(self):
+        self.calls = []  # (chat_id, [bytes | file_id, ...])
+        self.reject_file_ids = 0  # Сколько следующих альбомов с file_id отклонить
+        self._uploads = 0
+
+    @property
+    def uploaded(self):
+        return [data for _, media in self.calls for data in media if isinstance(data, bytes)]
+
+    async def send_media_group(self, chat_id, media, **kwargs):
+        sources = [item.media.input_file_content if isinstance(item.media, InputFile) else item.media
+                   for item in media]
+        if self.reject_file_ids and any(isinstance(source, str) for source in sources):
+            self.reject_file_ids -= 1
+            raise BadRequest('Wrong file identifier/http url specified')
+
+        self.calls.append((chat_id, sources))
+        messages = []
+        for source in sources:
+            if isinstance(source, bytes):
+                self._uploads += 1
+                source = f'file-{self._uploads}'
+            messages.append(mock.Mock(photo=[mock.Mock(file_id=f'{source}-small'), mock.Mock(file_id=source)]))
+        return messages
+
+
+class TelegramMediaCacheTests(SimpleTestCase):
+    """🖼️ Альбом нескольким чатам: байты загружаются один раз, дальше — file_id"""
+
+    def setUp(self):
+        self.bot = AlbumBot()
+        self.cache = MediaFileCache()
+        self.photos = [b'jpeg-1', b'jpeg-2', b'jpeg-3']
+
+    def test_fan_out_uploads_bytes_once(self):
+        limiter = mock.Mock(acquire=mock.AsyncMock(return_value=0.0))
+        chats = ['-1', '-2', '-3', '-4']
+        results = async_to_sync(fan_out_media_group)(
+            self.bot, chats, self.photos, 'Сделка', cache=self.cache, limiter=limiter
+        )
+
+        self.assertEqual(results, dict.fromkeys(chats, True))
+        self.assertEqual(self.bot.uploaded, self.photos)
+        self.assertEqual([sources for _, sources in self.bot.calls[1:]],
+                         [['file-1', 'file-2', 'file-3']] * 3)
+        self.assertEqual(limiter.acquire.await_args_list, [mock.call(chat, 3) for chat in chats])
+
+    def test_rejected_file_id_is_reuploaded_once(self):
+        async_to_sync(send_media_group_cached)(self.bot, '-1', self.photos, cache=self.cache)
+        self.bot.reject_file_ids = 1
+
+        with self.assertLogs('bot.notifications', level='WARNING'):
+            async_to_sync(send_media_group_cached)(self.bot, '-2', self.photos, cache=self.cache)
+        async_to_sync(send_media_group_cached)(self.bot, '-3', self.photos, cache=self.cache)
+
+        self.assertEqual(self.bot.uploaded, self.photos * 2)
+        self.assertEqual([chat for chat, _ in self.bot.calls], ['-1', '-2', '-3'])
+        self.assertEqual(self.bot.calls[2][1], ['file-4', 'file-5', 'file-6'])
+
+    def test_rejection_without_cached_ids_is_not_retried(self):
+        self.bot.reject_file_ids = 1
+        with self.assertRaises(BadRequest):
+            async_to_sync(send_media_group_cached)(self.bot, '-1', ['https://example.com/a.jpg'], cache=self.cache)
+        self.assertEqual(self.bot.calls, [])
+
+
+class FakeBot:
+    """Bot без сети: считает initialize/shutdown"""
+
+    instances = []
+
+    def __init__(self, token, request=None, **kwargs):
+        self.initialized = False
+        self.initialize_calls = 0
+        self.shutdown_calls = 0
+        FakeBot.instances.append(self)
+
+    async def initialize(self):
+        if self.initialized:
+            return
+        await asyncio.sleep(0.01)  # get_me
+        self.initialize_calls += 1
+        self.initialized = True
+
+    async def shutdown(self):
+        self.shutdown_calls += 1
+        self.initialized = False
+
+
+class TelegramClientFactoryTests(SimpleTestCase):
+    """📡 Один Bot на loop: инициализируется один раз и закрывается вместе с loop'ом"""
+
+    def setUp(self):
+        FakeBot.instances = []
+        self.factory = TelegramClientFactory()
+        for target in ('Bot', '_build_request'):
+            patcher = mock.patch(f'shared.utils.telegram_client.{target}', FakeBot if target == 'Bot' else mock.Mock())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.factory.close)
+
+    def test_concurrent_first_use_initializes_once(self):
+        async def run():
+            return await asyncio.gather(*(self.factory.get_bot('token') for _ in range(5)))
+
+        bots = asyncio.run(run())
+        self.assertEqual(len({id(bot) for bot in bots}), 1)
+        self.assertEqual(bots[0].initialize_calls, 1)
+
+    def test_bot_is_shut_down_with_its_loop(self):
+        asyncio.run(self.factory.get_bot('token'))
+        async_to_sync(self.factory.get_bot)('token')
+
+        self.assertEqual(len(FakeBot.instances), 2)
+        self.assertEqual([bot.shutdown_calls for bot in FakeBot.instances], [1, 1])
+        self.assertEqual(self.factory._clients, {})
+
+    def test_explicit_close_then_loop_end(self):
+        async def run():
+            await self.factory.get_bot('token')
+            await self.factory.aclose()
+            return await self.factory.get_bot('token')
+
+        bot = asyncio.run(run())
+        first, second = FakeBot.instances
+        self.assertIs(bot, second)
+        self.assertEqual((first.shutdown_calls, second.shutdown_calls), (1, 1))
+        self.assertEqual(self.factory._clients, {})
+
+    def test_sync_callers_share_background_bot(self):
+        bots = [self.factory.run_sync(lambda bot: asyncio.sleep(0, bot), 'token') for _ in range(3)]
+        self.assertEqual(len({id(bot) for bot in bots}), 1)
+        self.factory.close()
+        self.assertEqual(bots[0].shutdown_calls, 1)
+
+
+class FakeBotAPI(ThreadingHTTPServer):
+    """Локальный Bot API: отвечает на getMe/sendMessage и считает TCP-соединения"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeBotAPIHandler)
+        self.connections = 0
+        self.requests = 0
+        self.count_lock = threading.Lock()
+
+    def get_request(self):
+        request = super().get_request()
+        with self.count_lock:
+            self.connections += 1
+        return request
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/bot'
+
+
+class FakeBotAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive: соединение живёт между запросами
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.count_lock:
+            self.server.requests += 1
+            number = self.server.requests
+
+        if self.path.endswith('/getMe'):
+            result = {'id': 1, 'is_bot': True, 'first_name': 'bot', 'username': 'bot'}
+        else:
+            result = {'message_id': number, 'date': 0, 'chat': {'id': 1, 'type': 'private'}, 'text': 'ok'}
+        body = json.dumps({'ok': True, 'result': result}).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TelegramClientConnectionTests(SimpleTestCase):
+    """📡 100 сообщений через общий Bot — соединения переиспользуются, а не открываются на каждое"""
+
+    def setUp(self):
+        self.server = FakeBotAPI()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.factory = TelegramClientFactory(base_url=self.server.base_url)
+        self.addCleanup(self.factory.close)
+
+    def send(self, count, concurrent=False):
+        async def run():
+            bot = await self.factory.get_bot('123:token')
+            sends = [bot.send_message(chat_id=1, text=f'message {index}') for index in range(count)]
+            if concurrent:
+                await asyncio.gather(*sends)
+            else:
+                for send in sends:
+                    await send
+
+        asyncio.run(run())
+
+    def test_sequential_messages_share_one_connection(self):
+        self.send(100)
+        self.assertEqual(self.server.requests, 101)  # getMe + 100 sendMessage
+        self.assertEqual(self.server.connections, 1)
+
+    def test_concurrent_messages_stay_within_pool(self):
+        self.send(100, concurrent=True)
+        self.assertEqual(self.server.requests, 101)
+        self.assertLessEqual(self.server.connections, CONNECTION_POOL_SIZE)
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
+    'django.contrib.postgres',
 
     # Сторонние приложения
     'rest_framework',
@@ -144,6 +145,12 @@ NOTIFICATIONS_CONFIG = {
 BACKUP_DIR = BASE_DIR / 'database_backups'
 MAX_BACKUP_DAYS = 7
 
+# Месячные партиции FoundItem старше срока уходят в архив (archive_found_items,
+# ежедневно в 03:30), избранное остаётся в базе. None — хранить всё (история
+# цен и обучение ML); включать осознанно, например 12
+FOUND_ITEM_RETENTION_MONTHS = None
+FOUND_ITEM_ARCHIVE_DIR = BACKUP_DIR / 'found_items'
+
 # ============================================
 # ВАЛИДАТОРЫ ПАРОЛЕЙ
 # ============================================
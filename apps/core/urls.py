@@ -21,6 +21,7 @@ def safe_console_log(message):
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('apps.website.urls')),  # Django сам возьмет namespace из app_name
+    path('notifications/', include('apps.notifications.urls')),  # SSE toast-уведомлений
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
 ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:48
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=100, verbose_name='Канал')),
+                ('event', models.CharField(max_length=50, verbose_name='Тип события')),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Данные')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Создано')),
+            ],
+            options={
+                'verbose_name': 'Push-событие',
+                'verbose_name_plural': 'Push-события',
+                'indexes': [models.Index(fields=['channel', 'id'], name='pushevent_channel_id')],
+            },
+        ),
+    ]
@@ -1,3 +1,31 @@
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
+
+
+class PushEvent(models.Model):
+    """Событие push-канала (toast, новый товар, строка консоли) для SSE-подписчиков"""
+    channel = models.CharField(max_length=100, verbose_name="Канал")
+    event = models.CharField(max_length=50, verbose_name="Тип события")
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder, verbose_name="Данные")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Создано")
+
+    TTL_HOURS = 1  # Столько подписчик может пробыть офлайн и догнать пропущенное
+
+    class Meta:
+        verbose_name = "Push-событие"
+        verbose_name_plural = "Push-события"
+        indexes = [
+            models.Index(fields=['channel', 'id'], name='pushevent_channel_id'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.channel}: {self.event}"
 
-# Create your models here.
+    @classmethod
+    def clean_expired(cls):
+        """Удаляет события старше TTL_HOURS, возвращает их число"""
+        deleted, _ = cls.objects.filter(created_at__lt=timezone.now() - timedelta(hours=cls.TTL_HOURS)).delete()
+        return deleted
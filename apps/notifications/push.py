@@ -0,0 +1,229 @@
+# notifications/push.py
+"""
+Push-канал для toast-уведомлений, новых товаров и строк консоли.
+
+События лежат в таблице PushEvent (PostgreSQL — одна на сайт, парсер и
+бота), о новых подписчики узнают через LISTEN/NOTIFY. Страница
+подписывается один раз через Server-Sent Events (views.event_stream_response):
+
+    push_channel.publish(push_channel.user_channel(user), 'toast', toast_data)
+    push_channel.publish_many([(channel, 'found_item', row), ...])
+
+    subscription = push_channel.subscribe(channels, last_event_id)
+    events = subscription.get(timeout)   # без запросов к БД
+    subscription.close()
+
+- publish пишет после коммита текущей транзакции, под
+  pg_advisory_xact_lock: id выдаются и становятся видны строго по
+  возрастанию, поэтому читатель, запомнивший last_id, не проскочит
+  событие, которое ещё не закоммичено;
+- в процессе один поток-слушатель держит LISTEN на своём соединении,
+  дочитывает новые строки одним запросом и раздаёт их только подписчикам
+  нужных каналов: SSE-потоки не ходят в базу и не будят друг друга;
+- у анонимного посетителя канала нет (user_channel -> None).
+"""
+
+import logging
+import select
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'push_events'
+PUBLISH_LOCK_KEY = 704001  # pg_advisory_xact_lock: публикации идут по одной
+EVENT_FIELDS = ('id', 'channel', 'event', 'data')
+
+
+class Subscription:
+    """События выбранных каналов для одного SSE-потока"""
+
+    BUFFER_SIZE = 200  # Недочитанных событий; медленный клиент теряет самые старые
+
+    def __init__(self, push, channels, last_id=None):
+        self.push = push
+        self.channels = frozenset(channels)
+        self.last_id = last_id
+        self._events = deque(maxlen=self.BUFFER_SIZE)
+        self._ready = threading.Event()
+
+    def deliver(self, events):
+        """Вызывается слушателем (и subscribe — для пропущенных)"""
+        if events:
+            self._events.extend(events)
+            self._ready.set()
+
+    def get(self, timeout):
+        """Новые события (id > last_id) по возрастанию id; ждёт не дольше timeout"""
+        self._ready.wait(timeout)
+        self._ready.clear()
+        received = []
+        while self._events:
+            received.append(self._events.popleft())
+
+        events = []
+        for event in sorted(received, key=lambda event: event['id']):
+            if self.last_id is None or event['id'] > self.last_id:
+                events.append(event)
+                self.last_id = event['id']
+        return events
+
+    def close(self):
+        self.push.unsubscribe(self)
+
+
+class PushChannel:
+    """Каналы событий в PostgreSQL со сквозной нумерацией"""
+
+    REPLAY_SECONDS = 60  # Что показать странице, открытой без Last-Event-ID
+    REPLAY_LIMIT = 200  # Пропущенных событий, догружаемых при подключении
+    LISTEN_TIMEOUT = 5.0  # Секунд между проверками, остались ли подписчики
+    RECONNECT_DELAY = 5.0  # Пауза слушателя после ошибки соединения
+    DISPATCH_LIMIT = 1000  # Строк за один запрос слушателя
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._listener = None
+        self._listen_from = 0
+
+    @staticmethod
+    def user_channel(user):
+        if user is not None and getattr(user, 'is_authenticated', False):
+            return f'user:{user.id}'
+        return None
+
+    # ============================================
+    # ПУБЛИКАЦИЯ
+    # ============================================
+
+    def publish(self, channel, event, data):
+        """Добавляет событие в канал (после коммита текущей транзакции)"""
+        self.publish_many([(channel, event, data)])
+
+    def publish_many(self, events):
+        """[(канал, тип, данные)] одним INSERT; события без канала пропускаются"""
+        events = [(channel, event, data) for channel, event, data in events if channel]
+        if events:
+            # Вне запроса выполняется сразу; в ATOMIC_REQUESTS — не держит блокировку до конца запроса
+            transaction.on_commit(lambda: self._insert(events), robust=True)
+
+    @staticmethod
+    def _insert(events):
+        from .models import PushEvent
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [PUBLISH_LOCK_KEY])
+            PushEvent.objects.bulk_create([
+                PushEvent(channel=channel, event=event, data=data) for channel, event, data in events
+            ])
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, ''])
+
+    # ============================================
+    # ПОДПИСКА
+    # ============================================
+
+    def subscribe(self, channels, last_id=None):
+        """Подписка на каналы; пропущенное после last_id догружается сразу (один запрос)"""
+        subscription = Subscription(self, channels, last_id)
+        with self._lock:
+            self._subscribers.add(subscription)
+            listener = None
+            if self._listener is None:
+                listener = self._listener = threading.Thread(target=self._listen, name='push-listener', daemon=True)
+
+        if listener is not None:
+            # Граница — до догрузки: всё, что новее, слушатель дочитает сам
+            self._listen_from = self._latest_id()
+            listener.start()
+
+        subscription.deliver(self._missed(subscription.channels, last_id))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @staticmethod
+    def _latest_id():
+        from .models import PushEvent
+        return PushEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _missed(self, channels, last_id):
+        from .models import PushEvent
+
+        events = PushEvent.objects.filter(channel__in=channels)
+        if last_id is None:
+            events = events.filter(created_at__gte=timezone.now() - timedelta(seconds=self.REPLAY_SECONDS))
+        else:
+            events = events.filter(id__gt=last_id)
+        return list(events.order_by('-id').values(*EVENT_FIELDS)[:self.REPLAY_LIMIT])[::-1]
+
+    # ============================================
+    # СЛУШАТЕЛЬ (один поток на процесс, пока есть подписчики)
+    # ============================================
+
+    def _listen(self):
+        last_seen = self._listen_from
+        try:
+            while True:
+                try:
+                    connection.ensure_connection()
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                    raw = connection.connection
+
+                    # NOTIFY, пришедшие до LISTEN, не доходят — дочитываем сразу
+                    last_seen = self._dispatch(last_seen)
+                    while True:
+                        if select.select([raw], [], [], self.LISTEN_TIMEOUT)[0]:
+                            raw.poll()
+                            raw.notifies.clear()
+                            last_seen = self._dispatch(last_seen)
+                        if self._stop_if_idle():
+                            return
+                except Exception as e:
+                    logger.warning(f"⚠️ Push-канал: слушатель переподключается: {e}")
+                    connection.close()
+                    time.sleep(self.RECONNECT_DELAY)
+                    if self._stop_if_idle():
+                        return
+        finally:
+            connection.close()
+
+    def _stop_if_idle(self):
+        with self._lock:
+            if self._subscribers:
+                return False
+            self._listener = None
+            return True
+
+    def _dispatch(self, last_seen):
+        """Новые строки после last_seen — подписчикам их каналов; возвращает новый last_seen"""
+        from .models import PushEvent
+
+        while True:
+            events = list(
+                PushEvent.objects.filter(id__gt=last_seen).order_by('id').values(*EVENT_FIELDS)[:self.DISPATCH_LIMIT]
+            )
+            if not events:
+                return last_seen
+            last_seen = events[-1]['id']
+
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscription in subscribers:
+                subscription.deliver([event for event in events if event['channel'] in subscription.channels])
+
+            if len(events) < self.DISPATCH_LIMIT:
+                return last_seen
+
+
+push_channel = PushChannel()
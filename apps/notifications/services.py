@@ -2,6 +2,8 @@
 from django.contrib import messages
 from django.utils import timezone
 
+from .push import push_channel
+
 
 class ToastNotificationSystem:
 
@@ -40,21 +42,14 @@ class ToastNotificationSystem:
             'timestamp': timezone.now().isoformat()
         }
 
-        if hasattr(request, 'session'):
-            try:
-                session_key = cls._get_session_key(request)
-                if session_key not in request.session:
-                    request.session[session_key] = []
+        toast_data.update(kwargs)  # position, timeOut, template и т.п. от вызывающего
 
-                notifications = request.session[session_key]
-                if len(notifications) >= 10:
-                    notifications.pop(0)
-
-                notifications.append(toast_data)
-                request.session[session_key] = notifications
-                request.session.modified = True
-            except:
-                pass
+        # Push-канал вместо сессии: страница получает toast по SSE (views.toast_stream).
+        # Анонимному канала нет — ему остаются Django messages
+        try:
+            push_channel.publish(push_channel.user_channel(getattr(request, 'user', None)), 'toast', toast_data)
+        except Exception:
+            pass
 
         # Django messages
         full_message = f"{title}: {message}" if title else message
@@ -71,6 +66,7 @@ class ToastNotificationSystem:
 
     @classmethod
     def get_all(cls, request):
+        """Toast'ы, оставшиеся в сессии со старой схемы (новые идут через push_channel)"""
         if hasattr(request, 'session'):
             try:
                 session_key = cls._get_session_key(request)
@@ -1,3 +1,109 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase
+
+from .models import PushEvent
+from .push import PushChannel, push_channel
+from .views import toast_stream
+
+
+class AnonymousStreamTests(TestCase):
+    """🙈 Анонимный посетитель не получает чужих toast'ов"""
+
+    def test_anonymous_user_has_no_channel(self):
+        self.assertIsNone(push_channel.user_channel(AnonymousUser()))
+        self.assertIsNone(push_channel.user_channel(None))
+
+    def test_anonymous_stream_is_empty(self):
+        request = RequestFactory().get('/notifications/stream/')
+        request.user = AnonymousUser()
+        self.assertEqual(toast_stream(request).status_code, 204)
+
+    def test_publish_without_channel_is_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            push_channel.publish(push_channel.user_channel(AnonymousUser()), 'toast', {'message': 'x'})
+        self.assertFalse(PushEvent.objects.exists())
+
+    def test_user_channel(self):
+        user = User.objects.create_user('push')
+        self.assertEqual(push_channel.user_channel(user), f'user:{user.id}')
+
+
+class PushChannelTests(TransactionTestCase):
+    """📡 События доходят по порядку, без пропусков и только своим подписчикам"""
+
+    WAIT = 10.0
+
+    def setUp(self):
+        self.push = PushChannel()
+        self.push.LISTEN_TIMEOUT = 0.1
+        self.subscriptions = []
+
+    def tearDown(self):
+        for subscription in self.subscriptions:
+            subscription.close()
+        listener = self.push._listener
+        if listener is not None:
+            listener.join(self.WAIT)
+
+    def subscribe(self, channels, last_id=None):
+        subscription = self.push.subscribe(channels, last_id)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def collect(self, subscription, count):
+        events = []
+        deadline = time.monotonic() + self.WAIT
+        while len(events) < count and time.monotonic() < deadline:
+            events.extend(subscription.get(0.2))
+        return events
+
+    def test_concurrent_publishers_are_seen_in_order(self):
+        subscription = self.subscribe(['user:1'])
+        publishers, per_thread = 4, 25
+
+        def publish(number):
+            try:
+                for index in range(per_thread):
+                    self.push.publish('user:1', 'toast', {'publisher': number, 'index': index})
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=publish, args=(number,)) for number in range(publishers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        events = self.collect(subscription, publishers * per_thread)
+        ids = [event['id'] for event in events]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(ids, list(PushEvent.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_subscriber_gets_only_its_channels(self):
+        mine = self.subscribe(['user:1'])
+        other = self.subscribe(['user:2'])
+        self.push.publish_many([('user:2', 'toast', {'n': 1}), ('user:1', 'toast', {'n': 2})])
+
+        self.assertEqual([event['data'] for event in self.collect(mine, 1)], [{'n': 2}])
+        self.assertEqual([event['data'] for event in self.collect(other, 1)], [{'n': 1}])
+        self.assertEqual(mine.get(0.3), [])
+
+    def test_missed_events_are_replayed_after_last_id(self):
+        self.push.publish('user:1', 'toast', {'n': 1})
+        seen = PushEvent.objects.get().id
+        self.push.publish_many([('user:1', 'toast', {'n': 2}), ('user:1', 'toast', {'n': 3})])
+
+        subscription = self.subscribe(['user:1'], last_id=seen)
+        self.assertEqual([event['data']['n'] for event in self.collect(subscription, 2)], [2, 3])
+
+    def test_listener_stops_without_subscribers(self):
+        subscription = self.subscribe(['user:1'])
+        listener = self.push._listener
+        subscription.close()
+        listener.join(self.WAIT)
+        self.assertFalse(listener.is_alive())
+        self.assertIsNone(self.push._listener)
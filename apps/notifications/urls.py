@@ -0,0 +1,10 @@
+# notifications/urls.py
+from django.urls import path
+
+from . import views
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('stream/', views.toast_stream, name='toast_stream'),
+]
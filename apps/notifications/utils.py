@@ -1,71 +1,9 @@
-from apps.website.models import NotificationCache
 from apps.notifications.services import ToastNotificationSystem
-from django.utils import timezone
 
 
 class NotificationCacheManager:
     """Менеджер для работы с кэшем уведомлений и toast"""
 
-    @staticmethod
-    def notify_new_product(request, product_data):
-        """
-        Уведомление о новом товаре с проверкой на дубликаты
-
-        Args:
-            request: HttpRequest объект
-            product_data: словарь с данными товара
-                {
-                    'product_id': str,
-                    'normalized_url': str,
-                    'product_name': str,
-                    'price': str,
-                    'location': str,
-                    'category': str
-                }
-        """
-        # Проверяем на дубликат
-        is_duplicate = NotificationCache.is_duplicate(
-            product_data['product_id'],
-            product_data['normalized_url']
-        )
-
-        if not is_duplicate:
-            # Добавляем в кэш
-            NotificationCache.add_to_cache(
-                product_data['product_id'],
-                product_data['normalized_url'],
-                product_data['product_name']
-            )
-
-            # Формируем сообщение для toast
-            message = f"""
-            <div class="toast-product-notification">
-                <div class="toast-product-name">{product_data['product_name']}</div>
-                <div class="toast-product-price">💰 {product_data.get('price', 'Цена не указана')}</div>
-                <div class="toast-product-location">📍 {product_data.get('location', 'Местоположение не указано')}</div>
-                <div class="toast-product-category">🏷️ {product_data.get('category', 'Категория не указана')}</div>
-                <button class="toast-view-button" onclick="window.open('{product_data['normalized_url']}', '_blank')">
-                    Посмотреть товар
-                </button>
-            </div>
-            """
-
-            # Показываем toast уведомление
-            ToastNotificationSystem.success(
-                request,
-                message,
-                'Новый товар найден!',
-                position='toast-top-right',
-                timeOut=8000,
-                progressBar=True,
-                closeButton=True,
-                template='materialize'  # Используем новый стиль
-            )
-
-            return True
-
-        return False
-
     @staticmethod
     def notify_parser_status(request, status_data):
         """
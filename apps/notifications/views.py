@@ -1,3 +1,72 @@
-from django.shortcuts import render
+# notifications/views.py
+import json
+import time
 
-# Create your views here.
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .push import push_channel
+
+STREAM_DURATION = 55  # Секунд держим соединение, дальше EventSource переподключается сам
+KEEPALIVE_INTERVAL = 15  # Комментарий-пинг, чтобы прокси не рвали тишину
+RETRY_MS = 2000
+
+
+def _parse_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_event(event):
+    data = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+def event_stream_response(request, channels, duration=None):
+    """SSE-ответ с событиями каналов push_channel
+
+    Возобновление — по заголовку Last-Event-ID (EventSource шлёт его сам)
+    или параметру ?last_event_id= (страница хранит его между переходами).
+    Пропущенное догружается одним запросом здесь; дальше поток ждёт в
+    памяти процесса и соединение с БД не держит.
+    """
+    last_id = _parse_event_id(request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('last_event_id'))
+    duration = duration or STREAM_DURATION
+    subscription = push_channel.subscribe(channels, last_id)
+
+    def stream():
+        # Соединение, открытое middleware (сессия, пользователь), — обратно в PostgreSQL
+        connection.close()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+
+            started = last_ping = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if now - started >= duration:
+                    return
+                if now - last_ping >= KEEPALIVE_INTERVAL:
+                    last_ping = now
+                    yield ": ping\n\n"
+
+                # Будит только событие своих каналов (или пора слать пинг / закрываться)
+                timeout = min(KEEPALIVE_INTERVAL - (now - last_ping), duration - (now - started))
+                for event in subscription.get(max(timeout, 0)):
+                    yield _format_event(event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: не буферизовать поток
+    return response
+
+
+def toast_stream(request):
+    """SSE: toast'ы пользователя; анонимному — 204 (EventSource не переподключается)"""
+    channel = push_channel.user_channel(getattr(request, 'user', None))
+    if channel is None:
+        return HttpResponse(status=204)
+    return event_stream_response(request, [channel])
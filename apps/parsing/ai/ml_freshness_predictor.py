@@ -27,7 +27,7 @@ class MLFreshnessPredictor:
 
     @model.setter
     def model(self, value):
-        if value:
+        if value is not None:
             model_type = type(value).__name__
             logger.info(f"✅ Модель установлена: {model_type}")  # ЗДЕСЬ ИСПРАВЛЕНО
 
@@ -79,7 +79,7 @@ class MLFreshnessPredictor:
             logger.error(f"❌ Ошибка инициализации модели свежести: {e}")
             return False
 
-    async def train(self, training_data=None):
+    async def train(self, training_data=None, save=True):
         """🎯 Обучение модели свежести"""
         try:
             if training_data is None:
@@ -100,6 +100,8 @@ class MLFreshnessPredictor:
                 return False
 
             # Масштабирование и обучение
+            if self.scaler is None:
+                self.scaler = StandardScaler()
             X_scaled = self.scaler.fit_transform(X)
 
             # 🔥 ВОЗМОЖНОСТЬ СОЗДАТЬ VotingRegressor для тестирования
@@ -129,7 +131,8 @@ class MLFreshnessPredictor:
             train_score = self.model.score(X_scaled, y)
             logger.info(f"🚀 Модель свежести обучена! Точность: {train_score:.3f}, Данных: {len(X)}")
 
-            await self._save_model()
+            if save:
+                await self._save_model()
             return True
 
         except Exception as e:
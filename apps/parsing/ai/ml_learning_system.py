@@ -6,7 +6,6 @@
 import logging
 import numpy as np
 import asyncio
-import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 from collections import defaultdict, deque
@@ -14,12 +13,34 @@ import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 
+from ..utils.state_store import BinaryStateStore, load_legacy_json
+
 logger = logging.getLogger('parser.ai.learning')
 
 
 class MLLearningSystem:
     """🧠 МОЗГ СИСТЕМЫ - УМНАЯ ОБУЧАЮЩАЯСЯ СИСТЕМА"""
 
+    # 🔥 ПОТОКОВАЯ ЗАГРУЗКА ИЗ БАЗЫ
+    STREAM_CHUNK_SIZE = 2000
+    STREAM_FIELDS = (
+        'id', 'title', 'description', 'price', 'category',
+        'seller_rating', 'found_at', 'posted_date', 'ml_freshness_score'
+    )
+
+    # 🔥 ХРАНИЛИЩЕ СОСТОЯНИЯ
+    STATE_PATH = 'brain_state'
+    LEGACY_STATE_JSON = 'brain_state.json'
+    RECORD_SECTIONS = (
+        'freshness_patterns', 'successful_queries', 'category_insights',
+        'seller_patterns', 'price_trends'
+    )
+    # Разделы, которые считаются только из FoundItem (пересобираются при потере водяного знака)
+    DATABASE_SECTIONS = (
+        'freshness_patterns', 'timing_patterns', 'category_insights',
+        'seller_patterns', 'price_trends'
+    )
+
     def __init__(self, db_path="ml_knowledge.db"):
         self.db_path = db_path
         self.logger = logging.getLogger('parser.ai.learning')
@@ -37,6 +58,10 @@ class MLLearningSystem:
             'price_trends': defaultdict(list)
         }
 
+        # 🔥 ХРАНИЛИЩЕ СОСТОЯНИЯ (npz + SQLite)
+        self.state_store = BinaryStateStore(self.STATE_PATH)
+        self._changed_categories = set()  # Изменены с последнего сохранения (пишутся только они)
+
         # 🔥 ИСТОРИЯ ОБУЧЕНИЯ
         self.learning_history = deque(maxlen=10000)  # 10000 последних товаров
         self.found_items_history = set()  # Хэши уже обработанных товаров
@@ -47,6 +72,7 @@ class MLLearningSystem:
         self.fresh_items_found = 0
         self.successful_searches = 0
         self.avg_freshness_score = 0.0
+        self.last_learned_item_id = 0  # Водяной знак: последний обработанный FoundItem.id
 
         # 🔥 ФЛАГИ
         self.is_initialized = False
@@ -74,43 +100,28 @@ class MLLearningSystem:
             return default
 
     async def initialize_from_database(self):
-        """🚀 ИНИЦИАЛИЗАЦИЯ МОЗГА ИЗ ВСЕЙ БАЗЫ ДАННЫХ"""
+        """🚀 ИНИЦИАЛИЗАЦИЯ МОЗГА ИЗ БАЗЫ ДАННЫХ (ПОТОКОВО, ТОЛЬКО НОВЫЕ ТОВАРЫ)"""
         try:
-            from apps.website.models import FoundItem
             from asgiref.sync import sync_to_async
 
-            logger.info("🔍 Загрузка ВСЕХ знаний из базы данных...")
+            # 🔥 ПОДНИМАЕМ СОХРАНЁННЫЙ МОЗГ, ЧТОБЫ ЗНАТЬ ВОДЯНОЙ ЗНАК
+            if not self.is_initialized:
+                await self.load_brain_state()
 
-            # 🔥 БЕРЕМ ВСЕ ТОВАРЫ БЕЗ ОГРАНИЧЕНИЙ
-            all_items = await sync_to_async(list)(
-                FoundItem.objects.all().values(
-                    'title', 'description', 'price', 'category',
-                    'seller_rating', 'reviews_count', 'found_at',
-                    'posted_date', 'ml_freshness_score', 'priority_score',
-                    'views_count', 'images'
-                )
-            )
+            logger.info(f"🔍 Загрузка знаний из базы данных (после id={self.last_learned_item_id})...")
 
-            if not all_items:
+            processed = await sync_to_async(self._learn_from_database_sync)()
+
+            if processed == 0 and self.total_learned == 0:
                 logger.warning("⚠️ В базе нет данных для обучения мозга")
                 return False
 
-            total_items = len(all_items)
-            logger.info(f"📚 Загружено ВСЕГО {total_items} товаров для обучения мозга")
-
-            # 🔥 ОБУЧАЕМ МОЗГ НА ВСЕХ ТОВАРАХ
-            for i, item in enumerate(all_items, 1):
-                await self._deep_learn_from_item(item)
-                if i % 500 == 0:  # Логируем каждые 500 товаров
-                    logger.info(f"📖 Обучили {i}/{total_items} товаров ({i/total_items*100:.1f}%)")
-
             # 🔥 ОБУЧАЕМ МОДЕЛИ
             await self._train_freshness_detector()
 
             self.is_initialized = True
-            self.total_learned = total_items
 
-            logger.info(f"🧠 МОЗГ ОБУЧЕН НА {total_items} ТОВАРАХ!")
+            logger.info(f"🧠 МОЗГ ДООБУЧЕН НА {processed} НОВЫХ ТОВАРАХ (всего {self.total_learned})")
             logger.info(f"🎯 Найдено свежих товаров: {self.fresh_items_found}")
 
             # Сохраняем состояние
@@ -122,6 +133,194 @@ class MLLearningSystem:
             logger.error(f"❌ Ошибка инициализации мозга: {e}")
             return False
 
+    def _learn_from_database_sync(self):
+        """📚 Потоковое чтение FoundItem пачками после водяного знака"""
+        from apps.website.models import FoundItem
+
+        queryset = (
+            FoundItem.objects
+            .filter(id__gt=self.last_learned_item_id)
+            .order_by('id')
+            .values_list(*self.STREAM_FIELDS)
+            .iterator(chunk_size=self.STREAM_CHUNK_SIZE)
+        )
+
+        processed = 0
+        chunk = []
+        for row in queryset:
+            chunk.append(row)
+            if len(chunk) >= self.STREAM_CHUNK_SIZE:
+                processed += self._learn_from_chunk(chunk)
+                chunk = []
+                logger.info(f"📖 Обучили {processed} товаров (id <= {self.last_learned_item_id})")
+
+        if chunk:
+            processed += self._learn_from_chunk(chunk)
+
+        return processed
+
+    def _learn_from_chunk(self, rows):
+        """🧮 Векторная агрегация статистики по пачке строк"""
+        columns = dict(zip(self.STREAM_FIELDS, zip(*rows)))
+        count = len(rows)
+
+        freshness = np.array([self._safe_float(v) for v in columns['ml_freshness_score']], dtype=np.float64)
+        prices = np.array([self._safe_float(v) for v in columns['price']], dtype=np.float64)
+        ratings = np.array([self._safe_float(v) for v in columns['seller_rating']], dtype=np.float64)
+        categories = [str(v) if v is not None else 'unknown' for v in columns['category']]
+
+        names, codes = np.unique(np.array(categories, dtype=object), return_inverse=True)
+        n_cats = len(names)
+
+        cat_counts = np.bincount(codes, minlength=n_cats)
+        cat_freshness = np.bincount(codes, weights=freshness, minlength=n_cats)
+        priced = prices > 0
+        cat_price_sum = np.bincount(codes[priced], weights=prices[priced], minlength=n_cats)
+        cat_price_cnt = np.bincount(codes[priced], minlength=n_cats)
+        rated = ratings > 0
+        cat_rating_sum = np.bincount(codes[rated], weights=ratings[rated], minlength=n_cats)
+        cat_rating_cnt = np.bincount(codes[rated], minlength=n_cats)
+
+        hours = np.array([self._found_at(v).hour for v in columns['found_at']], dtype=np.int64)
+        weekdays = np.array([self._found_at(v).weekday() for v in columns['found_at']], dtype=np.int64)
+        hourly = np.bincount(codes * 24 + hours, minlength=n_cats * 24).reshape(n_cats, 24)
+        daily = np.bincount(codes * 7 + weekdays, minlength=n_cats * 7).reshape(n_cats, 7)
+
+        now_iso = datetime.now().isoformat()
+        self._changed_categories.update(names)
+        for idx, category in enumerate(names):
+            self._merge_category_stats(
+                category,
+                int(cat_counts[idx]),
+                float(cat_freshness[idx]),
+                float(cat_price_sum[idx]),
+                int(cat_price_cnt[idx]),
+                now_iso
+            )
+            self._merge_timing_stats(category, hourly[idx], daily[idx])
+            if cat_rating_cnt[idx]:
+                self._merge_seller_stats(category, float(cat_rating_sum[idx]), int(cat_rating_cnt[idx]))
+
+        self._append_chunk_patterns(columns, categories, freshness, prices, ratings, now_iso)
+
+        # 🔥 ОБНОВЛЯЕМ МЕТРИКИ
+        self.fresh_items_found += int(np.count_nonzero(freshness > 0.7))
+        total = self.total_learned + count
+        self.avg_freshness_score = (self.avg_freshness_score * self.total_learned + float(freshness.sum())) / total
+        self.total_learned = total
+        self.last_learned_item_id = int(max(columns['id']))
+
+        return count
+
+    def _found_at(self, value):
+        """Дата нахождения товара (строка, datetime или None)"""
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return datetime.now()
+        return value or datetime.now()
+
+    def _merge_category_stats(self, category, count, freshness_sum, price_sum, price_count, now_iso):
+        """Слияние агрегатов пачки в category_insights"""
+        insights = self.knowledge_base['category_insights'].setdefault(category, {
+            'total_items': 0,
+            'avg_freshness': 0.0,
+            'avg_price': 0.0,
+            'success_rate': 0.0,
+            'last_updated': now_iso
+        })
+
+        total = self._safe_int(insights['total_items'])
+        current_avg_freshness = self._safe_float(insights['avg_freshness'])
+        current_avg_price = self._safe_float(insights['avg_price'])
+
+        priced_total = self._safe_int(insights.get('priced_items', total))
+
+        insights['avg_freshness'] = (current_avg_freshness * total + freshness_sum) / (total + count)
+        if price_count:
+            insights['avg_price'] = (current_avg_price * priced_total + price_sum) / (priced_total + price_count)
+        insights['total_items'] = total + count
+        insights['priced_items'] = priced_total + price_count
+        insights['last_updated'] = now_iso
+
+    def _merge_timing_stats(self, category, hourly, daily):
+        """Слияние почасовых/подневных счётчиков пачки"""
+        pattern = self.knowledge_base['timing_patterns'].setdefault(category, {
+            'hourly_counts': [0] * 24,
+            'daily_counts': [0] * 7,
+            'best_hours': [],
+            'best_days': []
+        })
+
+        hourly_counts = (np.asarray(pattern['hourly_counts'], dtype=np.int64) + hourly).tolist()
+        daily_counts = (np.asarray(pattern['daily_counts'], dtype=np.int64) + daily).tolist()
+
+        pattern['hourly_counts'] = hourly_counts
+        pattern['daily_counts'] = daily_counts
+        pattern['best_hours'] = sorted(range(24), key=lambda h: hourly_counts[h], reverse=True)[:3]
+        pattern['best_days'] = sorted(range(7), key=lambda d: daily_counts[d], reverse=True)[:2]
+
+    def _merge_seller_stats(self, category, rating_sum, rating_count):
+        """Слияние рейтингов продавцов пачки"""
+        sellers = self.knowledge_base['seller_patterns'].setdefault(category, {
+            'total_sellers': 0,
+            'avg_rating': 0.0,
+            'top_sellers': []
+        })
+
+        current_avg = self._safe_float(sellers['avg_rating'])
+        total = self._safe_int(sellers['total_sellers'])
+
+        sellers['avg_rating'] = (current_avg * total + rating_sum) / (total + rating_count)
+        sellers['total_sellers'] = total + rating_count
+
+    def _append_chunk_patterns(self, columns, categories, freshness, prices, ratings, now_iso):
+        """Хвосты паттернов свежести и цен (только последние N на категорию)"""
+        freshness_patterns = self.knowledge_base['freshness_patterns']
+        price_trends = self.knowledge_base['price_trends']
+        now = datetime.now()
+
+        for i, category in enumerate(categories):
+            if prices[i] > 0:
+                price_trends.setdefault(category, []).append({
+                    'price': float(prices[i]),
+                    'timestamp': now_iso,
+                    'freshness': float(freshness[i])
+                })
+
+            posted_date = columns['posted_date'][i]
+            if not posted_date:
+                continue
+            if isinstance(posted_date, str):
+                try:
+                    posted_date = datetime.fromisoformat(posted_date.replace('Z', '+00:00'))
+                except ValueError:
+                    continue
+
+            try:
+                hours_ago = (now - posted_date).total_seconds() / 3600
+            except TypeError:
+                continue
+
+            title_lower = str(columns['title'][i] or '').lower()
+            desc_lower = str(columns['description'][i] or '').lower()
+
+            freshness_patterns.setdefault(category, []).append({
+                'hours_ago': hours_ago,
+                'freshness_score': float(freshness[i]),
+                'has_urgency': 'срочно' in title_lower or 'срочно' in desc_lower,
+                'is_new': 'новый' in title_lower or 'новый' in desc_lower,
+                'seller_type': 'Компания' if ratings[i] > 4.8 else 'Частное лицо'
+            })
+
+        # Ограничиваем размер
+        for category in set(categories):
+            if len(freshness_patterns.get(category, [])) > 1000:
+                freshness_patterns[category] = freshness_patterns[category][-1000:]
+            if len(price_trends.get(category, [])) > 500:
+                price_trends[category] = price_trends[category][-500:]
+
     async def _deep_learn_from_item(self, item):
         """🎯 ГЛУБОКОЕ ОБУЧЕНИЕ НА ОДНОМ ТОВАРЕ"""
         try:
@@ -144,6 +343,8 @@ class MLLearningSystem:
                 'price': self._safe_float(item.get('price', 0))
             }
 
+            self._changed_categories.add(insights['category'])
+
             # 🔥 АНАЛИЗ СВЕЖЕСТИ
             await self._analyze_freshness_patterns(item)
 
@@ -580,30 +781,34 @@ class MLLearningSystem:
             return {}
 
     async def _save_brain_state(self):
-        """💾 СОХРАНЕНИЕ СОСТОЯНИЯ МОЗГА"""
+        """💾 СОХРАНЕНИЕ СОСТОЯНИЯ МОЗГА (только изменения, бинарно)"""
         try:
-            def convert_for_json(obj):
-                """Конвертация для JSON"""
-                if isinstance(obj, (dict, list, tuple, str, int, bool, type(None), float)):
-                    return obj
-                elif hasattr(obj, '__dict__'):
-                    return obj.__dict__
-                else:
-                    return str(obj)
-
-            state = {
-                'knowledge_base': self.knowledge_base,
-                'stats': {
-                    'total_learned': self.total_learned,
-                    'fresh_items_found': self.fresh_items_found,
-                    'avg_freshness_score': float(self.avg_freshness_score),
-                    'successful_searches': self.successful_searches
-                },
+            timing = self.knowledge_base['timing_patterns']
+            counters = {
+                'hourly_counts': {category: p['hourly_counts'] for category, p in timing.items()},
+                'daily_counts': {category: p['daily_counts'] for category, p in timing.items()},
+            }
+
+            records = {
+                section: dict(self.knowledge_base[section])
+                for section in self.RECORD_SECTIONS
+            }
+            records['stats'] = {
+                'total_learned': self.total_learned,
+                'fresh_items_found': self.fresh_items_found,
+                'avg_freshness_score': float(self.avg_freshness_score),
+                'successful_searches': self.successful_searches,
+                'last_learned_item_id': self.last_learned_item_id,
                 'last_saved': datetime.now().isoformat()
             }
 
-            with open('brain_state.json', 'w', encoding='utf-8') as f:
-                json.dump(state, f, default=convert_for_json, ensure_ascii=False, indent=2)
+            changed = {
+                section: self._changed_categories
+                for section in (*self.RECORD_SECTIONS, 'hourly_counts', 'daily_counts')
+            }
+            changed['stats'] = records['stats'].keys()
+            self.state_store.save(counters, records, changed)
+            self._changed_categories = set()
 
             logger.info("💾 Состояние мозга сохранено")
 
@@ -613,29 +818,81 @@ class MLLearningSystem:
     async def load_brain_state(self):
         """📂 ЗАГРУЗКА СОСТОЯНИЯ МОЗГА"""
         try:
-            with open('brain_state.json', 'r', encoding='utf-8') as f:
-                state = json.load(f)
+            if self.state_store.exists():
+                counters, records = self.state_store.load()
+            else:
+                legacy = load_legacy_json(self.LEGACY_STATE_JSON)
+                if legacy is None:
+                    logger.info("🧠 Мозг не найден, будет создан новый")
+                    return False
+                counters, records = self._split_legacy_state(legacy)
 
-            self.knowledge_base = defaultdict(list, state.get('knowledge_base', {}))
+            self._apply_brain_state(counters, records)
 
-            stats = state.get('stats', {})
-            self.total_learned = self._safe_int(stats.get('total_learned', 0))
-            self.fresh_items_found = self._safe_int(stats.get('fresh_items_found', 0))
-            self.avg_freshness_score = self._safe_float(stats.get('avg_freshness_score', 0))
-            self.successful_searches = self._safe_int(stats.get('successful_searches', 0))
+            if not self.state_store.exists():
+                await self._save_brain_state()
 
             self.is_initialized = True
             logger.info(f"🧠 Мозг загружен: {self.total_learned} знаний")
 
             return True
 
-        except FileNotFoundError:
-            logger.info("🧠 Мозг не найден, будет создан новый")
-            return False
         except Exception as e:
             logger.error(f"❌ Ошибка загрузки мозга: {e}")
             return False
 
+    def _apply_brain_state(self, counters, records):
+        """Раскладывает загруженные счётчики и записи по базе знаний"""
+        for section in self.RECORD_SECTIONS:
+            self.knowledge_base[section].update(records.get(section, {}))
+
+        hourly_counts = counters.get('hourly_counts', {})
+        daily_counts = counters.get('daily_counts', {})
+        for category in set(hourly_counts) | set(daily_counts):
+            hourly = [int(v) for v in hourly_counts.get(category, [0] * 24)]
+            daily = [int(v) for v in daily_counts.get(category, [0] * 7)]
+            self.knowledge_base['timing_patterns'][category] = {
+                'hourly_counts': hourly,
+                'daily_counts': daily,
+                'best_hours': sorted(range(24), key=lambda h: hourly[h], reverse=True)[:3],
+                'best_days': sorted(range(7), key=lambda d: daily[d], reverse=True)[:2]
+            }
+
+        stats = records.get('stats', {})
+        self.total_learned = self._safe_int(stats.get('total_learned', 0))
+        self.fresh_items_found = self._safe_int(stats.get('fresh_items_found', 0))
+        self.avg_freshness_score = self._safe_float(stats.get('avg_freshness_score', 0))
+        self.successful_searches = self._safe_int(stats.get('successful_searches', 0))
+        self.last_learned_item_id = self._safe_int(stats.get('last_learned_item_id', 0))
+
+        if not self.last_learned_item_id and self.total_learned:
+            # Старый мозг (brain_state.json) без водяного знака: какие товары уже учтены,
+            # неизвестно — статистику по базе пересобираем с нуля, иначе посчитаем их дважды
+            logger.info(f"🧠 В сохранённом мозге нет водяного знака — пересобираем {self.total_learned} знаний из базы")
+            self._reset_database_knowledge()
+
+    def _reset_database_knowledge(self):
+        """Забывает всё, что посчитано из FoundItem (следующая загрузка — с id=0)"""
+        for section in self.DATABASE_SECTIONS:
+            self.knowledge_base[section].clear()
+        self.total_learned = 0
+        self.fresh_items_found = 0
+        self.avg_freshness_score = 0.0
+        self.last_learned_item_id = 0
+
+    def _split_legacy_state(self, state):
+        """Старый brain_state.json -> (counters, records)"""
+        knowledge = state.get('knowledge_base', {})
+        timing = knowledge.get('timing_patterns', {})
+
+        counters = {
+            'hourly_counts': {category: p.get('hourly_counts', [0] * 24) for category, p in timing.items()},
+            'daily_counts': {category: p.get('daily_counts', [0] * 7) for category, p in timing.items()},
+        }
+        records = {section: knowledge.get(section, {}) for section in self.RECORD_SECTIONS}
+        records['stats'] = state.get('stats', {})
+        return counters, records
+
     async def analyze_database(self):
         """📊 АНАЛИЗ ВСЕЙ БАЗЫ ДАННЫХ"""
         try:
@@ -7,18 +7,27 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List, Tuple
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, VotingRegressor
 from sklearn.preprocessing import StandardScaler, RobustScaler
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.feature_selection import SelectKBest, f_regression
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 import warnings
 
+from ..utils.text_matcher import get_matcher
+from .training_pool import TrainingBudget, TrainingPool
+
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger('parser.ai')
 
 
 class MLPricePredictor:
+    # Версия расчёта фич: модели, сохранённые с другой версией, не загружаются и обучаются заново.
+    # 2 — текстовые фичи считает KeywordMatcher (целые слова, словоформы)
+    FEATURE_VERSION = 2
+    PRICE_MODEL_INFO = 'apps/parsing/ai/ml_models/ultra_price_model_info.json'
+    FRESHNESS_MODEL_INFO = 'apps/parsing/ai/ml_models/ultra_freshness_model_info.json'
+
     def __init__(self, db_path="ml_knowledge.db"):
         self.model_version = "v3.0_ultra_smart"
         self.db_path = db_path
@@ -46,6 +55,17 @@ class MLPricePredictor:
             'model_update_frequency': 100
         }
 
+        # 🔥 БЮДЖЕТ CPU НА ОБУЧЕНИЕ (парсер обновляет из ParserSettings)
+        self.training_budget = TrainingBudget()
+
+        # Сетка для successive halving (training_budget.successive_halving)
+        self.price_param_grid = {
+            'rf__max_depth': [15, 30, None],
+            'rf__min_samples_leaf': [1, 3],
+            'gb__max_depth': [5, 15],
+            'gb__learning_rate': [0.05, 0.1],
+        }
+
         # 🔥 ИНИЦИАЛИЗАЦИЯ ПАТТЕРНОВ
         self._initialize_patterns()
 
@@ -136,6 +156,12 @@ class MLPricePredictor:
             'new_keywords': ['новый', 'не использовался', 'с гарантией', 'оригинал']
         }
 
+        # 🔤 Все словари текста компилируются в один матчер (один проход по тексту)
+        self.keyword_matcher = get_matcher({
+            **self.freshness_indicators,
+            **{f'condition_{name}': data['keywords'] for name, data in self.condition_keywords.items()},
+        })
+
     async def initialize_all_models(self):
         """🚀 ИНИЦИАЛИЗАЦИЯ ВСЕХ МОДЕЛЕЙ СРАЗУ"""
         try:
@@ -182,6 +208,15 @@ class MLPricePredictor:
                 ).order_by('-found_at')[:self.config['max_training_samples']]
             )
 
+            return await self.train_price_model_on_items(items)
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки данных для модели цены: {e}")
+            return await self._train_fallback_price_model()
+
+    async def train_price_model_on_items(self, items, save=True):
+        """🎯 ОБУЧЕНИЕ МОДЕЛИ ЦЕНЫ НА ГОТОВОМ НАБОРЕ ТОВАРОВ (dict как из .values())"""
+        try:
             total_items = len(items)
             logger.info(f"📚 Загружено {total_items} товаров для обучения цены")
 
@@ -254,21 +289,27 @@ class MLPricePredictor:
             )
 
             # 🔥 АНСАМБЛЬ
-            self.price_model = VotingRegressor([
+            ensemble = VotingRegressor([
                 ('rf', rf_model),
                 ('gb', gb_model)
             ])
 
-            # Кросс-валидация
-            cv_scores = cross_val_score(
-                self.price_model, X_train_scaled, y_train,
-                cv=min(3, len(X_train) // 100),
-                scoring='r2',
-                n_jobs=-1
-            )
+            # 🔥 КВ, ПОДБОР ПАРАМЕТРОВ И ОБУЧЕНИЕ — В ОТДЕЛЬНОМ ПУЛЕ ПРОЦЕССОВ В ПРЕДЕЛАХ БЮДЖЕТА CPU
+            cv = max(2, min(3, len(X_train) // 100))
+            async with TrainingPool(self.training_budget) as pool:
+                if self.training_budget.successive_halving:
+                    best_params, _ = await pool.successive_halving(
+                        ensemble, self.price_param_grid, X_train_scaled, y_train, cv=cv
+                    )
+                    ensemble.set_params(**best_params)
+                    logger.info(f"🪜 Лучшие параметры модели цены: {best_params}")
+
+                # Кросс-валидация
+                cv_scores = await pool.cross_val_score(ensemble, X_train_scaled, y_train, cv=cv, scoring='r2')
 
-            # Финальное обучение
-            self.price_model.fit(X_train_scaled, y_train)
+                # Финальное обучение
+                self.price_model = await pool.fit(ensemble, X_train_scaled, y_train)
+                rf_model = self.price_model.named_estimators_['rf']
 
             # 🔥 ВАЛИДАЦИЯ
             y_pred = self.price_model.predict(X_test_scaled)
@@ -306,7 +347,8 @@ class MLPricePredictor:
                     logger.info(f"   • Фича {idx}: {importances[idx]:.4f}")
 
             # 🔥 СОХРАНЕНИЕ
-            await self._save_price_model()
+            if save:
+                await self._save_price_model()
             self.is_price_trained = True
 
             return True
@@ -337,6 +379,15 @@ class MLPricePredictor:
                 ).order_by('-found_at')[:self.config['max_training_samples']]
             )
 
+            return await self.train_freshness_model_on_items(items)
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки данных для модели свежести: {e}")
+            return await self._train_fallback_freshness_model()
+
+    async def train_freshness_model_on_items(self, items, save=True):
+        """🎯 ОБУЧЕНИЕ МОДЕЛИ СВЕЖЕСТИ НА ГОТОВОМ НАБОРЕ ТОВАРОВ"""
+        try:
             total_items = len(items)
             logger.info(f"📚 Загружено {total_items} товаров для обучения свежести")
 
@@ -372,7 +423,7 @@ class MLPricePredictor:
             X_test_scaled = self.scaler_freshness.transform(X_test)
 
             # 🔥 ОБУЧЕНИЕ МОДЕЛИ СВЕЖЕСТИ
-            self.freshness_model = RandomForestRegressor(
+            freshness_model = RandomForestRegressor(
                 n_estimators=100,
                 max_depth=20,
                 min_samples_split=5,
@@ -381,15 +432,13 @@ class MLPricePredictor:
                 n_jobs=-1
             )
 
-            # Кросс-валидация
-            cv_scores = cross_val_score(
-                self.freshness_model, X_train_scaled, y_train,
-                cv=min(3, len(X_train) // 100),
-                scoring='r2'
-            )
+            cv = max(2, min(3, len(X_train) // 100))
+            async with TrainingPool(self.training_budget) as pool:
+                # Кросс-валидация
+                cv_scores = await pool.cross_val_score(freshness_model, X_train_scaled, y_train, cv=cv, scoring='r2')
 
-            # Финальное обучение
-            self.freshness_model.fit(X_train_scaled, y_train)
+                # Финальное обучение
+                self.freshness_model = await pool.fit(freshness_model, X_train_scaled, y_train)
 
             # 🔥 ВАЛИДАЦИЯ
             y_pred = self.freshness_model.predict(X_test_scaled)
@@ -417,7 +466,8 @@ class MLPricePredictor:
             logger.info(f"   • CV R²: {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
 
             # 🔥 СОХРАНЕНИЕ
-            await self._save_freshness_model()
+            if save:
+                await self._save_freshness_model()
             self.is_freshness_trained = True
 
             return True
@@ -486,26 +536,16 @@ class MLPricePredictor:
             # 🔥 ТЕКСТОВЫЕ ИНДИКАТОРЫ
             text = f"{title} {description}"
 
+            hits = self.keyword_matcher.scan(text)
+
             # Индикаторы срочности
-            urgency_score = 0.0
-            for word in self.freshness_indicators['urgency_keywords']:
-                if word in text:
-                    urgency_score += 0.2
-            features.append(min(urgency_score, 1.0))
+            features.append(min(len(hits['urgency_keywords']) * 0.2, 1.0))
 
             # Индикаторы новизны
-            new_score = 0.0
-            for word in self.freshness_indicators['new_keywords']:
-                if word in text:
-                    new_score += 0.25
-            features.append(min(new_score, 1.0))
+            features.append(min(len(hits['new_keywords']) * 0.25, 1.0))
 
             # Индикаторы времени
-            time_score = 0.0
-            for word in self.freshness_indicators['time_keywords']:
-                if word in text:
-                    time_score += 0.3
-            features.append(min(time_score, 1.0))
+            features.append(min(len(hits['time_keywords']) * 0.3, 1.0))
 
             # 🔥 ПРОДАВЕЦ
             seller_rating = float(item.get('seller_rating', 0))
@@ -584,12 +624,11 @@ class MLPricePredictor:
         text = f"{title} {description}"
 
         condition_scores = [0.0] * 5
+        hits = self.keyword_matcher.scan(text)
 
         for i, (condition, data) in enumerate(self.condition_keywords.items()):
-            for keyword in data['keywords']:
-                if keyword in text:
-                    condition_scores[i] = data['weight']
-                    break
+            if hits[f'condition_{condition}']:
+                condition_scores[i] = data['weight']
 
         return condition_scores
 
@@ -748,11 +787,10 @@ class MLPricePredictor:
         text = f"{title} {description}"
 
         # Состояние
+        hits = self.keyword_matcher.scan(text)
         for condition, data in self.condition_keywords.items():
-            for keyword in data['keywords']:
-                if keyword in text:
-                    correction *= data['weight']
-                    break
+            if hits[f'condition_{condition}']:
+                correction *= data['weight']
 
         # Продавец
         seller_rating = float(product_data.get('seller_rating', 0))
@@ -850,12 +888,13 @@ class MLPricePredictor:
 
                 model_info = {
                     'version': self.model_version,
+                    'feature_version': self.FEATURE_VERSION,
                     'saved_at': datetime.now().isoformat(),
                     'feature_count': self.config['price_features_count'],
                     'training_log': self.training_log[-5:]  # 5 последних логов
                 }
 
-                with open('apps/parsing/ai/ml_models/ultra_price_model_info.json', 'w', encoding='utf-8') as f:
+                with open(self.PRICE_MODEL_INFO, 'w', encoding='utf-8') as f:
                     json.dump(model_info, f, ensure_ascii=False, indent=2)
 
                 logger.info("💾 Ультра-модель цены сохранена")
@@ -871,21 +910,38 @@ class MLPricePredictor:
 
                 freshness_info = {
                     'version': self.model_version,
+                    'feature_version': self.FEATURE_VERSION,
                     'saved_at': datetime.now().isoformat(),
                     'feature_count': self.config['freshness_features_count'],
                     'training_log': self.training_log[-5:]
                 }
 
-                with open('apps/parsing/ai/ml_models/ultra_freshness_model_info.json', 'w', encoding='utf-8') as f:
+                with open(self.FRESHNESS_MODEL_INFO, 'w', encoding='utf-8') as f:
                     json.dump(freshness_info, f, ensure_ascii=False, indent=2)
 
                 logger.info("💾 Ультра-модель свежести сохранена")
         except Exception as e:
             logger.warning(f"⚠️ Не удалось сохранить модель свежести: {e}")
 
+    def _is_saved_model_current(self, info_path):
+        """Сохранённая модель посчитана на текущих фичах (иначе её нужно переобучить)"""
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                feature_version = json.load(f).get('feature_version')
+        except (OSError, ValueError):
+            feature_version = None
+
+        if feature_version != self.FEATURE_VERSION:
+            logger.info(f"🔄 {info_path}: версия фич {feature_version}, нужна {self.FEATURE_VERSION} — переобучаем")
+            return False
+        return True
+
     async def _load_price_model(self):
         """📂 Загрузка модели цены"""
         try:
+            if not self._is_saved_model_current(self.PRICE_MODEL_INFO):
+                return False
+
             # 🔥 ФИКС: ultra_price_model.joblib - это СЛОВАРЬ!
             model_data = joblib.load('apps/parsing/ai/ml_models/ultra_price_model.joblib')
 
@@ -909,6 +965,9 @@ class MLPricePredictor:
     async def _load_freshness_model(self):
         """📂 Загрузка модели свежести"""
         try:
+            if not self._is_saved_model_current(self.FRESHNESS_MODEL_INFO):
+                return False
+
             self.freshness_model = joblib.load('apps/parsing/ai/ml_models/ultra_freshness_model.joblib')
             self.scaler_freshness = joblib.load('apps/parsing/ai/ml_models/ultra_freshness_scaler.joblib')
             self.is_freshness_trained = True
@@ -957,6 +1016,9 @@ class MLPricePredictor:
 
             # 1. Загружаем модель цены
             try:
+                if not self._is_saved_model_current(self.PRICE_MODEL_INFO):
+                    raise ValueError("модель посчитана на старой версии фич")
+
                 model_data = joblib.load('apps/parsing/ai/ml_models/ultra_price_model.joblib')
 
                 # 🔥 ФИКС: Извлекаем из словаря
@@ -985,6 +1047,9 @@ class MLPricePredictor:
 
             # 2. Загружаем модель свежести
             try:
+                if not self._is_saved_model_current(self.FRESHNESS_MODEL_INFO):
+                    raise ValueError("модель посчитана на старой версии фич")
+
                 self.freshness_model = joblib.load('apps/parsing/ai/ml_models/ultra_freshness_model.joblib')
 
                 try:
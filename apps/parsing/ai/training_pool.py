@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import KFold, cross_val_score
+from threadpoolctl import threadpool_limits
+
+logger = logging.getLogger('parser.ai')
+
+
+@dataclass
+class TrainingBudget:
+    """⚙️ Бюджет CPU на обучение моделей (из ParserSettings)"""
+    cpu_share: float = 0.5  # Доля ядер машины, которую можно занять обучением
+    max_workers: Optional[int] = None  # Жёсткий потолок процессов
+    successive_halving: bool = False  # Подбор гиперпараметров successive halving
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Берёт ml_* поля из ParserSettings / SettingsManager (если их нет — дефолты)"""
+        return cls(
+            cpu_share=getattr(settings, 'ml_cpu_share', cls.cpu_share),
+            max_workers=getattr(settings, 'ml_max_workers', cls.max_workers) or None,
+            successive_halving=getattr(settings, 'ml_successive_halving', cls.successive_halving),
+        )
+
+    @property
+    def workers(self):
+        """Сколько процессов обучения можно держать одновременно"""
+        share = min(max(float(self.cpu_share or 0), 0.0), 1.0)
+        workers = max(1, math.floor((os.cpu_count() or 1) * share))
+        if self.max_workers:
+            workers = min(workers, self.max_workers)
+        return workers
+
+
+class TrainingPool:
+    """🏭 ОТДЕЛЬНЫЙ ПУЛ ПРОЦЕССОВ ДЛЯ ОБУЧЕНИЯ
+
+    - фолды кросс-валидации и кандидаты гиперпараметров идут параллельно,
+      по одной задаче на процесс, не больше budget.workers процессов;
+    - в каждом процессе BLAS/OpenMP ограничены одним потоком (threadpoolctl),
+      чтобы пул не съел ядра, оставленные парсеру;
+    - воркеры стартуют через spawn и импортируют только sklearn:
+      форк процесса с Selenium и event loop не нужен.
+
+        async with TrainingPool(budget) as pool:
+            scores = await pool.cross_val_score(model, X, y, cv=3, scoring='r2')
+            model = await pool.fit(model, X, y)
+    """
+
+    def __init__(self, budget: TrainingBudget = None):
+        self.budget = budget or TrainingBudget()
+        self.workers = self.budget.workers
+        self._executor = None
+
+    async def __aenter__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=threadpool_limits,
+            initargs=(1,),
+        )
+        logger.info(f"🏭 Пул обучения: {self.workers} процессов (CPU {self.budget.cpu_share:.0%})")
+        return self
+
+    async def __aexit__(self, *exc):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    def _submit(self, func, *args, **kwargs):
+        return asyncio.wrap_future(self._executor.submit(func, *args, **kwargs))
+
+    async def cross_val_score(self, estimator, X, y, cv=3, scoring='r2'):
+        """Кросс-валидация: каждый фолд — отдельная задача пула (модель в один поток)"""
+        X, y = np.asarray(X), np.asarray(y)
+        estimator = _set_n_jobs(clone(estimator), 1)
+        folds = list(KFold(n_splits=cv).split(X))
+        scores = await asyncio.gather(*[
+            self._submit(cross_val_score, estimator, X, y, cv=[fold], scoring=scoring)
+            for fold in folds
+        ])
+        return np.concatenate(scores)
+
+    async def fit(self, estimator, X, y, n_jobs=None):
+        """Финальное обучение в одном процессе пула; потоки деревьев — в пределах бюджета"""
+        estimator = _set_n_jobs(clone(estimator), min(n_jobs or self.workers, self.workers))
+        return await self._submit(estimator.fit, np.asarray(X), np.asarray(y))
+
+    async def successive_halving(self, estimator, param_grid: Dict[str, List[Any]], X, y,
+                                 cv=3, scoring='r2', factor=3, min_resources=500, random_state=42):
+        """🪜 Successive halving: все кандидаты на малой выборке, дальше — лучшая 1/factor на выборке в factor раз больше
+
+        Возвращает (лучшие параметры, история раундов).
+        """
+        X, y = np.asarray(X), np.asarray(y)
+        names = list(param_grid)
+        candidates = [dict(zip(names, values)) for values in product(*param_grid.values())]
+        rng = np.random.RandomState(random_state)
+        order = rng.permutation(len(X))
+
+        history = []
+        resources = min(min_resources, len(X))
+        while True:
+            subset = order[:resources]
+            results = await asyncio.gather(*[
+                self.cross_val_score(clone(estimator).set_params(**params), X[subset], y[subset], cv, scoring)
+                for params in candidates
+            ])
+            ranked = sorted(zip(candidates, results), key=lambda item: item[1].mean(), reverse=True)
+            history.append({
+                'resources': int(resources),
+                'candidates': len(candidates),
+                'best_score': float(ranked[0][1].mean()),
+            })
+            logger.info(f"🪜 Halving: {len(candidates)} кандидатов на {resources} строках, "
+                        f"лучший R² {ranked[0][1].mean():.4f}")
+
+            if len(candidates) == 1 or resources >= len(X):
+                return ranked[0][0], history
+
+            candidates = [params for params, _ in ranked[:max(1, math.ceil(len(candidates) / factor))]]
+            resources = min(resources * factor, len(X))
+
+
+def _set_n_jobs(estimator, n_jobs):
+    """Проставляет n_jobs моделям внутри estimator.
+
+    У ансамбля (VotingRegressor) свой n_jobs = 1: иначе он поднимет ещё
+    процессы joblib поверх пула, а потоки получат только сами деревья.
+    """
+    names = [name for name in estimator.get_params() if name == 'n_jobs' or name.endswith('__n_jobs')]
+    nested = any('__' in name for name in names)
+    estimator.set_params(**{name: 1 if nested and name == 'n_jobs' else n_jobs for name in names})
+    return estimator
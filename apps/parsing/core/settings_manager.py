@@ -23,6 +23,14 @@ class SettingsManager:
         self.seller_type = 'all'
         self.city = "Москва"  # ← ДОБАВЬТЕ ЭТУ СТРОКУ!
 
+        # 🧠 Бюджет обучения ML
+        self.ml_cpu_share = 0.5
+        self.ml_max_workers = None
+        self.ml_successive_halving = False
+
+        # 📋 Статус цикла в Telegram
+        self.status_verbosity = 'progress'
+
         # Не загружаем настройки автоматически - будет загружено позже
         logger.info("✅ Менеджер настроек инициализирован (настройки загрузятся позже)")
 
@@ -51,6 +59,10 @@ class SettingsManager:
                     self.seller_type = parser_settings.seller_type
                     # 🔥 ДОБАВИЛ ГОРОД
                     self.city = parser_settings.city or 'Москва'
+                    self.ml_cpu_share = parser_settings.ml_cpu_share
+                    self.ml_max_workers = parser_settings.ml_max_workers
+                    self.ml_successive_halving = parser_settings.ml_successive_halving
+                    self.status_verbosity = parser_settings.status_verbosity
 
                     logger.info(f"✅ ЗАГРУЖЕНЫ НАСТРОЙКИ: {self.search_queries}")
                     logger.info(f"✅ Город: {self.city}")
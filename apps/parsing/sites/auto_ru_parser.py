@@ -216,8 +216,8 @@ class AutoRuParser(BaseSiteParser):
     async def _send_captcha_notification(self):
         """Отправляет уведомление о капче в Telegram"""
         try:
-            from telegram import Bot
             from shared.utils.config import get_bot_token, get_chat_id
+            from ..utils.telegram_queue import telegram_queue, PRIORITY_ALERT
 
             token = get_bot_token()
             chat_id = get_chat_id()
@@ -226,8 +226,6 @@ class AutoRuParser(BaseSiteParser):
                 logger.error("❌ Не удалось отправить уведомление о капче: нет токена или chat_id")
                 return False
 
-            bot = Bot(token=token)
-
             message = (
                 "🚨 <b>ПАРСЕР AUTO.RU ОСТАНОВЛЕН!</b>\n\n"
                 "Обнаружена капча или блокировка по IP!\n\n"
@@ -243,13 +241,9 @@ class AutoRuParser(BaseSiteParser):
                 "⏰ <b>Статус:</b> Ожидание действий пользователя"
             )
 
-            await bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode='HTML'
-            )
+            await telegram_queue.put(chat_id, message, priority=PRIORITY_ALERT)
 
-            logger.info("✅ Уведомление о капче отправлено в Telegram")
+            logger.info("✅ Уведомление о капче поставлено в очередь Telegram")
             return True
 
         except Exception as e:
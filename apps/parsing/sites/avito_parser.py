@@ -435,8 +435,8 @@ class AvitoParser(BaseSiteParser):
     async def _send_captcha_notification(self):
         """Отправка уведомления в Telegram"""
         try:
-            from telegram import Bot
             from shared.utils.config import get_bot_token, get_chat_id
+            from ..utils.telegram_queue import telegram_queue, PRIORITY_ALERT
 
             token = get_bot_token()
             chat_id = get_chat_id()
@@ -445,7 +445,6 @@ class AvitoParser(BaseSiteParser):
                 self.logger.error("❌ Нет токена или chat_id")
                 return False
 
-            bot = Bot(token=token)
             message = (
                 "🚨 <b>ПАРСЕР ОСТАНОВЛЕН!</b>\n\n"
                 "Обнаружена капча или блокировка по IP!\n\n"
@@ -456,8 +455,8 @@ class AvitoParser(BaseSiteParser):
                 "4. Перезапустите парсер"
             )
 
-            await bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
-            self.logger.info("✅ Уведомление отправлено")
+            await telegram_queue.put(chat_id, message, priority=PRIORITY_ALERT)
+            self.logger.info("✅ Уведомление поставлено в очередь")
             return True
 
         except Exception as e:
@@ -1,3 +1,902 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import KFold, cross_val_score
+from telegram.error import RetryAfter, TimedOut
+
+from apps.parsing.ai.ml_learning_system import MLLearningSystem
+from apps.parsing.ai.ml_price_predictor import MLPricePredictor
+from apps.parsing.ai.training_pool import TrainingBudget, TrainingPool
+from apps.parsing.utils.cycle_status import (
+    VERBOSITY_DETAILED, VERBOSITY_OFF, VERBOSITY_PROGRESS, VERBOSITY_SUMMARY, CycleStatusReporter,
+)
+from apps.parsing.utils.found_item_writer import FoundItemWriter
+from apps.parsing.utils.notification_sender import NotificationSender
+from apps.parsing.utils.page_pipeline import PagePipeline, PipelineStage
+from apps.parsing.utils.state_store import BinaryStateStore
+from apps.parsing.utils.telegram_queue import (
+    PRIORITY_ALERT, PRIORITY_DEAL, PRIORITY_STATUS, TelegramOutboundQueue,
+)
+from apps.parsing.utils.text_matcher import KeywordMatcher
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    """🔤 Термины совпадают целыми словами, с окончаниями"""
+
+    def test_stem_does_not_match_inside_other_words(self):
+        matcher = KeywordMatcher({'new': ['новый']})
+        for text in ('Продаю в Новосибирске', 'новинка сезона', 'новости района'):
+            with self.subTest(text=text):
+                self.assertEqual(matcher.scan(text)['new'], frozenset())
+
+    def test_short_stem_does_not_match_longer_word(self):
+        matcher = KeywordMatcher({'variants': ['кос']})
+        self.assertFalse(matcher.has_any('Телескоп для наблюдения за космосом'))
+
+    def test_literal_does_not_match_inside_word(self):
+        matcher = KeywordMatcher({'variants': ['тв']})
+        self.assertFalse(matcher.has_any('Отвертка крестовая'))
+        self.assertTrue(matcher.has_any('ТВ приставка'))
+
+    def test_word_forms_still_match(self):
+        matcher = KeywordMatcher({'new': ['новый'], 'time': ['час', 'минут'], 'urgency': ['срочно']})
+        self.assertEqual(matcher.scan('Новая куртка')['new'], frozenset({'новый'}))
+        self.assertEqual(matcher.scan('2 часа назад, 5 минут')['time'], frozenset({'час', 'минут'}))
+        self.assertEqual(matcher.scan('Срочная продажа!')['urgency'], frozenset({'срочно'}))
+
+    def test_overlapping_phrases(self):
+        matcher = KeywordMatcher({'perfect': ['не использовался'], 'excellent': ['почти не использовался']})
+        hits = matcher.scan('Почти не использовалась, с коробкой')
+        self.assertEqual(hits['perfect'], frozenset({'не использовался'}))
+        self.assertEqual(hits['excellent'], frozenset({'почти не использовался'}))
+        # «...не использовался» внутри «телефоне использовался» — не начало фразы
+        self.assertEqual(matcher.scan('В телефоне использовался новый аккумулятор')['perfect'], frozenset())
+
+    def test_without_stemming_matches_whole_words(self):
+        matcher = KeywordMatcher({'brands': ['iphone', 'sony']}, stem=False)
+        self.assertTrue(matcher.has_any('Apple iPhone 15 Pro'))
+        self.assertFalse(matcher.has_any('iphones case'))
+        self.assertFalse(matcher.has_any('Sonya'))
+
+    def test_substring_mode_finds_glued_model_numbers(self):
+        titles = {
+            'iphone': 'Apple iPhone15 Pro 256GB',
+            'playstation': 'Sony PlayStation5 Slim',
+            'macbook': 'MacBookPro 14 M3',
+            'велосипед': 'Электровелосипед складной',
+        }
+        for keyword, title in titles.items():
+            with self.subTest(keyword=keyword):
+                self.assertTrue(KeywordMatcher({'variants': [keyword]}, whole_words=False).has_any(title))
+                self.assertFalse(KeywordMatcher({'variants': [keyword]}).has_any(title))
+
+    def test_substring_mode_keeps_word_forms(self):
+        matcher = KeywordMatcher({'variants': ['куртка', 'jacket']}, whole_words=False)
+        self.assertTrue(matcher.has_any('Продам куртку, размер M'))
+        self.assertTrue(matcher.has_any('Softshell-jacket'))
+        self.assertFalse(matcher.has_any('Пальто шерстяное'))
+
+    def test_yo_is_normalized(self):
+        matcher = KeywordMatcher({'condition': ['потертости']})
+        self.assertTrue(matcher.has_any('Потёртости на корпусе'))
+
+
+class MLPricePredictorVersionTests(SimpleTestCase):
+    """🔄 Модели, посчитанные на старых фичах, не загружаются — их обучают заново"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.remove(os.path.join(directory, name)) for name in os.listdir(directory)])
+        self.info_path = os.path.join(directory, 'ultra_price_model_info.json')
+        patcher = mock.patch.object(MLPricePredictor, 'PRICE_MODEL_INFO', self.info_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.predictor = MLPricePredictor()
+
+    def test_model_without_feature_version_is_retrained(self):
+        with open(self.info_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 'v3.0_ultra_smart', 'feature_count': 35}, f)
+
+        with mock.patch('apps.parsing.ai.ml_price_predictor.joblib.load') as load:
+            self.assertFalse(asyncio.run(self.predictor._load_price_model()))
+            self.assertFalse(asyncio.run(self.predictor.load_model()))
+        load.assert_not_called()
+
+    def test_saved_model_records_feature_version(self):
+        self.predictor.price_model = object()
+        self.predictor.scaler_price = object()
+        with mock.patch('apps.parsing.ai.ml_price_predictor.joblib.dump'):
+            asyncio.run(self.predictor._save_price_model())
+
+        with open(self.info_path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['feature_version'], MLPricePredictor.FEATURE_VERSION)
+        self.assertTrue(self.predictor._is_saved_model_current(self.info_path))
+
+
+class BinaryStateStoreTests(SimpleTestCase):
+    """💾 Счётчики и записи переживают перезапуск, удаление и компакцию"""
+
+    COUNTERS = {'hourly': {'phones': [1] * 24, 'tablets': [2] * 24}}
+    RECORDS = {'insights': {'phones': {'total_items': 3}, 'tablets': {'total_items': 5}}}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.remove(os.path.join(self.directory, name)) for name in os.listdir(self.directory)])
+        self.base_path = os.path.join(self.directory, 'state')
+
+    def store(self):
+        return BinaryStateStore(self.base_path)
+
+    def reload(self):
+        counters, records = self.store().load()
+        return {section: {key: values.tolist() for key, values in items.items()}
+                for section, items in counters.items()}, records
+
+    def test_round_trip(self):
+        self.store().save(self.COUNTERS, self.RECORDS)
+        self.assertEqual(self.reload(), (self.COUNTERS, self.RECORDS))
+
+    def test_removed_keys_stay_removed(self):
+        store = self.store()
+        store.save(self.COUNTERS, self.RECORDS)
+        store.save({'hourly': {'phones': [1] * 24}}, {'insights': {'phones': {'total_items': 3}}})
+        self.assertEqual(self.reload(), ({'hourly': {'phones': [1] * 24}}, {'insights': {'phones': {'total_items': 3}}}))
+
+        # Ключ вернулся после удаления — считается с нуля, без старых значений
+        store.save({'hourly': {'phones': [1] * 24, 'tablets': [7] * 24}}, {})
+        self.assertEqual(self.reload()[0]['hourly']['tablets'], [7] * 24)
+
+        store.compact()
+        self.assertEqual(self.reload(), ({'hourly': {'phones': [1] * 24, 'tablets': [7] * 24}}, {}))
+
+    def test_removed_keys_stay_removed_after_restart(self):
+        self.store().save(self.COUNTERS, self.RECORDS)
+        # Другой процесс поднимает состояние с диска и всё сбрасывает
+        restarted = self.store()
+        restarted.load()
+        restarted.save({'hourly': {}}, {'insights': {}})
+        self.assertEqual(self.reload(), ({'hourly': {}}, {}))
+
+    def test_only_changed_keys_are_encoded(self):
+        store = self.store()
+        store.save(self.COUNTERS, self.RECORDS)
+
+        counters = {'hourly': {'phones': [3] * 24, 'tablets': [9] * 24}}
+        records = {'insights': {'phones': {'total_items': 4}, 'tablets': {'total_items': 9}}}
+        with mock.patch('apps.parsing.utils.state_store.json.dumps', wraps=json.dumps) as dumps:
+            store.save(counters, records, changed={'hourly': ['phones'], 'insights': ['phones']})
+        self.assertEqual(dumps.call_count, 1)
+
+        # Неотмеченный tablets не сравнивался и не записан
+        counters_on_disk, records_on_disk = self.reload()
+        self.assertEqual(counters_on_disk['hourly'], {'phones': [3] * 24, 'tablets': [2] * 24})
+        self.assertEqual(records_on_disk['insights'], {'phones': {'total_items': 4}, 'tablets': {'total_items': 5}})
+
+    def test_first_save_compares_everything(self):
+        self.store().save(self.COUNTERS, self.RECORDS)
+
+        # Новый экземпляр не знает, с чем сверялся вызывающий код: changed игнорируется
+        self.store().save({'hourly': {'phones': [1] * 24, 'tablets': [4] * 24}}, self.RECORDS, changed={})
+        self.assertEqual(self.reload()[0]['hourly']['tablets'], [4] * 24)
+
+    def test_compaction_folds_deltas(self):
+        store = self.store()
+        store.COMPACT_EVERY = 3
+        for value in range(1, 5):
+            store.save({'hourly': {'phones': [value] * 24}}, self.RECORDS)
+
+        self.assertEqual(store._generation, 1)
+        with sqlite3.connect(store.index_path) as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM counter_deltas').fetchone()[0], 1)
+        self.assertEqual(self.reload()[0], {'hourly': {'phones': [4] * 24}})
+
+    def test_crash_before_rename_keeps_previous_state(self):
+        store = self.store()
+        store.save(self.COUNTERS, self.RECORDS)
+        store.compact()
+        store.save({'hourly': {'phones': [5] * 24}}, self.RECORDS)
+
+        with mock.patch('apps.parsing.utils.state_store.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                store.compact()
+
+        self.assertEqual(self.reload()[0], {'hourly': {'phones': [5] * 24}})
+        self.assertEqual(sorted(os.listdir(self.directory)), ['state.npz', 'state.sqlite3'])
+
+    def test_crash_after_rename_ignores_old_deltas(self):
+        store = self.store()
+        store.save(self.COUNTERS, self.RECORDS)
+        with sqlite3.connect(store.index_path) as conn:
+            stale = conn.execute('SELECT section, key, delta FROM counter_deltas').fetchall()
+
+        store.compact()
+        # Снапшот подменён, а дельты прошлого поколения удалить не успели
+        with sqlite3.connect(store.index_path) as conn:
+            conn.executemany(
+                'INSERT INTO counter_deltas (generation, section, key, delta) VALUES (0, ?, ?, ?)', stale
+            )
+        self.assertEqual(self.reload()[0], self.COUNTERS)
+
+
+class WriterSender:
+    """Методы NotificationSender, которые нужны FoundItemWriter"""
+
+    @staticmethod
+    def normalize_url_universal(url, product=None):
+        return url
+
+    @staticmethod
+    def extract_product_id(url):
+        return url.rsplit('_', 1)[-1]
+
+    @staticmethod
+    def format_duration(seconds):
+        return f"{seconds:.0f}с"
+
+
+def writer_entries(user, count, start=0):
+    return [
+        ({'url': f'https://www.avito.ru/moskva/telefony/iphone_{index}', 'name': f'iPhone {index}',
+          'price': 10000 + index, 'city': 'Москва', 'metro_stations': [{'name': 'Арбатская'}]},
+         1000, 10, user.id)
+        for index in range(start, start + count)
+    ]
+
+
+class FoundItemWriterTests(TestCase):
+    """💾 Пачка товаров пишется постоянным числом запросов и не теряется при ошибке"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer')
+
+    def setUp(self):
+        self.writer = FoundItemWriter(WriterSender())
+
+    def test_batch_of_50_new_items(self):
+        # users, SAVEPOINT, поисковые запросы, их bulk_create, url, INSERT, RELEASE
+        with self.assertNumQueries(7):
+            saved = self.writer.save_batch(writer_entries(self.user, 50))
+        self.assertEqual(saved, 50)
+        self.assertEqual(self.user.searchquery_set.count(), 50)
+
+    def test_batch_of_50_saved_items_is_one_update(self):
+        entries = writer_entries(self.user, 50)
+        self.writer.save_batch(entries)
+        # users, SAVEPOINT, поисковые запросы (уже есть), url, UPDATE, RELEASE
+        with self.assertNumQueries(6):
+            self.writer.save_batch(entries)
+
+    def test_failed_batch_is_saved_item_by_item(self):
+        entries = writer_entries(self.user, 3)
+        save_batch = self.writer.save_batch
+        calls = []
+
+        def flaky(batch):
+            calls.append(len(batch))
+            if len(calls) == 1:
+                raise OperationalError('connection lost')
+            return save_batch(batch)
+
+        with mock.patch.object(self.writer, 'save_batch', side_effect=flaky):
+            for entry in entries:
+                async_to_sync(self.writer.claim)(*entry)
+            async_to_sync(self.writer.flush)()
+
+        self.assertEqual(calls, [3, 1, 1, 1])
+        self.assertEqual(self.user.searchquery_set.filter(found_items__isnull=False).count(), 3)
+        self.assertFalse(self.writer._retrying)
+
+    def test_unsaved_items_are_retried(self):
+        self.writer.RETRY_DELAYS = (0, 0)
+        entries = writer_entries(self.user, 2)
+        save_batch = self.writer.save_batch
+        failures = iter([True] * 3)  # пачка и оба товара по одному
+
+        def flaky(batch):
+            if next(failures, False):
+                raise OperationalError('connection lost')
+            return save_batch(batch)
+
+        async def run():
+            for entry in entries:
+                await self.writer.claim(*entry)
+            await self.writer.flush()
+            self.assertEqual(len(self.writer._retrying), 2)
+            await self.writer.close()
+
+        with mock.patch.object(self.writer, 'save_batch', side_effect=flaky):
+            async_to_sync(run)()
+
+        self.assertEqual(self.user.searchquery_set.filter(found_items__isnull=False).count(), 2)
+        self.assertFalse(self.writer._retrying)
+        self.assertFalse(self.writer._pending_urls)
+
+    def test_gives_up_after_retry_delays(self):
+        self.writer.RETRY_DELAYS = (0,)
+
+        async def run():
+            await self.writer.claim(*writer_entries(self.user, 1)[0])
+            await self.writer.close()
+
+        with mock.patch.object(self.writer, 'save_batch', side_effect=OperationalError('down')) as save_batch:
+            async_to_sync(run)()
+
+        self.assertEqual(save_batch.call_count, 2)
+        self.assertFalse(self.writer._retrying)
+        self.assertFalse(self.writer._pending_urls)
+
+    def test_save_returns_after_row_is_written(self):
+        from apps.website.models import FoundItem
+
+        entry = writer_entries(self.user, 1)[0]
+        exists = sync_to_async(FoundItem.objects.filter(url=entry[0]['url']).exists)
+
+        async def run():
+            self.assertTrue(await self.writer.save(*entry))
+            self.assertTrue(await exists())
+            # Повторно найденный — уже в базе, уведомлять не нужно
+            self.assertFalse(await self.writer.save(*entry))
+            await self.writer.close()
+
+        async_to_sync(run)()
+
+    def test_save_is_false_when_item_is_not_written(self):
+        self.writer.RETRY_DELAYS = (0,)
+
+        async def run():
+            self.assertFalse(await self.writer.save(*writer_entries(self.user, 1)[0]))
+            await self.writer.close()
+
+        with mock.patch.object(self.writer, 'save_batch', side_effect=OperationalError('down')):
+            async_to_sync(run)()
+
+    def test_pipeline_saves_fill_one_batch(self):
+        from apps.website.models import FoundItem
+
+        self.writer.SAVE_FLUSH_INTERVAL = 0.1
+        entries = writer_entries(self.user, 20)
+        save_batch = self.writer.save_batch
+
+        async def arrive(entry):
+            await asyncio.sleep(0.005)  # Детали и оценка — по одному товару
+            return entry
+
+        async def persist(entry):
+            return entry if await self.writer.save(*entry) else None
+
+        async def run():
+            pipeline = PagePipeline([
+                PipelineStage('scoring', arrive, workers=1),
+                PipelineStage('persist', persist, workers=FoundItemWriter.SAVE_WORKERS),
+            ])
+            saved = await pipeline.run(entries)
+            await self.writer.close()
+            return saved
+
+        with mock.patch.object(self.writer, 'save_batch', side_effect=save_batch) as transactions:
+            saved = async_to_sync(run)()
+
+        self.assertEqual(len(saved), 20)
+        self.assertEqual(FoundItem.objects.filter(search_query__user=self.user).count(), 20)
+        # Пачки по SAVE_WORKERS товаров (8, 8, 4), а не транзакция на каждый товар
+        self.assertLessEqual(transactions.call_count, 5)
+
+    def test_known_urls_cache_is_bounded(self):
+        self.writer.KNOWN_URLS_LIMIT = 10
+        for index in range(25):
+            self.writer._remember(known={f'url{index}'}, checked={f'url{index}'})
+        self.assertLessEqual(len(self.writer._known_urls) + len(self.writer._checked_urls), 10)
+
+
+class PagePipelineTests(SimpleTestCase):
+    """🏭 Этапы идут внахлёст, но для одного товара — строго по порядку"""
+
+    DELAYS = {'details': 0.04, 'scoring': 0.02, 'persist': 0.01, 'notify': 0.08}
+
+    def run_pipeline(self, count, workers):
+        events = []
+
+        def stage(name):
+            async def handler(item):
+                events.append((name, 'start', item, time.perf_counter()))
+                await asyncio.sleep(self.DELAYS[name])
+                events.append((name, 'end', item, time.perf_counter()))
+                return item
+            return PipelineStage(name, handler, workers=workers.get(name, 1))
+
+        pipeline = PagePipeline([stage(name) for name in self.DELAYS])
+        started = time.perf_counter()
+        done = async_to_sync(pipeline.run)(range(count))
+        return done, events, time.perf_counter() - started
+
+    def test_stages_overlap(self):
+        count = 8
+        done, events, elapsed = self.run_pipeline(count, {'notify': 2})
+        self.assertEqual(sorted(done), list(range(count)))
+
+        sequential = count * sum(self.DELAYS.values())
+        self.assertLess(elapsed, sequential * 0.7)
+
+        # Следующий товар парсится, пока предыдущий ещё уходит в Telegram
+        at = {(name, edge, item): moment for name, edge, item, moment in events}
+        self.assertLess(at[('details', 'start', 2)], at[('notify', 'end', 0)])
+
+    def test_notify_starts_after_persist_ends(self):
+        _, events, _ = self.run_pipeline(6, {'persist': 2, 'notify': 2})
+        at = {(name, edge, item): moment for name, edge, item, moment in events}
+        for item in range(6):
+            with self.subTest(item=item):
+                self.assertLessEqual(at[('persist', 'end', item)], at[('notify', 'start', item)])
+
+
+class QueueLimiter:
+    """Лимитер без ожиданий"""
+
+    async def acquire(self, chat_id, messages=1):
+        return 0.0
+
+    def pause(self, chat_id, seconds):
+        pass
+
+
+class QueueBot:
+    """Записывает отправленное; сообщение 'held' ждёт release"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Event()
+
+    async def send_message(self, chat_id, text, **kwargs):
+        while text == 'held' and not self.release.is_set():
+            await asyncio.sleep(0.01)
+        self.sent.append(text)
+
+
+class TelegramQueueLoopTests(SimpleTestCase):
+    """📬 Смена event loop'а не запускает второй воркер и не шлёт сообщение дважды"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.remove(os.path.join(directory, name)) for name in os.listdir(directory)])
+        self.bot = QueueBot()
+
+        async def bot_factory():
+            return self.bot
+
+        self.queue = TelegramOutboundQueue(os.path.join(directory, 'outbox.sqlite3'), QueueLimiter(), bot_factory)
+
+        self.old_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.old_loop.run_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.old_loop.close)
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.old_loop.call_soon_threadsafe, self.old_loop.stop)
+
+    def in_old_loop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.old_loop).result(5)
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_loop_switch_keeps_in_flight_message_with_old_worker(self):
+        self.in_old_loop(self.queue.put('1', 'held'))
+        old_worker = self.queue._worker
+        self.assertTrue(self.wait_for(lambda: self.queue._busy))
+
+        async def new_loop():
+            await self.queue.put('1', 'next')
+            self.assertTrue(await self.queue.flush(5))
+            self.bot.release.set()
+            while 'held' not in self.bot.sent:
+                await asyncio.sleep(0.01)
+            await self.queue.close()
+
+        asyncio.run(new_loop())
+        self.assertTrue(self.wait_for(old_worker.done))
+        self.assertEqual(sorted(self.bot.sent), ['held', 'next'])
+        self.assertEqual(self.queue.store.count(), 0)
+
+    def test_close_from_other_loop_stops_old_worker(self):
+        self.in_old_loop(self.queue.put('1', 'held'))
+        old_worker = self.queue._worker
+        self.assertTrue(self.wait_for(lambda: self.queue._busy))
+
+        async def new_loop():
+            await self.queue.close(timeout=0)
+            self.assertIsNone(self.queue._worker)
+            await self.queue.put('1', 'after')
+            self.bot.release.set()
+            self.assertTrue(await self.queue.flush(5))
+            await self.queue.close()
+
+        asyncio.run(new_loop())
+        self.assertTrue(self.wait_for(old_worker.done))
+        self.assertEqual(sorted(self.bot.sent), ['after', 'held'])
+        self.assertEqual(self.queue.store.count(), 0)
+
+
+class FlakyBotAPI:
+    """Фейковый Bot API: сначала отвечает заданными ошибками (429, таймауты), потом принимает"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+        self.albums = []
+
+    def _fail(self):
+        if self.errors:
+            raise self.errors.pop(0)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self._fail()
+        self.sent.append(text)
+
+    async def send_media_group(self, chat_id, media, **kwargs):
+        self._fail()
+        self.albums.append((chat_id, media[0].caption))
+        return []
+
+
+class TelegramQueueDeliveryTests(SimpleTestCase):
+    """📬 429, порядок приоритетов, повторы и досылка из SQLite после перезапуска"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.remove(os.path.join(directory, name)) for name in os.listdir(directory)])
+        self.path = os.path.join(directory, 'outbox.sqlite3')
+        self.limiter = mock.Mock(wraps=QueueLimiter())
+        self.limiter.acquire = mock.AsyncMock(return_value=0.0)
+
+    def make_queue(self, bot):
+        async def bot_factory():
+            return bot
+        return TelegramOutboundQueue(self.path, self.limiter, bot_factory)
+
+    def test_retry_after_pauses_limiter_and_delivers(self):
+        bot = FlakyBotAPI([RetryAfter(3), RetryAfter(7)])
+        queue = self.make_queue(bot)
+
+        async def run():
+            await queue.put('1', 'deal')
+            self.assertTrue(await queue.flush(5))
+            await queue.close()
+
+        asyncio.run(run())
+        self.assertEqual(bot.sent, ['deal'])
+        self.assertEqual(self.limiter.pause.call_args_list, [mock.call('1', 3.0), mock.call('1', 7.0)])
+        self.assertEqual(queue.store.count(), 0)
+
+    def test_alerts_go_before_deals_and_statuses(self):
+        bot = FlakyBotAPI()
+        queue = self.make_queue(bot)
+        queue.STATUS_BATCH_WINDOW = 0.0
+
+        async def run():
+            # Воркер стартует только после того, как все три уже в очереди
+            await queue.put('1', 'status', priority=PRIORITY_STATUS)
+            await queue.put('1', 'deal', priority=PRIORITY_DEAL)
+            await queue.put('1', 'alert', priority=PRIORITY_ALERT)
+            self.assertTrue(await queue.flush(5))
+            await queue.close()
+
+        asyncio.run(run())
+        self.assertEqual(bot.sent, ['alert', 'deal', 'status'])
+
+    def test_undelivered_rows_survive_restart(self):
+        queue = self.make_queue(FlakyBotAPI([ConnectionError('down')]))
+        queue.MAX_ATTEMPTS = 1
+
+        async def run_failing():
+            await queue.put('1', 'deal')
+            await queue.flush(0.5)
+            await queue.close(timeout=0)
+
+        asyncio.run(run_failing())
+        self.assertEqual(queue.store.count(), 1)
+
+        bot = FlakyBotAPI()
+        restarted = self.make_queue(bot)
+
+        async def run_restarted():
+            await restarted.put('1', 'next')
+            self.assertTrue(await restarted.flush(5))
+            await restarted.close()
+
+        asyncio.run(run_restarted())
+        self.assertEqual(bot.sent, ['deal', 'next'])
+        self.assertEqual(restarted.store.count(), 0)
+
+    def test_exhausted_message_is_requeued_after_delay(self):
+        bot = FlakyBotAPI([ConnectionError('down')])
+        queue = self.make_queue(bot)
+        queue.MAX_ATTEMPTS = 1
+        queue.REQUEUE_DELAY = 0.2
+
+        async def run():
+            await queue.put('1', 'deal')
+            self.assertTrue(await queue.flush(5))
+            self.assertEqual(queue._deferred, {1})
+            await asyncio.sleep(0.3)
+            self.assertTrue(await queue.flush(5))
+            await queue.close()
+
+        asyncio.run(run())
+        self.assertEqual(bot.sent, ['deal'])
+        self.assertEqual(queue.store.count(), 0)
+
+    def test_timed_out_album_waits_for_explicit_resend(self):
+        bot = FlakyBotAPI([TimedOut()])
+        queue = self.make_queue(bot)
+
+        async def run():
+            await queue.put('1', 'album', photos=[b'jpeg'])
+            self.assertTrue(await queue.flush(5))
+            await queue.close()
+
+        with self.assertLogs('bot.notifications', level='ERROR'):
+            asyncio.run(run())
+        self.assertEqual(bot.albums, [])
+        self.assertEqual(queue.store.count(), 1)
+
+        restarted = self.make_queue(bot)
+
+        async def run_restarted():
+            await restarted.put('1', 'next')
+            self.assertTrue(await restarted.flush(5))
+            self.assertEqual(bot.albums, [])  # Сам не повторяется
+            self.assertEqual(await restarted.resend_unconfirmed(), 1)
+            self.assertTrue(await restarted.flush(5))
+            await restarted.close()
+
+        asyncio.run(run_restarted())
+        self.assertEqual(bot.albums, [('1', 'album')])
+        self.assertEqual(restarted.store.count(), 0)
+
+
+class TrainingPoolTests(SimpleTestCase):
+    """🏭 Пул обучения: бюджет ограничивает процессы, фолды считаются как у sklearn"""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(size=(240, 5))
+        self.y = self.X @ np.array([3.0, -2.0, 1.0, 0.5, 4.0]) + rng.normal(scale=0.1, size=240)
+
+    def test_budget_caps_workers(self):
+        with mock.patch('apps.parsing.ai.training_pool.os.cpu_count', return_value=8):
+            self.assertEqual(TrainingBudget(cpu_share=0.5).workers, 4)
+            self.assertEqual(TrainingBudget(cpu_share=0.5, max_workers=2).workers, 2)
+            self.assertEqual(TrainingBudget(cpu_share=0.0).workers, 1)
+            self.assertEqual(TrainingBudget(cpu_share=3.0).workers, 8)
+            pool = TrainingPool(TrainingBudget(cpu_share=1.0, max_workers=2))
+
+        async def run():
+            async with pool:
+                pids = await asyncio.gather(*[pool._submit(os.getpid) for _ in range(6)])
+                return pool._executor._max_workers, set(pids)
+
+        max_workers, pids = asyncio.run(run())
+        self.assertEqual(pool.workers, 2)
+        self.assertEqual(max_workers, 2)
+        self.assertLessEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_fold_scores_match_cross_val_score(self):
+        async def run():
+            async with TrainingPool(TrainingBudget(max_workers=2)) as pool:
+                return await pool.cross_val_score(Ridge(alpha=1.0), self.X, self.y, cv=3, scoring='r2')
+
+        expected = cross_val_score(Ridge(alpha=1.0), self.X, self.y, cv=KFold(n_splits=3), scoring='r2')
+        np.testing.assert_allclose(asyncio.run(run()), expected)
+
+    def test_successive_halving_keeps_best_candidate(self):
+        grid = {'alpha': [1e6, 1e4, 0.1, 100.0]}
+
+        async def run():
+            async with TrainingPool(TrainingBudget(max_workers=2)) as pool:
+                return await pool.successive_halving(Ridge(), grid, self.X, self.y, factor=2, min_resources=60)
+
+        best, history = asyncio.run(run())
+        self.assertEqual(best, {'alpha': 0.1})
+        self.assertEqual([(round_['resources'], round_['candidates']) for round_ in history],
+                         [(60, 4), (120, 2), (240, 1)])
+        self.assertGreater(history[-1]['best_score'], 0.99)
+
+
+class StatusBot:
+    """Фейковый бот: считает отправки и правки сообщений"""
+
+    def __init__(self):
+        self.sent = 0
+        self.edited = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent += 1
+        return mock.Mock(message_id=1)
+
+    async def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        self.edited += 1
+
+
+@mock.patch.object(CycleStatusReporter, 'EDIT_INTERVAL', 0.005)
+@mock.patch('apps.parsing.utils.cycle_status.telegram_rate_limiter', QueueLimiter())
+@mock.patch('apps.parsing.utils.cycle_status.get_chat_id', lambda: '1')
+class CycleStatusReporterTests(SimpleTestCase):
+    """📋 Вызовов Telegram за цикл не больше MAX_EDITS + 2 при любом числе запросов"""
+
+    def run_cycle(self, verbosity, queries):
+        bot = StatusBot()
+
+        async def bot_factory():
+            return bot
+
+        async def cycle():
+            reporter = CycleStatusReporter(verbosity, bot_factory)
+            await reporter.start_cycle(total_queries=queries, windows=2)
+            for index in range(queries):
+                reporter.query_started(index % 2, f'iphone {index}')
+                await asyncio.sleep(0.002)
+                if index % 10 == 9:
+                    reporter.query_failed('timeout')
+                else:
+                    reporter.query_finished(found=5, processed=3, deals=index % 3 == 0)
+            await reporter.finish_cycle()
+
+        asyncio.run(cycle())
+        return bot.sent, bot.edited
+
+    def test_api_calls_do_not_grow_with_queries(self):
+        expected = {
+            VERBOSITY_OFF: (0, 0),
+            VERBOSITY_SUMMARY: (1, 0),
+            VERBOSITY_PROGRESS: (1, CycleStatusReporter.MAX_EDITS + 1),
+            VERBOSITY_DETAILED: (1, CycleStatusReporter.MAX_EDITS + 1),
+        }
+        for verbosity, calls in expected.items():
+            for queries in (50, 200):
+                with self.subTest(verbosity=verbosity, queries=queries):
+                    self.assertEqual(self.run_cycle(verbosity, queries), calls)
+
+
+class NotificationImageLimitTests(SimpleTestCase):
+    """🖼️ Уведомление берёт IMAGE_LIMIT фото, избранное — до MEDIA_GROUP_LIMIT"""
+
+    def setUp(self):
+        self.sender = NotificationSender()
+        self.urls = [f'https://example.com/{index}.jpg' for index in range(12)]
+
+        async def fetch_image(session, image_url):
+            return image_url.encode()
+
+        async def get_http_session():
+            return None
+
+        self.sender._fetch_image = fetch_image
+        self.sender._get_http_session = get_http_session
+
+    def test_notification_takes_image_limit(self):
+        images = asyncio.run(self.sender._fetch_images(self.urls))
+        self.assertEqual(len(images), NotificationSender.IMAGE_LIMIT)
+
+    def test_favorite_takes_full_media_group(self):
+        images = asyncio.run(self.sender._fetch_images(self.urls, limit=NotificationSender.MEDIA_GROUP_LIMIT))
+        self.assertEqual(images, [url.encode() for url in self.urls[:10]])
+
+    def test_media_group_keeps_ten_photos(self):
+        bot = mock.AsyncMock()
+        images = [url.encode() for url in self.urls[:10]]
+        asyncio.run(self.sender._send_media_group_with_caption(bot, 1, images, 'caption', None))
+        self.assertEqual(len(bot.send_media_group.call_args.kwargs['media']), 10)
+
+
+class MLLearningSystemTests(TestCase):
+    """🧠 Мозг учится из FoundItem потоково, каждый товар — один раз"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.website.models import FoundItem, SearchQuery
+
+        user = User.objects.create_user('brain')
+        cls.search_query = SearchQuery.objects.create(user=user, name='iphone', target_price=0)
+        cls.items = FoundItem.objects.bulk_create([
+            FoundItem(search_query=cls.search_query, title=f'iPhone {index}', price=10000 + index,
+                      category='phones', url=f'https://www.avito.ru/brain/{index}', ml_freshness_score=0.9)
+            for index in range(3)
+        ])
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.remove(os.path.join(directory, name)) for name in os.listdir(directory)])
+        self.state_path = os.path.join(directory, 'brain_state')
+        self.legacy_path = os.path.join(directory, 'brain_state.json')
+
+    def brain(self):
+        with mock.patch.object(MLLearningSystem, 'STATE_PATH', self.state_path):
+            brain = MLLearningSystem()
+        brain.LEGACY_STATE_JSON = self.legacy_path
+        return brain
+
+    def test_legacy_state_without_watermark_is_rebuilt(self):
+        with open(self.legacy_path, 'w', encoding='utf-8') as legacy:
+            json.dump({
+                'knowledge_base': {'category_insights': {'phones': {'total_items': 3, 'avg_price': 10001.0}}},
+                'stats': {'total_learned': 3, 'fresh_items_found': 3},
+            }, legacy)
+
+        brain = self.brain()
+        self.assertTrue(async_to_sync(brain.initialize_from_database)())
+        self.assertEqual(brain.total_learned, 3)
+        self.assertEqual(brain.knowledge_base['category_insights']['phones']['total_items'], 3)
+        self.assertEqual(brain.last_learned_item_id, max(item.id for item in self.items))
+
+        # Следующий запуск читает сохранённый водяной знак и ничего не пересчитывает
+        restarted = self.brain()
+        async_to_sync(restarted.initialize_from_database)()
+        self.assertEqual(restarted.total_learned, 3)
+        self.assertEqual(restarted.knowledge_base['category_insights']['phones']['total_items'], 3)
+
+    def test_reset_does_not_resurrect_removed_counters(self):
+        # Сохранённый мозг без водяного знака, со счётчиками категории, которой в базе нет
+        BinaryStateStore(self.state_path).save(
+            {'hourly_counts': {'tablets': [5] * 24}, 'daily_counts': {'tablets': [5] * 7}},
+            {'stats': {'total_learned': 3}},
+        )
+
+        brain = self.brain()
+        self.assertTrue(async_to_sync(brain.initialize_from_database)())
+        self.assertNotIn('tablets', brain.knowledge_base['timing_patterns'])
+
+        restarted = self.brain()
+        self.assertTrue(async_to_sync(restarted.load_brain_state)())
+        self.assertNotIn('tablets', restarted.knowledge_base['timing_patterns'])
+        self.assertEqual(sum(restarted.knowledge_base['timing_patterns']['phones']['hourly_counts']), 3)
+
+    def test_streaming_500k_rows_keeps_memory_bounded(self):
+        from apps.website.models import FoundItem
+
+        rows = 500000
+        table = FoundItem._meta.db_table
+        varied = {'id', 'url', 'price', 'category', 'ml_freshness_score', 'found_at', 'search_vector'}
+        columns = ', '.join(field.column for field in FoundItem._meta.concrete_fields if field.column not in varied)
+        with connection.cursor() as cursor:
+            # Размножаем первый товар средствами SQL, без триггеров search_vector и реестра url
+            # (отложенные проверки FK вставок выше иначе не дают изменить таблицу)
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(f'ALTER TABLE {table} DISABLE TRIGGER USER')
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}, url, price, category, ml_freshness_score, found_at) "
+                f"SELECT {columns}, url || '#' || n, 1000 + n %% 5000, 'cat' || n %% 20, (n %% 100) / 100.0, "
+                f"now() - (n %% 720) * interval '1 hour' "
+                f"FROM {table}, generate_series(1, %s) AS n WHERE id = %s",
+                [rows - len(self.items), self.items[0].id],
+            )
+            cursor.execute(f'ALTER TABLE {table} ENABLE TRIGGER USER')
+
+        brain = self.brain()
+        tracemalloc.start()
+        try:
+            processed = brain._learn_from_database_sync()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(processed, rows)
+        self.assertEqual(brain.total_learned, rows)
+        # Пачка в 2000 строк и хвосты паттернов (~5 МБ), а не вся таблица (сотни МБ)
+        self.assertLess(peak, 32 * 1024 * 1024)
@@ -0,0 +1,281 @@
+"""
+📋 СТАТУС ЦИКЛА ПАРСИНГА — ОДНО СООБЩЕНИЕ НА ЦИКЛ
+
+Вместо «начало парсинга» и «результаты» на каждый запрос копим счётчики
+цикла и показываем их в одном сообщении, которое редактируется на месте
+(edit_message_text). Правки идут в фоне и не чаще EDIT_INTERVAL, за цикл —
+не больше MAX_EDITS промежуточных плюс итоговая. Число вызовов API
+не зависит от количества запросов.
+
+Подробность — ParserSettings.status_verbosity:
+    off       — ничего не отправлять
+    summary   — одно сообщение с итогом в конце цикла
+    progress  — сообщение в начале цикла, дальше правки с прогрессом
+    detailed  — как progress, плюс строка на каждый запрос
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from html import escape
+from typing import List, Optional
+
+from asgiref.sync import sync_to_async
+from telegram.error import BadRequest, RetryAfter
+
+from shared.utils.config import get_chat_id
+from shared.utils.telegram_client import get_bot
+from .notification_sender import NotificationSender
+from .rate_limiter import telegram_rate_limiter
+
+logger = logging.getLogger('bot.notifications')
+
+VERBOSITY_OFF = 'off'
+VERBOSITY_SUMMARY = 'summary'
+VERBOSITY_PROGRESS = 'progress'
+VERBOSITY_DETAILED = 'detailed'
+
+
+@dataclass
+class QueryStatus:
+    """Результат одного запроса в цикле"""
+    query: str
+    window_index: int
+    found: int = 0
+    processed: int = 0
+    deals: bool = False
+    error: Optional[str] = None
+    finished: bool = False
+
+
+class CycleStatusReporter:
+    """📋 Агрегатор статусов запросов цикла → одно сообщение в Telegram"""
+
+    EDIT_INTERVAL = 10.0  # Секунд между правками сообщения
+    MAX_EDITS = 10  # Промежуточных правок за цикл (итоговая — сверх)
+    DETAILED_LINES = 30  # Последних запросов в режиме detailed
+    QUERY_DISPLAY_LENGTH = 40
+
+    def __init__(self, verbosity=VERBOSITY_PROGRESS, bot_factory=get_bot):
+        self.verbosity = verbosity
+        self.bot_factory = bot_factory
+        self.cycle_number = 0
+        self._user_labels = {}
+        self._reset()
+
+    def _reset(self):
+        self.total_queries = 0
+        self.windows = 0
+        self.user_label = ''
+        self.started_at = None
+        self.finished = False
+        self.queries: List[QueryStatus] = []
+        self.current: Optional[QueryStatus] = None
+
+        self._chat_id = None
+        self._message_id = None
+        self._last_text = None
+        self._last_edit = 0.0
+        self._edits = 0
+        self._dirty = False
+        self._updater = None
+        self._publishing = False
+
+    @property
+    def progressive(self):
+        return self.verbosity in (VERBOSITY_PROGRESS, VERBOSITY_DETAILED)
+
+    # ============================================
+    # СОБЫТИЯ ЦИКЛА
+    # ============================================
+
+    async def start_cycle(self, total_queries, windows, user_id=None):
+        """Новый цикл: сбрасываем счётчики (в режиме progress — отправляем сообщение)"""
+        await self._finish_updater()
+        self._reset()
+        self.cycle_number += 1
+        self.total_queries = total_queries
+        self.windows = windows
+        self.started_at = time.time()
+
+        if self.verbosity == VERBOSITY_OFF:
+            return
+
+        self._chat_id = get_chat_id()
+        self.user_label = await self._get_user_label(user_id)
+        self._schedule_update()
+
+    def query_started(self, window_index, query):
+        self.current = QueryStatus(query=query, window_index=window_index)
+        self.queries.append(self.current)
+        self._schedule_update()
+
+    def query_finished(self, found=0, processed=0, deals=False):
+        if self.current is None:
+            return
+        self.current.found = found
+        self.current.processed = processed
+        self.current.deals = bool(deals)
+        self.current.finished = True
+        self._schedule_update()
+
+    def query_failed(self, reason):
+        if self.current is None:
+            return
+        self.current.error = reason
+        self.current.finished = True
+        self._schedule_update()
+
+    async def finish_cycle(self):
+        """Итоговая правка (или единственное сообщение в режиме summary)"""
+        self.finished = True
+        self.current = None
+        if self.verbosity == VERBOSITY_OFF or not self._chat_id:
+            return
+
+        await self._finish_updater()
+        await self._publish()
+
+    # ============================================
+    # ОТПРАВКА
+    # ============================================
+
+    def _schedule_update(self):
+        """Правка в фоне: парсинг не ждёт Telegram, частые события склеиваются"""
+        if not self.progressive or not self._chat_id or self.finished:
+            return
+        if self._updater is not None and not self._updater.done():
+            self._dirty = True
+            return
+        self._dirty = True
+        self._updater = asyncio.get_running_loop().create_task(self._update_loop())
+
+    async def _update_loop(self):
+        while self._dirty:
+            if self._message_id is not None and self._edits >= self.MAX_EDITS:
+                return  # Остальное покажет итоговая правка
+            self._dirty = False
+
+            wait = self._last_edit + self.EDIT_INTERVAL - time.monotonic()
+            if self._message_id is not None and wait > 0:
+                await asyncio.sleep(wait)
+            await self._publish()
+
+    async def _finish_updater(self):
+        updater, self._updater = self._updater, None
+        if updater is None or updater.done():
+            return
+        if self._publishing:
+            # Запрос уже в Telegram: дожидаемся, иначе потеряем message_id
+            self._dirty = False
+            await updater
+        else:
+            updater.cancel()
+            try:
+                await updater
+            except asyncio.CancelledError:
+                pass
+
+    async def _publish(self):
+        text = self._render()
+        if text == self._last_text:
+            return
+
+        self._publishing = True
+        try:
+            bot = await self.bot_factory()
+            await telegram_rate_limiter.acquire(self._chat_id)
+            if self._message_id is None:
+                message = await bot.send_message(
+                    chat_id=self._chat_id,
+                    text=text,
+                    parse_mode='HTML',
+                    disable_web_page_preview=True
+                )
+                self._message_id = message.message_id
+            else:
+                await bot.edit_message_text(
+                    text=text,
+                    chat_id=self._chat_id,
+                    message_id=self._message_id,
+                    parse_mode='HTML',
+                    disable_web_page_preview=True
+                )
+                self._edits += 1
+
+            self._last_text = text
+            self._last_edit = time.monotonic()
+
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            seconds = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+            telegram_rate_limiter.pause(self._chat_id, seconds)
+        except BadRequest as e:
+            if 'not modified' not in str(e).lower():
+                logger.warning(f"⚠️ Не удалось обновить статус цикла: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка отправки статуса цикла: {e}")
+        finally:
+            self._publishing = False
+
+    async def _get_user_label(self, user_id):
+        if not user_id:
+            return ''
+        if user_id not in self._user_labels:
+            try:
+                from django.contrib.auth.models import User
+                user = await sync_to_async(User.objects.get)(id=user_id)
+                self._user_labels[user_id] = user.username
+            except Exception:
+                self._user_labels[user_id] = f"ID {user_id}"
+        return self._user_labels[user_id]
+
+    def _render(self):
+        done = [status for status in self.queries if status.finished]
+        found = sum(status.found for status in done)
+        processed = sum(status.processed for status in done)
+        with_deals = sum(1 for status in done if status.deals)
+        errors = sum(1 for status in done if status.error)
+        empty = sum(1 for status in done if not status.error and not status.found)
+
+        state = "✅ завершён" if self.finished else "⏳ идёт"
+        started = datetime.fromtimestamp(self.started_at).strftime("%H:%M:%S")
+        elapsed = NotificationSender.format_duration(time.time() - self.started_at)
+
+        lines = [f"🌀 <b>ЦИКЛ ПАРСИНГА #{self.cycle_number}</b> — {state}", ""]
+        if self.user_label:
+            lines.append(f"👤 <b>Пользователь:</b> {escape(self.user_label)}")
+        lines.append(f"⏰ <b>Начало:</b> {started} | ⏱️ {elapsed}")
+        lines.append(f"📊 <b>Запросов:</b> {len(done)}/{self.total_queries} | 🖥️ <b>Окон:</b> {self.windows}")
+        lines.append("")
+        lines.append(f"📈 <b>Найдено товаров:</b> {found}")
+        lines.append(f"• Обработано: <b>{processed}</b> | Отфильтровано: <b>{found - processed}</b>")
+        lines.append(f"• Запросов со сделками: <b>{with_deals}</b>")
+        if empty or errors:
+            lines.append(f"• Пустых: <b>{empty}</b> | Ошибок: <b>{errors}</b>")
+
+        if self.current is not None and not self.current.finished:
+            lines.append("")
+            lines.append(f"🔎 <b>Сейчас:</b> <code>{escape(self._short(self.current.query))}</code> "
+                         f"(окно {self.current.window_index + 1})")
+
+        if self.verbosity == VERBOSITY_DETAILED and done:
+            lines.append("")
+            lines.append("📋 <b>По запросам:</b>")
+            if len(done) > self.DETAILED_LINES:
+                lines.append(f"… ещё {len(done) - self.DETAILED_LINES}")
+            for status in done[-self.DETAILED_LINES:]:
+                mark = "⚠️" if status.error else ("🎉" if status.deals else "•")
+                lines.append(f"{mark} <code>{escape(self._short(status.query))}</code> — "
+                             f"{status.found}/{status.processed}")
+
+        return "\n".join(lines)
+
+    def _short(self, query):
+        if len(query) <= self.QUERY_DISPLAY_LENGTH:
+            return query
+        return query[:self.QUERY_DISPLAY_LENGTH - 1] + "…"
@@ -0,0 +1,466 @@
+"""
+💾 ПАКЕТНАЯ ЗАПИСЬ НАЙДЕННЫХ ТОВАРОВ
+
+Товар резервируется в памяти (claim), а пачка пишется в фоне одной
+транзакцией. Конвейер страницы уведомляет только о сохранённом товаре —
+save() ставит его в запись и ждёт, пока пачка с ним окажется в базе.
+Пачку не пишут сразу: она копится SAVE_FLUSH_INTERVAL от первого
+ждущего save(), пока SAVE_WORKERS воркеров этапа persist подкладывают в
+неё следующие товары страницы. Запросы на пачку:
+
+    1 запрос  — пользователи пачки (in_bulk)
+    1-2       — поисковые запросы (выборка + bulk_create недостающих)
+    1         — id уже сохранённых товаров пачки по url
+    1-2       — INSERT новых + UPDATE уже сохранённых
+
+Повторно найденный товар не создаётся заново — у него обновляются ML-поля
+и время обработки (UPSERT_FIELDS). ON CONFLICT (url) в секционированной
+таблице невозможен (нет уникального индекса по url), поэтому новые и
+сохранённые товары разделяются выборкой; если тот же url успел записать
+другой процесс, пачка повторяется.
+
+Уведомление о товаре к этому моменту уже может быть отправлено, поэтому
+пачка при ошибке не выбрасывается: она пишется по одному товару, а то, что
+не записалось и так, повторяется с паузами RETRY_DELAYS.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+
+logger = logging.getLogger('bot.notifications')
+
+# Поля, которые обновляются у уже сохранённого товара
+UPSERT_FIELDS = [
+    'ml_freshness_score', 'priority_score', 'freshness_category',
+    'parse_time_display', 'time_status',
+]
+SAVE_ATTEMPTS = 2  # Повтор пачки, если url параллельно записал другой процесс
+
+
+def _time_status(total_duration):
+    if total_duration <= 5:
+        return "⚡ Молниеносно"
+    if total_duration <= 15:
+        return "🚀 Быстро"
+    if total_duration <= 30:
+        return "🐇 Нормально"
+    if total_duration <= 60:
+        return "🐢 Медленно"
+    return "🚧 Очень медленно"
+
+
+def build_found_item(sender, product, economy, economy_percent, user, search_query):
+    """FoundItem со всеми полями Avito/Auto.ru, ML и временем (ещё не сохранён)"""
+    from apps.website.models import FoundItem
+
+    image_urls = product.get('image_urls', [])
+    if not image_urls and product.get('image_url'):
+        image_urls = [product.get('image_url')]
+
+    # 🔥 Просмотры: общее и за сегодня — всегда числа
+    views_count = product.get('views_count', 0)
+    views_today = product.get('views_today', 0)
+    try:
+        if isinstance(views_count, dict):
+            views_count = views_count.get('total_views', 0)
+        views_count = int(views_count) if views_count not in [None, ''] else 0
+        views_today = int(views_today) if views_today not in [None, ''] else 0
+    except (ValueError, TypeError) as e:
+        logger.warning(f"⚠️ Ошибка конвертации просмотров: {e}")
+        views_count = 0
+        views_today = 0
+
+    year_value = product.get('year')
+    if year_value and str(year_value).strip() and str(year_value).isdigit():
+        year_value = int(year_value)
+    else:
+        year_value = None
+
+    product_id = product.get('product_id') or product.get('item_id') or sender.extract_product_id(product['url'])
+
+    parse_duration = product.get('parse_time_seconds', 0)
+    search_duration = product.get('search_duration', 0)
+    total_duration = parse_duration + search_duration
+
+    item = FoundItem(
+        search_query=search_query,
+        parsed_by=user,
+        title=product['name'],
+        price=product['price'],
+        target_price=product.get('target_price', product['price']),
+        profit=economy,
+        profit_percent=economy_percent,
+        url=sender.normalize_url_universal(product['url'], product),
+        image_url=product.get('image_url'),
+        image_urls=image_urls,
+        description=product.get('description', '') or '',
+        seller_name=product.get('seller_name', ''),
+        seller_rating=product.get('seller_rating'),
+        reviews_count=product.get('reviews_count', 0),
+        category=product.get('avito_category', product.get('category', 'Не указана')),
+        city=product.get('city', 'Москва'),
+        posted_date=product.get('posted_date', ''),
+        views_count=views_count,
+        views_today=views_today,
+        is_notified=True,
+        address=product.get('address'),
+        color=product.get('color', 'Разноцветный'),
+        metro_stations=product.get('metro_stations', []),
+        full_location=product.get('full_location'),
+        is_favorite=False,
+        condition=product.get('condition') or 'Не указано',
+        source='auto_ru' if product.get('site', 'avito') == 'auto.ru' else 'avito',
+        seller_type=product.get('seller_type', 'Не указано'),
+
+        # 🚗 Поля Auto.ru
+        steering=product.get('steering', ''),
+        transmission=product.get('transmission', ''),
+        drive=product.get('drive', ''),
+        engine=product.get('engine', ''),
+        year=year_value,
+        mileage=product.get('mileage', ''),
+        owners=product.get('owners', ''),
+        pts=product.get('pts', ''),
+        tax=product.get('tax', ''),
+        customs=product.get('customs', ''),
+        body=product.get('body', ''),
+        package=product.get('package', ''),
+        price_status=product.get('price_status', ''),
+        discount_price=product.get('discount_price') or 0,
+        product_id=product_id,
+        seller_avatar=product.get('seller_avatar'),
+        seller_profile_url=product.get('seller_profile_url'),
+
+        # 🧠 ML
+        ml_freshness_score=product.get('ml_freshness_score', 0.5),
+        priority_score=product.get('priority_score', 50.0),
+        freshness_category=product.get('ml_freshness_category', 'БЕЗ ML'),
+
+        # ⏱️ Время обработки
+        parse_time_display=product.get('parse_time_display', sender.format_duration(parse_duration)),
+        parse_time_seconds=int(parse_duration),
+        search_duration_seconds=int(search_duration),
+        total_processing_seconds=int(total_duration),
+        time_status=_time_status(total_duration),
+    )
+
+    # bulk_create не вызывает save(): та же защита цен, что и в FoundItem.save()
+    item.clean()
+    return item
+
+
+class FoundItemWriter:
+    """💾 Буфер найденных товаров с фоновой пакетной записью
+
+        if await writer.claim(product, economy, economy_percent, user_id):
+            ...  # товар новый — можно уведомлять, запись догонит в фоне
+        if await writer.save(product, economy, economy_percent, user_id):
+            ...  # товар новый и уже в базе
+        await writer.flush()  # конец страницы / остановка парсера
+    """
+
+    BATCH_SIZE = 50  # Товаров в одной транзакции
+    FLUSH_INTERVAL = 5.0  # Секунд до записи неполной пачки
+    SAVE_FLUSH_INTERVAL = 0.5  # Столько save() ждёт соседей по пачке (задержка уведомления)
+    SAVE_WORKERS = 8  # Воркеров этапа persist: параллельные save() наполняют одну пачку
+    RETRY_DELAYS = (1.0, 5.0, 30.0)  # Паузы перед повторами незаписанных товаров
+    KNOWN_URLS_LIMIT = 50000  # Кэш «url есть в базе» сбрасывается, когда разрастается
+
+    def __init__(self, sender):
+        self.sender = sender
+        self._pending: List[Tuple[dict, float, int, int]] = []
+        self._pending_urls: Set[str] = set()
+        self._retrying: List[Tuple[dict, float, int, int]] = []  # Ждут повтора после ошибки
+        self._attempts: Dict[str, int] = {}  # url -> неудачных попыток записи
+        self._written: Dict[str, asyncio.Future] = {}  # url -> True/False, когда запись закончилась (save)
+        self._known_urls: Set[str] = set()  # Точно есть в базе (из prefetch / прошлых записей)
+        self._checked_urls: Set[str] = set()  # Проверены prefetch'ем
+        self._flush_task = None
+        self._retry_task = None
+        self._save_wakeup = None  # Таймер SAVE_FLUSH_INTERVAL от первого ждущего save()
+        self._batch_ready = asyncio.Event()
+        self._lock = None
+
+    # ============================================
+    # ПУБЛИЧНЫЙ API
+    # ============================================
+
+    async def prefetch(self, products):
+        """Одним запросом узнаёт, какие товары страницы уже есть в базе"""
+        urls = {self.sender.normalize_url_universal(product['url'], product) for product in products if product.get('url')}
+        urls -= self._checked_urls
+        if not urls:
+            return
+        self._remember(known=await sync_to_async(self.existing_urls)(urls), checked=urls)
+
+    async def claim(self, product, economy, economy_percent, user_id):
+        """Ставит товар в очередь записи. True — товара ещё нет в базе (можно уведомлять)"""
+        url = self.sender.normalize_url_universal(product['url'], product)
+        if url in self._pending_urls:
+            return False
+
+        if url not in self._checked_urls:
+            self._remember(known=await sync_to_async(self.existing_urls)({url}), checked={url})
+
+        # Уже сохранённый товар тоже пишем: обновятся ML-поля и время
+        self._pending.append((product, economy, economy_percent, user_id))
+        self._pending_urls.add(url)
+        self._schedule_flush()
+        return url not in self._known_urls
+
+    async def save(self, product, economy, economy_percent, user_id):
+        """claim + ожидание записи. True — товар новый и уже в базе (можно уведомлять)"""
+        url = self.sender.normalize_url_universal(product['url'], product)
+        if url in self._pending_urls:
+            return False
+
+        written = asyncio.get_running_loop().create_future()
+        self._written[url] = written
+        try:
+            is_new = await self.claim(product, economy, economy_percent, user_id)
+            self._wake_flush_after(self.SAVE_FLUSH_INTERVAL)
+            saved = await written  # Пачку запишет _delayed_flush; не записался — ждём повторов
+        finally:
+            self._written.pop(url, None)
+        return is_new and saved
+
+    async def flush(self):
+        """Записывает всё накопленное (пачками по BATCH_SIZE)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self._pending:
+                batch, self._pending = self._pending[:self.BATCH_SIZE], self._pending[self.BATCH_SIZE:]
+                failed = await self._save_with_fallback(batch)
+                failed_urls = {self._url(entry) for entry in failed}
+                saved_urls = {self._url(entry) for entry in batch} - failed_urls
+
+                self._pending_urls -= saved_urls
+                for url in saved_urls:
+                    self._attempts.pop(url, None)
+                    self._resolve_written(url, True)
+                self._remember(known=saved_urls)
+
+                if failed:
+                    self._retry_later(failed)
+                    if not saved_urls:
+                        break  # База недоступна — остальное запишет повтор
+
+            if not self._pending:
+                self._cancel_save_wakeup()
+
+    async def close(self):
+        """Дописывает буфер (при остановке парсера)"""
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            self._batch_ready.set()
+            await task
+        await self.flush()
+        # Незаписанные товары — повторы с паузами, пока не кончатся попытки
+        while self._retrying and self._retry_task is not None:
+            await self._retry_task
+        self._known_urls.clear()
+        self._checked_urls.clear()
+
+    # ============================================
+    # БАЗА ДАННЫХ (синхронно)
+    # ============================================
+
+    @staticmethod
+    def existing_urls(urls) -> Set[str]:
+        from apps.website.models import FoundItem
+        return set(FoundItem.objects.filter(url__in=list(urls)).values_list('url', flat=True))
+
+    def save_batch(self, entries):
+        """Пачка товаров [(product, economy, economy_percent, user_id)] одной транзакцией"""
+        from apps.website.models import FoundItem, SearchQuery
+        from apps.website.dashboard_stats import invalidate_dashboard_stats
+        from apps.website.live_feed import publish_found_items
+        from django.contrib.auth.models import User
+
+        started = time.time()
+        users = User.objects.in_bulk({user_id for *_, user_id in entries})
+
+        entries = [entry for entry in entries if entry[3] in users]
+        if not entries:
+            logger.error("❌ Пакетное сохранение: пользователи не найдены")
+            return 0
+
+        for attempt in range(1, SAVE_ATTEMPTS + 1):
+            try:
+                items, created = self._write_batch(FoundItem, SearchQuery, users, entries)
+                break
+            except IntegrityError as e:
+                if attempt == SAVE_ATTEMPTS:
+                    raise
+                logger.warning(f"⚠️ Пакетное сохранение: url уже записан другим процессом, повтор ({e})")
+
+        logger.info(
+            f"💾 Сохранено товаров: {len(items)} (новых {len(created)}) "
+            f"за {time.time() - started:.2f}с (одна транзакция)"
+        )
+
+        # 📡 Новые товары — сразу на открытые дашборды (повторно найденные там уже есть)
+        publish_found_items(created)
+        # 📊 Счётчики дашборда владельцев пересчитаются на следующем открытии
+        invalidate_dashboard_stats(item.search_query.user_id for item in created)
+        return len(items)
+
+    def _write_batch(self, model, search_query_model, users, entries):
+        """Одна транзакция: новые товары — INSERT, сохранённые — UPDATE UPSERT_FIELDS"""
+        with transaction.atomic():
+            search_queries = self._resolve_search_queries(search_query_model, users, entries)
+
+            # Один URL в пачке — одна строка
+            items = {}
+            for product, economy, economy_percent, user_id in entries:
+                key = (user_id, product['name'][:50])
+                item = build_found_item(
+                    self.sender, product, economy, economy_percent, users[user_id], search_queries[key]
+                )
+                items[item.url] = item
+
+            saved = dict(model.objects.filter(url__in=list(items)).values_list('url', 'id'))
+            created = [item for url, item in items.items() if url not in saved]
+            updated = []
+            for url, item_id in saved.items():
+                item = items[url]
+                item.id = item_id
+                updated.append(item)
+
+            if created:
+                model.objects.bulk_create(created)
+            if updated:
+                model.objects.bulk_update(updated, UPSERT_FIELDS)
+
+        return items, created
+
+    @staticmethod
+    def _resolve_search_queries(model, users, entries):
+        """(user_id, название) -> SearchQuery: одна выборка + bulk_create недостающих"""
+        wanted = {}
+        for product, *_, user_id in entries:
+            wanted.setdefault((user_id, product['name'][:50]), product)
+
+        found = {}
+        existing = model.objects.filter(
+            user_id__in={user_id for user_id, _ in wanted},
+            name__in={name for _, name in wanted},
+        ).order_by('id')
+        for search_query in existing:
+            found.setdefault((search_query.user_id, search_query.name), search_query)
+
+        missing = [
+            model(
+                user=users[user_id],
+                name=name,
+                category=product.get('avito_category', product.get('category', 'Не указана')),
+                target_price=product.get('target_price', product['price']),
+                min_price=0,
+                max_price=1000000,
+                is_active=True,
+            )
+            for (user_id, name), product in wanted.items()
+            if (user_id, name) not in found
+        ]
+        if missing:
+            for search_query in model.objects.bulk_create(missing):
+                found[(search_query.user_id, search_query.name)] = search_query
+        return found
+
+    def _url(self, entry):
+        return self.sender.normalize_url_universal(entry[0]['url'], entry[0])
+
+    def _remember(self, known=frozenset(), checked=frozenset()):
+        """Пополняет кэш url; при KNOWN_URLS_LIMIT начинает его заново (url перепроверятся запросом)"""
+        if len(self._known_urls) + len(self._checked_urls) >= self.KNOWN_URLS_LIMIT:
+            self._known_urls.clear()
+            self._checked_urls.clear()
+        self._known_urls |= known
+        self._checked_urls |= checked
+
+    async def _save_with_fallback(self, batch):
+        """Пишет пачку; при ошибке — по одному товару. Возвращает незаписанные"""
+        try:
+            await sync_to_async(self.save_batch)(batch)
+            return []
+        except Exception as e:
+            logger.error(f"❌ Ошибка пакетного сохранения {len(batch)} товаров: {e}")
+        if len(batch) == 1:
+            return batch
+
+        failed = []
+        for entry in batch:
+            try:
+                await sync_to_async(self.save_batch)([entry])
+            except Exception as e:
+                logger.error(f"❌ Товар не сохранён: {self._url(entry)}: {e}")
+                failed.append(entry)
+        logger.info(f"💾 По одному сохранено {len(batch) - len(failed)} из {len(batch)} товаров")
+        return failed
+
+    def _retry_later(self, entries):
+        """Откладывает незаписанные товары на повтор; после RETRY_DELAYS попыток — сдаётся"""
+        retry = []
+        for entry in entries:
+            url = self._url(entry)
+            attempt = self._attempts.get(url, 0) + 1
+            if attempt > len(self.RETRY_DELAYS):
+                self._attempts.pop(url, None)
+                self._pending_urls.discard(url)
+                logger.error(f"🚨 Товар не записан после {attempt - 1} повторов, потерян: {url}")
+                self._resolve_written(url, False)
+                continue
+            self._attempts[url] = attempt
+            retry.append(entry)
+
+        self._retrying.extend(retry)
+        if retry and (self._retry_task is None or self._retry_task.done()):
+            delay = self.RETRY_DELAYS[max(self._attempts[self._url(entry)] for entry in retry) - 1]
+            logger.warning(f"🔁 Повтор записи {len(retry)} товаров через {delay:.0f}с")
+            self._retry_task = asyncio.get_running_loop().create_task(self._retry_flush(delay))
+
+    def _resolve_written(self, url, saved):
+        written = self._written.get(url)
+        if written is not None and not written.done():
+            written.set_result(saved)
+
+    async def _retry_flush(self, delay):
+        await asyncio.sleep(delay)
+        self._pending, self._retrying = self._retrying + self._pending, []
+        self._retry_task = None
+        await self.flush()
+
+    def _wake_flush_after(self, delay):
+        """Неполная пачка запишется не позже чем через delay (а не FLUSH_INTERVAL)"""
+        if self._save_wakeup is None:
+            self._save_wakeup = asyncio.get_running_loop().call_later(delay, self._on_save_wakeup)
+
+    def _on_save_wakeup(self):
+        self._save_wakeup = None
+        self._batch_ready.set()
+
+    def _cancel_save_wakeup(self):
+        if self._save_wakeup is not None:
+            self._save_wakeup.cancel()
+            self._save_wakeup = None
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+        if len(self._pending) >= self.BATCH_SIZE:
+            self._batch_ready.set()
+
+    async def _delayed_flush(self):
+        """Пишет пачку, как только она набралась, но не позже FLUSH_INTERVAL"""
+        try:
+            await asyncio.wait_for(self._batch_ready.wait(), self.FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        self._batch_ready.clear()
+        await self.flush()
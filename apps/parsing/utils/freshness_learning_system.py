@@ -1,24 +1,37 @@
 import logging
 import numpy as np
 import asyncio
-import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from collections import defaultdict, deque
 import hashlib
 
+from .state_store import BinaryStateStore, load_legacy_json
+from .text_matcher import get_matcher
+
 logger = logging.getLogger('parser.ai')
 
 
 class FreshnessLearningSystem:
     """🔥 СИСТЕМА ОБУЧЕНИЯ ДЛЯ СВЕЖЕСТИ ОБЪЯВЛЕНИЙ"""
 
+    FRESHNESS_KEYWORDS = [
+        'только что', 'сегодня', 'минут', 'час', 'только добавлен',
+        'срочно', 'быстро', 'срочная продажа', 'новый', 'не использовался'
+    ]
+
+    STATE_PATH = 'freshness_learning_state'
+    LEGACY_STATE_JSON = 'freshness_learning_state.json'
+
     def __init__(self, db_path="freshness_knowledge.db"):
         self.db_path = db_path
         self.freshness_patterns = {}
         self.timing_optimization = {}
         self.category_freshness = {}
         self.successful_patterns = deque(maxlen=1000)
+        self.state_store = BinaryStateStore(self.STATE_PATH)
+        self._changed_categories = set()  # Изменены с последнего сохранения (пишутся только они)
+        self.keyword_matcher = get_matcher({'freshness': self.FRESHNESS_KEYWORDS})
 
         # 🔥 БАЗА ЗНАНИЙ СВЕЖЕСТИ
         self.freshness_knowledge = {
@@ -106,6 +119,7 @@ class FreshnessLearningSystem:
             hour = found_time.hour
             day_of_week = found_time.weekday()
 
+            self._changed_categories.add(category)
             if category not in self.timing_optimization:
                 self.timing_optimization[category] = {
                     'hourly_pattern': [0] * 24,
@@ -126,6 +140,7 @@ class FreshnessLearningSystem:
     async def _update_freshness_patterns(self, features, category):
         """🎯 Обновляем паттерны признаков свежести"""
         try:
+            self._changed_categories.add(category)
             if category not in self.freshness_patterns:
                 self.freshness_patterns[category] = {
                     'feature_counts': defaultdict(int),
@@ -154,6 +169,7 @@ class FreshnessLearningSystem:
     async def _update_successful_queries(self, query, category):
         """🔍 Обновляем успешные запросы"""
         try:
+            self._changed_categories.add(category)
             if category not in self.freshness_knowledge['successful_queries']:
                 self.freshness_knowledge['successful_queries'][category] = {}
 
@@ -175,13 +191,9 @@ class FreshnessLearningSystem:
             features = {}
 
             # 🔥 ТЕКСТОВЫЕ ПРИЗНАКИ СВЕЖЕСТИ
-            freshness_keywords = [
-                'только что', 'сегодня', 'минут', 'час', 'только добавлен',
-                'срочно', 'быстро', 'срочная продажа', 'новый', 'не использовался'
-            ]
-
-            for keyword in freshness_keywords:
-                features[f'keyword_{keyword}'] = 1.0 if keyword in text else 0.0
+            found = self.keyword_matcher.find_terms(text)
+            for keyword in self.FRESHNESS_KEYWORDS:
+                features[f'keyword_{keyword}'] = 1.0 if keyword in found else 0.0
 
             # 🔥 ВРЕМЕННЫЕ ПРИЗНАКИ
             time_listed = item.get('time_listed', 24)
@@ -322,18 +334,33 @@ class FreshnessLearningSystem:
             return {}
 
     async def _save_learning_state(self):
-        """💾 Сохранение состояния обучения"""
+        """💾 Сохранение состояния обучения (только изменения, бинарно)"""
         try:
-            state = {
-                'timing_optimization': self.timing_optimization,
+            counters = {
+                'hourly_pattern': {
+                    category: p['hourly_pattern'] for category, p in self.timing_optimization.items()
+                },
+                'daily_pattern': {
+                    category: p['daily_pattern'] for category, p in self.timing_optimization.items()
+                },
+            }
+
+            records = {
                 'freshness_patterns': self.freshness_patterns,
-                'freshness_knowledge': self.freshness_knowledge,
-                'successful_patterns': list(self.successful_patterns),
-                'last_saved': datetime.now().isoformat()
+                'successful_patterns': {'recent': list(self.successful_patterns)},
+                'meta': {'last_saved': datetime.now().isoformat()}
             }
+            for section, items in self.freshness_knowledge.items():
+                records[f'knowledge:{section}'] = items
 
-            with open('freshness_learning_state.json', 'w', encoding='utf-8') as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
+            changed = {
+                section: self._changed_categories
+                for section in ('hourly_pattern', 'daily_pattern', 'freshness_patterns', 'knowledge:successful_queries')
+            }
+            changed['successful_patterns'] = ['recent']
+            changed['meta'] = ['last_saved']
+            self.state_store.save(counters, records, changed)
+            self._changed_categories = set()
 
             logger.info("💾 Состояние обучения свежести сохранено")
 
@@ -343,27 +370,65 @@ class FreshnessLearningSystem:
     async def load_learning_state(self):
         """📥 Загрузка состояния обучения"""
         try:
-            with open('freshness_learning_state.json', 'r', encoding='utf-8') as f:
-                state = json.load(f)
+            if self.state_store.exists():
+                counters, records = self.state_store.load()
+            else:
+                legacy = load_legacy_json(self.LEGACY_STATE_JSON)
+                if legacy is None:
+                    logger.info("📥 Файл состояния обучения не найден, начинаем с чистого листа")
+                    return True
+                counters, records = self._split_legacy_state(legacy)
+
+            hourly = counters.get('hourly_pattern', {})
+            daily = counters.get('daily_pattern', {})
+            self.timing_optimization = {}
+            for category in set(hourly) | set(daily):
+                hourly_pattern = [int(v) for v in hourly.get(category, [0] * 24)]
+                self.timing_optimization[category] = {
+                    'hourly_pattern': hourly_pattern,
+                    'daily_pattern': [int(v) for v in daily.get(category, [0] * 7)],
+                    'total_finds': sum(hourly_pattern)
+                }
 
-            self.timing_optimization = state.get('timing_optimization', {})
-            self.freshness_patterns = state.get('freshness_patterns', {})
-            self.freshness_knowledge = state.get('freshness_knowledge', {})
+            self.freshness_patterns = {
+                category: {**pattern, 'feature_counts': defaultdict(int, pattern.get('feature_counts', {}))}
+                for category, pattern in records.get('freshness_patterns', {}).items()
+            }
+            self.freshness_knowledge = {
+                section[len('knowledge:'):]: items
+                for section, items in records.items()
+                if section.startswith('knowledge:')
+            } or self.freshness_knowledge
             self.successful_patterns = deque(
-                state.get('successful_patterns', []),
+                records.get('successful_patterns', {}).get('recent', []),
                 maxlen=1000
             )
 
+            if not self.state_store.exists():
+                await self._save_learning_state()
+
             logger.info("📥 Состояние обучения свежести загружено")
             return True
 
-        except FileNotFoundError:
-            logger.info("📥 Файл состояния обучения не найден, начинаем с чистого листа")
-            return True
         except Exception as e:
             logger.warning(f"⚠️ Ошибка загрузки состояния обучения: {e}")
             return False
 
+    def _split_legacy_state(self, state):
+        """Старый freshness_learning_state.json -> (counters, records)"""
+        timing = state.get('timing_optimization', {})
+        counters = {
+            'hourly_pattern': {category: p.get('hourly_pattern', [0] * 24) for category, p in timing.items()},
+            'daily_pattern': {category: p.get('daily_pattern', [0] * 7) for category, p in timing.items()},
+        }
+        records = {
+            'freshness_patterns': state.get('freshness_patterns', {}),
+            'successful_patterns': {'recent': state.get('successful_patterns', [])},
+        }
+        for section, items in state.get('freshness_knowledge', {}).items():
+            records[f'knowledge:{section}'] = items
+        return counters, records
+
     async def get_learning_stats(self) -> Dict[str, Any]:
         """📊 Статистика обучения для совместимости"""
         progress = await self.get_learning_progress()
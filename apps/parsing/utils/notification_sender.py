@@ -6,14 +6,19 @@ from asgiref.sync import sync_to_async
 from urllib.parse import urlparse
 import hashlib
 import base64
+import weakref
 import aiohttp
 from html import escape
 import re
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-from telegram import Bot, InputMediaPhoto, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import InputMediaPhoto, InlineKeyboardButton, InlineKeyboardMarkup
 from shared.utils.config import get_bot_token, get_chat_id
+from shared.utils.telegram_client import get_bot, run_sync
+from .rate_limiter import telegram_rate_limiter
+from .telegram_queue import telegram_queue, PRIORITY_ALERT, PRIORITY_DEAL, PRIORITY_STATUS
+from .found_item_writer import FoundItemWriter
 
 logger = logging.getLogger('bot.notifications')
 
@@ -21,9 +26,17 @@ logger = logging.getLogger('bot.notifications')
 class NotificationSender:
     """УНИВЕРСАЛЬНЫЙ ОТПРАВЩИК УВЕДОМЛЕНИЙ С ТРЕКИНГОМ ВРЕМЕНИ"""
 
+    IMAGE_LIMIT = 5  # Фото в уведомлении
+    MEDIA_GROUP_LIMIT = 10  # Фото в избранном (максимум медиагруппы Telegram)
+    IMAGE_FETCH_BUDGET = 8.0  # Секунд на загрузку всех фото одного объявления
+
+    # loop -> aiohttp.ClientSession: общая для всех экземпляров (избранное создаёт свой sender)
+    _http_sessions = weakref.WeakKeyDictionary()
+
     def __init__(self):
         self.retry_count = 0
         self.max_retries = 3
+        self.found_item_writer = FoundItemWriter(self)
 
     @staticmethod
     def format_duration(seconds: float) -> str:
@@ -93,8 +106,12 @@ class NotificationSender:
         except Exception as e:
             return hashlib.md5(url.encode()).hexdigest()[:12]
 
-    def normalize_url_universal(self, url):
-        """УНИВЕРСАЛЬНАЯ НОРМАЛИЗАЦИЯ URL - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
+    def normalize_url_universal(self, url, product_data=None):
+        """УНИВЕРСАЛЬНАЯ НОРМАЛИЗАЦИЯ URL - ИСПРАВЛЕННАЯ ВЕРСИЯ
+
+        product_data — данные именно этого товара (пакетная запись);
+        без него берётся текущий обрабатываемый товар.
+        """
         try:
             # 🔥 ДЛЯ AUTO.RU - ВОЗВРАЩАЕМ ОРИГИНАЛЬНЫЙ URL БЕЗ ИЗМЕНЕНИЙ
             if 'auto.ru' in url:
@@ -102,8 +119,10 @@ class NotificationSender:
                 return url
 
             # 🔥 ДЛЯ AVITO - используем product_id из данных если есть
-            if hasattr(self, 'current_product_data'):
-                product_id = self.current_product_data.get('product_id') or self.current_product_data.get('item_id')
+            if product_data is None:
+                product_data = getattr(self, 'current_product_data', None)
+            if product_data:
+                product_id = product_data.get('product_id') or product_data.get('item_id')
                 if product_id:
                     normalized_url = f"https://www.avito.ru/items/{product_id}"
                     logger.debug(f"🔗 Нормализация Avito URL с product_id: {normalized_url}")
@@ -200,35 +219,33 @@ class NotificationSender:
             traceback.print_exc()
             return 0
 
-    async def _save_to_cache(self, product_id, normalized_url, product_name, time_data=None):
-        """Сохранение в кэш с данными о времени"""
+    async def _save_to_cache(self, product_id, normalized_url, product_name):
+        """Сохранение в кэш: один upsert по product_id"""
         try:
             from apps.website.models import NotificationCache
+            return await sync_to_async(NotificationCache.add_to_cache)(
+                product_id=product_id,
+                normalized_url=normalized_url,
+                product_name=product_name
+            )
 
-            @sync_to_async
-            def save_to_database():
-                cache_entry = NotificationCache.add_to_cache(
-                    product_id=product_id,
-                    normalized_url=normalized_url,
-                    product_name=product_name[:255]
-                )
-
-                # Если есть данные о времени, обновляем дополнительными полями
-                if time_data and cache_entry:
-                    cache_entry.parse_duration = time_data.get('parse_duration_seconds', 0)
-                    cache_entry.search_duration = time_data.get('search_duration_seconds', 0)
-                    cache_entry.total_duration = time_data.get('total_duration_seconds', 0)
-                    cache_entry.time_status = time_data.get('time_status', '')
-                    cache_entry.save()
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения в кэш: {e}")
+            raise e
 
-                return cache_entry
+    async def filter_new_products(self, products):
+        """🔥 ПАКЕТНАЯ ПРОВЕРКА ДУБЛИКАТОВ: товары, которых нет в кэше (один запрос)"""
+        try:
+            from apps.website.models import NotificationCache
 
-            cache_entry = await save_to_database()
-            return cache_entry
+            product_ids = [self.extract_product_id(product.get('url', '')) for product in products]
+            urls = [product.get('url', '') for product in products]
+            new_ids = set(await sync_to_async(NotificationCache.filter_new)(product_ids, urls))
+            return [product for product, product_id in zip(products, product_ids) if str(product_id) in new_ids]
 
         except Exception as e:
-            logger.error(f"❌ Ошибка сохранения в кэш: {e}")
-            raise e
+            logger.error(f"❌ Ошибка пакетной проверки дубликатов: {e}")
+            return list(products)
 
     def create_notification_keyboard(self, product_url):
         """Создает клавиатуру для уведомления"""
@@ -254,41 +271,65 @@ class NotificationSender:
             except:
                 return None
 
-    async def _url_to_base64(self, image_url):
-        """Конвертирует URL изображения в base64"""
+    async def _get_http_session(self):
+        """aiohttp-сессия текущего event loop (одна на все картинки всех объявлений)"""
+        loop = asyncio.get_running_loop()
+        session = self._http_sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.IMAGE_FETCH_BUDGET),
+                connector=aiohttp.TCPConnector(limit=self.MEDIA_GROUP_LIMIT * 2, limit_per_host=self.MEDIA_GROUP_LIMIT)
+            )
+            self._http_sessions[loop] = session
+        return session
+
+    async def close(self):
+        """Закрывает HTTP-сессию текущего event loop"""
+        session = self._http_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def _fetch_image(self, session, image_url):
+        """Скачивает картинку как есть (bytes)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url, timeout=15) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        return f"data:image/jpeg;base64,{base64.b64encode(image_data).decode()}"
-            return None
+            async with session.get(image_url) as response:
+                if response.status == 200:
+                    return await response.read()
+                logger.debug(f"⚠️ HTTP {response.status} для изображения {image_url}")
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.warning(f"⚠️ Ошибка загрузки изображения {image_url}: {e}")
-            return None
+        return None
 
-    async def _get_all_images(self, product_data, image_data=None):
-        """Получает все изображения товара"""
-        all_images = []
+    async def _fetch_images(self, image_urls, limit=None):
+        """🖼️ Параллельная загрузка картинок объявления с общим бюджетом времени
 
-        image_urls = product_data.get('image_urls', [])
-        if image_urls:
-            success_count = 0
-            error_count = 0
+        Берёт первые limit фото (по умолчанию IMAGE_LIMIT). Что не успело
+        за IMAGE_FETCH_BUDGET — отменяется; порядок фото сохраняется.
+        """
+        image_urls = [url for url in image_urls[:limit or self.IMAGE_LIMIT] if url]
+        if not image_urls:
+            return []
 
-            for image_url in image_urls[:5]:
-                try:
-                    image_base64 = await self._url_to_base64(image_url)
-                    if image_base64:
-                        all_images.append(image_base64)
-                        success_count += 1
-                except Exception as e:
-                    error_count += 1
-                    if error_count == 1:
-                        logger.debug(f"⚠️ Ошибка конвертации изображения: {e}")
-
-            if error_count > 0:
-                logger.warning(f"⚠️ Не удалось конвертировать {error_count} изображений")
+        session = await self._get_http_session()
+        tasks = [asyncio.create_task(self._fetch_image(session, url)) for url in image_urls]
+        done, pending = await asyncio.wait(tasks, timeout=self.IMAGE_FETCH_BUDGET)
+        for task in pending:
+            task.cancel()
+
+        if pending:
+            logger.warning(f"⏱️ Не уложились в {self.IMAGE_FETCH_BUDGET:.0f} с: пропущено {len(pending)} изображений")
+
+        return [task.result() for task in tasks if task in done and task.result()]
+
+    async def _get_all_images(self, product_data, image_data=None):
+        """Получает все изображения товара (bytes; base64 только от старых источников)"""
+        all_images = await self._fetch_images(product_data.get('image_urls') or [])
+
+        failed = min(len(product_data.get('image_urls') or []), self.IMAGE_LIMIT) - len(all_images)
+        if failed > 0:
+            logger.warning(f"⚠️ Не удалось загрузить {failed} изображений")
 
         if not all_images and image_data:
             all_images = [image_data]
@@ -298,6 +339,15 @@ class NotificationSender:
 
         return all_images
 
+    @staticmethod
+    def _image_bytes(image):
+        """bytes как есть; base64 / data:image;base64 (auto.ru, старый кэш) — декодируем"""
+        if isinstance(image, (bytes, bytearray)):
+            return bytes(image)
+        if image.startswith('data:'):
+            image = image.split(',', 1)[1]
+        return base64.b64decode(image)
+
     def _generate_hashtags(self, product_data):
         """Генерирует умные теги на основе частоты слов в названии, категории и описании"""
         try:
@@ -732,12 +782,16 @@ class NotificationSender:
 
         return message
 
-    async def send_notification(self, product_data, image_data=None):
-        """ОТПРАВКА УВЕДОМЛЕНИЯ - БЕЗ ДУБЛЕЙ"""
+    async def send_notification(self, product_data, image_data=None, chat_ids=None):
+        """ОТПРАВКА УВЕДОМЛЕНИЯ - БЕЗ ДУБЛЕЙ
+
+        chat_ids — несколько получателей одной сделки (по умолчанию основной
+        чат): фото загружаются в Telegram один раз, остальным — по file_id.
+        """
         try:
             product_url = product_data['url']
             product_id = self.extract_product_id(product_url)
-            normalized_url = self.normalize_url_universal(product_url)
+            normalized_url = self.normalize_url_universal(product_url, product_data)
 
             # 🔥 ПРОСТАЯ ПРОВЕРКА: ЕСТЬ В БАЗЕ - ПРОПУСТИТЬ, НЕТ - ОБРАБОТАТЬ
             if await self.is_duplicate_url(product_url):
@@ -747,7 +801,8 @@ class NotificationSender:
             logger.info(f"📨 Отправляем уведомление: {product_data['name']} (ID: {product_id})")
 
             token = get_bot_token()
-            chat_id = get_chat_id()
+            chat_ids = list(chat_ids) if chat_ids else [get_chat_id()]
+            chat_id = chat_ids[0]
 
             if not token or token == 'ваш_токен_бота':
                 logger.error("❌ Токен бота не установлен или установлен по умолчанию")
@@ -757,53 +812,34 @@ class NotificationSender:
                 logger.error("❌ Chat ID не установлен")
                 return False
 
-            bot = Bot(token=token)
             all_images = await self._get_all_images(product_data, image_data)
             message = self._format_message(product_data)
             reply_markup = self.create_notification_keyboard(product_url)
 
-            success = False
-
-            # 🔥 ОДНА ПОПЫТКА ОТПРАВКИ - ЛИБО МЕДИА-ГРУППА, ЛИБО ТЕКСТ, НЕ ОБА ВАРИАНТА!
-            if len(all_images) >= 1:
-                logger.info(f"🖼️ Отправка медиа-группы из {len(all_images)} фото")
-                success = await self._send_media_group_with_caption(
-                    bot, chat_id, all_images, message, reply_markup
-                )
-
-                # 🔥 НЕ ПЫТАЕМСЯ ОТПРАВИТЬ ТЕКСТ ЕСЛИ НЕ УДАЛОСЬ ОТПРАВИТЬ ФОТО
-                if not success:
-                    logger.error("❌ Не удалось отправить медиа-группу")
+            # 🔥 ОДНО СООБЩЕНИЕ - ЛИБО МЕДИА-ГРУППА, ЛИБО ТЕКСТ С КНОПКАМИ
+            # Отправку, лимиты и повторы берёт на себя очередь: парсинг не ждёт Telegram
+            photos = [self._image_bytes(image) for image in all_images[:self.IMAGE_LIMIT]]
+            if photos:
+                logger.info(f"🖼️ В очередь: медиа-группа из {len(photos)} фото")
             else:
-                logger.info("📝 Отправка текста с кнопками (нет фото)")
-                success = await self._send_text_with_buttons(bot, chat_id, message, reply_markup)
+                logger.info("📝 В очередь: текст с кнопками (нет фото)")
 
-            # ✅ СОХРАНЯЕМ В БАЗУ ТОЛЬКО ПРИ УСПЕШНОЙ ОТПРАВКЕ
-            if success:
-                try:
-                    # 🔥 СОБИРАЕМ ДАННЫЕ О ВРЕМЕНИ ДЛЯ СОХРАНЕНИЯ В КЭШ
-                    time_data = {}
-                    parse_duration = product_data.get('parse_time_seconds', 0)
-                    search_duration = product_data.get('search_duration', 0)
-                    total_duration = parse_duration + search_duration
-
-                    if total_duration > 0:
-                        time_data = {
-                            'parse_duration_seconds': int(parse_duration),
-                            'search_duration_seconds': int(search_duration),
-                            'total_duration_seconds': int(total_duration),
-                            'time_status': product_data.get('time_status', '')
-                        }
-
-                    await self._save_to_cache(product_id, normalized_url, product_data['name'], time_data)
-                    logger.info(
-                        f"✅ Уведомление отправлено и сохранено в базу: {product_data['name']} (ID: {product_id})")
-                except Exception as db_error:
-                    logger.error(f"❌ Ошибка сохранения в кэш базы: {db_error}")
-            else:
-                logger.error(f"❌ Уведомление не отправлено: {product_data['name']}")
+            await telegram_queue.put_many(
+                chat_ids, message,
+                priority=PRIORITY_DEAL,
+                photos=photos,
+                reply_markup=None if photos else reply_markup
+            )
 
-            return success
+            # ✅ СОХРАНЯЕМ В БАЗУ: сообщение уже лежит в очереди на диске и будет доставлено
+            try:
+                await self._save_to_cache(product_id, normalized_url, product_data['name'])
+                logger.info(
+                    f"✅ Уведомление поставлено в очередь и сохранено в базу: {product_data['name']} (ID: {product_id})")
+            except Exception as db_error:
+                logger.error(f"❌ Ошибка сохранения в кэш базы: {db_error}")
+
+            return True
 
         except Exception as e:
             logger.error(f"❌ Критическая ошибка отправки уведомления: {e}")
@@ -813,18 +849,11 @@ class NotificationSender:
 
     async def _send_media_group_with_caption(self, bot, chat_id, image_data_list, message, reply_markup):
         """🔥 УМНАЯ ОТПРАВКА БЕЗ ЛОЖНЫХ ОШИБОК"""
-        import base64
-
         try:
             media_group = []
 
-            for i, image_data in enumerate(image_data_list[:5]):
-                if image_data.startswith('data:image/jpeg;base64,'):
-                    image_data = image_data.replace('data:image/jpeg;base64,', '')
-                elif image_data.startswith('data:image/png;base64,'):
-                    image_data = image_data.replace('data:image/png;base64,', '')
-
-                image_bytes = base64.b64decode(image_data)
+            for i, image in enumerate(image_data_list[:self.MEDIA_GROUP_LIMIT]):
+                image_bytes = self._image_bytes(image)
 
                 if i == 0:
                     media = InputMediaPhoto(
@@ -837,10 +866,10 @@ class NotificationSender:
 
                 media_group.append(media)
 
-            # 🔥 ДОБАВЛЯЕМ ЗАДЕРЖКУ И УВЕЛИЧЕННЫЙ ТАЙМАУТ
             logger.info(f"📸 Подготовлено {len(media_group)} изображений для отправки")
-            logger.info("⏳ Добавляем задержку для стабильной отправки...")
-            await asyncio.sleep(2)  # ← задержка 2 секунды перед отправкой
+
+            # 🚦 Вместо фиксированной паузы — лимиты Telegram (каждое фото = сообщение)
+            await telegram_rate_limiter.acquire(chat_id, len(media_group))
 
             # 🎯 ОТПРАВЛЯЕМ С УВЕЛИЧЕННЫМ ТАЙМАУТОМ
             await bot.send_media_group(
@@ -862,6 +891,7 @@ class NotificationSender:
         """Отправляет текстовое сообщение с кнопками"""
         for attempt in range(3):
             try:
+                await telegram_rate_limiter.acquire(chat_id)
                 await bot.send_message(
                     chat_id=chat_id,
                     text=message,
@@ -948,356 +978,16 @@ class NotificationSender:
         seller_type = " (Магазин)" if product.get('reviews_count', 0) > 150 else " (Частник)"
         return f"{product.get('seller_name', 'Не указан')}{seller_type}"
 
-    @sync_to_async
-    def save_product_to_db(self, product, economy, economy_percent, user_id):
-        """СОХРАНЕНИЕ В БАЗУ ДЛЯ КОНКРЕТНОГО ПОЛЬЗОВАТЕЛЯ С ВСЕМИ ПОЛЯМИ AUTO.RU И ML И ВРЕМЕНЕМ"""
-        try:
-            from apps.website.models import FoundItem, SearchQuery
-            from django.contrib.auth.models import User
-            from django.utils import timezone
-            from django.db import IntegrityError
-            from datetime import timedelta
-
-            # 🔥 КЛЮЧЕВОЕ ИЗМЕНЕНИЕ 1: Получаем пользователя по переданному user_id
-            try:
-                user = User.objects.get(id=user_id)
-                logger.info(f"👤 Сохранение товара для пользователя: {user.username} (ID: {user_id})")
-            except User.DoesNotExist:
-                logger.error(f"❌ Пользователь с ID {user_id} не найден")
-                return False
-
-            # 🔥 СОХРАНЯЕМ ДАННЫЕ ТОВАРА ДЛЯ ИСПОЛЬЗОВАНИЯ В extract_product_id
-            self.current_product_data = product
-
-            normalized_url = self.normalize_url_universal(product['url'])
-            time_threshold = timezone.now() - timedelta(hours=24)
-
-            # 🔥 КЛЮЧЕВОЕ ИЗМЕНЕНИЕ 2: Проверка дубликата ТОЛЬКО для этого пользователя
-            existing_item = FoundItem.objects.filter(
-                url=normalized_url,
-                search_query__user=user,  # ← Теперь фильтруем по пользователю
-                found_at__gte=time_threshold
-            ).first()
-
-            if existing_item:
-                logger.info(f"🚫 Товар уже существует у пользователя {user.username} (24ч): {product['name']}")
-
-                # 🔥 ОБНОВЛЯЕМ ML-ПОЛЯ если товар уже существует
-                updated = False
-                if 'ml_freshness_score' in product:
-                    existing_item.ml_freshness_score = product['ml_freshness_score']
-                    updated = True
-                    logger.info(f"📝 Обновлен ml_freshness_score: {product['ml_freshness_score']}")
-
-                if 'priority_score' in product:
-                    existing_item.priority_score = product['priority_score']
-                    updated = True
-                    logger.info(f"📝 Обновлен priority_score: {product['priority_score']}")
-
-                if 'ml_freshness_category' in product:
-                    existing_item.freshness_category = product['ml_freshness_category']
-                    updated = True
-                    logger.info(f"📝 Обновлен freshness_category: {product['ml_freshness_category']}")
-
-                # 🔥 ОБНОВЛЯЕМ ПОЛЯ ВРЕМЕНИ
-                parse_time_display = product.get('parse_time_display')
-                time_status = product.get('time_status')
-                if parse_time_display and hasattr(existing_item, 'parse_time_display'):
-                    existing_item.parse_time_display = parse_time_display
-                    updated = True
-                    logger.info(f"📝 Обновлено время парсинга: {parse_time_display}")
-
-                if time_status and hasattr(existing_item, 'time_status'):
-                    existing_item.time_status = time_status
-                    updated = True
-                    logger.info(f"📝 Обновлен статус времени: {time_status}")
-
-                if updated:
-                    existing_item.save()
-                    logger.info(f"📝 Обновлен существующий товар с ML-полями и временем")
-
-                return False
-
-            # 🔥 КЛЮЧЕВОЕ ИЗМЕНЕНИЕ 3: Создаем SearchQuery ТОЛЬКО для этого пользователя
-            search_query, created = SearchQuery.objects.get_or_create(
-                user=user,  # ← user теперь правильный
-                name=product['name'][:50],
-                defaults={
-                    'category': product.get('avito_category', product.get('category', 'Не указана')),
-                    'target_price': product.get('target_price', product['price']),
-                    'min_price': 0,
-                    'max_price': 1000000,
-                    'is_active': True
-                }
-            )
-
-            image_urls = product.get('image_urls', [])
-            if not image_urls and product.get('image_url'):
-                image_urls = [product.get('image_url')]
-
-            city = product.get('city', 'Москва')
-
-            # 🔥 ИСПРАВЛЕНИЕ: Извлекаем ОБА значения просмотров
-            views_count = product.get('views_count', 0)
-            views_today_value = product.get('views_today', 0)
-
-            # 🔥 ПРИВОДИМ К INT НА ВСЯКИЙ СЛУЧАЙ
-            try:
-                # Если views_count пришел как словарь (старая версия)
-                if isinstance(views_count, dict):
-                    logger.warning("⚠️ views_count пришел как словарь, извлекаем total_views")
-                    views_count = views_count.get('total_views', 0)
-
-                views_count = int(views_count) if views_count not in [None, ''] else 0
-                views_today_value = int(views_today_value) if views_today_value not in [None, ''] else 0
-            except (ValueError, TypeError) as e:
-                logger.warning(f"⚠️ Ошибка конвертации просмотров: {e}")
-                views_count = 0
-                views_today_value = 0
-
-            address = product.get('address')
-            metro_stations = product.get('metro_stations', [])
-            full_location = product.get('full_location')
-
-            # 🔥 ОПРЕДЕЛЯЕМ ИСТОЧНИК (source) ПО САЙТУ
-            site = product.get('site', 'avito')  # По умолчанию avito
-            if site == 'auto.ru':
-                source = 'auto_ru'
-            else:
-                source = 'avito'
-
-            # 🔥 ИСПРАВЛЯЕМ ПЕРЕДАЧУ ЧИСЛОВЫХ ПОЛЕЙ
-            year_value = product.get('year')
-            if year_value and str(year_value).strip() and str(year_value).isdigit():
-                year_value = int(year_value)
-            else:
-                year_value = None
-
-            discount_price_value = product.get('discount_price', 0)
-            if not discount_price_value or discount_price_value == '':
-                discount_price_value = 0
-
-            # 🔥 ВАЖНО: Получаем product_id из данных товара
-            product_id = product.get('product_id') or product.get('item_id')
-            if not product_id:
-                # Если нет в данных, извлекаем из URL
-                product_id = self.extract_product_id(product['url'])
-
-            # 🔥 ВЫЧИСЛЯЕМ ВРЕМЯ И СТАТУС
-            parse_duration = product.get('parse_time_seconds', 0)
-            search_duration = product.get('search_duration', 0)
-            total_duration = parse_duration + search_duration
-
-            # Форматируем время
-            parse_time_display = product.get('parse_time_display', self.format_duration(parse_duration))
-
-            # Определяем статус времени
-            if total_duration <= 5:
-                time_status = "⚡ Молниеносно"
-            elif total_duration <= 15:
-                time_status = "🚀 Быстро"
-            elif total_duration <= 30:
-                time_status = "🐇 Нормально"
-            elif total_duration <= 60:
-                time_status = "🐢 Медленно"
-            else:
-                time_status = "🚧 Очень медленно"
-
-            # 🔥 СОЗДАЕМ ОБЪЕКТ С ВСЕМИ НОВЫМИ ПОЛЯМИ ВКЛЮЧАЯ ML И ВРЕМЯ
-            found_item_data = {
-                'search_query': search_query,
-                'parsed_by': user,
-                'title': product['name'],
-                'price': product['price'],
-                'target_price': product.get('target_price', product['price']),
-                'profit': economy,
-                'profit_percent': economy_percent,
-                'url': normalized_url,
-                'image_url': product.get('image_url'),
-                'image_urls': image_urls,
-                'description': product.get('description', '') or '',
-                'seller_name': product.get('seller_name', ''),
-                'seller_rating': product.get('seller_rating'),
-                'reviews_count': product.get('reviews_count', 0),
-                'category': product.get('avito_category', product.get('category', 'Не указана')),
-                'city': city,
-                'posted_date': product.get('posted_date', ''),
-                'views_count': views_count,  # ← ОБЩИЕ ПРОСМОТРЫ (число)
-                'views_today': views_today_value,  # ← ПРОСМОТРЫ ЗА СЕГОДНЯ (число)
-                'found_at': timezone.now(),
-                'is_notified': True,
-                'address': address,
-                'color': product.get('color', 'Разноцветный'),
-                'metro_stations': metro_stations,
-                'full_location': full_location,
-                'is_favorite': False,
-                'condition': product.get('condition'),
-                'source': source,
-
-                # 🔥 ДОБАВЛЯЕМ ВСЕ НОВЫЕ ПОЛЯ AUTO.RU
-                'steering': product.get('steering', ''),
-                'transmission': product.get('transmission', ''),
-                'drive': product.get('drive', ''),
-                'engine': product.get('engine', ''),
-                'year': year_value,
-                'mileage': product.get('mileage', ''),
-                'owners': product.get('owners', ''),
-                'pts': product.get('pts', ''),
-                'tax': product.get('tax', ''),
-                'customs': product.get('customs', ''),
-                'body': product.get('body', ''),
-                'package': product.get('package', ''),
-                'price_status': product.get('price_status', ''),
-                'discount_price': discount_price_value,
-                'product_id': product_id,
-                'seller_avatar': product.get('seller_avatar'),
-                'seller_profile_url': product.get('seller_profile_url'),
-
-                # 🔥 ДОБАВЛЯЕМ ML-ПОЛЯ (если они есть в модели FoundItem)
-                'ml_freshness_score': product.get('ml_freshness_score', 0.5),  # ← ML ОЦЕНКА СВЕЖЕСТИ
-                'priority_score': product.get('priority_score', 50.0),  # ← ПРИОРИТЕТНЫЙ СКОР
-                'freshness_category': product.get('ml_freshness_category', 'БЕЗ ML'),  # ← КАТЕГОРИЯ СВЕЖЕСТИ
-
-                # 🔥 НОВЫЕ ПОЛЯ ДЛЯ ТРЕКИНГА ВРЕМЕНИ
-                'parse_time_display': parse_time_display,
-                'parse_time_seconds': int(parse_duration),
-                'search_duration_seconds': int(search_duration),
-                'total_processing_seconds': int(total_duration),
-                'time_status': time_status,
-            }
-
-            # 🔥 ДОБАВЛЯЕМ seller_type ТОЛЬКО ЕСЛИ ОНО ЕСТЬ В МОДЕЛИ
-            try:
-                # Проверяем, существует ли поле seller_type в модели FoundItem
-                if hasattr(FoundItem, 'seller_type'):
-                    found_item_data['seller_type'] = product.get('seller_type', 'Не указано')
-            except Exception:
-                pass  # Молча игнорируем, если поле не существует
-
-            # 🔥 УБИРАЕМ ПОЛЯ КОТОРЫХ НЕТ В МОДЕЛИ
-            fields_to_check = [
-                'ml_freshness_score', 'priority_score', 'freshness_category',
-                'parse_time_display', 'parse_time_seconds', 'search_duration_seconds',
-                'total_processing_seconds', 'time_status'
-            ]
-            for field_name in fields_to_check:
-                if field_name in found_item_data and not hasattr(FoundItem, field_name):
-                    del found_item_data[field_name]
-
-            found_item = FoundItem(**found_item_data)
-
-            try:
-                found_item.save()
-
-                # 🔥 ЛОГИРУЕМ ВСЕ СОХРАНЕННЫЕ ДАННЫЕ С ML И ВРЕМЕНЕМ
-                logger.info(f"✅ Товар сохранен в базу для пользователя {user.username}: {product['name']}")
-                logger.info(f"📦 Сохраненные данные:")
-                logger.info(f"├──👤 Владелец: {user.username} (ID: {user_id})")
-                logger.info(f"├──🚗 Модель: {found_item.title}")
-                logger.info(f"├──💰 Цена: {found_item.price}₽")
-                logger.info(f"├──🎯 Целевая цена: {found_item.target_price}₽")
-
-                # 🔥 ЛОГИРУЕМ ML-ПОЛЯ если они сохранились
-                if hasattr(found_item, 'ml_freshness_score'):
-                    logger.info(f"├──🧠 ML свежесть: {found_item.ml_freshness_score}")
-                else:
-                    logger.info(f"├──🧠 ML свежесть: НЕ СОХРАНЕНО (нет в модели)")
-
-                if hasattr(found_item, 'priority_score'):
-                    logger.info(f"├──🏆 Приоритет: {found_item.priority_score}")
-                else:
-                    logger.info(f"├──🏆 Приоритет: НЕ СОХРАНЕНО (нет в модели)")
-
-                if hasattr(found_item, 'freshness_category'):
-                    logger.info(f"├──📊 Категория свежести: {found_item.freshness_category}")
-                else:
-                    logger.info(f"├──📊 Категория свежести: НЕ СОХРАНЕНО (нет в модели)")
-
-                # 🔥 ЛОГИРУЕМ ВРЕМЯ ОБРАБОТКИ
-                if hasattr(found_item, 'parse_time_display'):
-                    logger.info(f"├──⏱️ Время парсинга: {found_item.parse_time_display}")
-                else:
-                    logger.info(f"├──⏱️ Время парсинга: НЕ СОХРАНЕНО (нет в модели)")
-
-                if hasattr(found_item, 'time_status'):
-                    logger.info(f"├──🏁 Статус скорости: {found_item.time_status}")
-                else:
-                    logger.info(f"├──🏁 Статус скорости: НЕ СОХРАНЕНО (нет в модели)")
-
-                logger.info(f"├──🏷️ Статус цены: {getattr(found_item, 'price_status', '')}")
-                logger.info(f"├──🆔 ID: {getattr(found_item, 'product_id', '')}")
-                logger.info(f"├──🔗 Ссылка: {found_item.url}")
-                logger.info(f"├──📅 Год: {getattr(found_item, 'year', '')}")
-                logger.info(f"├──🛣️ Пробег: {getattr(found_item, 'mileage', '')}")
-                logger.info(f"├──⚙️ Двигатель: {getattr(found_item, 'engine', '')}")
-                logger.info(f"├──🎨 Цвет: {getattr(found_item, 'color', '')}")
-                logger.info(f"├──🔧 Коробка: {getattr(found_item, 'transmission', '')}")
-                logger.info(f"├──🚗 Привод: {getattr(found_item, 'drive', '')}")
-                logger.info(f"├──🚙 Кузов: {getattr(found_item, 'body', '')}")
-                logger.info(f"├──📦 Комплектация: {getattr(found_item, 'package', '')}")
-                logger.info(f"├──🔧 Состояние: {getattr(found_item, 'condition', '')}")
-                logger.info(f"├──🏠 Адрес: {getattr(found_item, 'address', '')}")
-                logger.info(f"├──🏙️ Город: {getattr(found_item, 'city', '')}")
-                logger.info(f"├──🚇 Метро: {len(getattr(found_item, 'metro_stations', []))} станций")
-                logger.info(f"├──👤 Продавец: {getattr(found_item, 'seller_name', '')}")
-
-                # 🔥 ЛОГИРУЕМ АВАТАРКУ ПРОДАВЦА
-                if getattr(found_item, 'seller_avatar', None):
-                    logger.info(f"├──🖼️ Аватар продавца: {found_item.seller_avatar}")
-
-                # 🔥 ЛОГИРУЕМ seller_type ТОЛЬКО ЕСЛИ ОНО ЕСТЬ
-                if hasattr(found_item, 'seller_type'):
-                    logger.info(f"├──🏢 Тип продавца: {found_item.seller_type}")
-
-                logger.info(f"├──⭐ Рейтинг продавца: {getattr(found_item, 'seller_rating', '')}")
-                logger.info(f"├──📊 Отзывов: {getattr(found_item, 'reviews_count', 0)}")
-                logger.info(f"├──👁️ Просмотры: {getattr(found_item, 'views_count', 0)}")
-                logger.info(
-                    f"├──👁️ Просмотров сегодня: {getattr(found_item, 'views_today', 0)}")
-                logger.info(f"├──📅 Дата размещения: {getattr(found_item, 'posted_date', '')}")
-                logger.info(f"├──🖼️ Фото: {len(getattr(found_item, 'image_urls', []))}")
-                logger.info(f"├──💰 Цена со скидкой: {getattr(found_item, 'discount_price', 0)}₽")
-                logger.info(f"├──📝 Описание: {len(getattr(found_item, 'description', ''))} симв.")
-                logger.info(f"└──🔗 Источник: {found_item.source}")
-
-                return True
-
-            except IntegrityError as e:
-                logger.warning(f"🚫 Товар уже существует у пользователя {user.username}: {product['name']}")
-                return False
-            except Exception as save_error:
-                logger.error(f"❌ Ошибка при сохранении товара для пользователя {user.username}: {save_error}")
-
-                # 🔥 АЛЬТЕРНАТИВНЫЙ СПОСОБ СОХРАНЕНИЯ БЕЗ ОПЦИОНАЛЬНЫХ ПОЛЕЙ
-                try:
-                    logger.info("🔄 Пробуем сохранить без опциональных полей...")
-
-                    # Оставляем только основные поля
-                    basic_fields = ['search_query', 'parsed_by', 'title', 'price', 'url',
-                                    'description', 'found_at', 'category', 'city', 'source']
-
-                    basic_data = {k: found_item_data[k] for k in basic_fields if k in found_item_data}
-
-                    found_item_alt = FoundItem(**basic_data)
-                    found_item_alt.save()
-                    logger.info(f"✅ Товар сохранен только с основными полями для пользователя {user.username}")
-                    return True
-                except Exception as alt_error:
-                    logger.error(f"❌ Ошибка альтернативного сохранения для пользователя {user.username}: {alt_error}")
-                    return False
-
-        except Exception as e:
-            logger.error(f"❌ Критическая ошибка сохранения товара: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-
     async def process_and_notify(self, product_data, economy, economy_percent, user_id):
-        """🔥 ПРОСТО СОХРАНЯЕМ И ОТПРАВЛЯЕМ - ИСПОЛЬЗУЕМ send_notification"""
+        """🔥 СТАВИМ В ПАКЕТНУЮ ЗАПИСЬ И СРАЗУ ОТПРАВЛЯЕМ - ИСПОЛЬЗУЕМ send_notification"""
         try:
-            # 🔥 ПЕРЕДАЕМ user_id В СОХРАНЕНИЕ
-            saved_product = await self.save_product_to_db(product_data, economy, economy_percent, user_id)
-            if not saved_product:
+            # 🔥 ТЕКУЩИЙ ТОВАР: по нему нормализуются URL и ID
+            self.current_product_data = product_data
+
+            # 💾 Запись в базу идёт в фоне пачками — уведомление её не ждёт
+            is_new = await self.found_item_writer.claim(product_data, economy, economy_percent, user_id)
+            if not is_new:
+                logger.info(f"🚫 Товар уже есть в базе: {product_data['name']}")
                 return False
 
             # 🔥 ОТПРАВЛЯЕМ В ТЕЛЕГРАМ ЧЕРЕЗ СУЩЕСТВУЮЩИЙ send_notification
@@ -1487,7 +1177,6 @@ class NotificationSender:
             # 5. Отправляем сообщение через существующий бот
             try:
                 from shared.utils.config import get_bot_token, get_chat_id
-                from telegram import Bot
 
                 token = get_bot_token()
                 chat_id = get_chat_id()
@@ -1508,28 +1197,18 @@ class NotificationSender:
 
                 logger.info(f"📸 Валидных фото для отправки: {len(valid_image_urls)}")
 
-                # Отправляем через существующий бот
-                bot = Bot(token=token)
-
-                async def send_async():
+                # Отправляем через общий Telegram-клиент процесса
+                async def send_async(bot):
                     try:
                         # Если есть фото - отправляем с фото через медиагруппу
                         if valid_image_urls:
                             logger.info(f"📸 Отправляем медиа-группу из {len(valid_image_urls)} фото")
 
-                            # Загружаем фото в base64 как это делает NotificationSender
-                            image_data_list = []
-
-                            for photo_url in valid_image_urls[:10]:  # максимум 10 фото для медиагруппы
-                                try:
-                                    image_base64 = await notification_sender._url_to_base64(photo_url)
-                                    if image_base64:
-                                        image_data_list.append(image_base64)
-                                        logger.info(f"✅ Загружено фото: {photo_url}")
-                                    else:
-                                        logger.warning(f"⚠️ Не удалось загрузить фото: {photo_url}")
-                                except Exception as e:
-                                    logger.warning(f"⚠️ Ошибка загрузки фото {photo_url}: {e}")
+                            # Загружаем фото параллельно, как это делает NotificationSender
+                            image_data_list = await notification_sender._fetch_images(
+                                valid_image_urls, limit=notification_sender.MEDIA_GROUP_LIMIT
+                            )
+                            logger.info(f"✅ Загружено фото: {len(image_data_list)}/{len(valid_image_urls)}")
 
                             if image_data_list:
                                 # 🔥 ВАЖНО: В медиагруппе НЕ используем reply_markup (кнопки не поддерживаются)
@@ -1574,14 +1253,8 @@ class NotificationSender:
                         traceback.print_exc()
                         return False
 
-                # Запускаем асинхронную отправку
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(send_async())
-                    return result
-                finally:
-                    loop.close()
+                # Запускаем асинхронную отправку на фоновом loop клиента
+                return run_sync(send_async, token)
 
             except Exception as e:
                 logger.error(f"❌ Ошибка в отправке: {e}")
@@ -1597,7 +1270,6 @@ class NotificationSender:
         """Отправляет уведомление о начале парсинга запроса в Telegram"""
         try:
             from shared.utils.config import get_bot_token, get_chat_id
-            from telegram import Bot
 
             token = get_bot_token()
             chat_id = get_chat_id()
@@ -1606,8 +1278,6 @@ class NotificationSender:
                 logger.warning("⚠️ Не удалось отправить уведомление: нет токена или chat_id")
                 return False
 
-            bot = Bot(token=token)
-
             # Получаем текущее время
             current_time = datetime.now().strftime("%H:%M:%S")
 
@@ -1631,13 +1301,9 @@ class NotificationSender:
                 f"⚡ <b>Статус:</b> Парсинг запущен..."
             )
 
-            await bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode='HTML'
-            )
+            await telegram_queue.put(chat_id, message, priority=PRIORITY_STATUS)
 
-            logger.info(f"✅ Уведомление о начале парсинга '{query}' отправлено в Telegram")
+            logger.info(f"✅ Уведомление о начале парсинга '{query}' поставлено в очередь Telegram")
             return True
 
         except Exception as e:
@@ -1648,7 +1314,6 @@ class NotificationSender:
         """Отправляет уведомление о результатах парсинга в Telegram"""
         try:
             from shared.utils.config import get_bot_token, get_chat_id
-            from telegram import Bot
 
             token = get_bot_token()
             chat_id = get_chat_id()
@@ -1657,8 +1322,6 @@ class NotificationSender:
                 logger.warning("⚠️ Не удалось отправить уведомление: нет токена или chat_id")
                 return False
 
-            bot = Bot(token=token)
-
             # Получаем текущее время
             current_time = datetime.now().strftime("%H:%M:%S")
 
@@ -1687,13 +1350,9 @@ class NotificationSender:
                 f"✅ <b>Статус:</b> Парсинг завершен"
             )
 
-            await bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode='HTML'
-            )
+            await telegram_queue.put(chat_id, message, priority=PRIORITY_STATUS)
 
-            logger.info(f"✅ Уведомление о результатах парсинга '{query}' отправлено в Telegram")
+            logger.info(f"✅ Уведомление о результатах парсинга '{query}' поставлено в очередь Telegram")
             return True
 
         except Exception as e:
@@ -1704,7 +1363,6 @@ class NotificationSender:
         """Отправляет уведомление о старте парсера в Telegram"""
         try:
             from shared.utils.config import get_bot_token, get_chat_id
-            from telegram import Bot
 
             token = get_bot_token()
             chat_id = get_chat_id()
@@ -1713,8 +1371,6 @@ class NotificationSender:
                 logger.warning("⚠️ Не удалось отправить уведомление: нет токена или chat_id")
                 return False
 
-            bot = Bot(token=token)
-
             # Получаем текущее время
             current_time = datetime.now().strftime("%H:%M:%S")
 
@@ -1739,13 +1395,9 @@ class NotificationSender:
                 f"⚡ <b>Статус:</b> Запускаем парсинг..."
             )
 
-            await bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode='HTML'
-            )
+            await telegram_queue.put(chat_id, message, priority=PRIORITY_STATUS)
 
-            logger.info("✅ Уведомление о старте парсера отправлено в Telegram")
+            logger.info("✅ Уведомление о старте парсера поставлено в очередь Telegram")
             return True
 
         except Exception as e:
@@ -1756,7 +1408,6 @@ class NotificationSender:
         """Отправляет уведомление об остановке парсера в Telegram"""
         try:
             from shared.utils.config import get_bot_token, get_chat_id
-            from telegram import Bot
 
             token = get_bot_token()
             chat_id = get_chat_id()
@@ -1765,8 +1416,6 @@ class NotificationSender:
                 logger.warning("⚠️ Не удалось отправить уведомление: нет токена или chat_id")
                 return False
 
-            bot = Bot(token=token)
-
             # Получаем текущее время
             current_time = datetime.now().strftime("%H:%M:%S")
 
@@ -1801,19 +1450,41 @@ class NotificationSender:
                 f"✅ <b>Статус:</b> Парсер успешно остановлен"
             )
 
-            await bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode='HTML'
-            )
+            await telegram_queue.put(chat_id, message, priority=PRIORITY_STATUS)
 
-            logger.info("✅ Уведомление об остановке парсера отправлено в Telegram")
+            logger.info("✅ Уведомление об остановке парсера поставлено в очередь Telegram")
             return True
 
         except Exception as e:
             logger.warning(f"⚠️ Ошибка отправки уведомления об остановке: {e}")
             return False
 
+    async def send_captcha_notification(self, reason="Обнаружена капча или блокировка"):
+        """🚨 Срочное уведомление о капче / проблемах парсера (вне очереди сделок)"""
+        try:
+            token = get_bot_token()
+            chat_id = get_chat_id()
+
+            if not token or not chat_id:
+                logger.warning("⚠️ Не удалось отправить уведомление: нет токена или chat_id")
+                return False
+
+            current_time = datetime.now().strftime("%H:%M:%S")
+            message = (
+                f"🚨 <b>ПРОБЛЕМА С ПАРСЕРОМ</b>\n\n"
+                f"⏰ <b>Время:</b> {current_time}\n"
+                f"📝 <b>Причина:</b> {escape(reason)}"
+            )
+
+            await telegram_queue.put(chat_id, message, priority=PRIORITY_ALERT)
+
+            logger.info(f"✅ Уведомление о проблеме поставлено в очередь Telegram: {reason}")
+            return True
+
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка отправки уведомления о проблеме: {e}")
+            return False
+
     async def send_demo_notification(self):
         """Отправляет демо-уведомление"""
         try:
@@ -1851,7 +1522,7 @@ class NotificationSender:
             message = self._format_message(product)
             reply_markup = self.create_notification_keyboard(product['url'])
 
-            bot = Bot(token=token)
+            bot = await get_bot(token)
             await bot.send_message(
                 chat_id=chat_id,
                 text=message,
@@ -1895,7 +1566,7 @@ class NotificationSender:
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
 
-            bot = Bot(token=token)
+            bot = await get_bot(token)
             await bot.send_message(
                 chat_id=chat_id,
                 text=message,
@@ -0,0 +1,128 @@
+"""
+🏭 КОНВЕЙЕР ОБРАБОТКИ СТРАНИЦЫ
+
+Товары страницы проходят этапы (детали → оценка → сохранение → уведомление),
+связанные ограниченными asyncio.Queue. Пока один товар ждёт Telegram,
+следующий уже парсится:
+
+    pipeline = PagePipeline([
+        PipelineStage('details', fetch, workers=1),
+        PipelineStage('scoring', score, workers=1),
+        PipelineStage('persist', save, workers=1),
+        PipelineStage('notify', notify, workers=1),
+    ], should_stop=parser._check_stop_requested)
+    done = await pipeline.run(products)
+
+- обработчик этапа получает элемент и возвращает его (или новый) для
+  следующего этапа; None — элемент отсеян;
+- у каждого этапа своё число воркеров, очередь между этапами — не больше
+  queue_size элементов (быстрый этап ждёт медленный, память не растёт);
+- элемент попадает на следующий этап только после завершения предыдущего,
+  поэтому для одного товара «сохранить → уведомить» идёт строго по порядку.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger('parser.selenium')
+
+_DONE = object()  # Маркер конца потока для воркеров
+
+
+@dataclass
+class PipelineStage:
+    """Этап конвейера: имя, обработчик и число параллельных воркеров"""
+    name: str
+    handler: Callable[[Any], Awaitable[Optional[Any]]]
+    workers: int = 1
+
+
+@dataclass
+class PageItem:
+    """Товар страницы на пути по конвейеру"""
+    index: int
+    product: dict
+    started_at: float = field(default_factory=time.time)
+    detailed: Optional[dict] = None
+    economy: float = 0
+    economy_percent: int = 0
+
+
+class PagePipeline:
+    """🏭 Этапы, связанные ограниченными очередями (back-pressure)"""
+
+    QUEUE_SIZE = 2  # Элементов в очереди между этапами
+
+    def __init__(self, stages: List[PipelineStage], queue_size=QUEUE_SIZE, should_stop=None):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.should_stop = should_stop or (lambda: False)
+        self.stats: Dict[str, Dict[str, int]] = {
+            stage.name: {'processed': 0, 'dropped': 0, 'errors': 0} for stage in stages
+        }
+
+    async def run(self, items) -> list:
+        """Прогоняет items через все этапы; возвращает прошедшие последний этап"""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = []
+        groups = []
+
+        for position, stage in enumerate(self.stages):
+            inbox = queues[position]
+            outbox = queues[position + 1] if position + 1 < len(queues) else None
+            workers = [
+                asyncio.create_task(self._worker(stage, inbox, outbox, results))
+                for _ in range(max(1, stage.workers))
+            ]
+            groups.append(workers)
+
+        try:
+            for item in items:
+                if self.should_stop():
+                    break
+                await queues[0].put(item)  # Ждёт, если первый этап не успевает
+
+            # Конец потока: этап за этапом, когда все воркеры предыдущего закончили
+            for position, workers in enumerate(groups):
+                for _ in workers:
+                    await queues[position].put(_DONE)
+                await asyncio.gather(*workers)
+
+        finally:
+            for workers in groups:
+                for worker in workers:
+                    if not worker.done():
+                        worker.cancel()
+            await asyncio.gather(*(worker for workers in groups for worker in workers), return_exceptions=True)
+
+        return results
+
+    async def _worker(self, stage, inbox, outbox, results):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            if self.should_stop():
+                continue  # Дочитываем очередь, чтобы не блокировать предыдущий этап
+
+            try:
+                output = await stage.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats[stage.name]['errors'] += 1
+                logger.error(f"❌ Конвейер, этап {stage.name}: {type(e).__name__}: {e}")
+                continue
+
+            if output is None:
+                self.stats[stage.name]['dropped'] += 1
+                continue
+
+            self.stats[stage.name]['processed'] += 1
+            if outbox is not None:
+                await outbox.put(output)
+            else:
+                results.append(output)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -15,6 +15,10 @@ class ParserSettings:
     max_items_per_hour: int = 10
     browser_windows: int = 1
     is_active: bool = True
+    ml_cpu_share: float = 0.5
+    ml_max_workers: Optional[int] = None
+    ml_successive_halving: bool = False
+    status_verbosity: str = 'progress'
 
     def get_search_queries(self) -> List[str]:
         """Возвращает список поисковых запросов"""
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger('bot.notifications')
+
+
+class TokenBucket:
+    """🪣 Token bucket: rate токенов в секунду, не больше capacity подряд
+
+    reserve() сразу списывает токены и возвращает, сколько ждать до права
+    на отправку — без asyncio.Lock, поэтому одно ведро можно делить между
+    event loop'ами разных потоков.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Списывает токены (можно в долг) и возвращает задержку в секундах"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds):
+        """Ближайшие seconds секунд токенов нет (RetryAfter от Telegram)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    async def acquire(self, tokens=1):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class TelegramRateLimiter:
+    """🚦 ЛИМИТЫ TELEGRAM BOT API
+
+    - общий: ~30 сообщений в секунду на бота;
+    - личный чат: ~1 сообщение в секунду (короткие всплески допустимы);
+    - группа/канал (chat_id < 0): 20 сообщений в минуту.
+
+    Фото медиа-группы считаются отдельными сообщениями.
+    """
+
+    GLOBAL_RATE = 30
+    PRIVATE_RATE = 1
+    PRIVATE_BURST = 10  # Альбом целиком (до 10 фото), дальше — 1 сообщение в секунду
+    GROUP_RATE = 20 / 60
+    GROUP_BURST = 5
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(self.GLOBAL_RATE, self.GLOBAL_RATE)
+        self._chat_buckets = {}
+        self._lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id):
+        key = str(chat_id)
+        with self._lock:
+            bucket = self._chat_buckets.get(key)
+            if bucket is None:
+                if key.startswith('-') or key.startswith('@'):
+                    bucket = TokenBucket(self.GROUP_RATE, self.GROUP_BURST)
+                else:
+                    bucket = TokenBucket(self.PRIVATE_RATE, self.PRIVATE_BURST)
+                self._chat_buckets[key] = bucket
+            return bucket
+
+    def reserve(self, chat_id, messages=1):
+        """Задержка до отправки messages сообщений в chat_id (токены уже списаны)"""
+        return max(self.global_bucket.reserve(messages), self._chat_bucket(chat_id).reserve(messages))
+
+    def pause(self, chat_id, seconds):
+        """Telegram ответил 429: придерживаем и чат, и бота целиком"""
+        logger.warning(f"⏳ Flood control для {chat_id}: пауза {seconds:.0f} с")
+        self.global_bucket.pause(seconds)
+        self._chat_bucket(chat_id).pause(seconds)
+
+    async def acquire(self, chat_id, messages=1):
+        """Ждёт, пока отправка не нарушит лимиты Telegram"""
+        delay = self.reserve(chat_id, messages)
+        if delay > 0:
+            logger.debug(f"🚦 Лимит Telegram для {chat_id}: ждём {delay:.2f} с")
+            await asyncio.sleep(delay)
+        return delay
+
+
+# Один лимитер на процесс — лимиты Telegram считаются на бота, а не на отправителя
+telegram_rate_limiter = TelegramRateLimiter()
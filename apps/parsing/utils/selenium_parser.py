@@ -22,8 +22,15 @@ from ..core.browser_manager import BrowserManager
 from ..core.settings_manager import SettingsManager
 from ..core.timer_manager import TimerManager
 from ..utils.notification_sender import NotificationSender
+from ..utils.found_item_writer import FoundItemWriter
 from ..utils.product_validator import ProductValidator
+from ..utils.text_matcher import extract_main_keyword, get_matcher
+from ..utils.telegram_queue import telegram_queue
+from ..utils.cycle_status import CycleStatusReporter
+from ..utils.page_pipeline import PagePipeline, PipelineStage, PageItem
+from shared.utils.telegram_client import close_telegram_clients
 from ..ai.ml_price_predictor import MLPricePredictor
+from ..ai.training_pool import TrainingBudget
 from ..ai.ml_learning_system import MLLearningSystem
 from ..ai.publication_predictor import PublicationPredictor
 
@@ -53,6 +60,17 @@ except ImportError as e:
 # Вместо глобального импорта - динамическая загрузка
 DJANGO_AVAILABLE = False  # По умолчанию
 
+# 🔤 Синонимы главного ключевого слова для проверки релевантности
+KEYWORD_VARIANTS = {
+    'пульт': ['пульт', 'remote', 'дистанционное', 'пультик'],
+    'телевизор': ['телевизор', 'телек', 'tv', 'тв'],
+    'холодильник': ['холодильник', 'refrigerator', 'fridge'],
+    'кроссовки': ['кроссовки', 'кеды', 'sneakers', 'обувь'],
+    'куртка': ['куртка', 'пуховик', 'пальто', 'jacket'],
+    'телефон': ['телефон', 'смартфон', 'phone', 'mobile'],
+    'ноутбук': ['ноутбук', 'лэптоп', 'laptop', 'ноут']
+}
+
 
 # ============================================
 # ВСПОМОГАТЕЛЬНЫЕ КЛАССЫ (ПОЛНЫЕ)
@@ -122,6 +140,7 @@ class AdvancedCache:
         self.stats = {'hits': 0, 'misses': 0, 'size': 0}
         self.query_importance = {}  # Важность запросов для приоритетного кэширования
         self.adaptive_ttl = {}  # Адаптивное время жизни кэша
+        self.brand_matcher = get_matcher({'brands': ['iphone', 'macbook', 'samsung', 'sony']}, stem=False)
 
         # Лимиты для предотвращения утечек памяти
         self.max_urls = 3000
@@ -208,8 +227,7 @@ class AdvancedCache:
         importance = 0.5
 
         # Запросы с брендами важнее
-        brands = ['iphone', 'macbook', 'samsung', 'sony']
-        if any(brand in query.lower() for brand in brands):
+        if self.brand_matcher.has_any(query):
             importance += 0.3
 
         # Конкретные запросы важнее общих
@@ -319,6 +337,11 @@ class AdaptiveTimer:
 class SeleniumAvitoParser(BaseParser):
     """🚀 СУПЕР-ПАРСЕР С AI-ФИЧАМИ И ПРИОРИТЕТОМ СВЕЖЕСТИ"""
 
+    # 🏭 Воркеров на этап конвейера страницы: карточки открываются в одном окне
+    # браузера, уведомления (загрузка фото) могут идти параллельно, а товары,
+    # ждущие записи, собираются в одну пачку FoundItemWriter
+    PIPELINE_WORKERS = {'details': 1, 'scoring': 1, 'persist': FoundItemWriter.SAVE_WORKERS, 'notify': 2}
+
     # Singleton паттерн
     _instance = None
     _initialized = False
@@ -357,6 +380,7 @@ class SeleniumAvitoParser(BaseParser):
         self.browser_manager = BrowserManager()
         self.timer_manager = TimerManager()
         self.notification_sender = NotificationSender()
+        self.cycle_status = CycleStatusReporter()  # 📋 Один статус на цикл вместо сообщений на каждый запрос
         self.product_validator = ProductValidator()
 
         # 🔥 УНИФИЦИРОВАННЫЕ AI-КОМПОНЕНТЫ - ВСЕ ИЗ parser/ai/
@@ -559,6 +583,8 @@ class SeleniumAvitoParser(BaseParser):
                     if user_settings:
                         logger.info(f"🔥 [configure_for_user] Город в настройках: '{user_settings.city}'")
                         logger.info(f"🔥 [configure_for_user] Сайт в настройках: '{user_settings.site}'")
+                        self.price_predictor.training_budget = TrainingBudget.from_settings(user_settings)
+                        self.cycle_status.verbosity = user_settings.status_verbosity
 
                     if user_settings and user_settings.city:
                         self.current_city = user_settings.city.strip()
@@ -684,11 +710,11 @@ class SeleniumAvitoParser(BaseParser):
             logger.warning(f"⚠️ Ошибка работы с хэш-кэшем: {e}")
             return False
 
-    async def _fast_duplicate_check(self, product_data, window_index):
+    async def _fast_duplicate_check(self, product_data, window_index, notified_urls=None):
         """
         БЫСТРАЯ ПРОВЕРКА ДУБЛИКАТОВ ПО ТРЕМ УРОВНЯМ:
         1. Кэш в памяти (самый быстрый)
-        2. NotificationSender кэш
+        2. NotificationSender кэш (notified_urls — заранее проверенная пачкой страница)
         3. База данных PostgreSQL
         """
         try:
@@ -701,12 +727,14 @@ class SeleniumAvitoParser(BaseParser):
                 return True
 
             # 🔥 УРОВЕНЬ 2: Проверка через notification_sender
-            if hasattr(self.notification_sender, 'is_duplicate_url'):
+            if notified_urls is not None:
+                is_duplicate = product_data.get('url', '') in notified_urls
+            else:
                 is_duplicate = await self.notification_sender.is_duplicate_url(product_data.get('url', ''))
-                if is_duplicate:
-                    logger.info(f"🚫 Окно {window_index} | Дубликат в notification кэше: {product_name}...")
-                    self.search_stats['duplicates_blocked'] += 1
-                    return True
+            if is_duplicate:
+                logger.info(f"🚫 Окно {window_index} | Дубликат в notification кэше: {product_name}...")
+                self.search_stats['duplicates_blocked'] += 1
+                return True
 
             # 🔥 УРОВЕНЬ 3: Проверка в базе данных PostgreSQL
             is_db_duplicate = await self._is_duplicate_in_database(
@@ -1193,7 +1221,6 @@ class SeleniumAvitoParser(BaseParser):
         await self.init_async_session()
 
         self.browser_manager.set_browser_windows(self.browser_windows)
-        await self.notification_sender.clear_duplicate_cache()
 
         if not await self._optimized_driver_setup():
             logger.error("❌ Не удалось запустить парсер")
@@ -1603,7 +1630,6 @@ class SeleniumAvitoParser(BaseParser):
 
         # 🔥 ИНИЦИАЛИЗИРУЕМ ПЕРЕМЕННЫЕ
         current_fresh_deals = []  # Локальный список для свежих сделок в этом цикле
-        found_deals = False  # Флаг нахождения хороших сделок
 
         # 🔥 СОРТИРУЕМ ТОВАРЫ ПО СВЕЖЕСТИ
         sorted_products = await self._safe_async_operation(
@@ -1620,347 +1646,247 @@ class SeleniumAvitoParser(BaseParser):
 
         logger.info(f"📦 Окно {window_index} | После сортировки: {len(products_to_process)} товаров для обработки")
 
-        for product_index, product in enumerate(products_to_process):
-            # 🔥 ДЕБАГ ПЕРЕД КАЖДЫМ ТОВАРОМ
-            logger.info(f"🔍 ДЕБАГ ОБРАБОТКА: товар {product_index + 1}/{len(products_to_process)}")
+        # 🔥 КЭШ УВЕДОМЛЕНИЙ: вся страница проверяется одним запросом
+        fresh_products = await self.notification_sender.filter_new_products(products_to_process)
+        fresh_urls = {fresh.get('url', '') for fresh in fresh_products}
+        notified_urls = {item.get('url', '') for item in products_to_process} - fresh_urls
 
-            # 🔥 ЧАСТАЯ ПРОВЕРКА ОСТАНОВКИ ПЕРЕД КАЖДЫМ ТОВАРОМ
-            if self._check_stop_requested():
-                logger.info(f"🔴 Окно {window_index} | Прерывание обработки на товаре {product_index + 1}")
-                break
+        # 🏭 КОНВЕЙЕР: детали → оценка → сохранение → уведомление
+        # Пока один товар ждёт фото и Telegram, следующий уже парсится
+        main_keyword = self._extract_main_keyword(query)
+        total = len(products_to_process)
 
-            # 🔥 НАЧАЛО ТРЕКИНГА ВРЕМЕНИ ДЛЯ ВСЕГО ТОВАРА (ДО ВСЕХ ПРОВЕРОК!)
-            product_start_time = time.time()
+        async def fetch_details(item):
+            """🎯 Дубликаты, релевантность и детали товара (одно окно браузера)"""
+            product = item.product
+            item.started_at = time.time()  # 🔥 ТРЕКИНГ ВРЕМЕНИ ДЛЯ ВСЕГО ТОВАРА (ДО ВСЕХ ПРОВЕРОК!)
             logger.info(
-                f"⏱️ Окно {window_index} | Начало обработки товара {product_index + 1}: {product['name'][:50]}...")
-
-            detailed_product = None
+                f"⏱️ Окно {window_index} | Начало обработки товара {item.index + 1}: {product['name'][:50]}...")
 
-            try:
-                # 🔥 ШАГ 0: БЫСТРАЯ ПРОВЕРКА ДУБЛИКАТОВ (САМЫЙ ПЕРВЫЙ ЭТАП)
-                is_duplicate = await self._fast_duplicate_check(product, window_index)
-                if is_duplicate:
-                    logger.info(f"🔍 ДЕБАГ: товар {product_index + 1} - дубликат, пропускаем")
-                    continue
-
-                # 🎯 ШАГ 1: ПРОВЕРКА РЕЛЕВАНТНОСТИ
-                main_keyword = self._extract_main_keyword(query)
-                if not self._check_universal_relevance(product, main_keyword, query):
-                    logger.debug(f"🔍 Окно {window_index} | Не релевантен: {product['name'][:50]}...")
-                    continue
-
-                # 🎯 ШАГ 2: ПОЛУЧАЕМ ДЕТАЛИ ТОВАРА
-                logger.info(
-                    f"🔍 Окно {window_index} | Получаем детали товара {product_index + 1}/{len(products_to_process)}: {product['name'][:50]}...")
-
-                # 🔥 БЕЗОПАСНЫЙ ВЫЗОВ ПАРСЕРА
-                detailed_product = await self._safe_async_operation(
-                    f"get_details_{window_index}_{product_index}",
-                    site_parser.get_product_details,
-                    product
-                )
+            # 🔥 ШАГ 0: БЫСТРАЯ ПРОВЕРКА ДУБЛИКАТОВ (САМЫЙ ПЕРВЫЙ ЭТАП)
+            if await self._fast_duplicate_check(product, window_index, notified_urls):
+                logger.info(f"🔍 ДЕБАГ: товар {item.index + 1} - дубликат, пропускаем")
+                return None
 
-                if not detailed_product or self._check_stop_requested():
-                    if self._check_stop_requested():
-                        logger.info(f"🔴 Окно {window_index} | Прерывание после получения деталей")
-                        break
-                    logger.warning(f"⚠️ Окно {window_index} | Не удалось получить детали товара: {product['name']}")
-                    continue
+            # 🎯 ШАГ 1: ПРОВЕРКА РЕЛЕВАНТНОСТИ
+            if not self._check_universal_relevance(product, main_keyword, query):
+                logger.debug(f"🔍 Окно {window_index} | Не релевантен: {product['name'][:50]}...")
+                return None
 
-                logger.info(f"✅ Окно {window_index} | Детали получены: {detailed_product.get('name', 'No name')}")
+            # 🎯 ШАГ 2: ПОЛУЧАЕМ ДЕТАЛИ ТОВАРА
+            logger.info(
+                f"🔍 Окно {window_index} | Получаем детали товара {item.index + 1}/{total}: {product['name'][:50]}...")
+            detailed_product = await self._safe_async_operation(
+                f"get_details_{window_index}_{item.index}",
+                site_parser.get_product_details,
+                product
+            )
 
-                # 🔥 ПРОВЕРКА ОСТАНОВКИ ПЕРЕД ML АНАЛИЗОМ
+            # 🔥 ПАУЗА МЕЖДУ ОТКРЫТИЯМИ КАРТОЧЕК В ОКНЕ (1.5 секунды с проверкой остановки)
+            for _ in range(3):
                 if self._check_stop_requested():
-                    logger.info(f"🔴 Окно {window_index} | Прерывание перед ML анализом")
                     break
+                await asyncio.sleep(0.5)
 
-                # 🔥 ПРОВЕРКА ДАННЫХ ПЕРЕД ML АНАЛИЗОМ
-                await self._ensure_ml_data_ready(detailed_product)
+            if not detailed_product or self._check_stop_requested():
+                if not self._check_stop_requested():
+                    logger.warning(f"⚠️ Окно {window_index} | Не удалось получить детали товара: {product['name']}")
+                return None
 
-                # 🎯 ШАГ 3: AI-АНАЛИЗ ЦЕНЫ И СВЕЖЕСТИ
-                # 🔥 РАСЧЕТ time_listed если его нет
-                if 'time_listed' not in detailed_product or detailed_product['time_listed'] is None:
-                    detailed_product['time_listed'] = await self._calculate_time_listed(detailed_product)
+            logger.info(f"✅ Окно {window_index} | Детали получены: {detailed_product.get('name', 'No name')}")
+            item.detailed = detailed_product
+            return item
 
-                # 🔥 ДЕБАГ: логируем перед анализом свежести
-                logger.info(f"🔍 ДЕБАГ: перед анализом свежести для товара {product_index + 1}")
+        async def score(item):
+            """🧠 ML-свежесть, предсказание цены, Vision и валидатор"""
+            detailed_product = item.detailed
 
-                # 🔥 АНАЛИЗ СВЕЖЕСТИ С ML
-                freshness_analysis = await self._safe_async_operation(
-                    f"freshness_analysis_{window_index}_{product_index}",
-                    self._analyze_product_freshness,
-                    detailed_product, window_index
-                )
+            # 🔥 ПРОВЕРКА ДАННЫХ ПЕРЕД ML АНАЛИЗОМ
+            await self._ensure_ml_data_ready(detailed_product)
 
-                if freshness_analysis and not self._check_stop_requested():
-                    detailed_product.update(freshness_analysis)
+            # 🎯 ШАГ 3: AI-АНАЛИЗ ЦЕНЫ И СВЕЖЕСТИ
+            if 'time_listed' not in detailed_product or detailed_product['time_listed'] is None:
+                detailed_product['time_listed'] = await self._calculate_time_listed(detailed_product)
 
-                    # 🔥 ДЕБАГ: логируем результат анализа свежести
-                    logger.info(
-                        f"🔍 ДЕБАГ: свежесть товара {product_index + 1}: {detailed_product.get('ml_freshness_score', 'N/A')}")
+            freshness_analysis = await self._safe_async_operation(
+                f"freshness_analysis_{window_index}_{item.index}",
+                self._analyze_product_freshness,
+                detailed_product, window_index
+            )
+            if freshness_analysis and not self._check_stop_requested():
+                detailed_product.update(freshness_analysis)
+                logger.info(
+                    f"🔍 ДЕБАГ: свежесть товара {item.index + 1}: {detailed_product.get('ml_freshness_score', 'N/A')}")
 
-                # 🔥 ПРОВЕРКА ОСТАНОВКИ ПЕРЕД ML ПРЕДСКАЗАНИЕМ
-                if self._check_stop_requested():
-                    logger.info(f"🔴 Окно {window_index} | Прерывание перед ML предсказанием")
-                    break
+            if self._check_stop_requested():
+                return None
 
-                # 🔥 СУПЕР-ML ПРЕДСКАЗАНИЕ ЦЕНЫ
-                try:
-                    predicted_price = await self._safe_async_operation(
-                        f"price_prediction_{window_index}_{product_index}",
-                        self.price_predictor.predict_price_ultra,  # ← ИСПРАВЛЕНО!
-                        detailed_product
-                    )
+            # 🔥 СУПЕР-ML ПРЕДСКАЗАНИЕ ЦЕНЫ
+            try:
+                predicted_price = await self._safe_async_operation(
+                    f"price_prediction_{window_index}_{item.index}",
+                    self.price_predictor.predict_price_ultra,
+                    detailed_product
+                )
 
-                    if predicted_price and not self._check_stop_requested():
-                        detailed_product['ai_predicted_price'] = predicted_price
-                        detailed_product['ml_confidence'] = self.price_predictor.get_prediction_confidence(
-                            detailed_product)
-
-                        # Пересчитываем экономию
-                        economy = predicted_price - detailed_product['price']
-                        economy_percent = int(
-                            (economy / predicted_price) * 100) if predicted_price and predicted_price > 0 else 0
-
-                        detailed_product['economy'] = economy
-                        detailed_product['economy_percent'] = economy_percent
-                        detailed_product['target_price'] = predicted_price
-
-                        self.search_stats['predicted_deals'] += 1
-                        logger.info(
-                            f"🤖 Окно {window_index} | СУПЕР-ML предсказание: {predicted_price:.0f} руб (уверенность: {detailed_product['ml_confidence']:.1%})")
-
-                except Exception as price_error:
-                    if not self._check_stop_requested():
-                        logger.warning(f"⚠️ Окно {window_index} | Ошибка ML-предсказания цены: {price_error}")
-                        target_price = detailed_product.get('target_price', detailed_product['price'] * 1.2)
-                        economy = target_price - detailed_product['price']
-                        economy_percent = int(
-                            (economy / target_price) * 100) if target_price and target_price > 0 else 0
-                        detailed_product['economy'] = economy
-                        detailed_product['economy_percent'] = economy_percent
-                        detailed_product['target_price'] = target_price
-                        detailed_product['ai_predicted_price'] = None
-                        detailed_product['ml_confidence'] = 0.3
-
-                # 🔥 ПРОВЕРКА ОСТАНОВКИ ПЕРЕД VISION
-                if self._check_stop_requested():
-                    logger.info(f"🔴 Окно {window_index} | Прерывание перед Vision анализом")
-                    break
+                if predicted_price and not self._check_stop_requested():
+                    detailed_product['ai_predicted_price'] = predicted_price
+                    detailed_product['ml_confidence'] = self.price_predictor.get_prediction_confidence(
+                        detailed_product)
 
-                # 🎯 ШАГ 4: VISION-АНАЛИЗ ИЗОБРАЖЕНИЙ
-                vision_result = await self._safe_async_operation(
-                    f"vision_analysis_{window_index}_{product_index}",
-                    self._verify_with_computer_vision_universal,
-                    detailed_product, query, window_index
-                )
+                    # Пересчитываем экономию
+                    economy = predicted_price - detailed_product['price']
+                    economy_percent = int(
+                        (economy / predicted_price) * 100) if predicted_price and predicted_price > 0 else 0
 
-                if not vision_result or self._check_stop_requested():
-                    if self._check_stop_requested():
-                        break
+                    detailed_product['economy'] = economy
+                    detailed_product['economy_percent'] = economy_percent
+                    detailed_product['target_price'] = predicted_price
+
+                    self.search_stats['predicted_deals'] += 1
                     logger.info(
-                        f"👁️ Окно {window_index} | Vision анализ не пройден: {detailed_product['name'][:50]}...")
-                    continue
+                        f"🤖 Окно {window_index} | СУПЕР-ML предсказание: {predicted_price:.0f} руб (уверенность: {detailed_product['ml_confidence']:.1%})")
 
-                # 🔥 ДОБАВЛЯЕМ ДАННЫЕ VISION
-                if isinstance(vision_result, dict) and 'vision_data' in vision_result:
-                    detailed_product['vision_data'] = vision_result['vision_data']
-                    detailed_product['computer_vision_result'] = vision_result['vision_data']
-                    detailed_product['search_query'] = query
+            except Exception as price_error:
+                if not self._check_stop_requested():
+                    logger.warning(f"⚠️ Окно {window_index} | Ошибка ML-предсказания цены: {price_error}")
+                    target_price = detailed_product.get('target_price', detailed_product['price'] * 1.2)
+                    economy = target_price - detailed_product['price']
+                    economy_percent = int(
+                        (economy / target_price) * 100) if target_price and target_price > 0 else 0
+                    detailed_product['economy'] = economy
+                    detailed_product['economy_percent'] = economy_percent
+                    detailed_product['target_price'] = target_price
+                    detailed_product['ai_predicted_price'] = None
+                    detailed_product['ml_confidence'] = 0.3
 
-                # 🔥 ПРОВЕРКА ОСТАНОВКИ ПЕРЕД ВАЛИДАЦИЕМ
-                if self._check_stop_requested():
-                    logger.info(f"🔴 Окно {window_index} | Прерывание перед валидацией")
-                    break
+            if self._check_stop_requested():
+                return None
 
-                # 🎯 ШАГ 5: ПРОВЕРКА ВАЛИДАТОРОМ
-                logger.info(f"✅ Окно {window_index} | Проверка валидатором: {detailed_product['name'][:50]}...")
+            # 🎯 ШАГ 4: VISION-АНАЛИЗ ИЗОБРАЖЕНИЙ
+            vision_result = await self._safe_async_operation(
+                f"vision_analysis_{window_index}_{item.index}",
+                self._verify_with_computer_vision_universal,
+                detailed_product, query, window_index
+            )
 
-                # 🔥 ИСПРАВЛЕНИЕ: ДОБАВЛЯЕМ await перед вызовом is_good_deal
-                if not await self.product_validator.is_good_deal(detailed_product):
+            if not vision_result or self._check_stop_requested():
+                if not self._check_stop_requested():
                     logger.info(
-                        f"❌ Окно {window_index} | Товар не прошел валидацию: {detailed_product['name'][:50]}...")
-                    continue
+                        f"👁️ Окно {window_index} | Vision анализ не пройден: {detailed_product['name'][:50]}...")
+                return None
 
-                logger.info(f"✅ Окно {window_index} | Товар прошел валидацию: {detailed_product['name'][:50]}...")
+            # 🔥 ДОБАВЛЯЕМ ДАННЫЕ VISION
+            if isinstance(vision_result, dict) and 'vision_data' in vision_result:
+                detailed_product['vision_data'] = vision_result['vision_data']
+                detailed_product['computer_vision_result'] = vision_result['vision_data']
+                detailed_product['search_query'] = query
 
-                # 🔥 ПРОВЕРКА ОСТАНОВКИ ПЕРЕД ОБНОВЛЕНИЕМ СТАТИСТИКИ
-                if self._check_stop_requested():
-                    logger.info(f"🔴 Окно {window_index} | Прерывание перед обновлением статистики")
-                    break
+            # 🎯 ШАГ 5: ПРОВЕРКА ВАЛИДАТОРОМ
+            logger.info(f"✅ Окно {window_index} | Проверка валидатором: {detailed_product['name'][:50]}...")
+            if not await self.product_validator.is_good_deal(detailed_product):
+                logger.info(
+                    f"❌ Окно {window_index} | Товар не прошел валидацию: {detailed_product['name'][:50]}...")
+                return None
 
-                # 🔥 ОБНОВЛЯЕМ СТАТИСТИКУ
-                self.search_stats['items_found'] += 1
-                self.search_stats['good_deals_found'] += 1
+            logger.info(f"✅ Окно {window_index} | Товар прошел валидацию: {detailed_product['name'][:50]}...")
 
-                if detailed_product.get('ml_freshness_score', 0) >= 0.6:
-                    self.search_stats['fresh_deals_found'] += 1
+            # 🔥 ОБНОВЛЯЕМ СТАТИСТИКУ
+            self.search_stats['items_found'] += 1
+            self.search_stats['good_deals_found'] += 1
 
-                # 🔥 ИНИЦИАЛИЗИРУЕМ query_stats
-                if query not in self.query_stats:
-                    self.query_stats[query] = {
-                        'total_found': 0,
-                        'good_deals': 0,
-                        'fresh_deals': 0,
-                        'count': 0,
-                        'successful': 0,
-                        'success_rate': 0
-                    }
+            if detailed_product.get('ml_freshness_score', 0) >= 0.6:
+                self.search_stats['fresh_deals_found'] += 1
 
-                self.query_stats[query]['total_found'] += 1
-                self.query_stats[query]['good_deals'] += 1
+            if query not in self.query_stats:
+                self.query_stats[query] = {
+                    'total_found': 0,
+                    'good_deals': 0,
+                    'fresh_deals': 0,
+                    'count': 0,
+                    'successful': 0,
+                    'success_rate': 0
+                }
 
-                if detailed_product.get('ml_freshness_score', 0) >= 0.6:
-                    self.query_stats[query]['fresh_deals'] += 1
+            self.query_stats[query]['total_found'] += 1
+            self.query_stats[query]['good_deals'] += 1
 
-                # 🔥 ПРОВЕРКА ОСТАНОВКИ ПЕРЕД УВЕДОМЛЕНИЕМ
-                if self._check_stop_requested():
-                    logger.info(f"🔴 Окно {window_index} | Прерывание перед отправкой уведомления")
-                    break
+            if detailed_product.get('ml_freshness_score', 0) >= 0.6:
+                self.query_stats[query]['fresh_deals'] += 1
 
-                # 🎯 ШАГ 6: ФИНАЛЬНАЯ ОБРАБОТКА С ПРОВЕРКОЙ ДУБЛИКАТОВ
-                logger.info(
-                    f"🚀 Окно {window_index} | ВЫЗОВ NotificationSender.process_and_notify для: {detailed_product['name'][:50]}...")
+            item.economy = detailed_product.get('economy', 0)
+            item.economy_percent = detailed_product.get('economy_percent', 0)
+            return item
 
-                # 🔥 ПРЯМОЙ ВЫЗОВ ДЛЯ ТЕСТИРОВАНИЯ
-                try:
-                    economy = detailed_product.get('economy', 0)
-                    economy_percent = detailed_product.get('economy_percent', 0)
+        async def persist(item):
+            """💾 Время обработки и запись в базу (уведомление — только после неё)"""
+            detailed_product = item.detailed
 
-                    # 🔥 КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: передаем user_id парсера
-                    # Проверяем, есть ли у парсера текущий пользователь
-                    user_id = getattr(self, 'current_user_id', None)
+            # 🔥 КЛЮЧЕВОЕ: товар сохраняется для пользователя парсера
+            user_id = getattr(self, 'current_user_id', None)
+            if not user_id:
+                logger.error(f"🚨 Окно {window_index} | ОШИБКА: Парсер не настроен для пользователя!")
+                return None
 
-                    if not user_id:
-                        logger.error(f"🚨 Окно {window_index} | ОШИБКА: Парсер не настроен для пользователя!")
-                        continue
+            # 🔥 ВЫЧИСЛЯЕМ ОБЩЕЕ ВРЕМЯ ОБРАБОТКИ ТОВАРА (С МОМЕНТА НАЧАЛА)
+            self._apply_processing_time(detailed_product, item.product, time.time() - item.started_at, window_index)
 
-                    logger.info(f"👤 Окно {window_index} | Отправка товара для пользователя ID: {user_id}")
-
-                    # 🔥 ВЫЧИСЛЯЕМ ОБЩЕЕ ВРЕМЯ ОБРАБОТКИ ТОВАРА (С МОМЕНТА НАЧАЛА)
-                    product_end_time = time.time()
-                    parse_duration = product_end_time - product_start_time
-
-                    # Форматируем время
-                    minutes = int(parse_duration // 60)
-                    seconds = int(parse_duration % 60)
-                    parse_time_str = f"{minutes}:{seconds:02d}"
-
-                    # Определяем статус скорости
-                    if parse_duration <= 5:
-                        time_status = "⚡ Молниеносно"
-                    elif parse_duration <= 15:
-                        time_status = "🚀 Быстро"
-                    elif parse_duration <= 30:
-                        time_status = "🐇 Нормально"
-                    elif parse_duration <= 60:
-                        time_status = "🐢 Медленно"
-                    else:
-                        time_status = "🚧 Очень медленно"
-
-                    # Добавляем данные о времени в товар
-                    detailed_product['parse_time_display'] = parse_time_str
-                    detailed_product['parse_time_seconds'] = int(parse_duration)
-                    detailed_product['time_status'] = time_status
-
-                    # 🔥 ДОБАВЛЯЕМ ВРЕМЯ ПОИСКА ЕСЛИ ОНО ЕСТЬ В ДАННЫХ
-                    search_duration = product.get('search_duration', 0)
-                    if search_duration > 0:
-                        search_minutes = int(search_duration // 60)
-                        search_seconds = int(search_duration % 60)
-                        search_time_str = f"{search_minutes}:{search_seconds:02d}"
-                        detailed_product['search_time_display'] = search_time_str
-                        detailed_product['search_duration'] = search_duration
-                        detailed_product['search_duration_seconds'] = int(search_duration)
-
-                        # 🔥 ОБЩЕЕ ВРЕМЯ = ВРЕМЯ ПОИСКА + ВРЕМЯ ПАРСИНГА
-                        total_duration = search_duration + parse_duration
-                        total_minutes = int(total_duration // 60)
-                        total_seconds = int(total_duration % 60)
-                        total_time_str = f"{total_minutes}:{total_seconds:02d}"
-                        detailed_product['total_time_display'] = total_time_str
-                        detailed_product['total_processing_seconds'] = int(total_duration)
-
-                    logger.info(f"⏱️ Окно {window_index} | ТОВАР ОБРАБОТАН за {parse_time_str} ({time_status})")
-                    if search_duration > 0:
-                        logger.info(
-                            f"🔍 Окно {window_index} | Время поиска: {detailed_product.get('search_time_display', '0:00')}")
-                        logger.info(
-                            f"⏱️ Окно {window_index} | ОБЩЕЕ время: {detailed_product.get('total_time_display', parse_time_str)}")
-
-                    # 🔥 ПРАВИЛЬНЫЙ ВЫЗОВ С user_id И ДАННЫМИ О ВРЕМЕНИ
-                    success = await self._safe_async_operation(
-                        f"notification_{window_index}_{product_index}",
-                        self.notification_sender.process_and_notify,
-                        detailed_product,
-                        economy,
-                        economy_percent,
-                        user_id
-                    )
+            # Ждёт записи пачки с товаром: без строки в базе уведомление не уходит
+            is_new = await self.notification_sender.found_item_writer.save(
+                detailed_product, item.economy, item.economy_percent, user_id
+            )
+            if not is_new:
+                logger.info(f"🚫 Окно {window_index} | Товар уже есть в базе или не записан: "
+                            f"{detailed_product['name'][:50]}...")
+                return None
+            return item
 
-                    if success:
-                        logger.info(
-                            f"🎉 Окно {window_index} | Товар успешно обработан для пользователя {user_id}: {detailed_product['name'][:50]}...")
-                        self.stats['good_deals_found'] += 1
-                        found_deals = True
-
-                        if detailed_product.get('ml_freshness_score', 0) >= 0.6:
-                            self.search_stats['fresh_deals_found'] += 1
-                            logger.info(
-                                f"🔥 Окно {window_index} | СВЕЖАЯ СДЕЛКА ОБРАБОТАНА: {detailed_product['name'][:50]}...")
-
-                        # 🔥 ДОБАВЛЯЕМ В current_fresh_deals ТОЛЬКО ЕСЛИ ТОВАР СВЕЖИЙ И УСПЕШНО ОБРАБОТАН
-                        if detailed_product.get('ml_freshness_score', 0) >= 0.6:
-                            # 🔥 ДЕБАГ: перед добавлением
-                            logger.info(f"🔍 ДЕБАГ: добавляем товар в current_fresh_deals")
-                            current_fresh_deals.append(detailed_product)
-                            logger.info(f"🔍 ДЕБАГ: current_fresh_deals длина={len(current_fresh_deals)}")
-                            logger.info(
-                                f"🔥 Окно {window_index} | Добавлен в свежие сделки: {detailed_product['name'][:50]}...")
-                    else:
-                        if not self._check_stop_requested():
-                            logger.error(
-                                f"❌ Окно {window_index} | Ошибка прямого вызова для: {detailed_product['name'][:50]}...")
+        async def notify(item):
+            """📨 Уведомление в Telegram — только после записи в базу"""
+            detailed_product = item.detailed
+            logger.info(
+                f"🚀 Окно {window_index} | Уведомление для: {detailed_product['name'][:50]}...")
 
-                except Exception as e:
-                    if not self._check_stop_requested():
-                        logger.error(f"❌ Окно {window_index} | Критическая ошибка прямого вызова: {e}")
+            success = await self._safe_async_operation(
+                f"notification_{window_index}_{item.index}",
+                self.notification_sender.send_notification,
+                detailed_product
+            )
+            self.stats['total_processed'] += 1
 
-                # 🔥 ПРОВЕРКА ОСТАНОВКИ ПЕРЕД ПАУЗОЙ
+            if not success:
                 if not self._check_stop_requested():
-                    # 🔥 ПАУЗА МЕЖДУ ТОВАРАМИ С ПРОВЕРКОЙ
-                    for i in range(3):  # 1.5 секунды = 3 итерации по 0.5 секунды
-                        if self._check_stop_requested():
-                            logger.info(f"🔴 Окно {window_index} | Прерывание паузы между товарами")
-                            break
-                        await asyncio.sleep(0.5)
+                    logger.error(
+                        f"❌ Окно {window_index} | Ошибка отправки для: {detailed_product['name'][:50]}...")
+                return None
 
-                self.stats['total_processed'] += 1
+            logger.info(
+                f"🎉 Окно {window_index} | Товар успешно обработан: {detailed_product['name'][:50]}...")
+            self.stats['good_deals_found'] += 1
 
-            except Exception as e:
-                # 🔥 ИГНОРИРУЕМ ОШИБКИ ПРИ ОСТАНОВКЕ
-                if self._check_stop_requested():
-                    logger.info(f"🔴 Окно {window_index} | Ожидаемая ошибка при остановке обработки товара")
-                    break
-                else:
-                    product_name = product.get('name', 'Неизвестный товар') if product else 'Неизвестный товар'
-
-                    # 🔥 ДЕТАЛЬНЫЙ ДЕБАГ ОШИБКИ
-                    error_msg = str(e)
-                    logger.error(f"❌ ОШИБКА обработки товара '{product_name}' в окне {window_index}:")
-                    logger.error(f"❌ Тип ошибки: {type(e).__name__}")
-                    logger.error(f"❌ Сообщение: {error_msg}")
-
-                    # 🔥 ДЕБАГ current_fresh_deals если ошибка связана с ним
-                    if 'fresh_deals' in error_msg.lower():
-                        logger.error("🚨 ДЕБАГ ОШИБКИ fresh_deals:")
-                        logger.error(f"  - current_fresh_deals type: {type(current_fresh_deals)}")
-                        logger.error(f"  - current_fresh_deals len: {len(current_fresh_deals)}")
-
-                    # 🔥 ДЕБАГ трассировки
-                    import traceback
-                    logger.error(f"❌ Traceback:\n{traceback.format_exc()}")
-                    continue
+            # 🔥 В current_fresh_deals ТОЛЬКО СВЕЖИЕ И УСПЕШНО ОБРАБОТАННЫЕ
+            if detailed_product.get('ml_freshness_score', 0) >= 0.6:
+                self.search_stats['fresh_deals_found'] += 1
+                current_fresh_deals.append(detailed_product)
+                logger.info(
+                    f"🔥 Окно {window_index} | СВЕЖАЯ СДЕЛКА ОБРАБОТАНА: {detailed_product['name'][:50]}...")
+            return item
+
+        pipeline = PagePipeline([
+            PipelineStage('details', fetch_details, workers=self.PIPELINE_WORKERS['details']),
+            PipelineStage('scoring', score, workers=self.PIPELINE_WORKERS['scoring']),
+            PipelineStage('persist', persist, workers=self.PIPELINE_WORKERS['persist']),
+            PipelineStage('notify', notify, workers=self.PIPELINE_WORKERS['notify']),
+        ], should_stop=self._check_stop_requested)
+
+        notified = await pipeline.run(
+            PageItem(index=index, product=product) for index, product in enumerate(products_to_process)
+        )
+        found_deals = bool(notified)
+        logger.info(f"🏭 Окно {window_index} | Конвейер: {pipeline.stats}")
+
+        # 💾 ДОПИСЫВАЕМ В БАЗУ ОСТАТОК (товары других вызовов claim)
+        await self.notification_sender.found_item_writer.flush()
 
         # 🔥 СОХРАНЯЕМ current_fresh_deals В self.fresh_deals ТОЛЬКО ЕСЛИ НЕ БЫЛА ОСТАНОВКА И ЕСТЬ ЧТО СОХРАНЯТЬ
         if not self._check_stop_requested() and current_fresh_deals:
@@ -1993,6 +1919,49 @@ class SeleniumAvitoParser(BaseParser):
 
         return found_deals
 
+    def _apply_processing_time(self, detailed_product, product, parse_duration, window_index):
+        """⏱️ Время парсинга (и поиска, если есть) в данные товара"""
+        minutes = int(parse_duration // 60)
+        seconds = int(parse_duration % 60)
+        parse_time_str = f"{minutes}:{seconds:02d}"
+
+        # Определяем статус скорости
+        if parse_duration <= 5:
+            time_status = "⚡ Молниеносно"
+        elif parse_duration <= 15:
+            time_status = "🚀 Быстро"
+        elif parse_duration <= 30:
+            time_status = "🐇 Нормально"
+        elif parse_duration <= 60:
+            time_status = "🐢 Медленно"
+        else:
+            time_status = "🚧 Очень медленно"
+
+        detailed_product['parse_time_display'] = parse_time_str
+        detailed_product['parse_time_seconds'] = int(parse_duration)
+        detailed_product['time_status'] = time_status
+
+        # 🔥 ДОБАВЛЯЕМ ВРЕМЯ ПОИСКА ЕСЛИ ОНО ЕСТЬ В ДАННЫХ
+        search_duration = product.get('search_duration', 0)
+        if search_duration > 0:
+            search_minutes = int(search_duration // 60)
+            search_seconds = int(search_duration % 60)
+            detailed_product['search_time_display'] = f"{search_minutes}:{search_seconds:02d}"
+            detailed_product['search_duration'] = search_duration
+            detailed_product['search_duration_seconds'] = int(search_duration)
+
+            # 🔥 ОБЩЕЕ ВРЕМЯ = ВРЕМЯ ПОИСКА + ВРЕМЯ ПАРСИНГА
+            total_duration = search_duration + parse_duration
+            total_minutes = int(total_duration // 60)
+            total_seconds = int(total_duration % 60)
+            detailed_product['total_time_display'] = f"{total_minutes}:{total_seconds:02d}"
+            detailed_product['total_processing_seconds'] = int(total_duration)
+
+        logger.info(f"⏱️ Окно {window_index} | ТОВАР ОБРАБОТАН за {parse_time_str} ({time_status})")
+        if search_duration > 0:
+            logger.info(
+                f"⏱️ Окно {window_index} | ОБЩЕЕ время: {detailed_product.get('total_time_display', parse_time_str)}")
+
     async def _ensure_ml_data_ready(self, product_data):
         """Гарантирует что все данные для ML готовы и корректны"""
         try:
@@ -2203,12 +2172,19 @@ class SeleniumAvitoParser(BaseParser):
             self.min_price = min_price if min_price else 0
             self.max_price = max_price if max_price else 1000000000
 
+            # 🧠 Бюджет CPU на обучение моделей
+            self.price_predictor.training_budget = TrainingBudget.from_settings(self.settings_manager)
+
+            # 📋 Подробность статуса цикла в Telegram
+            self.cycle_status.verbosity = getattr(self.settings_manager, 'status_verbosity', self.cycle_status.verbosity)
+
             # Логирование изменений
             new_count = len(self.search_queries) if self.search_queries else 0
             logger.info(f"🔄 Локальные настройки обновлены:")
             logger.info(f"   Запросы: {previous_count} → {new_count}")
             logger.info(f"   Цены: {self.min_price}-{self.max_price}₽")
             logger.info(f"   Окна: {self.browser_windows}")
+            logger.info(f"   Обучение ML: {self.price_predictor.training_budget.workers} процессов")
             logger.info(f"   Город: {getattr(self, 'current_city', 'не указан')}")
 
         except Exception as e:
@@ -2322,21 +2298,31 @@ class SeleniumAvitoParser(BaseParser):
 
         total_found = 0
 
-        # Обрабатываем каждое окно
-        for window_index, driver in enumerate(self.browser_manager.drivers):
-            if not self.is_running:
-                break
+        # 📋 Статус цикла: одно сообщение, правится по мере обработки запросов
+        await self.cycle_status.start_cycle(
+            total_queries=len(self.search_queries) * len(self.browser_manager.drivers),
+            windows=len(self.browser_manager.drivers),
+            user_id=self.current_user_id
+        )
+
+        try:
+            # Обрабатываем каждое окно
+            for window_index, driver in enumerate(self.browser_manager.drivers):
+                if not self.is_running:
+                    break
 
-            # Перемешиваем запросы
-            shuffled_queries = self.search_queries.copy()
-            random.shuffle(shuffled_queries)
+                # Перемешиваем запросы
+                shuffled_queries = self.search_queries.copy()
+                random.shuffle(shuffled_queries)
 
-            found_in_window = await self._process_window_queries(driver, window_index, shuffled_queries)
-            total_found += found_in_window
+                found_in_window = await self._process_window_queries(driver, window_index, shuffled_queries)
+                total_found += found_in_window
 
-            # Пауза между окнами
-            if window_index < len(self.browser_manager.drivers) - 1:
-                await asyncio.sleep(2)
+                # Пауза между окнами
+                if window_index < len(self.browser_manager.drivers) - 1:
+                    await asyncio.sleep(2)
+        finally:
+            await self.cycle_status.finish_cycle()
 
         return total_found > 0
 
@@ -2357,17 +2343,8 @@ class SeleniumAvitoParser(BaseParser):
 
                 logger.info(f"🔎 Окно {window_index} | {self.current_site} | Запрос: '{query}'")
 
-                # 🔥 ОТПРАВЛЯЕМ УВЕДОМЛЕНИЕ О НАЧАЛЕ ПАРСИНГА
-                try:
-                    await self.notification_sender.send_parsing_start_notification(
-                        query=query,
-                        window_index=window_index,
-                        total_queries=len(queries),
-                        query_index=query_index,
-                        user_id=self.current_user_id
-                    )
-                except Exception as notify_error:
-                    logger.warning(f"⚠️ Не удалось отправить уведомление о начале парсинга: {notify_error}")
+                # 📋 СТАТУС ЦИКЛА: ЗАПРОС НАЧАТ
+                self.cycle_status.query_started(window_index, query)
 
                 # 🔥 ОБНОВЛЯЕМ СТАТИСТИКУ ЗАПРОСА
                 if query not in self.query_stats:
@@ -2384,6 +2361,7 @@ class SeleniumAvitoParser(BaseParser):
                 # Проверка драйвера
                 if not await self._check_driver_health(driver, window_index):
                     logger.warning(f"⚠️ Окно {window_index} | Проблемы с драйвером, пропускаем запрос")
+                    self.cycle_status.query_failed("Проблемы с драйвером")
 
                     # 🔥 УВЕДОМЛЕНИЕ О ПРОБЛЕМЕ С ДРАЙВЕРОМ
                     try:
@@ -2403,6 +2381,7 @@ class SeleniumAvitoParser(BaseParser):
                     # 🔥 ВАЖНО: Проверяем что site_parser существует и имеет метод search_items
                     if not site_parser:
                         logger.error(f"❌ Окно {window_index} | site_parser не создан!")
+                        self.cycle_status.query_failed("Парсер сайта не создан")
 
                         # 🔥 УВЕДОМЛЕНИЕ О ПРОБЛЕМЕ С ПАРСЕРОМ
                         try:
@@ -2416,6 +2395,7 @@ class SeleniumAvitoParser(BaseParser):
 
                     if not hasattr(site_parser, 'search_items'):
                         logger.error(f"❌ Окно {window_index} | site_parser не имеет метода search_items!")
+                        self.cycle_status.query_failed("Нет метода search_items")
 
                         # 🔥 УВЕДОМЛЕНИЕ О ПРОБЛЕМЕ С МЕТОДОМ
                         try:
@@ -2477,40 +2457,19 @@ class SeleniumAvitoParser(BaseParser):
                 # Проверяем результаты
                 if not products:
                     logger.info(f"ℹ️ Окно {window_index} | По '{query}' ничего не найдено")
-
-                    # 🔥 УВЕДОМЛЕНИЕ О ПУСТОМ РЕЗУЛЬТАТЕ
-                    try:
-                        await self.notification_sender.send_parsing_results_notification(
-                            query=query,
-                            window_index=window_index,
-                            found_count=0,
-                            items_processed=0,
-                            user_id=self.current_user_id
-                        )
-                    except Exception as notify_error:
-                        logger.warning(f"⚠️ Не удалось отправить уведомление о пустом результате: {notify_error}")
-
+                    self.cycle_status.query_finished(found=0, processed=0)
                     continue
 
                 logger.info(f"✅ Окно {window_index} | Найдено {len(products)} товаров по '{query}'")
                 self.query_stats[query]['successful'] += 1
                 self.search_stats['successful_searches'] += 1
 
-                # 🔥 ОТПРАВЛЯЕМ РЕЗУЛЬТАТЫ ПАРСИНГА
-                try:
-                    items_to_process = min(len(products), 15)  # Примерно сколько обработаем
-                    await self.notification_sender.send_parsing_results_notification(
-                        query=query,
-                        window_index=window_index,
-                        found_count=len(products),
-                        items_processed=items_to_process,
-                        user_id=self.current_user_id
-                    )
-                except Exception as notify_error:
-                    logger.warning(f"⚠️ Не удалось отправить уведомление о результатах: {notify_error}")
-
                 # 🔥 ОБРАБОТКА ТОВАРОВ
                 found_deals = await self._fast_process_products_with_vision(products, site_parser, window_index, query)
+
+                # 📋 СТАТУС ЦИКЛА: РЕЗУЛЬТАТЫ ЗАПРОСА
+                items_to_process = min(len(products), 15)  # Примерно сколько обработали
+                self.cycle_status.query_finished(found=len(products), processed=items_to_process, deals=found_deals)
                 if found_deals:
                     found_any_in_window = True
                     logger.info(f"🎉 Окно {window_index} | Найдены хорошие сделки!")
@@ -2619,30 +2578,17 @@ class SeleniumAvitoParser(BaseParser):
 
     def _check_universal_relevance(self, product, main_keyword, query):
         """ПРОВЕРКА РЕЛЕВАНТНОСТИ"""
-        title = product['name'].lower()
-        query_lower = query.lower()
-
-        # Главное ключевое слово должно быть в заголовке
-        if main_keyword not in title:
-            # Проверяем синонимы
-            keyword_variants = self._get_keyword_variants(main_keyword)
-            if not any(variant in title for variant in keyword_variants):
-                return False
-
-        return True
+        # Главное ключевое слово или его синоним (в любой форме) должно быть в заголовке.
+        # Подстрокой, как раньше: «iPhone15», «MacBookPro», «Электровелосипед» — релевантны.
+        # Матчер на ключевое слово компилируется один раз и берётся из кэша
+        matcher = get_matcher(
+            {'variants': [main_keyword, *self._get_keyword_variants(main_keyword)]}, whole_words=False
+        )
+        return matcher.has_any(product['name'])
 
     def _get_keyword_variants(self, keyword):
         """Возвращает варианты ключевого слова"""
-        variants_map = {
-            'пульт': ['пульт', 'remote', 'дистанционное', 'пультик'],
-            'телевизор': ['телевизор', 'телек', 'tv', 'тв'],
-            'холодильник': ['холодильник', 'refrigerator', 'fridge'],
-            'кроссовки': ['кроссовки', 'кеды', 'sneakers', 'обувь'],
-            'куртка': ['куртка', 'пуховик', 'пальто', 'jacket'],
-            'телефон': ['телефон', 'смартфон', 'phone', 'mobile'],
-            'ноутбук': ['ноутбук', 'лэптоп', 'laptop', 'ноут']
-        }
-        return variants_map.get(keyword, [keyword])
+        return KEYWORD_VARIANTS.get(keyword, [keyword])
 
     async def _verify_with_computer_vision_universal(self, product, query, window_index):
         """ПРОВЕРКА COMPUTER VISION"""
@@ -2756,16 +2702,7 @@ class SeleniumAvitoParser(BaseParser):
 
     def _extract_main_keyword(self, query):
         """ИЗВЛЕЧЕНИЕ КЛЮЧЕВОГО СЛОВА"""
-        cleaned_query = re.sub(r'[^\w\s]', ' ', query.lower())
-        words = cleaned_query.split()
-
-        # Ищем самое важное слово
-        stop_words = {'для', 'от', 'в', 'на', 'с', 'по', 'из', 'у', 'бу', 'б/у', 'новый', 'новая', 'новое'}
-        for word in words:
-            if word not in stop_words and len(word) > 2:
-                return word
-
-        return words[0] if words else query
+        return extract_main_keyword(query)
 
     async def _check_driver_health(self, driver, window_index):
         """ПРОВЕРКА ДРАЙВЕРА С USER-AGENT РОТАЦИЕЙ ПРИ ОШИБКАХ"""
@@ -2999,6 +2936,21 @@ class SeleniumAvitoParser(BaseParser):
                 finally:
                     self.session = None
 
+            # 💾 Несохранённые товары — до закрытия очереди уведомлений
+            try:
+                await self.notification_sender.found_item_writer.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка записи товаров при остановке: {e}")
+
+            # 📡 Telegram-клиент этого event loop (пул соединений)
+            try:
+                await telegram_queue.close()
+                await self.notification_sender.close()
+                await close_telegram_clients()
+                logger.info("✅ Telegram-клиент закрыт")
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка закрытия Telegram-клиента: {e}")
+
             # 🔥 БЕЗОПАСНАЯ ПРОВЕРКА browser_manager
             if hasattr(self, 'browser_manager') and self.browser_manager:
                 try:
@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger('parser.ai')
+
+
+class BinaryStateStore:
+    """💾 КОМПАКТНОЕ БИНАРНОЕ ХРАНИЛИЩЕ СОСТОЯНИЯ ОБУЧЕНИЯ
+
+    - счётчики (часовые/дневные массивы по категориям) лежат в снапшоте ``.npz``;
+    - между компакциями изменения счётчиков дописываются в SQLite как дельты,
+      удалённый ключ — как пустая дельта (надгробие);
+    - ключевые паттерны (словари по категориям) хранятся построчно в SQLite
+      и перезаписываются только когда изменились;
+    - save(..., changed={раздел: ключи}) кодирует и сравнивает только
+      изменённые ключи, а не всё состояние.
+    """
+
+    COMPACT_EVERY = 200  # Дельт счётчиков до компакции снапшота
+    TOMBSTONE = b''  # Дельта удалённого ключа
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.snapshot_path = f"{base_path}.npz"
+        self.index_path = f"{base_path}.sqlite3"
+
+        self._generation = 0
+        self._persisted_counters: Dict[str, Dict[str, np.ndarray]] = {}
+        self._persisted_records: Dict[str, Dict[str, str]] = {}
+        self._pending_deltas = 0
+        self._loaded = False
+
+    # ============================================
+    # ПУБЛИЧНЫЙ API
+    # ============================================
+
+    def exists(self):
+        """Есть ли сохранённое состояние"""
+        return os.path.exists(self.index_path)
+
+    def save(self, counters: Dict[str, Dict[str, Any]], records: Dict[str, Dict[str, Any]],
+             changed: Optional[Dict[str, Iterable[str]]] = None):
+        """Сохраняет изменения: дельты счётчиков и изменённые записи
+
+        changed — {раздел: ключи}, изменённые с прошлого сохранения: кодируются
+        и сравниваются только они (удалённые ключи находятся по набору ключей).
+        None — сравнить всё; так же и при первом сохранении в процессе.
+        """
+        if not self._loaded:
+            # Базовая линия для дельт — то, что уже лежит на диске; с ней
+            # вызывающий код не сверялся, поэтому сравниваем всё
+            if self.exists():
+                self.load()
+            changed = None
+
+        with self._connect() as conn:
+            self._write_counter_deltas(conn, counters, changed)
+            self._write_records(conn, records, changed)
+        self._loaded = True
+
+        if self._pending_deltas >= self.COMPACT_EVERY:
+            self.compact()
+
+    def load(self):
+        """Загружает (counters, records): снапшот + дельты + записи"""
+        counters = self._read_snapshot()
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT section, key, delta FROM counter_deltas WHERE generation = ? ORDER BY seq",
+                (self._generation,)
+            ).fetchall()
+            for section, key, delta in rows:
+                items = counters.setdefault(section, {})
+                if delta == self.TOMBSTONE:
+                    items.pop(key, None)
+                    continue
+                delta = np.frombuffer(delta, dtype=np.int64)
+                current = items.get(key)
+                items[key] = delta.copy() if current is None else current + delta
+            self._pending_deltas = len(rows)
+
+            records = {}
+            self._persisted_records = {}
+            for section, key, value in conn.execute("SELECT section, key, value FROM records"):
+                records.setdefault(section, {})[key] = json.loads(value)
+                self._persisted_records.setdefault(section, {})[key] = value
+
+        self._persisted_counters = {
+            section: {key: values.copy() for key, values in items.items()}
+            for section, items in counters.items()
+        }
+        self._loaded = True
+        return counters, records
+
+    def compact(self, counters=None):
+        """Переписывает снапшот .npz целиком и сбрасывает дельты
+
+        Снапшот пишется во временный файл и подменяется os.replace: до подмены
+        на диске старое поколение и его дельты, после — новое без дельт.
+        """
+        if counters is None:
+            counters = self._persisted_counters
+
+        generation = self._generation + 1
+        arrays = {'__generation__': np.array([generation], dtype=np.int64)}
+        for section, items in counters.items():
+            keys = sorted(items)
+            if not keys:
+                continue
+            arrays[f"{section}__keys"] = np.array(keys, dtype=str)
+            arrays[f"{section}__values"] = np.vstack([np.asarray(items[key], dtype=np.int64) for key in keys])
+
+        self._atomic_write_npz(arrays)
+        self._generation = generation
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM counter_deltas WHERE generation < ?", (generation,))
+        self._pending_deltas = 0
+
+        logger.debug(f"🗜️ Компакция состояния {self.base_path}: поколение {generation}")
+
+    # ============================================
+    # ВНУТРЕННЕЕ
+    # ============================================
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path)
+        try:
+            with conn:
+                self._ensure_schema(conn)
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self, conn):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "section TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (section, key))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS counter_deltas ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, generation INTEGER NOT NULL, "
+            "section TEXT NOT NULL, key TEXT NOT NULL, delta BLOB NOT NULL)"
+        )
+
+    @staticmethod
+    def _changed_keys(items, section, changed):
+        if changed is None:
+            return items.keys()
+        return [key for key in changed.get(section, ()) if key in items]
+
+    def _write_counter_deltas(self, conn, counters, changed):
+        rows = []
+        for section in set(counters) | set(self._persisted_counters):
+            items = counters.get(section, {})
+            persisted = self._persisted_counters.setdefault(section, {})
+            for key in self._changed_keys(items, section, changed):
+                values = np.asarray(items[key], dtype=np.int64)
+                previous = persisted.get(key)
+                if previous is None:
+                    delta = values
+                elif previous.shape != values.shape:
+                    # Размерность поменялась — удаляем старое значение и пишем новое
+                    rows.append((self._generation, section, key, self.TOMBSTONE))
+                    delta = values
+                else:
+                    delta = values - previous
+                if previous is None or previous.shape != values.shape or delta.any():
+                    rows.append((self._generation, section, key, delta.tobytes()))
+                persisted[key] = values.copy()
+
+            # Удалённые ключи (сброс знаний) не должны воскреснуть при загрузке
+            for key in persisted.keys() - items.keys():
+                rows.append((self._generation, section, key, self.TOMBSTONE))
+                del persisted[key]
+
+        if rows:
+            conn.executemany(
+                "INSERT INTO counter_deltas (generation, section, key, delta) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._pending_deltas += len(rows)
+
+    def _write_records(self, conn, records, changed):
+        upserts, deletes = [], []
+        for section in set(records) | set(self._persisted_records):
+            items = records.get(section, {})
+            persisted = self._persisted_records.setdefault(section, {})
+            for key in self._changed_keys(items, section, changed):
+                encoded = json.dumps(items[key], ensure_ascii=False, default=str, separators=(',', ':'))
+                key = str(key)
+                if persisted.get(key) != encoded:
+                    upserts.append((section, key, encoded))
+                    persisted[key] = encoded
+            for key in persisted.keys() - {str(k) for k in items}:
+                deletes.append((section, key))
+                del persisted[key]
+
+        if upserts:
+            conn.executemany(
+                "INSERT INTO records (section, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (section, key) DO UPDATE SET value = excluded.value",
+                upserts
+            )
+        if deletes:
+            conn.executemany("DELETE FROM records WHERE section = ? AND key = ?", deletes)
+
+    def _read_snapshot(self):
+        counters = {}
+        self._generation = 0
+        if not os.path.exists(self.snapshot_path):
+            return counters
+
+        with np.load(self.snapshot_path, allow_pickle=False) as data:
+            self._generation = int(data['__generation__'][0])
+            for name in data.files:
+                if not name.endswith('__keys'):
+                    continue
+                section = name[:-len('__keys')]
+                keys = data[name].tolist()
+                values = data[f"{section}__values"]
+                counters[section] = {key: values[i].astype(np.int64) for i, key in enumerate(keys)}
+        return counters
+
+    def _atomic_write_npz(self, arrays):
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.state-', suffix='.npz', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def load_legacy_json(path):
+    """Читает старое JSON-состояние (для миграции в бинарное хранилище)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        logger.info(f"📦 Найдено старое состояние {path}, переносим в бинарное хранилище")
+        return state
+    except FileNotFoundError:
+        return None
+
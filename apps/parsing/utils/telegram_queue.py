@@ -0,0 +1,541 @@
+"""
+📬 ИСХОДЯЩАЯ ОЧЕРЕДЬ TELEGRAM
+
+Парсер кладёт сообщение в очередь и сразу идёт дальше; отправляет их
+один фоновый воркер на event loop парсера:
+
+- лимиты Telegram (общий и на чат) — через telegram_rate_limiter;
+- 429 RetryAfter — пауза ровно на столько, сколько просит Telegram;
+- приоритеты: алерты (капча, падения) → сделки → статусы парсинга;
+- статусы одного чата копятся STATUS_BATCH_WINDOW секунд и уходят одним сообщением;
+- всё неотправленное лежит в SQLite и досылается после перезапуска;
+- сообщение, исчерпавшее MAX_ATTEMPTS, возвращается в очередь через REQUEUE_DELAY;
+- альбом, на который Telegram не ответил (TimedOut), не повторяется сам (мог
+  дойти — повтор дал бы дубль), а ждёт resend_unconfirmed().
+
+    await telegram_queue.put(chat_id, text, priority=PRIORITY_STATUS)
+    await telegram_queue.put(chat_id, caption, photos=[jpeg_bytes, ...])
+    await telegram_queue.put_many([chat_a, chat_b], caption, photos=[...])  # фото загрузятся один раз
+    await telegram_queue.resend_unconfirmed()  # дослать альбомы без подтверждения
+    await telegram_queue.close()  # при остановке парсера: дослать накопленное
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from telegram import InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, RetryAfter, TimedOut
+
+from shared.utils.telegram_client import get_bot
+from shared.utils.telegram_media import send_media_group_cached
+from .rate_limiter import telegram_rate_limiter
+
+logger = logging.getLogger('bot.notifications')
+
+PRIORITY_ALERT = 0  # Капча, проблемы с браузером — человек должен узнать сразу
+PRIORITY_DEAL = 1  # Найденные объявления
+PRIORITY_STATUS = 2  # Старт/результаты запросов — склеиваются в одно сообщение
+
+OUTBOX_PATH = 'telegram_outbox.sqlite3'
+TELEGRAM_TEXT_LIMIT = 4096
+STATUS_SEPARATOR = '\n\n➖➖➖➖➖\n\n'
+
+
+@dataclass
+class OutboundMessage:
+    """✉️ Сообщение в очереди (текст или альбом с подписью)"""
+    chat_id: str
+    text: str
+    priority: int = PRIORITY_DEAL
+    parse_mode: Optional[str] = 'HTML'
+    reply_markup: Optional[dict] = None  # InlineKeyboardMarkup.to_dict()
+    photos: List[bytes] = field(default_factory=list)
+    ids: List[int] = field(default_factory=list)  # Строки SQLite (у склеенных статусов — несколько)
+    attempts: int = 0
+
+    @property
+    def batchable(self):
+        return self.priority >= PRIORITY_STATUS and not self.photos and not self.reply_markup
+
+
+class OutboxStore:
+    """💾 Неотправленные сообщения в SQLite (удаляются после доставки)
+
+    Строки, которые воркер сейчас отправляет, помечены in flight (claim) и
+    при перечитывании очереди не загружаются — иначе новый воркер послал бы
+    их второй раз. Альбомы без подтверждения доставки лежат в
+    outbox_unconfirmed и загружаются только load(unconfirmed=True).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._in_flight = set()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS outbox ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, priority INTEGER NOT NULL, '
+                'created REAL NOT NULL, payload TEXT NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS outbox_photos ('
+                'message_id INTEGER NOT NULL, position INTEGER NOT NULL, data BLOB NOT NULL, '
+                'PRIMARY KEY (message_id, position))'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS outbox_unconfirmed ('
+                'message_id INTEGER PRIMARY KEY, marked REAL NOT NULL)'
+            )
+        return self._conn
+
+    def add(self, message):
+        payload = json.dumps({
+            'chat_id': message.chat_id,
+            'text': message.text,
+            'parse_mode': message.parse_mode,
+            'reply_markup': message.reply_markup,
+        }, ensure_ascii=False)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    'INSERT INTO outbox (priority, created, payload) VALUES (?, ?, ?)',
+                    (message.priority, time.time(), payload)
+                )
+                conn.executemany(
+                    'INSERT INTO outbox_photos (message_id, position, data) VALUES (?, ?, ?)',
+                    [(cursor.lastrowid, position, photo) for position, photo in enumerate(message.photos)]
+                )
+            return cursor.lastrowid
+
+    def delete(self, ids):
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(f'DELETE FROM outbox_photos WHERE message_id IN ({placeholders})', ids)
+                conn.execute(f'DELETE FROM outbox_unconfirmed WHERE message_id IN ({placeholders})', ids)
+                conn.execute(f'DELETE FROM outbox WHERE id IN ({placeholders})', ids)
+            self._in_flight.difference_update(ids)
+
+    def claim(self, ids):
+        """Строки уходят в отправку — load() их пропускает"""
+        with self._lock:
+            self._in_flight.update(ids)
+
+    def release(self, ids):
+        """Отправка не удалась — строки снова доступны load()"""
+        with self._lock:
+            self._in_flight.difference_update(ids)
+
+    def mark_unconfirmed(self, ids):
+        """Доставка не подтверждена — строки остаются, но load() их не перечитывает"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    'INSERT OR IGNORE INTO outbox_unconfirmed (message_id, marked) VALUES (?, ?)',
+                    [(message_id, time.time()) for message_id in ids]
+                )
+            self._in_flight.difference_update(ids)
+
+    def clear_unconfirmed(self, ids):
+        """Строки снова обычные неотправленные"""
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(f'DELETE FROM outbox_unconfirmed WHERE message_id IN ({placeholders})', ids)
+
+    def load(self, unconfirmed=False):
+        """Неотправленные сообщения (кроме тех, что сейчас в отправке) в порядке постановки
+
+        unconfirmed=True — только альбомы без подтверждения доставки.
+        """
+        condition = 'IN' if unconfirmed else 'NOT IN'
+        with self._lock:
+            conn = self._connection()
+            rows = [
+                row for row in conn.execute(
+                    'SELECT id, priority, payload FROM outbox '
+                    f'WHERE id {condition} (SELECT message_id FROM outbox_unconfirmed) ORDER BY id'
+                ).fetchall()
+                if row[0] not in self._in_flight
+            ]
+            photos: Dict[int, List[bytes]] = {}
+            for message_id, data in conn.execute(
+                    'SELECT message_id, data FROM outbox_photos ORDER BY message_id, position'):
+                photos.setdefault(message_id, []).append(data)
+
+        messages = []
+        for message_id, priority, payload in rows:
+            data = json.loads(payload)
+            messages.append(OutboundMessage(
+                chat_id=data['chat_id'],
+                text=data['text'],
+                priority=priority,
+                parse_mode=data.get('parse_mode'),
+                reply_markup=data.get('reply_markup'),
+                photos=photos.get(message_id, []),
+                ids=[message_id],
+            ))
+        return messages
+
+    def count(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+
+class TelegramOutboundQueue:
+    """📬 ОЧЕРЕДЬ ИСХОДЯЩИХ СООБЩЕНИЙ С ПРИОРИТЕТАМИ И ЛИМИТАМИ
+
+    Воркер живёт в event loop, из которого пришёл первый put(). В памяти —
+    только копия SQLite: при смене loop'а очередь перечитывается с диска
+    (без сообщений в отправке), а старый воркер досылает то, что уже
+    отправляет, и завершается. Состояние очереди — под threading.RLock:
+    старый и новый loop могут работать в разных потоках.
+    """
+
+    STATUS_BATCH_WINDOW = 5.0  # Секунд копим статусы чата перед отправкой
+    STATUS_BATCH_SIZE = 20  # ...или пока их не накопится столько
+    MAX_ATTEMPTS = 5  # Сетевых ошибок подряд, после которых сообщение откладывается
+    REQUEUE_DELAY = 300.0  # Через сколько секунд отложенное сообщение снова встаёт в очередь
+    DRAIN_TIMEOUT = 30.0  # Сколько close() ждёт досылки накопленного
+
+    def __init__(self, path=OUTBOX_PATH, limiter=telegram_rate_limiter, bot_factory=get_bot):
+        self.store = OutboxStore(path)
+        self.limiter = limiter
+        self.bot_factory = bot_factory
+
+        self._heap = []  # (priority, seq, OutboundMessage)
+        self._status: Dict[str, List[OutboundMessage]] = {}
+        self._status_deadline: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._busy = False
+        self._deferred = set()  # Первые id отложенных до REQUEUE_DELAY сообщений
+        self._loop = None
+        self._worker = None
+        self._wakeup = None
+        self._generation = 0  # Воркер прошлого поколения больше не берёт сообщения
+        self._state_lock = threading.RLock()
+
+    def __len__(self):
+        """Сообщений к отправке (без отложенных после MAX_ATTEMPTS)"""
+        return len(self._heap) + sum(len(batch) for batch in self._status.values()) + int(self._busy)
+
+    async def put(self, chat_id, text, priority=PRIORITY_DEAL, photos=None, reply_markup=None, parse_mode='HTML'):
+        """Ставит сообщение в очередь (сразу сохраняется на диск) и возвращает его"""
+        if isinstance(reply_markup, InlineKeyboardMarkup):
+            reply_markup = reply_markup.to_dict()
+
+        message = OutboundMessage(
+            chat_id=str(chat_id),
+            text=text,
+            priority=priority,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup,
+            photos=list(photos or []),
+        )
+
+        self._ensure_worker()
+        message.ids = [self.store.add(message)]
+        self._push(message)
+        return message
+
+    async def put_many(self, chat_ids, text, priority=PRIORITY_DEAL, photos=None, reply_markup=None,
+                       parse_mode='HTML'):
+        """Одно сообщение нескольким чатам подряд (альбом загружается первым, дальше — file_id)"""
+        return [
+            await self.put(chat_id, text, priority, photos, reply_markup, parse_mode)
+            for chat_id in dict.fromkeys(str(chat_id) for chat_id in chat_ids)
+        ]
+
+    async def resend_unconfirmed(self):
+        """Снова ставит в очередь альбомы, на которые Telegram не ответил; возвращает их число"""
+        self._ensure_worker()
+        messages = self.store.load(unconfirmed=True)
+        if not messages:
+            return 0
+
+        self.store.clear_unconfirmed([message_id for message in messages for message_id in message.ids])
+        logger.info(f"📬 Повторно отправляем {len(messages)} альбомов без подтверждения")
+        for message in messages:
+            self._push(message)
+        return len(messages)
+
+    async def flush(self, timeout=DRAIN_TIMEOUT):
+        """Досылает всё накопленное (статусы — не дожидаясь окна склейки)"""
+        if self._worker is None or self._worker.done() or self._loop is not asyncio.get_running_loop():
+            return len(self) == 0
+
+        for chat_id in self._status_deadline:
+            self._status_deadline[chat_id] = 0.0
+        self._wakeup.set()
+
+        deadline = time.monotonic() + timeout
+        while len(self) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        return len(self) == 0
+
+    async def close(self, timeout=DRAIN_TIMEOUT):
+        """Останавливает воркер; что не успели отправить — остаётся в SQLite
+
+        Из чужого loop'а воркер не отменяется, а досылает текущее сообщение
+        и завершается сам.
+        """
+        delivered = await self.flush(timeout)
+        if not delivered:
+            logger.warning(f"📬 Не дослано {len(self)} сообщений — отправим после перезапуска")
+        if self._deferred:
+            logger.warning(f"📬 {len(self._deferred)} сообщений ждали повтора — отправим после перезапуска")
+
+        with self._state_lock:
+            worker, own_loop = self._worker, self._loop is asyncio.get_running_loop()
+            self._stop_worker()
+
+        if worker is not None and not worker.done() and own_loop:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+
+    # ============================================
+    # ВОРКЕР
+    # ============================================
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            if self._worker is not None and not self._worker.done() and self._loop is loop:
+                return
+
+            self._stop_worker()
+            self._heap.clear()
+            self._status.clear()
+            self._status_deadline.clear()
+            self._deferred.clear()
+            self._busy = False
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run(self._generation))
+
+            # Сообщения в отправке у старого воркера не перечитываются — он их дошлёт
+            pending = self.store.load()
+            if pending:
+                logger.info(f"📬 Досылаем {len(pending)} сообщений из SQLite")
+            for message in pending:
+                self._push(message)
+
+            unconfirmed = len(self.store.load(unconfirmed=True))
+            if unconfirmed:
+                logger.error(f"📬 {unconfirmed} альбомов без подтверждения доставки — "
+                             f"проверьте чаты и вызовите resend_unconfirmed()")
+
+    def _stop_worker(self):
+        """Следующее поколение: текущий воркер дошлёт своё сообщение и выйдет (под _state_lock)"""
+        self._generation += 1
+        worker, loop, wakeup = self._worker, self._loop, self._wakeup
+        self._worker = None
+        if worker is not None and not worker.done() and loop.is_running():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _push(self, message):
+        with self._state_lock:
+            if message.batchable:
+                batch = self._status.setdefault(message.chat_id, [])
+                if not batch:
+                    self._status_deadline[message.chat_id] = time.monotonic() + self.STATUS_BATCH_WINDOW
+                batch.append(message)
+            else:
+                heapq.heappush(self._heap, (message.priority, next(self._seq), message))
+            self._wakeup.set()
+
+    def _next_ready(self):
+        """Следующее сообщение: сначала по приоритету, статусы — когда окно закрылось"""
+        if self._heap:
+            return heapq.heappop(self._heap)[2]
+
+        now = time.monotonic()
+        for chat_id, deadline in self._status_deadline.items():
+            if deadline <= now or len(self._status[chat_id]) >= self.STATUS_BATCH_SIZE:
+                return self._take_status_batch(chat_id)
+        return None
+
+    def _take_status_batch(self, chat_id):
+        """Склеивает накопленные статусы чата в одно сообщение (в пределах 4096 символов)"""
+        batch = self._status[chat_id]
+        taken, length = [], 0
+        while batch and (not taken or length + len(STATUS_SEPARATOR) + len(batch[0].text) <= TELEGRAM_TEXT_LIMIT):
+            message = batch.pop(0)
+            length += len(message.text) + (len(STATUS_SEPARATOR) if taken else 0)
+            taken.append(message)
+
+        if not batch:
+            del self._status[chat_id]
+            del self._status_deadline[chat_id]
+
+        if len(taken) == 1:
+            return taken[0]
+
+        return OutboundMessage(
+            chat_id=chat_id,
+            text=STATUS_SEPARATOR.join(message.text for message in taken),
+            priority=PRIORITY_STATUS,
+            parse_mode=taken[0].parse_mode,
+            ids=[message_id for message in taken for message_id in message.ids],
+        )
+
+    async def _run(self, generation):
+        wakeup = self._wakeup
+        while True:
+            with self._state_lock:
+                if generation != self._generation:
+                    return
+                message = self._next_ready()
+                if message is None:
+                    wakeup.clear()
+                    timeout = None
+                    if self._status_deadline:
+                        timeout = max(0.0, min(self._status_deadline.values()) - time.monotonic())
+                else:
+                    self.store.claim(message.ids)
+                    self._busy = True
+
+            if message is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delivered = retry = False
+            try:
+                delivered = await self._deliver(message)
+                retry = not delivered
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ошибка воркера очереди Telegram: {e}")
+                retry = True
+            finally:
+                if not delivered:
+                    self.store.release(message.ids)
+                with self._state_lock:
+                    if generation == self._generation:
+                        self._busy = False
+                    if retry:
+                        self._requeue_later(message)
+
+    def _requeue_later(self, message):
+        """Попытки кончились — через REQUEUE_DELAY сообщение снова в очереди (под _state_lock)
+
+        Таймер ставится в loop текущего поколения; если к его срабатыванию
+        очередь перечитали из SQLite, сообщение уже там и не добавляется.
+        """
+        loop, generation = self._loop, self._generation
+        if loop is None or not loop.is_running():
+            return  # Строка в SQLite — дошлём после перезапуска
+
+        message.attempts = 0
+        self._deferred.add(message.ids[0])
+        logger.warning(f"📬 Сообщение для {message.chat_id} отложено на {self.REQUEUE_DELAY:.0f} с")
+        loop.call_soon_threadsafe(loop.call_later, self.REQUEUE_DELAY, self._requeue, message, generation)
+
+    def _requeue(self, message, generation):
+        with self._state_lock:
+            if generation != self._generation:
+                return
+            self._deferred.discard(message.ids[0])
+            self._push(message)
+
+    async def _deliver(self, message):
+        """Отправка с учётом лимитов; True — доставлено, отброшено Telegram навсегда или ждёт resend_unconfirmed()"""
+        while True:
+            await self.limiter.acquire(message.chat_id, max(1, len(message.photos)))
+            try:
+                await self._send(await self.bot_factory(), message)
+
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                seconds = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+                self.limiter.pause(message.chat_id, seconds)
+                continue
+
+            except TimedOut as e:
+                if not message.photos:
+                    if not await self._backoff(message, e):
+                        return False
+                    continue
+                # Альбом обычно доходит, даже если ответа не дождались: сам повтор дал бы дубль
+                logger.error(f"❌ Таймаут ответа на медиа-группу для {message.chat_id}, "
+                             f"доставка не подтверждена (resend_unconfirmed): {e}")
+                self.store.mark_unconfirmed(message.ids)
+                return True
+
+            except (BadRequest, Forbidden) as e:
+                logger.error(f"❌ Telegram отклонил сообщение для {message.chat_id}: {e}")
+                self.store.delete(message.ids)
+                return True
+
+            except Exception as e:
+                if not await self._backoff(message, e):
+                    return False
+                continue
+
+            self.store.delete(message.ids)
+            return True
+
+    async def _backoff(self, message, error):
+        """Пауза перед повтором; False — попытки кончились, сообщение откладывается"""
+        message.attempts += 1
+        if message.attempts >= self.MAX_ATTEMPTS:
+            logger.error(f"❌ Не удалось отправить сообщение за {message.attempts} попыток: {error}")
+            return False
+
+        delay = min(2 ** message.attempts, 60)
+        logger.warning(f"⚠️ Ошибка отправки ({error}), повтор через {delay} с")
+        await asyncio.sleep(delay)
+        return True
+
+    @staticmethod
+    async def _send(bot, message):
+        if message.photos:
+            # Та же сделка другим чатам уходит по file_id — байты загружаются один раз
+            await send_media_group_cached(
+                bot,
+                message.chat_id,
+                message.photos,
+                caption=message.text,
+                parse_mode=message.parse_mode,
+                read_timeout=60,
+                write_timeout=60,
+                connect_timeout=60
+            )
+            return
+
+        reply_markup = InlineKeyboardMarkup.de_json(message.reply_markup, bot) if message.reply_markup else None
+        await bot.send_message(
+            chat_id=message.chat_id,
+            text=message.text,
+            parse_mode=message.parse_mode,
+            reply_markup=reply_markup,
+            disable_web_page_preview=True
+        )
+
+
+# Одна очередь на процесс — как и лимитер, лимиты общие на бота
+telegram_queue = TelegramOutboundQueue()
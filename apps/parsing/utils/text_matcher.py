@@ -0,0 +1,243 @@
+"""
+🔤 ОБЩИЙ МАТЧЕР КЛЮЧЕВЫХ СЛОВ
+
+Все словари компилируются один раз в одно регулярное выражение
+(trie из литеральных префиксов), поиск по тексту — за один проход.
+Русские слова приводятся к основе: «новый» найдёт и «новая», «новое»;
+«срочно» — и «срочная»; «час» — и «часа». Ё нормализуется в е.
+
+Термин совпадает только целыми словами: основа плюс одно окончание из
+списка _ENDINGS, дальше не буква. «новый» не находится в «Новосибирске»,
+«новинке» и «новостях», «тв» — в «отвертке».
+
+С whole_words=False термин ищется подстрокой (основа — в любом месте
+текста): так работает фильтр релевантности парсера, которому нужны
+«iPhone15», «PlayStation5» и «Электровелосипед».
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Set
+
+# Окончания, которые отрезаем от русских слов (длинные первыми)
+_ENDINGS = sorted([
+    'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ами', 'ями', 'ась', 'ось', 'ись', 'ася',
+    'ся', 'сь',
+    'ый', 'ий', 'ой', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ых', 'их', 'ую', 'юю',
+    'ым', 'им', 'ом', 'ем', 'ов', 'ев', 'ам', 'ям', 'ах', 'ях',
+    'а', 'я', 'ы', 'и', 'у', 'ю', 'о', 'е', 'ь',
+], key=len, reverse=True)
+_ENDINGS_PATTERN = '(?:' + '|'.join(_ENDINGS) + ')'
+_MIN_STEM = 3
+_CYRILLIC_WORD = re.compile(r'^[а-я]+$')
+_WORD_RE = re.compile(r'[^\w\s]')
+
+STOP_WORDS = frozenset({'для', 'от', 'в', 'на', 'с', 'по', 'из', 'у', 'бу', 'б/у', 'новый', 'новая', 'новое'})
+
+
+def normalize_text(text):
+    """Нижний регистр, ё -> е"""
+    return str(text or '').lower().replace('ё', 'е')
+
+
+def stem_word(word):
+    """Лёгкий стемминг: отрезает типовое окончание у русского слова"""
+    if not _CYRILLIC_WORD.match(word):
+        return word
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    """Слова запроса без пунктуации"""
+    return _WORD_RE.sub(' ', normalize_text(text)).split()
+
+
+@lru_cache(maxsize=1024)
+def extract_main_keyword(query):
+    """Первое значимое слово запроса (без стоп-слов и коротких слов)"""
+    words = tokenize(query)
+    for word in words:
+        if word not in STOP_WORDS and len(word) > 2:
+            return word
+    return words[0] if words else query
+
+
+def _compile_term(term, stem, whole_words=True):
+    """(паттерн термина, литеральный префикс до первой основы)"""
+    words = normalize_text(term).split(' ')
+    parts = []
+    prefix = None
+    for index, word in enumerate(words):
+        if stem and _CYRILLIC_WORD.match(word):
+            # Основа + необязательное окончание: «час» -> «часа», «новый» -> «новая»
+            root = stem_word(word)
+            parts.append(re.escape(root) + _ENDINGS_PATTERN + '?')
+            if prefix is None:
+                prefix = ' '.join(words[:index] + [root])
+        else:
+            parts.append(re.escape(word))
+    if prefix is None:
+        prefix = ' '.join(words)
+    pattern = ' '.join(parts)
+    if whole_words:
+        pattern = r'(?<!\w)' + pattern + r'(?!\w)'
+    return re.compile(pattern), prefix
+
+
+def _trie_pattern(words):
+    """Регулярка для набора литералов, сгруппированная по общим префиксам"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # Узел — конец слова: продолжение необязательно (жадно берём самое длинное)
+            return body + '?' if len(branches) > 1 else f'(?:{body})?'
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """🎯 Скомпилированные словари ключевых слов
+
+    vocabularies: {'urgency': ['срочно', ...], 'new': [...]}
+    scan(text) -> {'urgency': frozenset({'срочно'}), 'new': frozenset()}
+
+    whole_words=False — поиск подстрокой: «iphone» найдётся в «iPhone15».
+
+    Один regex из литеральных префиксов (быстрый поиск в C), окончания
+    и граница слова проверяются только у найденных кандидатов.
+    """
+
+    RESOLVED_CACHE_SIZE = 20000
+
+    def __init__(self, vocabularies: Dict[str, Iterable[str]], stem=True, whole_words=True):
+        self.vocabularies = {name: list(dict.fromkeys(terms)) for name, terms in vocabularies.items()}
+
+        self._vocabulary_sets = {name: frozenset(terms) for name, terms in self.vocabularies.items()}
+
+        # Литеральный префикс -> [(термин, полный паттерн)]
+        by_prefix: Dict[str, list] = {}
+        for term in self._vocabulary_terms():
+            pattern, prefix = _compile_term(term, stem, whole_words)
+            by_prefix.setdefault(prefix, []).append((term, pattern))
+
+        # Литеральный префикс -> кандидаты: его термины + термины более коротких
+        # префиксов, которые совпадают в той же позиции
+        self._candidates: Dict[str, list] = {
+            prefix: [entry for other in by_prefix if prefix.startswith(other) for entry in by_prefix[other]]
+            for prefix in by_prefix
+        }
+
+        # Префиксы, которые могут начинаться внутри другого префикса: (смещение, префикс).
+        # finditer не возвращает перекрывающиеся совпадения — их досматриваем по этому списку
+        self._overlaps: Dict[str, list] = {
+            prefix: [
+                (offset, other)
+                for offset in range(1, len(prefix))
+                for other in by_prefix
+                if prefix[offset:].startswith(other) or other.startswith(prefix[offset:])
+            ]
+            for prefix in by_prefix
+        }
+
+        # Префиксы собираются в trie-регулярку: sre не перебирает десятки
+        # альтернатив на каждой позиции, а идёт по общему началу слов.
+        # В режиме целых слов кандидат начинается только с начала слова
+        start = r'(?<!\w)' if whole_words else ''
+        self._regex = re.compile(start + _trie_pattern(by_prefix)) if by_prefix else None
+
+        # Окно текста от начала совпадения, в которое гарантированно помещаются
+        # термин со словоформой и все перекрывающиеся с ним термины
+        longest = max((len(term) + 3 * len(term.split(' ')) for term in self._vocabulary_terms()), default=0)
+        self._window = 2 * longest
+        # Окно -> найденные в нём термины. Фразы в объявлениях повторяются,
+        # поэтому окончания проверяются regex'ом только при промахе
+        self._resolved: Dict[str, frozenset] = {}
+        # Набор найденных терминов -> раскладка по словарям (наборов немного)
+        self._scans: Dict[frozenset, Dict[str, frozenset]] = {}
+
+    def _vocabulary_terms(self):
+        return dict.fromkeys(term for terms in self.vocabularies.values() for term in terms)
+
+    def _resolve(self, window) -> frozenset:
+        """Термины, совпадающие в начале окна (с учётом перекрытий)"""
+        prefix = self._regex.match(window).group()
+        hits = [(0, prefix)] + [
+            (offset, other) for offset, other in self._overlaps[prefix]
+            if window.startswith(other, offset)
+        ]
+        # Паттерн проверяет окончание и границы слова (до позиции и после окончания)
+        terms = frozenset(
+            term
+            for position, hit in hits
+            for term, pattern in self._candidates[hit]
+            if pattern.match(window, position)
+        )
+        if len(self._resolved) >= self.RESOLVED_CACHE_SIZE:
+            self._resolved.clear()
+        self._resolved[window] = terms
+        return terms
+
+    def find_terms(self, text) -> Set[str]:
+        """Все найденные термины (в исходном написании) за один проход"""
+        found: Set[str] = set()
+        if self._regex is None:
+            return found
+
+        text = normalize_text(text)
+        window = self._window
+        resolved = self._resolved
+        for match in self._regex.finditer(text):
+            start = match.start()
+            snippet = text[start:start + window]
+            terms = resolved.get(snippet)
+            if terms is None:
+                terms = self._resolve(snippet)
+            found |= terms
+        return found
+
+    def scan(self, text) -> Dict[str, frozenset]:
+        """Найденные термины, разложенные по словарям (результат только для чтения)"""
+        found = frozenset(self.find_terms(text))
+        hits = self._scans.get(found)
+        if hits is None:
+            hits = {name: found & terms for name, terms in self._vocabulary_sets.items()}
+            if len(self._scans) >= self.RESOLVED_CACHE_SIZE:
+                self._scans.clear()
+            self._scans[found] = hits
+        return hits
+
+    def has_any(self, text, vocabulary=None) -> bool:
+        """Есть ли хоть один термин (из словаря или из любого)"""
+        found = self.find_terms(text)
+        if vocabulary is None:
+            return bool(found)
+        return not found.isdisjoint(self._vocabulary_sets[vocabulary])
+
+    def count(self, text, vocabulary) -> int:
+        """Сколько разных терминов словаря найдено"""
+        return len(self.find_terms(text) & self._vocabulary_sets[vocabulary])
+
+
+@lru_cache(maxsize=256)
+def _cached_matcher(frozen_vocabularies, stem, whole_words):
+    return KeywordMatcher({name: terms for name, terms in frozen_vocabularies}, stem=stem, whole_words=whole_words)
+
+
+def get_matcher(vocabularies: Dict[str, Iterable[str]], stem=True, whole_words=True) -> KeywordMatcher:
+    """Матчер из кэша процесса: одинаковые словари компилируются один раз"""
+    frozen = tuple(sorted((name, tuple(terms)) for name, terms in vocabularies.items()))
+    return _cached_matcher(frozen, stem, whole_words)
@@ -34,6 +34,27 @@ class WebsiteConfig(AppConfig):  # ИЗМЕНИЛ: DashboardConfig → WebsiteCo
                 self.run_daily_charge
             )
 
+            # Очистка истёкшего кэша уведомлений (вместо DELETE на каждой проверке)
+            schedule.every(30).minutes.do(
+                self.run_notification_cache_cleanup
+            )
+
+            # Старые события push-канала (SSE)
+            schedule.every(10).minutes.do(
+                self.run_push_events_cleanup
+            )
+
+            # Сводка фильтров поиска (материализованное представление)
+            from apps.website.models import FoundItemFacet
+            schedule.every(FoundItemFacet.REFRESH_MINUTES).minutes.do(
+                self.run_found_item_facets_refresh
+            )
+
+            # Партиции FoundItem: будущие месяцы и архив старых
+            schedule.every().day.at("03:30").do(
+                self.run_found_item_partitions
+            )
+
             # Тестовое задание каждые 10 минут (для отладки)
             schedule.every(10).minutes.do(
                 self.run_daily_charge_test
@@ -71,3 +92,45 @@ class WebsiteConfig(AppConfig):  # ИЗМЕНИЛ: DashboardConfig → WebsiteCo
             call_command('deduct_daily_payments')
         except Exception as e:
             logger.error(f"❌ Ошибка тестового списания: {e}")
+
+    def run_notification_cache_cleanup(self):
+        """Удаляет истёкшие записи кэша уведомлений"""
+        try:
+            from apps.website.models import NotificationCache
+            deleted = NotificationCache.clean_expired()
+            if deleted:
+                logger.info(f"🧹 Кэш уведомлений: удалено {deleted} истёкших записей")
+        except Exception as e:
+            logger.error(f"❌ Ошибка очистки кэша уведомлений: {e}")
+
+    def run_push_events_cleanup(self):
+        """Удаляет события push-канала старше PushEvent.TTL_HOURS"""
+        try:
+            from apps.notifications.models import PushEvent
+            deleted = PushEvent.clean_expired()
+            if deleted:
+                logger.info(f"🧹 Push-канал: удалено {deleted} старых событий")
+        except Exception as e:
+            logger.error(f"❌ Ошибка очистки push-канала: {e}")
+
+    def run_found_item_facets_refresh(self):
+        """Пересчитывает сводку фильтров поиска (search_filters_api)"""
+        try:
+            from apps.website.models import FoundItemFacet
+            FoundItemFacet.refresh()
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления фильтров поиска: {e}")
+
+    def run_found_item_partitions(self):
+        """Создаёт партиции FoundItem наперёд и архивирует старше срока хранения"""
+        try:
+            from apps.website.partitions import archive_partitions, ensure_partitions, retention_settings
+            ensure_partitions()
+
+            keep_months, archive_dir = retention_settings()
+            if keep_months:
+                archived = archive_partitions(keep_months, archive_dir)
+                if archived:
+                    logger.info(f"📦 FoundItem: в архив ушло партиций: {len(archived)}")
+        except Exception as e:
+            logger.error(f"❌ Ошибка обслуживания партиций FoundItem: {e}")
@@ -2,6 +2,8 @@ import threading
 from django.utils import timezone
 import logging
 
+from apps.website.live_feed import publish_console_lines
+
 # Глобальное хранилище консольных сообщений
 console_history = []
 console_lock = threading.Lock()
@@ -12,6 +14,7 @@ def add_to_console(message, log_to_console=True):
     """Добавляет сообщение в консоль с правильным форматированием"""
     global console_history
 
+    added = []
     try:
         with console_lock:
             timestamp = timezone.now().strftime("[%H:%M:%S]")
@@ -33,6 +36,7 @@ def add_to_console(message, log_to_console=True):
                             # Проверяем на дубликаты перед добавлением
                             if not any(formatted_message == existing_msg for existing_msg in console_history[-20:]):
                                 console_history.append(formatted_message)
+                                added.append(formatted_message)
 
                                 # Логируем в консоль если нужно
                                 if log_to_console:
@@ -42,6 +46,9 @@ def add_to_console(message, log_to_console=True):
             if len(console_history) > 1000:
                 console_history = console_history[-500:]
 
+        # Публикация — уже без console_lock
+        publish_console_lines(added)
+
     except Exception as e:
         print(f"Ошибка добавления в консоль: {e}")
         logger.error(f"Ошибка добавления в консоль: {e}")
@@ -0,0 +1,66 @@
+"""
+📊 СТАТИСТИКА ДАШБОРДА ПОЛЬЗОВАТЕЛЯ
+
+Счётчики дашборда и профиля считаются одним запросом с условными
+агрегатами (поисковые запросы LEFT JOIN товары) плюс одна строка
+ParserStats и лежат в кэше DASHBOARD_STATS_TTL секунд. Новые товары и
+изменение поисковых запросов сбрасывают кэш владельца сразу:
+
+    stats = get_user_dashboard_stats(request.user)   # dashboard, profile_view
+    invalidate_dashboard_stats([user.id])            # FoundItemWriter, запросы
+
+Ключи: total_items, good_deals, today_items, potential_profit,
+total_searches, active_searches, duplicates_blocked.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.website.models import ParserStats, SearchQuery
+
+DASHBOARD_STATS_TTL = 60  # секунд
+
+
+def _cache_key(user_id):
+    return f'dashboard_stats_{user_id}'
+
+
+def get_user_dashboard_stats(user):
+    """Счётчики пользователя: из кэша или двумя запросами"""
+    key = _cache_key(user.id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = collect_dashboard_stats(user)
+        cache.set(key, stats, DASHBOARD_STATS_TTL)
+    return stats
+
+
+def collect_dashboard_stats(user):
+    """Счётчики без кэша: агрегаты по запросам и товарам + последняя ParserStats"""
+    # «Сегодня» — по местному времени, как found_at__date; диапазон идёт по индексу
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    good_deal = Q(found_items__profit__gt=0)
+
+    stats = SearchQuery.objects.filter(user=user).aggregate(
+        total_searches=Count('id', distinct=True),
+        active_searches=Count('id', distinct=True, filter=Q(is_active=True)),
+        total_items=Count('found_items'),
+        good_deals=Count('found_items', filter=good_deal),
+        today_items=Count('found_items', filter=Q(
+            found_items__found_at__gte=today, found_items__found_at__lt=today + timedelta(days=1)
+        )),
+        potential_profit=Sum('found_items__profit', filter=good_deal),
+    )
+    stats['potential_profit'] = stats['potential_profit'] or 0
+
+    stats['duplicates_blocked'] = ParserStats.objects.filter(user=user).order_by('-created_at').values_list(
+        'duplicates_blocked', flat=True
+    ).first() or 0
+    return stats
+
+
+def invalidate_dashboard_stats(user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in set(user_ids)])
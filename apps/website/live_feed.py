@@ -0,0 +1,164 @@
+"""
+📡 ЖИВАЯ ЛЕНТА: новые товары и строки консоли через push-канал
+
+Парсер публикует только что сохранённые товары, консоль — новые
+строки; страницы получают их по SSE (views.stream_views.live_stream)
+вместо опроса /api/latest-items/ и /api/console-update/:
+
+    publish_found_items(items)        # FoundItemWriter.save_batch
+    publish_console_lines(lines)      # console_manager.add_to_console
+
+    channels = [found_items_channel(user.id), CONSOLE_CHANNEL]
+
+Строки консоли копятся в памяти и уходят в канал одной пачкой раз в
+CONSOLE_FLUSH_INTERVAL из фонового потока: add_to_console не ждёт базу,
+а подписчики консоли просыпаются раз на пачку, а не на каждую строку.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from django.db import connection
+
+from apps.notifications.push import push_channel
+
+logger = logging.getLogger(__name__)
+
+CONSOLE_CHANNEL = 'console'
+
+# Колонки строки таблицы — только их и читаем из БД (values вместо моделей)
+LATEST_ITEMS_FIELDS = [
+    'id', 'product_id', 'title', 'source', 'image_url', 'seller_rating', 'reviews_count',
+    'posted_date', 'views_count', 'condition', 'category', 'city', 'mileage', 'year', 'color',
+    'price', 'profit', 'price_status', 'found_at', 'is_favorite', 'target_price', 'profit_percent',
+    'url', 'description', 'seller_name', 'address', 'metro_stations', 'full_location', 'steering',
+    'transmission', 'drive', 'engine', 'owners', 'pts', 'tax', 'customs', 'body', 'package',
+    'discount_price', 'views_today', 'seller_avatar', 'seller_profile_url', 'seller_type',
+]
+
+
+def found_items_channel(user_id):
+    return f'found_items:{user_id}'
+
+
+def found_item_row(item):
+    """Строка динамической таблицы из values()-словаря"""
+    return {
+        'id': item['id'],
+        'product_id': item['product_id'] or item['id'],
+        'title': item['title'] or 'Без названия',
+        'source': item['source'] or 'avito',
+        'image_url': item['image_url'] or '',
+        'seller_rating': float(item['seller_rating']) if item['seller_rating'] else 0,
+        'reviews_count': item['reviews_count'] or 0,
+        'posted_date': str(item['posted_date'])[:20] if item['posted_date'] else '—',
+        'views_count': item['views_count'] or 0,
+        'condition': item['condition'] or '—',
+        'category': item['category'] or '—',
+        'city': item['city'] or '—',
+        'mileage': item['mileage'] or '—',
+        'year': item['year'] or '—',
+        'color': item['color'] or '—',
+        'price': int(item['price']) if item['price'] else 0,
+        'profit': int(item['profit']) if item['profit'] else 0,
+        'price_status': item['price_status'] or '—',
+        'created_at': item['found_at'].strftime('%d.%m.%Y %H:%M') if item['found_at'] else '—',
+        'is_favorite': bool(item['is_favorite']),
+        'target_price': int(item['target_price']) if item['target_price'] else 0,
+        'profit_percent': float(item['profit_percent']) if item['profit_percent'] else 0,
+        'url': item['url'] or '',
+        'description': item['description'] or '',
+        'seller_name': item['seller_name'] or '',
+        'address': item['address'] or '',
+        'metro_stations': item['metro_stations'] or [],
+        'full_location': item['full_location'] or '',
+        'steering': item['steering'] or '—',
+        'transmission': item['transmission'] or '—',
+        'drive': item['drive'] or '—',
+        'engine': item['engine'] or '—',
+        'owners': item['owners'] or '—',
+        'pts': item['pts'] or '—',
+        'tax': item['tax'] or '—',
+        'customs': item['customs'] or '—',
+        'body': item['body'] or '—',
+        'package': item['package'] or '—',
+        'discount_price': int(item['discount_price']) if item['discount_price'] else 0,
+        'views_today': item['views_today'] or 0,
+        'seller_avatar': item['seller_avatar'] or '',
+        'seller_profile_url': item['seller_profile_url'] or '',
+        'seller_type': item['seller_type'] or 'Не указано',
+    }
+
+
+def publish_found_items(items):
+    """Сохранённые FoundItem — в каналы их владельцев одним INSERT (ошибки не мешают записи)"""
+    events = []
+    for item in items:
+        try:
+            row = found_item_row({field: getattr(item, field) for field in LATEST_ITEMS_FIELDS})
+            events.append((found_items_channel(item.search_query.user_id), 'found_item', row))
+        except Exception as e:
+            logger.warning(f"⚠️ Живая лента: товар {getattr(item, 'url', '?')} не опубликован: {e}")
+    try:
+        push_channel.publish_many(events)
+    except Exception as e:
+        logger.warning(f"⚠️ Живая лента: {len(events)} товаров не опубликованы: {e}")
+
+
+# ============================================
+# КОНСОЛЬ (пачками из фонового потока)
+# ============================================
+
+class ConsolePublisher:
+    """Копит строки консоли и публикует их пачками, пока они появляются"""
+
+    FLUSH_INTERVAL = 0.5  # Секунд между пачками
+    BUFFER_SIZE = 1000  # Неопубликованных строк; при переполнении теряются самые старые
+
+    def __init__(self):
+        self._lines = deque(maxlen=self.BUFFER_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, lines):
+        with self._lock:
+            self._lines.extend(lines)
+            if self._lines and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='console-publisher', daemon=True)
+                self._thread.start()
+
+    def _take(self):
+        """Накопленные строки; если их нет — поток завершается"""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            if not lines:
+                self._thread = None
+            return lines
+
+    def _run(self):
+        try:
+            while True:
+                time.sleep(self.FLUSH_INTERVAL)
+                lines = self._take()
+                if not lines:
+                    return
+                try:
+                    push_channel.publish_many([(CONSOLE_CHANNEL, 'console', {'message': line}) for line in lines])
+                except Exception as e:
+                    logger.warning(f"⚠️ Живая лента: {len(lines)} строк консоли не опубликованы: {e}")
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+            connection.close()
+
+
+console_publisher = ConsolePublisher()
+
+
+def publish_console_lines(lines):
+    """Строки — в очередь на публикацию (без запросов к БД в вызывающем потоке)"""
+    console_publisher.add(lines)
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.website.partitions import archive_partitions, restore_archive, retention_settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Архивирует месячные партиции FoundItem старше срока хранения (CSV в gzip) и удаляет их из базы; '
+        'избранное остаётся. --restore возвращает архив в базу'
+    )
+
+    def add_arguments(self, parser):
+        keep_months, archive_dir = retention_settings()
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=keep_months,
+            help=f'Сколько полных месяцев оставить в базе (по умолчанию FOUND_ITEM_RETENTION_MONTHS: {keep_months})',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=archive_dir,
+            help=f'Папка для архивов (по умолчанию FOUND_ITEM_ARCHIVE_DIR: {archive_dir})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, какие партиции уйдут в архив',
+        )
+        parser.add_argument(
+            '--restore',
+            metavar='PATH',
+            nargs='+',
+            help='Вернуть в базу архивы *.csv.gz (url, уже занятые в базе, пропускаются)',
+        )
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            for path in options['restore']:
+                restored = restore_archive(path)
+                self.stdout.write(self.style.SUCCESS(f'✅ {path}: восстановлено строк {restored}'))
+            return
+
+        keep_months = options['keep_months']
+        if keep_months is None:
+            raise CommandError('Срок хранения не задан: FOUND_ITEM_RETENTION_MONTHS или --keep-months')
+        if keep_months < 1:
+            raise CommandError('--keep-months должен быть не меньше 1')
+
+        result = archive_partitions(keep_months, options['archive_dir'], dry_run=options['dry_run'])
+
+        if not result:
+            self.stdout.write('📦 Нет партиций старше срока хранения')
+        elif options['dry_run']:
+            self.stdout.write(f"📦 Уйдут в архив: {', '.join(result)}")
+        else:
+            for path in result:
+                self.stdout.write(self.style.SUCCESS(f'✅ {path}'))
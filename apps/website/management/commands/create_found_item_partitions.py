@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.website.partitions import MONTHS_AHEAD, ensure_partitions, list_partitions
+
+
+class Command(BaseCommand):
+    help = 'Создаёт месячные партиции FoundItem на несколько месяцев вперёд'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=MONTHS_AHEAD,
+            help=f'Сколько месяцев вперёд от текущего (по умолчанию: {MONTHS_AHEAD})',
+        )
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(options['months_ahead'])
+
+        for name in created:
+            self.stdout.write(self.style.SUCCESS(f'✅ Создана партиция {name}'))
+        months = list_partitions()
+        self.stdout.write(
+            f"🗂️ Партиций: {len(months)}"
+            + (f" ({months[0]:%Y-%m} … {months[-1]:%Y-%m})" if months else "")
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0006_todocard_error_hash_todocard_task_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parsersettings',
+            name='ml_cpu_share',
+            field=models.FloatField(default=0.5, help_text='От 0 до 1: доля ядер сервера под пул обучения', verbose_name='Доля CPU для обучения моделей'),
+        ),
+        migrations.AddField(
+            model_name='parsersettings',
+            name='ml_max_workers',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Максимум процессов обучения'),
+        ),
+        migrations.AddField(
+            model_name='parsersettings',
+            name='ml_successive_halving',
+            field=models.BooleanField(default=False, verbose_name='Подбор гиперпараметров (successive halving)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_parsersettings_ml_training_budget'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parsersettings',
+            name='status_verbosity',
+            field=models.CharField(choices=[('off', 'Не отправлять'), ('summary', 'Итог цикла'), ('progress', 'Прогресс цикла'), ('detailed', 'Прогресс по запросам')], default='progress', max_length=10, verbose_name='Статус парсинга в Telegram'),
+        ),
+    ]
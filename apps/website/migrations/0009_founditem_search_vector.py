@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Вектор собирается в БД: триггер срабатывает и на bulk_create (FoundItemWriter),
+# и на queryset.update(), которые не вызывают save()/post_save
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('russian', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce({row}category, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce({row}description, '')), 'C') ||
+    setweight(to_tsvector('russian', coalesce({row}city, '') || ' ' || coalesce({row}seller_name, '')), 'D')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE OR REPLACE FUNCTION website_founditem_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS website_founditem_search_vector_trigger ON website_founditem;
+CREATE TRIGGER website_founditem_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, category, description, city, seller_name
+    ON website_founditem
+    FOR EACH ROW EXECUTE FUNCTION website_founditem_search_vector_update();
+
+UPDATE website_founditem SET search_vector = {SEARCH_VECTOR_SQL.format(row='')};
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS website_founditem_search_vector_trigger ON website_founditem;
+DROP FUNCTION IF EXISTS website_founditem_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0008_parsersettings_status_verbosity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='founditem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='founditem_search_vector_gin'),
+        ),
+    ]
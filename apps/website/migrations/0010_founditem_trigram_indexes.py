@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def _text(field):
+    return django.db.models.functions.comparison.Coalesce(
+        models.F(field), models.Value(''), output_field=models.TextField()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0009_founditem_search_vector'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.text.Concat(
+                            _text('title'), models.Value('\n'),
+                            _text('description'), models.Value('\n'),
+                            _text('product_id'), models.Value('\n'),
+                            _text('category'), models.Value('\n'),
+                            _text('seller_name'), models.Value('\n'),
+                            _text('city'), models.Value('\n'),
+                            _text('color'), models.Value('\n'),
+                            _text('body'), models.Value('\n'),
+                            _text('engine'), models.Value('\n'),
+                            _text('transmission'),
+                            output_field=models.TextField(),
+                        )
+                    ),
+                    name='gin_trgm_ops',
+                ),
+                name='founditem_search_text_trgm',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('category'), name='gin_trgm_ops'), name='founditem_category_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('city'), name='gin_trgm_ops'), name='founditem_city_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('seller_name'), name='gin_trgm_ops'), name='founditem_seller_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('color'), name='gin_trgm_ops'), name='founditem_color_trgm'),
+        ),
+    ]
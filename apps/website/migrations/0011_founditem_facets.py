@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Одна строка на (пользователь, фасет, значение). Уникальный индекс нужен
+# для REFRESH MATERIALIZED VIEW CONCURRENTLY (FoundItemFacet.refresh)
+CREATE_VIEW = """
+CREATE MATERIALIZED VIEW website_founditem_facets AS
+SELECT sq.user_id, facet.name AS facet, facet.value, count(*) AS items,
+       NULL::numeric AS min_value, NULL::numeric AS max_value, NULL::numeric AS avg_value
+FROM website_founditem fi
+JOIN website_searchquery sq ON sq.id = fi.search_query_id
+CROSS JOIN LATERAL (VALUES
+    ('category', fi.category::text),
+    ('city', fi.city::text),
+    ('source', fi.source::text),
+    ('seller_type', fi.seller_type::text),
+    ('color', fi.color::text)
+) AS facet(name, value)
+WHERE facet.value <> ''
+GROUP BY sq.user_id, facet.name, facet.value
+
+UNION ALL
+
+SELECT sq.user_id, 'price', '', count(*), min(fi.price), max(fi.price), round(avg(fi.price), 2)
+FROM website_founditem fi
+JOIN website_searchquery sq ON sq.id = fi.search_query_id
+GROUP BY sq.user_id
+
+UNION ALL
+
+SELECT sq.user_id, 'year', '', count(*), min(fi.year), max(fi.year), NULL
+FROM website_founditem fi
+JOIN website_searchquery sq ON sq.id = fi.search_query_id
+WHERE fi.year IS NOT NULL
+GROUP BY sq.user_id
+WITH DATA;
+
+CREATE UNIQUE INDEX website_founditem_facets_key
+    ON website_founditem_facets (user_id, facet, value);
+"""
+
+DROP_VIEW = "DROP MATERIALIZED VIEW IF EXISTS website_founditem_facets;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0010_founditem_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+        migrations.CreateModel(
+            name='FoundItemFacet',
+            fields=[
+                ('pk', models.CompositePrimaryKey('user', 'facet', 'value', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=255)),
+                ('items', models.BigIntegerField()),
+                ('min_value', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('max_value', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('avg_value', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+            ],
+            options={
+                'verbose_name': 'Фильтры поиска',
+                'verbose_name_plural': 'Фильтры поиска',
+                'db_table': 'website_founditem_facets',
+                'managed': False,
+            },
+        ),
+    ]
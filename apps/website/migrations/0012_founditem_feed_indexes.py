@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:05
+
+import django.contrib.postgres.operations
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не блокирует запись парсера, но не работает в транзакции
+    atomic = False
+
+    dependencies = [
+        ('website', '0011_founditem_facets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='founditem',
+            index=models.Index(fields=['search_query', '-found_at'], name='founditem_query_feed'),
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='founditem',
+            index=models.Index(fields=['title', 'price'], name='founditem_title_price'),
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='founditem',
+            index=models.Index(condition=models.Q(('is_favorite', True)), fields=['search_query', '-found_at'], name='founditem_favorite_feed'),
+        ),
+        django.contrib.postgres.operations.AddIndexConcurrently(
+            model_name='founditem',
+            index=models.Index(condition=models.Q(('profit__gt', 0)), fields=['search_query'], name='founditem_good_deals'),
+        ),
+        # Индекс внешнего ключа теперь — префикс founditem_query_feed
+        migrations.AlterField(
+            model_name='founditem',
+            name='search_query',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='found_items', to='website.searchquery'),
+        ),
+    ]
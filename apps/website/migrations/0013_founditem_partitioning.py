@@ -0,0 +1,206 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:10
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Материализованное представление фильтров читает website_founditem — пересоздаём
+facets = import_module('apps.website.migrations.0011_founditem_facets')
+
+# Индексы (кроме первичного ключа и уникальности url) и внешние ключи
+# переносятся на новую таблицу с прежними именами — состояние миграций Django
+# остаётся верным. Уникальность url реализует реестр website_founditem_url.
+MOVE_INDEXES = r"""
+DO $$
+DECLARE
+    item record;
+BEGIN
+    FOR item IN
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = '{source}'
+          AND i.indexname NOT LIKE 'website_founditem_url_%_like'
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conindid = format('%I.%I', i.schemaname, i.indexname)::regclass
+          )
+    LOOP
+        EXECUTE format('DROP INDEX %I', item.indexname);
+        EXECUTE regexp_replace(item.indexdef, ' ON (ONLY )?\S+ USING ', ' ON {target} USING ');
+    END LOOP;
+
+    FOR item IN
+        SELECT conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = '{source}'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE {source} DROP CONSTRAINT %I', item.conname);
+        EXECUTE format('ALTER TABLE {target} ADD CONSTRAINT %I %s', item.conname, item.definition);
+    END LOOP;
+END
+$$;
+"""
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE TRIGGER website_founditem_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, category, description, city, seller_name
+    ON website_founditem
+    FOR EACH ROW EXECUTE FUNCTION website_founditem_search_vector_update();
+"""
+
+# Месячные партиции: от самого старого товара до трёх месяцев вперёд
+# (дальше их создаёт create_found_item_partitions), остальное — в DEFAULT
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month date := date_trunc('month', coalesce(
+        (SELECT min(found_at) FROM website_founditem_unpartitioned), now()
+    ) AT TIME ZONE 'UTC');
+    last_month date := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months';
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF website_founditem FOR VALUES FROM (%L) TO (%L)',
+            'website_founditem_p' || to_char(month, 'YYYYMM'),
+            month::timestamp AT TIME ZONE 'UTC',
+            (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END
+$$;
+
+CREATE TABLE website_founditem_default PARTITION OF website_founditem DEFAULT;
+"""
+
+# Уникальный индекс секционированной таблицы обязан включать found_at, поэтому
+# url занимается в отдельной таблице: повтор даёт ту же ошибку unique_violation
+# (IntegrityError), что и прежний UNIQUE (url). item_id позволяет товару
+# переехать в другую партицию (UPDATE found_at), не освобождая свой url.
+URL_REGISTRY = """
+CREATE TABLE website_founditem_url (
+    url text PRIMARY KEY,
+    item_id bigint NOT NULL,
+    found_at timestamp with time zone NOT NULL
+);
+
+INSERT INTO website_founditem_url (url, item_id, found_at)
+SELECT url, id, found_at FROM website_founditem;
+
+CREATE FUNCTION website_founditem_url_claim() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.url IS NOT DISTINCT FROM OLD.url AND NEW.found_at IS NOT DISTINCT FROM OLD.found_at THEN
+            RETURN NEW;
+        END IF;
+        DELETE FROM website_founditem_url WHERE url = OLD.url AND item_id = OLD.id;
+    END IF;
+
+    INSERT INTO website_founditem_url AS registry (url, item_id, found_at)
+    VALUES (NEW.url, NEW.id, NEW.found_at)
+    ON CONFLICT (url) DO UPDATE SET found_at = EXCLUDED.found_at
+    WHERE registry.item_id = EXCLUDED.item_id;
+
+    IF NOT FOUND THEN
+        RAISE unique_violation USING
+            MESSAGE = 'duplicate key value violates unique constraint "website_founditem_url_key"',
+            DETAIL = format('Key (url)=(%s) already exists.', NEW.url),
+            CONSTRAINT = 'website_founditem_url_key';
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION website_founditem_url_release() RETURNS trigger AS $$
+BEGIN
+    -- При переносе в другую партицию строка удаляется и вставляется заново
+    DELETE FROM website_founditem_url
+    WHERE url = OLD.url AND item_id = OLD.id
+      AND NOT EXISTS (SELECT 1 FROM website_founditem WHERE id = OLD.id);
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER website_founditem_url_claim
+    BEFORE INSERT OR UPDATE OF url, found_at ON website_founditem
+    FOR EACH ROW EXECUTE FUNCTION website_founditem_url_claim();
+
+CREATE TRIGGER website_founditem_url_release
+    AFTER DELETE ON website_founditem
+    FOR EACH ROW EXECUTE FUNCTION website_founditem_url_release();
+"""
+
+# Вся таблица копируется в одной транзакции под ACCESS EXCLUSIVE — на
+# больших базах запускать в окно обслуживания (PostgreSQL 13+)
+PARTITION = f"""
+DROP MATERIALIZED VIEW IF EXISTS website_founditem_facets;
+
+ALTER TABLE website_founditem ALTER COLUMN id DROP IDENTITY IF EXISTS;
+ALTER TABLE website_founditem RENAME TO website_founditem_unpartitioned;
+ALTER TABLE website_founditem_unpartitioned DROP CONSTRAINT website_founditem_pkey;
+
+CREATE TABLE website_founditem (
+    LIKE website_founditem_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE
+) PARTITION BY RANGE (found_at);
+
+CREATE SEQUENCE IF NOT EXISTS website_founditem_id_seq;
+ALTER SEQUENCE website_founditem_id_seq OWNED BY website_founditem.id;
+ALTER TABLE website_founditem ALTER COLUMN id SET DEFAULT nextval('website_founditem_id_seq');
+
+{CREATE_PARTITIONS}
+
+INSERT INTO website_founditem SELECT * FROM website_founditem_unpartitioned;
+SELECT setval('website_founditem_id_seq', coalesce(max(id), 0) + 1, false) FROM website_founditem;
+
+ALTER TABLE website_founditem ADD CONSTRAINT website_founditem_pkey PRIMARY KEY (id, found_at);
+{MOVE_INDEXES.format(source='website_founditem_unpartitioned', target='website_founditem')}
+{URL_REGISTRY}
+{SEARCH_VECTOR_TRIGGER}
+DROP TABLE website_founditem_unpartitioned;
+{facets.CREATE_VIEW}
+"""
+
+UNPARTITION = f"""
+DROP MATERIALIZED VIEW IF EXISTS website_founditem_facets;
+
+ALTER TABLE website_founditem RENAME TO website_founditem_partitioned;
+ALTER TABLE website_founditem_partitioned DROP CONSTRAINT website_founditem_pkey;
+
+CREATE TABLE website_founditem (
+    LIKE website_founditem_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE
+);
+ALTER SEQUENCE website_founditem_id_seq OWNED BY website_founditem.id;
+
+INSERT INTO website_founditem SELECT * FROM website_founditem_partitioned;
+
+ALTER TABLE website_founditem ADD CONSTRAINT website_founditem_pkey PRIMARY KEY (id);
+ALTER TABLE website_founditem ADD CONSTRAINT website_founditem_url_key UNIQUE (url);
+CREATE INDEX website_founditem_url_7ca43e6a_like ON website_founditem (url varchar_pattern_ops);
+{MOVE_INDEXES.format(source='website_founditem_partitioned', target='website_founditem')}
+{SEARCH_VECTOR_TRIGGER}
+DROP TABLE website_founditem_partitioned;
+DROP TABLE website_founditem_url;
+DROP FUNCTION website_founditem_url_claim();
+DROP FUNCTION website_founditem_url_release();
+{facets.CREATE_VIEW}
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0012_founditem_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(PARTITION, UNPARTITION)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='founditem',
+                    name='url',
+                    field=models.URLField(),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.5 on 2026-10-19 21:20
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Ключи фильтров считаются в БД, как search_vector (0009): триггер срабатывает
+# и на bulk_create FoundItemWriter, и на queryset.update(). Станции метро —
+# объекты {"name": ..., "color": ...} или строки
+CITY_KEY_SQL = "nullif(lower(btrim({row}city)), '')"
+
+METRO_KEYS_SQL = """ARRAY(
+    SELECT DISTINCT station_key FROM (
+        SELECT lower(btrim(CASE jsonb_typeof(station)
+                               WHEN 'object' THEN station->>'name'
+                               WHEN 'string' THEN station #>> '{{}}'
+                           END)) AS station_key
+        FROM jsonb_array_elements(
+            CASE jsonb_typeof({row}metro_stations) WHEN 'array' THEN {row}metro_stations ELSE '[]'::jsonb END
+        ) AS station
+    ) AS stations
+    WHERE station_key <> ''
+)"""
+
+CREATE_TRIGGER = f"""
+CREATE OR REPLACE FUNCTION website_founditem_filter_keys_update() RETURNS trigger AS $$
+BEGIN
+    NEW.city_key := {CITY_KEY_SQL.format(row='NEW.')};
+    NEW.metro_keys := {METRO_KEYS_SQL.format(row='NEW.')};
+
+    IF nullif(btrim(NEW.category), '') IS NULL THEN
+        NEW.product_category_id := NULL;
+    ELSE
+        INSERT INTO website_productcategory (name) VALUES (btrim(NEW.category)) ON CONFLICT (name) DO NOTHING;
+        SELECT id INTO NEW.product_category_id FROM website_productcategory WHERE name = btrim(NEW.category);
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER website_founditem_filter_keys_trigger
+    BEFORE INSERT OR UPDATE OF city, metro_stations, category
+    ON website_founditem
+    FOR EACH ROW EXECUTE FUNCTION website_founditem_filter_keys_update();
+
+INSERT INTO website_productcategory (name)
+SELECT DISTINCT btrim(category) FROM website_founditem WHERE nullif(btrim(category), '') IS NOT NULL
+ON CONFLICT (name) DO NOTHING;
+
+UPDATE website_founditem SET
+    city_key = {CITY_KEY_SQL.format(row='')},
+    metro_keys = {METRO_KEYS_SQL.format(row='')},
+    product_category_id = (
+        SELECT id FROM website_productcategory WHERE name = btrim(website_founditem.category)
+    );
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS website_founditem_filter_keys_trigger ON website_founditem;
+DROP FUNCTION IF EXISTS website_founditem_filter_keys_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0013_founditem_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='founditem',
+            name='city_key',
+            field=models.CharField(editable=False, max_length=100, null=True, verbose_name='Город (ключ фильтра)'),
+        ),
+        migrations.AddField(
+            model_name='founditem',
+            name='metro_keys',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), editable=False, null=True, size=None, verbose_name='Станции метро (ключи фильтра)'),
+        ),
+        migrations.AddField(
+            model_name='founditem',
+            name='product_category',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='found_items', to='website.productcategory', verbose_name='Категория (справочник)'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        # Индексы — после заполнения: строятся один раз, а не на каждый UPDATE
+        migrations.AddIndex(
+            model_name='founditem',
+            index=models.Index(fields=['search_query', 'city_key', '-found_at'], name='founditem_query_city'),
+        ),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=models.Index(fields=['search_query', 'product_category', '-found_at'], name='founditem_query_category'),
+        ),
+        migrations.AddIndex(
+            model_name='founditem',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['metro_keys'], name='founditem_metro_keys_gin'),
+        ),
+    ]
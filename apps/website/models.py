@@ -1,6 +1,11 @@
 # dashboard/models.py
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce, Concat, Upper
 from django.utils import timezone
 import os
 from django.utils.safestring import mark_safe
@@ -48,6 +53,28 @@ class SearchQuery(models.Model):
         ordering = ['-created_at']
 
 
+# 🔥 Поля универсального поиска (icontains по любому из них).
+# Склеиваются в одно выражение с trigram-индексом founditem_search_text_trgm,
+# запрос должен строить его через found_item_search_text() — иначе индекс не подхватится
+SEARCH_TEXT_FIELDS = [
+    'title', 'description', 'product_id', 'category', 'seller_name',
+    'city', 'color', 'body', 'engine', 'transmission',
+]
+
+# Поля автодополнения — у каждого свой trigram-индекс по UPPER(поле)
+AUTOCOMPLETE_FIELDS = ['category', 'city', 'seller_name', 'color']
+
+
+def found_item_search_text():
+    """UPPER(title || '\\n' || description || ...) — выражение trigram-индекса поиска"""
+    parts = []
+    for field in SEARCH_TEXT_FIELDS:
+        if parts:
+            parts.append(models.Value('\n'))
+        parts.append(Coalesce(models.F(field), models.Value(''), output_field=models.TextField()))
+    return Upper(Concat(*parts, output_field=models.TextField()))
+
+
 class FoundItem(models.Model):
     # 🔥 ПОЛЕ ИСТОЧНИКА
     SOURCE_CHOICES = [
@@ -62,10 +89,13 @@ class FoundItem(models.Model):
         verbose_name="Источник объявления"
     )
 
-    search_query = models.ForeignKey(SearchQuery, on_delete=models.CASCADE, related_name='found_items')
+    # Отдельный индекс не нужен: его заменяет founditem_query_feed (search_query, -found_at)
+    search_query = models.ForeignKey(SearchQuery, on_delete=models.CASCADE, related_name='found_items', db_index=False)
     title = models.CharField(max_length=255)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    url = models.URLField(unique=True)
+    # Уникальность — в реестре website_founditem_url (миграция 0013): индекс
+    # секционированной таблицы не может быть уникальным без found_at
+    url = models.URLField()
     image_url = models.URLField(blank=True, null=True)
     image_urls = models.JSONField(default=list, blank=True)
     description = models.TextField(blank=True, null=True)
@@ -200,6 +230,24 @@ class FoundItem(models.Model):
     # Статистика просмотров
     views_today = models.IntegerField(default=0, verbose_name="Просмотров сегодня")
 
+    # 🔍 Полнотекстовый поиск: заполняет триггер PostgreSQL (миграция 0009),
+    # поэтому вектор актуален и для bulk_create/update()
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name="Поисковый вектор")
+
+    # 🏙️ Ключи фильтров списка товаров (found_items_view): тоже заполняет триггер
+    # (миграция 0014) — город и станции метро в нижнем регистре, категория из справочника
+    city_key = models.CharField(max_length=100, null=True, editable=False, verbose_name="Город (ключ фильтра)")
+    metro_keys = ArrayField(models.TextField(), null=True, editable=False, verbose_name="Станции метро (ключи фильтра)")
+    product_category = models.ForeignKey(
+        ProductCategory,
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        related_name='found_items',
+        db_index=False,  # Префикс не нужен: фильтр всегда вместе с search_query (founditem_query_category)
+        verbose_name="Категория (справочник)"
+    )
+
     def __str__(self):
         return self.title
 
@@ -492,8 +540,95 @@ class FoundItem(models.Model):
             models.Index(fields=['transmission']),
             models.Index(fields=['source', 'year']),
             models.Index(fields=['source', 'body']),
+            # Лента пользователя: filter(search_query__user=...).order_by('-found_at')
+            models.Index(fields=['search_query', '-found_at'], name='founditem_query_feed'),
+            # Дубликат по названию и цене (_is_duplicate_in_database)
+            models.Index(fields=['title', 'price'], name='founditem_title_price'),
+            # Частичные: избранное и выгодные — малая доля строк
+            models.Index(fields=['search_query', '-found_at'], condition=Q(is_favorite=True),
+                         name='founditem_favorite_feed'),
+            models.Index(fields=['search_query'], condition=Q(profit__gt=0), name='founditem_good_deals'),
+            # Фильтры списка товаров по нормализованным ключам
+            models.Index(fields=['search_query', 'city_key', '-found_at'], name='founditem_query_city'),
+            models.Index(fields=['search_query', 'product_category', '-found_at'], name='founditem_query_category'),
+            GinIndex(fields=['metro_keys'], name='founditem_metro_keys_gin'),
+            GinIndex(fields=['search_vector'], name='founditem_search_vector_gin'),
+            GinIndex(OpClass(found_item_search_text(), name='gin_trgm_ops'), name='founditem_search_text_trgm'),
+            *[
+                GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=f'founditem_{field}_trgm')
+                for field in AUTOCOMPLETE_FIELDS
+            ],
         ]
 
+
+class FoundItemFacet(models.Model):
+    """Сводка фильтров поиска по пользователям (материализованное представление)
+
+    Строка — значение фасета из VALUE_FACETS с числом объявлений; для 'price'
+    и 'year' одна строка с value='' и min/max/avg. Представление создаёт
+    миграция 0011, обновляет refresh() из планировщика WebsiteConfig.
+    """
+    VALUE_FACETS = ['category', 'city', 'source', 'seller_type', 'color']
+    REFRESH_MINUTES = 5
+
+    pk = models.CompositePrimaryKey('user', 'facet', 'value')
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=255)
+    items = models.BigIntegerField()
+    min_value = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    max_value = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    avg_value = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+
+    class Meta:
+        app_label = "website"
+        managed = False
+        db_table = 'website_founditem_facets'
+        verbose_name = "Фильтры поиска"
+        verbose_name_plural = "Фильтры поиска"
+
+    @classmethod
+    def refresh(cls):
+        """Пересчитывает сводку, не блокируя чтение (нужен уникальный индекс)"""
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {cls._meta.db_table}')
+
+    @classmethod
+    def summary(cls, user):
+        """Фильтры пользователя в формате search_filters_api — одним запросом"""
+        summary = {facet_name: [] for facet_name in cls.VALUE_FACETS}
+        price, year = {}, {}
+
+        rows = cls.objects.filter(user=user).order_by('facet', 'value').values_list(
+            'facet', 'value', 'min_value', 'max_value', 'avg_value'
+        )
+        for facet, value, min_value, max_value, avg_value in rows:
+            if facet == 'price':
+                price = {'min': min_value, 'max': max_value, 'avg': avg_value}
+            elif facet == 'year':
+                year = {'min': min_value, 'max': max_value}
+            elif facet in summary:
+                summary[facet].append(value)
+
+        return {
+            'categories': summary['category'],
+            'cities': summary['city'],
+            'sources': summary['source'],
+            'seller_types': summary['seller_type'],
+            'colors': summary['color'],
+            'price_range': {
+                'min': price.get('min') or 0,
+                'max': price.get('max') or 1000000,
+                'avg': price.get('avg') or 0
+            },
+            'year_range': {
+                'min': int(year['min']) if year.get('min') else 2000,
+                'max': int(year['max']) if year.get('max') else datetime.now().year
+            }
+        }
+
+
 class ParserStats(models.Model):
     """Модель для хранения статистики парсера"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -858,6 +993,13 @@ class ParserSettings(models.Model):
         ('auto.ru', 'Auto.ru'),
     ]
 
+    STATUS_VERBOSITY_CHOICES = [
+        ('off', 'Не отправлять'),
+        ('summary', 'Итог цикла'),
+        ('progress', 'Прогресс цикла'),
+        ('detailed', 'Прогресс по запросам'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField('Название настроек', max_length=100, default='Основные настройки')
     keywords = models.TextField('Ключевые слова')
@@ -876,6 +1018,14 @@ class ParserSettings(models.Model):
     updated_at = models.DateTimeField('Обновлено', auto_now=True)
     city = models.CharField(max_length=100, default='Москва', verbose_name='Город поиска', help_text='Город для поиска товаров (например: Москва, Санкт-Петербург, Краснодар)', blank=True)
 
+    # 🧠 Обучение ML-моделей: сколько CPU можно отнять у парсера
+    ml_cpu_share = models.FloatField('Доля CPU для обучения моделей', default=0.5, help_text='От 0 до 1: доля ядер сервера под пул обучения')
+    ml_max_workers = models.PositiveSmallIntegerField('Максимум процессов обучения', null=True, blank=True)
+    ml_successive_halving = models.BooleanField('Подбор гиперпараметров (successive halving)', default=False)
+
+    # 📋 Статус цикла в Telegram: одно сообщение на цикл, редактируется по ходу
+    status_verbosity = models.CharField('Статус парсинга в Telegram', max_length=10, choices=STATUS_VERBOSITY_CHOICES, default='progress')
+
     def save(self, *args, **kwargs):
         if self.is_default:
             if self.pk:
@@ -1012,6 +1162,8 @@ class NotificationCache(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True, verbose_name="Время отправки")
     expires_at = models.DateTimeField(verbose_name="Истекает в", help_text="Кэш очищается через 24 часа")
 
+    CACHE_TTL_HOURS = 24
+
     class Meta:
         app_label = "website"
         verbose_name = "Кэш уведомлений"
@@ -1029,39 +1181,96 @@ class NotificationCache(models.Model):
     def save(self, *args, **kwargs):
         if not self.expires_at:
             from django.utils import timezone
-            self.expires_at = timezone.now() + timezone.timedelta(hours=24)
+            self.expires_at = timezone.now() + timezone.timedelta(hours=self.CACHE_TTL_HOURS)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def _keys(cls, product_id, normalized_url):
+        """ID и URL в том виде, в каком они лежат в таблице (обрезаны по длине колонок)"""
+        id_length = cls._meta.get_field('product_id').max_length
+        url_length = cls._meta.get_field('normalized_url').max_length
+        return str(product_id)[:id_length], (normalized_url or '')[:url_length]
+
     @classmethod
     def is_duplicate(cls, product_id, normalized_url):
-        """Проверяет дубликат по ID товара и URL"""
+        """Проверяет дубликат по ID товара и URL (один SELECT, без очистки)"""
+        return not cls.filter_new([product_id], [normalized_url])
+
+    @classmethod
+    def filter_new(cls, product_ids, urls):
+        """Возвращает ID товаров, которых нет в кэше ни по ID, ни по URL
+
+        product_ids и urls — параллельные списки; вся пачка проверяется
+        одним запросом, порядок и повторы сохраняются. Сравнение — по тем же
+        обрезанным ключам, что пишет add_many.
+        """
         from django.utils import timezone
-        cls.clean_expired()
-        return cls.objects.filter(
-            models.Q(product_id=product_id) | models.Q(normalized_url=normalized_url),
+        product_ids = [str(product_id) for product_id in product_ids]
+        keys = [cls._keys(product_id, url) for product_id, url in zip(product_ids, urls)]
+        if not keys:
+            return []
+
+        cached = cls.objects.filter(
+            models.Q(product_id__in={key for key, _ in keys}) | models.Q(normalized_url__in={url for _, url in keys}),
             expires_at__gt=timezone.now()
-        ).exists()
+        ).order_by().values_list('product_id', 'normalized_url')
+
+        cached_ids, cached_urls = set(), set()
+        for product_id, normalized_url in cached:
+            cached_ids.add(product_id)
+            cached_urls.add(normalized_url)
+
+        return [
+            product_id for product_id, (key, url) in zip(product_ids, keys)
+            if key not in cached_ids and url not in cached_urls
+        ]
 
     @classmethod
     def add_to_cache(cls, product_id, normalized_url, product_name):
-        """Добавляет запись в кэш"""
+        """Добавляет запись в кэш (или продлевает существующую)"""
+        return cls.add_many([(product_id, normalized_url, product_name)])
+
+    @classmethod
+    def add_many(cls, entries):
+        """Upsert пачки [(product_id, normalized_url, product_name)] одним запросом
+
+        INSERT ... ON CONFLICT (product_id) DO UPDATE: повторная отправка
+        продлевает запись вместо DELETE + INSERT.
+        """
         from django.utils import timezone
-        cls.objects.filter(
-            models.Q(product_id=product_id) | models.Q(normalized_url=normalized_url)
-        ).delete()
-        return cls.objects.create(
-            product_id=product_id,
-            normalized_url=normalized_url,
-            product_name=product_name
+        now = timezone.now()
+        expires_at = now + timezone.timedelta(hours=cls.CACHE_TTL_HOURS)
+
+        rows = {}
+        for product_id, normalized_url, product_name in entries:
+            # Ключ — уже обрезанный ID: два длинных ID с общим началом — одна строка upsert'а
+            product_id, normalized_url = cls._keys(product_id, normalized_url)
+            rows[product_id] = cls(
+                product_id=product_id,
+                normalized_url=normalized_url,
+                product_name=(product_name or '')[:255],
+                sent_at=now,
+                expires_at=expires_at,
+            )
+        if not rows:
+            return 0
+
+        cls.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=['product_id'],
+            update_fields=['normalized_url', 'product_name', 'sent_at', 'expires_at'],
         )
+        return len(rows)
 
     @classmethod
     def clean_expired(cls):
-        """Очищает устаревшие записи"""
+        """Очищает устаревшие записи (периодическая задача, индекс по expires_at)"""
         from django.utils import timezone
         expired_count = cls.objects.filter(expires_at__lte=timezone.now()).delete()[0]
         if expired_count > 0:
             print(f"🧹 Очищено {expired_count} устаревших записей кэша")
+        return expired_count
 
     @classmethod
     def get_cache_stats(cls):
@@ -0,0 +1,197 @@
+"""
+🗂️ ПАРТИЦИИ website_founditem ПО МЕСЯЦАМ
+
+С миграции 0013 таблица секционирована по found_at: website_founditem_pYYYYMM
+на каждый месяц и website_founditem_default для строк вне созданных месяцев.
+Запрос с условием на found_at (лента за последние дни) читает только свои
+партиции, а старые месяцы уходят в архив целиком, без DELETE:
+
+    ensure_partitions()               # create_found_item_partitions / планировщик
+    archive_partitions(keep_months=12, archive_dir=settings.FOUND_ITEM_ARCHIVE_DIR)
+    restore_archive(path)             # archive_found_items --restore PATH
+
+Архив по умолчанию выключен (FOUND_ITEM_RETENTION_MONTHS = None): старые
+объявления нужны истории цен и обучению ML, удалять их — решение владельца.
+
+Архив партиции — CSV с заголовком в gzip (website_founditem_p202401.csv.gz)
+со всеми её строками. Избранные (is_favorite) в базе остаются: после DETACH
+они вставляются обратно и попадают в website_founditem_default.
+
+Восстановление — restore_archive(path) или
+``manage.py archive_found_items --restore website_founditem_p202401.csv.gz``:
+CSV грузится во временную таблицу, в website_founditem вставляются строки,
+чьих url в базе нет (избранные и повторно найденные не дублируются).
+Партиция месяца не создаётся — строки ложатся в DEFAULT и архивом больше
+не затрагиваются; удалить их снова можно обычным DELETE по found_at.
+Вручную, из psql:
+
+    CREATE TEMP TABLE restored (LIKE website_founditem INCLUDING DEFAULTS);
+    \copy restored FROM PROGRAM 'zcat website_founditem_p202401.csv.gz' WITH (FORMAT csv, HEADER)
+    INSERT INTO website_founditem SELECT * FROM restored r
+    WHERE NOT EXISTS (SELECT 1 FROM website_founditem_url u WHERE u.url = r.url);
+"""
+
+import gzip
+import logging
+import re
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'website_founditem'
+DEFAULT_PARTITION = f'{TABLE}_default'
+URL_REGISTRY = f'{TABLE}_url'
+MONTHS_AHEAD = 3  # Сколько будущих месяцев держать созданными
+
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(value=None):
+    value = value or timezone.now()
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def _bound(month):
+    # Границы в UTC, как в миграции 0013
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def list_partitions():
+    """Месяцы существующих партиций по возрастанию"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month):
+    """Партиция месяца; строки этого месяца из DEFAULT переносятся в неё"""
+    name, lower, upper = partition_name(month), _bound(month), _bound(add_months(month, 1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE found_at >= {lower} AND found_at < {upper})"
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM ({lower}) TO ({upper})")
+            return name
+
+        # Партиция с такими строками в DEFAULT не создаётся — сначала переносим их.
+        # DELETE из DEFAULT освобождает url в реестре, поэтому занимаем их снова
+        cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE found_at >= {lower} AND found_at < {upper} "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})")
+        cursor.execute(
+            f"INSERT INTO {URL_REGISTRY} (url, item_id, found_at) SELECT url, id, found_at FROM {name} "
+            f"ON CONFLICT (url) DO NOTHING"
+        )
+        logger.info(f"🗂️ {name}: перенесено из DEFAULT {moved} строк")
+    return name
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD):
+    """Создаёт партиции с текущего месяца на months_ahead вперёд, возвращает новые"""
+    existing = set(list_partitions())
+    current = month_start()
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(create_partition(month))
+    if created:
+        logger.info(f"🗂️ Созданы партиции FoundItem: {', '.join(created)}")
+    return created
+
+
+def archive_partitions(keep_months, archive_dir, dry_run=False):
+    """Отсоединяет партиции старше keep_months месяцев, пишет их в archive_dir/*.csv.gz и удаляет
+
+    Текущий месяц не считается: keep_months=12 оставляет 12 полных прошлых месяцев.
+    Избранные товары попадают в архив, но из базы не уходят (переезжают в DEFAULT).
+    Возвращает пути архивов (при dry_run — имена партиций).
+    """
+    cutoff = add_months(month_start(), -keep_months)
+    old = [month for month in list_partitions() if add_months(month, 1) <= cutoff]
+    if dry_run or not old:
+        return [partition_name(month) for month in old]
+
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    archived = []
+    for month in old:
+        name = partition_name(month)
+        path = archive_dir / f'{name}.csv.gz'
+        # Файл пишется внутри транзакции: ошибка записи откатывает DETACH
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            with gzip.open(path, 'wb') as archive:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+            # DETACH не запускает триггеры — url освобождаем сами
+            cursor.execute(
+                f"DELETE FROM {URL_REGISTRY} WHERE found_at >= {_bound(month)} AND found_at < {_bound(add_months(month, 1))}"
+            )
+            # Избранное остаётся в базе: вставка в таблицу кладёт его в DEFAULT и снова занимает url
+            cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {name} WHERE is_favorite")
+            kept = cursor.rowcount
+            cursor.execute(f"DROP TABLE {name}")
+        logger.info(f"📦 {name} → {path}" + (f" (избранных оставлено в базе: {kept})" if kept else ''))
+        archived.append(path)
+    return archived
+
+
+def restore_archive(path):
+    """Возвращает строки архива партиции в таблицу (в DEFAULT); url, уже занятые в базе, пропускаются
+
+    Возвращает число восстановленных строк.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TEMP TABLE restored (LIKE {TABLE} INCLUDING DEFAULTS)")
+        with gzip.open(path, 'rb') as archive:
+            cursor.copy_expert("COPY restored FROM STDIN WITH (FORMAT csv, HEADER)", archive)
+        cursor.execute(
+            f"INSERT INTO {TABLE} SELECT * FROM restored "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {URL_REGISTRY} WHERE {URL_REGISTRY}.url = restored.url)"
+        )
+        restored = cursor.rowcount
+        cursor.execute("DROP TABLE restored")
+    logger.info(f"📦 {path} → {TABLE}: восстановлено {restored} строк")
+    return restored
+
+
+def retention_settings():
+    """(keep_months или None — архив выключен, archive_dir) из settings"""
+    return (
+        getattr(settings, 'FOUND_ITEM_RETENTION_MONTHS', None),
+        getattr(settings, 'FOUND_ITEM_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'database_backups' / 'found_items'),
+    )
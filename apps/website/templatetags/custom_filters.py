@@ -274,6 +274,6 @@ def split(value, arg):
 
 @register.simple_tag
 def get_total_items(user):
-    """Возвращает общее количество ВСЕХ товаров пользователя"""
-    from apps.website.models import FoundItem
-    return FoundItem.objects.filter(search_query__user=user).count()
\ No newline at end of file
+    """Возвращает общее количество ВСЕХ товаров пользователя (кэш статистики дашборда)"""
+    from apps.website.dashboard_stats import get_user_dashboard_stats
+    return get_user_dashboard_stats(user)['total_items']
\ No newline at end of file
@@ -1,4 +1,35 @@
-from django.test import TestCase
+import gzip
+import json
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Avg, Max, Min, Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.notifications.push import push_channel
+from apps.website import partitions
+from apps.website.console_manager import add_to_console
+from apps.website.dashboard_stats import get_user_dashboard_stats, invalidate_dashboard_stats
+from apps.website.live_feed import CONSOLE_CHANNEL, ConsolePublisher, found_items_channel
+from apps.website.models import FoundItem, FoundItemFacet, NotificationCache, ParserStats, SearchQuery
+from apps.website.utils.found_item_filters import filter_found_items, sort_found_items
+from apps.website.utils.pagination import decode_cursor, keyset_filter
+from apps.website.views import core_views
+from apps.website.views.api_views import get_latest_items
+from apps.website.views.search_views import (
+    TABLE_COLUMNS, autocomplete_api, calculate_search_score, header_search_api, search_filters_api, table_search_api,
+    universal_search_api
+)
+from apps.website.views.stream_views import live_stream
+
 
 def safe_console_log(message):
     """Безопасное логирование до инициализации Django"""
@@ -9,3 +40,864 @@ def safe_console_log(message):
         print(f"[SAFE_LOG] {message}")
         print(f"[SAFE_LOG] {message}")
 # Create your tests here.
+
+
+class LiveStreamTests(TransactionTestCase):
+    """📡 SSE живой ленты: свои события, консоль — только администраторам"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('viewer')
+        self.admin = User.objects.create_user('admin', is_staff=True)
+        patcher = mock.patch.object(push_channel, 'LISTEN_TIMEOUT', 0.1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.join_listener)
+
+    @staticmethod
+    def join_listener():
+        listener = push_channel._listener
+        if listener is not None:
+            listener.join(10)
+
+    def stream(self, user, query=''):
+        request = RequestFactory().get(f'/api/live/stream/{query}')
+        request.user = user
+        return live_stream(request)
+
+    def read_until(self, response, marker, chunks=10):
+        received = []
+        for chunk in response.streaming_content:
+            received.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+            if marker in received[-1] or len(received) >= chunks:
+                break
+        return ''.join(received)
+
+    def test_console_requires_admin(self):
+        self.assertEqual(self.stream(self.user, '?items=0&console=1').status_code, 403)
+
+    def test_admin_receives_console_lines(self):
+        response = self.stream(self.admin, '?items=0&console=1')
+        try:
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            push_channel.publish(CONSOLE_CHANNEL, 'console', {'message': '[12:00:00] Проверка'})
+            self.assertIn('event: console', self.read_until(response, 'Проверка'))
+        finally:
+            response.close()
+
+    def test_stream_gets_own_items_and_releases_connection(self):
+        response = self.stream(self.user)
+        try:
+            self.assertIn('retry:', self.read_until(response, 'retry:'))
+            # Пока поток ждёт событий, соединение запроса возвращено
+            self.assertIsNone(connection.connection)
+
+            push_channel.publish_many([
+                (found_items_channel(self.admin.id), 'found_item', {'title': 'Чужой'}),
+                (found_items_channel(self.user.id), 'found_item', {'title': 'Свой'}),
+            ])
+            received = self.read_until(response, 'Свой')
+            self.assertIn('event: found_item', received)
+            self.assertNotIn('Чужой', received)
+        finally:
+            response.close()
+        self.assertFalse(push_channel._subscribers)
+
+
+class ConsolePublisherTests(SimpleTestCase):
+    """🖥️ Строки консоли уходят в канал пачкой из фонового потока"""
+
+    def test_lines_are_published_in_one_batch(self):
+        publisher = ConsolePublisher()
+        publisher.FLUSH_INTERVAL = 0.2
+
+        with mock.patch('apps.website.live_feed.push_channel.publish_many') as publish_many:
+            for index in range(5):
+                publisher.add([f'[12:00:0{index}] строка {index}'])
+            thread = publisher._thread
+            thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(publish_many.call_count, 1)
+        self.assertEqual([data['message'] for _, _, data in publish_many.call_args.args[0]],
+                         [f'[12:00:0{index}] строка {index}' for index in range(5)])
+        self.assertIsNone(publisher._thread)
+
+    def test_add_to_console_does_not_publish_under_lock(self):
+        with mock.patch('apps.website.console_manager.publish_console_lines') as publish:
+            from apps.website.console_manager import console_lock
+            publish.side_effect = lambda lines: self.assertFalse(console_lock.locked())
+            add_to_console('🧪 проверка публикации', log_to_console=False)
+        publish.assert_called_once()
+
+
+class LatestItemsApiTests(TestCase):
+    """📊 Дельта по since_id и 304 без новых находок"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('latest')
+        cls.search_query = SearchQuery.objects.create(user=cls.user, name='iphone', target_price=0)
+        cls.items = [cls.create_item(index) for index in range(3)]
+
+    @classmethod
+    def create_item(cls, index):
+        return FoundItem.objects.create(search_query=cls.search_query, title=f'Товар {index}', price=100,
+                                        url=f'https://www.avito.ru/latest/{index}')
+
+    def setUp(self):
+        cache.clear()  # Счётчики троттлинга
+
+    def get(self, **params):
+        headers = {key: params.pop(key) for key in list(params) if key.startswith('HTTP_')}
+        request = RequestFactory().get('/api/latest-items/', params, **headers)
+        request.user = self.user
+        return get_latest_items(request)
+
+    def test_full_list_without_since_id(self):
+        response = self.get()
+        data = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data['items']], [item.id for item in reversed(self.items)])
+        self.assertEqual(data['latest_id'], self.items[-1].id)
+
+    def test_since_id_returns_only_newer_items(self):
+        data = json.loads(self.get(since_id=self.items[0].id).content)
+        self.assertEqual([item['id'] for item in data['items']], [self.items[2].id, self.items[1].id])
+
+        with self.assertNumQueries(1):
+            data = json.loads(self.get(since_id=self.items[-1].id).content)
+        self.assertEqual(data['items'], [])
+        self.assertEqual(data['count'], 0)
+
+    def test_not_modified_until_new_item(self):
+        etag = self.get()['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        newer = self.create_item(3)
+        response = self.get(since_id=self.items[-1].id, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([item['id'] for item in json.loads(response.content)['items']], [newer.id])
+
+    def test_bad_since_id_is_400(self):
+        response = self.get(since_id='abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['message'], 'since_id должен быть числом')
+
+    def test_other_value_error_is_500(self):
+        with mock.patch('apps.website.views.api_views.found_item_row', side_effect=ValueError('bad row')):
+            response = self.get()
+        self.assertEqual(response.status_code, 500)
+
+
+def create_found_item(search_query, url, **fields):
+    fields = {'title': 'Товар', 'price': 100, **fields}
+    return FoundItem.objects.create(search_query=search_query, url=url, **fields)
+
+
+def api_get(view, user, **params):
+    request = RequestFactory().get('/api/', params)
+    request.user = user
+    response = view(request)
+    return response, json.loads(response.content)
+
+
+class HeaderSearchTests(TestCase):
+    """🔍 Полнотекстовый поиск в шапке: ранжирование в PostgreSQL, прежний формат ответа"""
+
+    PAGE_KEYS = {'id', 'product_id', 'name', 'description', 'category', 'location', 'seller',
+                 'price', 'profit', 'icon', 'photo', 'url', 'year', 'color', 'source'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('header')
+        search_query = SearchQuery.objects.create(user=cls.user, name='iphone', target_price=0)
+        cls.in_title = create_found_item(
+            search_query, 'https://www.avito.ru/h/1', title='Айфон 13 синий', category='Бытовая техника',
+            city='Москва', price=50000, profit=7000, product_id='1001', year=2021, source='avito')
+        cls.in_description = create_found_item(
+            search_query, 'https://www.avito.ru/h/2', title='Чехол', description='Подходит на айфон 13',
+            city='Казань', product_id='1002')
+        cls.other = create_found_item(search_query, 'https://www.avito.ru/h/3', title='Велосипед',
+                                      product_id='1003')
+
+    def search(self, query):
+        return api_get(header_search_api, self.user, q=query)[1]
+
+    def test_response_shape(self):
+        data = self.search('айфон')
+        self.assertEqual(set(data), {'pages', 'files', 'members', 'suggestions', 'query', 'total_results'})
+        self.assertEqual(data['total_results'], 2)
+        self.assertEqual(set(data['pages'][0]), self.PAGE_KEYS)
+        self.assertEqual(data['pages'][0], {
+            'id': self.in_title.id, 'product_id': '1001', 'name': 'Айфон 13 синий', 'description': '',
+            'category': 'Бытовая техника', 'location': 'Москва', 'seller': '', 'price': '50,000 ₽',
+            'profit': '+7,000 ₽', 'icon': 'ri-smartphone-line', 'photo': '',
+            'url': f'/found-items/{self.in_title.id}/', 'year': '2021', 'color': '', 'source': 'avito',
+        })
+        self.assertEqual(data['suggestions'][0], 'айфон в Москва')
+
+    def test_title_match_ranks_above_description(self):
+        pages = self.search('айфон')['pages']
+        self.assertEqual([page['id'] for page in pages], [self.in_title.id, self.in_description.id])
+
+    def test_prefix_and_stemmed_words_match(self):
+        self.assertEqual([page['id'] for page in self.search('айф')['pages']],
+                         [self.in_title.id, self.in_description.id])
+        self.assertEqual([page['id'] for page in self.search('айфоны 13 син')['pages']], [self.in_title.id])
+
+    def test_product_id_matches_exactly(self):
+        self.assertEqual([page['id'] for page in self.search('1003')['pages']], [self.other.id])
+
+    def test_vector_follows_updates(self):
+        FoundItem.objects.filter(pk=self.other.pk).update(title='Айфон 15')
+        self.assertIn(self.other.id, [page['id'] for page in self.search('айфон')['pages']])
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            self.search('айфон')
+
+    def test_short_query_is_empty(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search('а'), {'pages': [], 'files': [], 'members': [], 'suggestions': []})
+
+
+class UniversalSearchTests(TestCase):
+    """🎯 Универсальный поиск и автодополнение по trigram-индексам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('universal')
+        cls.other_user = User.objects.create_user('universal-other')
+        search_query = SearchQuery.objects.create(user=cls.user, name='macbook', target_price=0)
+        other_query = SearchQuery.objects.create(user=cls.other_user, name='macbook', target_price=0)
+        rows = [
+            {'title': 'MacBook Pro 14', 'category': 'Ноутбуки', 'city': 'Москва', 'color': 'серый'},
+            {'title': 'Чехол', 'description': 'Для MacBook Air', 'city': 'Москва'},
+            {'title': 'Ноутбук', 'category': 'MacBook', 'seller_name': 'MacBook Store', 'city': 'Мурманск'},
+            {'title': 'Macbook Air M2', 'city': 'Санкт-Петербург', 'condition': 'как macbook новый'},
+            {'title': 'Велосипед', 'category': 'Спорт', 'city': 'Москва', 'year': 2015},
+        ]
+        cls.items = [
+            create_found_item(search_query, f'https://www.avito.ru/u/{index}', product_id=str(2000 + index), **row)
+            for index, row in enumerate(rows)
+        ]
+        create_found_item(other_query, 'https://www.avito.ru/u/other', title='MacBook', city='Москва-Сити')
+
+    def search(self, query):
+        return api_get(universal_search_api, self.user, q=query)[1]
+
+    def legacy_ranking(self, query):
+        """Как было: все объявления в Python, score > 0, по убыванию score"""
+        scored = [(calculate_search_score(item, query), item) for item in FoundItem.objects.all()]
+        return sorted((score for score, item in scored if score), reverse=True)
+
+    def test_ranking_matches_calculate_search_score(self):
+        for query in ['macbook', 'москва', 'ноутбук', '2002']:
+            with self.subTest(query=query):
+                pages = self.search(query)['pages']
+                items = FoundItem.objects.in_bulk([page['id'] for page in pages])
+                scores = [calculate_search_score(items[page['id']], query) for page in pages]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+                # Похожие по trigram слова (score 0) — после всех точных совпадений
+                self.assertEqual([score for score in scores if score], self.legacy_ranking(query))
+
+    def test_typo_matches_similar_word(self):
+        ids = {page['id'] for page in self.search('macbok')['pages']}
+        self.assertTrue({self.items[0].id, self.items[3].id} <= ids)
+
+    def test_year_query(self):
+        self.assertEqual([page['id'] for page in self.search('2015')['pages']], [self.items[4].id])
+
+    def test_two_queries(self):
+        with self.assertNumQueries(2):
+            data = self.search('macbook')
+        self.assertEqual(data['total_found'], 5)
+        self.assertFalse(data['total_capped'])
+
+    def test_autocomplete_returns_own_distinct_values(self):
+        response, data = api_get(autocomplete_api, self.user, field='city', q='моск')
+        self.assertEqual(data['results'], [{'id': 'Москва', 'text': 'Москва'}])
+
+    def test_autocomplete_orders_by_similarity(self):
+        data = api_get(autocomplete_api, self.user, field='seller', q='macbook')[1]
+        self.assertEqual([row['text'] for row in data['results']], ['MacBook Store'])
+        data = api_get(autocomplete_api, self.user, field='category', q='ноутбук')[1]
+        self.assertEqual([row['text'] for row in data['results']], ['Ноутбуки'])
+
+    def test_autocomplete_unknown_field(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(api_get(autocomplete_api, self.user, field='url', q='avito')[1], {'results': []})
+
+
+class SearchFiltersTests(TestCase):
+    """🎛️ Фильтры поиска из сводки FoundItemFacet совпадают с прежними запросами к FoundItem"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('facets')
+        cls.other_user = User.objects.create_user('facets-other')
+        cls.search_query = SearchQuery.objects.create(user=cls.user, name='авто', target_price=0)
+        other_query = SearchQuery.objects.create(user=cls.other_user, name='авто', target_price=0)
+        rows = [
+            {'category': 'Автомобили', 'city': 'Москва', 'color': 'белый', 'price': 900000, 'year': 2015},
+            {'category': 'Автомобили', 'city': 'Казань', 'seller_type': 'private', 'price': 1250000,
+             'year': 2019},
+            {'category': 'Мотоциклы', 'city': 'Москва', 'source': 'auto.ru', 'price': 310000},
+        ]
+        cls.items = [
+            create_found_item(cls.search_query, f'https://www.avito.ru/f/{index}', **row)
+            for index, row in enumerate(rows)
+        ]
+        create_found_item(other_query, 'https://www.avito.ru/f/other', category='Дома', city='Сочи', price=1)
+
+    def legacy_filters(self):
+        """Ответ search_filters_api до сводки: отдельные запросы к FoundItem"""
+        items = FoundItem.objects.filter(search_query__user=self.user)
+
+        def distinct(field):
+            return list(items.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                        .values_list(field, flat=True).distinct().order_by(field))
+
+        price = items.aggregate(min=Min('price'), max=Max('price'), avg=Avg('price'))
+        year = items.exclude(year__isnull=True).aggregate(min=Min('year'), max=Max('year'))
+        return {
+            'categories': distinct('category'),
+            'cities': distinct('city'),
+            'sources': distinct('source'),
+            'seller_types': distinct('seller_type'),
+            'colors': distinct('color'),
+            'price_range': {
+                'min': price['min'] or 0,
+                'max': price['max'] or 1000000,
+                'avg': round(price['avg'], 2) if price['avg'] else 0,
+            },
+            'year_range': {'min': year['min'] or 2000, 'max': year['max'] or datetime.now().year},
+        }
+
+    def get(self, **headers):
+        request = RequestFactory().get('/api/search/filters/', **headers)
+        request.user = self.user
+        return search_filters_api(request)
+
+    def test_summary_matches_item_queries(self):
+        FoundItemFacet.refresh()
+        self.assertEqual(FoundItemFacet.summary(self.user), self.legacy_filters())
+
+    def test_summary_follows_inserts_and_deletes_after_refresh(self):
+        FoundItemFacet.refresh()
+        create_found_item(self.search_query, 'https://www.avito.ru/f/new', category='Грузовики',
+                          city='Тверь', color='синий', price=5000000, year=2023)
+        self.items[2].delete()
+        # До обновления сводка прежняя — допустимое отставание REFRESH_MINUTES
+        self.assertIn('Мотоциклы', FoundItemFacet.summary(self.user)['categories'])
+
+        FoundItemFacet.refresh()
+        filters = FoundItemFacet.summary(self.user)
+        self.assertEqual(filters, self.legacy_filters())
+        self.assertEqual(filters['categories'], ['Автомобили', 'Грузовики'])
+        self.assertEqual(filters['price_range']['max'], Decimal('5000000'))
+
+    def test_single_query_and_not_modified(self):
+        FoundItemFacet.refresh()
+        with self.assertNumQueries(1):
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['cities'], ['Казань', 'Москва'])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.items[1].delete()
+        FoundItemFacet.refresh()
+        changed = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(json.loads(changed.content)['cities'], ['Москва'])
+
+
+class DashboardStatsTests(TestCase):
+    """📊 Счётчики дашборда: два запроса, кэш, те же числа, что отдельные запросы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dashboard')
+        cls.other_user = User.objects.create_user('dashboard-other')
+        active = SearchQuery.objects.create(user=cls.user, name='iphone', target_price=0)
+        SearchQuery.objects.create(user=cls.user, name='ipad', target_price=0, is_active=False)
+        other = SearchQuery.objects.create(user=cls.other_user, name='iphone', target_price=0)
+
+        yesterday = timezone.now() - timedelta(days=1, hours=1)
+        for index, profit in enumerate([5000, 1500, 0, 0]):
+            item = create_found_item(active, f'https://www.avito.ru/d/{index}', profit=profit)
+            if index % 2:
+                FoundItem.objects.filter(pk=item.pk).update(found_at=yesterday)
+        create_found_item(other, 'https://www.avito.ru/d/other', profit=9000)
+
+        ParserStats.objects.create(user=cls.user, duplicates_blocked=3)
+        ParserStats.objects.create(user=cls.user, duplicates_blocked=7)
+
+    def setUp(self):
+        cache.clear()
+
+    def legacy_stats(self):
+        """Как было в core_views.dashboard: отдельный запрос на каждый счётчик"""
+        items = FoundItem.objects.filter(search_query__user=self.user)
+        return {
+            'total_items': items.count(),
+            'good_deals': items.filter(profit__gt=0).count(),
+            'active_searches': SearchQuery.objects.filter(user=self.user, is_active=True).count(),
+            'today_items': items.filter(found_at__date=timezone.localdate()).count(),
+            'total_searches': SearchQuery.objects.filter(user=self.user).count(),
+            'duplicates_blocked': ParserStats.objects.filter(user=self.user).latest('created_at').duplicates_blocked,
+            'potential_profit': items.filter(profit__gt=0).aggregate(total=Sum('profit'))['total'] or 0,
+        }
+
+    def test_values_match_separate_queries(self):
+        stats = get_user_dashboard_stats(self.user)
+        self.assertEqual(stats, self.legacy_stats())
+        self.assertEqual(stats['total_items'], 4)
+        self.assertEqual(stats['good_deals'], 2)
+        self.assertEqual(stats['potential_profit'], Decimal('6500'))
+        self.assertEqual(stats['today_items'], 2)
+        self.assertEqual(stats['duplicates_blocked'], 7)
+
+    def test_two_queries_then_cache(self):
+        with self.assertNumQueries(2):
+            stats = get_user_dashboard_stats(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_dashboard_stats(self.user), stats)
+
+    def test_invalidate_recounts(self):
+        get_user_dashboard_stats(self.user)
+        create_found_item(SearchQuery.objects.get(user=self.user, name='iphone'), 'https://www.avito.ru/d/new',
+                          profit=100)
+        self.assertEqual(get_user_dashboard_stats(self.user)['total_items'], 4)
+
+        invalidate_dashboard_stats([self.user.id])
+        with self.assertNumQueries(2):
+            self.assertEqual(get_user_dashboard_stats(self.user)['total_items'], 5)
+
+    def test_user_without_data(self):
+        user = User.objects.create_user('dashboard-empty')
+        self.assertEqual(get_user_dashboard_stats(user), {
+            'total_searches': 0, 'active_searches': 0, 'total_items': 0, 'good_deals': 0,
+            'today_items': 0, 'potential_profit': 0, 'duplicates_blocked': 0,
+        })
+
+
+class NotificationCacheTests(TestCase):
+    """🗂️ Кэш уведомлений: пачка — один запрос, длинные ID сравниваются так же, как хранятся"""
+
+    def setUp(self):
+        NotificationCache.add_many([
+            ('1001', 'https://www.avito.ru/a/1001', 'iPhone'),
+            ('1002', 'https://www.avito.ru/a/1002', 'iPad'),
+        ])
+
+    def test_filter_new_is_one_query(self):
+        ids = [str(1000 + index) for index in range(1000)]
+        urls = [f'https://www.avito.ru/a/{product_id}' for product_id in ids]
+        with self.assertNumQueries(1):
+            fresh = NotificationCache.filter_new(ids, urls)
+        self.assertEqual(len(fresh), 998)
+        self.assertNotIn('1001', fresh)
+        self.assertNotIn('1002', fresh)
+
+    def test_filter_new_matches_by_url(self):
+        urls = ['https://www.avito.ru/a/1001', 'https://www.avito.ru/b']
+        self.assertEqual(NotificationCache.filter_new(['2001', '2002'], urls), ['2002'])
+
+    def test_add_many_is_one_query(self):
+        entries = [(str(3000 + index), f'https://www.avito.ru/c/{index}', 'item') for index in range(100)]
+        with self.assertNumQueries(1):
+            self.assertEqual(NotificationCache.add_many(entries), 100)
+        self.assertEqual(NotificationCache.objects.count(), 102)
+
+    def test_add_many_extends_existing_entry(self):
+        NotificationCache.objects.filter(product_id='1001').update(expires_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(NotificationCache.filter_new(['1001'], ['https://www.avito.ru/a/1001']), ['1001'])
+
+        NotificationCache.add_many([('1001', 'https://www.avito.ru/a/1001', 'iPhone')])
+        self.assertEqual(NotificationCache.objects.filter(product_id='1001').count(), 1)
+        self.assertEqual(NotificationCache.filter_new(['1001'], ['https://www.avito.ru/a/1001']), [])
+
+    def test_is_duplicate_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(NotificationCache.is_duplicate('1001', 'https://www.avito.ru/other'))
+        with self.assertNumQueries(1):
+            self.assertFalse(NotificationCache.is_duplicate('9999', 'https://www.avito.ru/other'))
+
+    def test_long_product_id_is_found_after_add(self):
+        product_id = 'x' * 80
+        url = 'https://www.avito.ru/' + 'y' * 600
+        NotificationCache.add_to_cache(product_id, url, 'long')
+
+        self.assertTrue(NotificationCache.is_duplicate(product_id, 'https://www.avito.ru/other'))
+        self.assertTrue(NotificationCache.is_duplicate('other', url))
+        self.assertEqual(NotificationCache.filter_new([product_id], [url]), [])
+
+    def test_long_ids_with_common_prefix_make_one_row(self):
+        prefix = 'z' * 50
+        with self.assertNumQueries(1):
+            NotificationCache.add_many([(prefix + '1', 'https://www.avito.ru/z1', 'a'),
+                                        (prefix + '2', 'https://www.avito.ru/z2', 'b')])
+        self.assertEqual(NotificationCache.objects.filter(product_id=prefix).count(), 1)
+
+
+def plan_nodes(queryset):
+    """Узлы EXPLAIN (JSON) по таблице FoundItem и её партициям"""
+    def walk(node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from walk(child)
+
+    plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+    table = FoundItem._meta.db_table
+    # Bitmap Index Scan без Relation Name — узнаём по имени индекса партиции
+    return [node for node in walk(plan)
+            if (node.get('Relation Name') or node.get('Index Name') or '').startswith(table)]
+
+
+def partition_index_parents():
+    """Индекс партиции → индекс таблицы (план идёт по индексам партиций)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname, parent.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relkind = 'I'"
+        )
+        return dict(cursor.fetchall())
+
+
+def found_at_index():
+    """Имя Index(fields=['found_at']) из Meta.indexes модели"""
+    return next(index.name for index in FoundItem._meta.indexes if index.fields == ['found_at'])
+
+
+class FoundItemFeedTestCase(TestCase):
+    """Объявления нескольких пользователей с ANALYZE — чтобы план был как на живой базе"""
+
+    ROWS = 20000
+    USERS = 20
+    QUERIES_PER_USER = 3
+    CITIES = ['Москва', 'Санкт-Петербург', 'Казань', 'Новосибирск', 'Москва-Сити', '']
+    STATIONS = ['Арбатская', 'Тверская', 'Маяковская', 'Курская']
+    CATEGORIES = ['Телефоны', 'Ноутбуки', 'Автомобили', 'Мебель', '']
+    RARE_CITY, RARE_CATEGORY = 'Тверь', 'Велосипеды'  # ~1% строк: выборочный фильтр
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        users = [User.objects.create_user(f'feed{number}') for number in range(cls.USERS)]
+        queries = SearchQuery.objects.bulk_create([
+            SearchQuery(user=user, name=f'feed{number}', target_price=0)
+            for user in users for number in range(cls.QUERIES_PER_USER)
+        ])
+        cls.user = users[0]
+
+        now = timezone.now()
+        items = []
+        for index in range(cls.ROWS):
+            price = Decimal(rng.randrange(1000, 100000))
+            items.append(FoundItem(
+                search_query=rng.choice(queries),
+                title=f'Товар {index % 700}',
+                price=price,
+                target_price=price,
+                profit=Decimal(rng.randrange(-20000, 10000)),
+                is_favorite=rng.random() < 0.02,
+                views_count=rng.randrange(1000),
+                city=cls.RARE_CITY if rng.random() < 0.01 else rng.choice(cls.CITIES),
+                metro_stations=[{'name': name} for name in rng.sample(cls.STATIONS, rng.randrange(3))],
+                category=cls.RARE_CATEGORY if rng.random() < 0.01 else rng.choice(cls.CATEGORIES),
+                found_at=now - timedelta(minutes=index, seconds=rng.random()),
+                url=f'https://www.avito.ru/feed/{index}',
+            ))
+        # found_at из списка, а не «сейчас»
+        with mock.patch.object(FoundItem._meta.get_field('found_at'), 'auto_now_add', False):
+            FoundItem.objects.bulk_create(items, batch_size=5000)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {FoundItem._meta.db_table}')
+            cursor.execute(f'ANALYZE {SearchQuery._meta.db_table}')
+
+    def assertUsesIndex(self, queryset, *indexes):
+        """План идёт хотя бы по одному из indexes (имена индексов таблицы)"""
+        parents = partition_index_parents()
+        used = {parents.get(node['Index Name'], node['Index Name']) for node in plan_nodes(queryset)
+                if 'Index Name' in node}
+        self.assertTrue(used & set(indexes), queryset.explain())
+
+    def assertNoSeqScan(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT DISTINCT tableoid::regclass::text FROM {FoundItem._meta.db_table}")
+            filled = {row[0] for row in cursor.fetchall()}
+        # Пустые партиции планировщик честно читает Seq Scan'ом — это бесплатно
+        scanned = {node['Relation Name'] for node in plan_nodes(queryset) if node['Node Type'] == 'Seq Scan'}
+        self.assertFalse(scanned & filled, queryset.explain())
+
+
+class FeedIndexTests(FoundItemFeedTestCase):
+    """🗂️ Горячие запросы ленты идут по индексам миграции 0012"""
+
+    def test_search_query_feed(self):
+        search_query = SearchQuery.objects.filter(user=self.user).first()
+        self.assertUsesIndex(FoundItem.objects.filter(search_query=search_query).order_by('-found_at')[:50],
+                             'founditem_query_feed')
+
+    def test_user_feed(self):
+        # Запросов у пользователя несколько: планировщик идёт по found_at с конца
+        # и отбрасывает чужие строки — без сортировки и полного чтения
+        self.assertNoSeqScan(FoundItem.objects.filter(search_query__user=self.user).order_by('-found_at')[:50])
+
+    def test_favorites(self):
+        favorites = FoundItem.objects.filter(search_query__user=self.user, is_favorite=True)
+        self.assertUsesIndex(favorites.order_by('-found_at')[:50], 'founditem_favorite_feed')
+
+    def test_good_deals_count(self):
+        good_deals = FoundItem.objects.filter(search_query__user=self.user, profit__gt=0)
+        self.assertUsesIndex(good_deals.order_by().values('pk'), 'founditem_good_deals')
+
+    def test_duplicate_check(self):
+        sample = FoundItem.objects.order_by('id').first()
+        self.assertUsesIndex(FoundItem.objects.filter(title=sample.title, price=sample.price)[:1],
+                             'founditem_title_price')
+
+
+class FoundItemsViewTests(FoundItemFeedTestCase):
+    """📦 Список товаров: фильтры по ключам 0014, страницы по курсору, немного запросов"""
+
+    def view(self, **params):
+        """Контекст found_items_view (шаблон не рендерим — в нём свои запросы)
+
+        add_to_console тоже подменяем: строку консоли публикует фоновый поток
+        своим соединением, и PushEvent пережил бы откат теста.
+        """
+        request = RequestFactory().get('/found-items/', params)
+        request.user = self.user
+        with mock.patch.object(core_views, 'render', side_effect=lambda request, template, context: context), \
+                mock.patch.object(core_views, 'add_to_console'):
+            return core_views.found_items_view(request)
+
+    def items(self, params):
+        return filter_found_items(FoundItem.objects.filter(search_query__user=self.user), params)
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            context = self.view(page_size=100, **params, **({'cursor': cursor} if cursor else {}))
+            ids += [item.id for item in context['found_items']]
+            cursor = context['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_page_queries(self):
+        # Страница, EXPLAIN для оценки числа (малой выборке — ещё COUNT), число избранных
+        with self.assertNumQueries(3):
+            context = self.view()
+        self.assertTrue(context['stats']['total_is_estimate'])
+
+        with self.assertNumQueries(4):
+            context = self.view(city='Казань', cursor=context['next_cursor'])
+        self.assertEqual(context['stats']['total_items'], self.items({'city': 'Казань'}).count())
+        self.assertFalse(context['stats']['total_is_estimate'])
+
+    def test_cursor_pages_follow_order_by(self):
+        for sort_by in ['-found_at', 'price', 'category', '-posted_date']:
+            with self.subTest(sort_by=sort_by):
+                params = {'city': 'Москва', 'sort_by': sort_by}
+                expected = sort_found_items(self.items(params), sort_by).values_list('id', flat=True)
+                self.assertEqual(self.walk(**params), list(expected))
+
+    def test_bad_cursor_starts_over(self):
+        context = self.view(cursor='испорчен')
+        self.assertTrue(context['is_first_page'])
+        self.assertEqual(context['found_items'], list(sort_found_items(self.items({}), '-found_at')[:20]))
+
+    def test_city_matches_whole_value_ignoring_case(self):
+        ids = set(self.items({'city': ' москва '}).values_list('id', flat=True))
+        expected = FoundItem.objects.filter(search_query__user=self.user, city='Москва')
+        self.assertEqual(ids, set(expected.values_list('id', flat=True)))
+
+    def test_metro_and_category(self):
+        items = FoundItem.objects.filter(search_query__user=self.user)
+        metro = {item.id for item in items if 'тверская' in [station['name'].lower() for station in item.metro_stations]}
+        self.assertEqual(set(self.items({'metro': 'Тверская'}).values_list('id', flat=True)), metro)
+        self.assertEqual(set(self.items({'category': 'Мебель'}).values_list('id', flat=True)),
+                         set(items.filter(category='Мебель').values_list('id', flat=True)))
+
+    def test_newness_today(self):
+        today = timezone.localdate()
+        expected = FoundItem.objects.filter(search_query__user=self.user, found_at__date=today)
+        self.assertEqual(set(self.items({'newness': 'today'}).values_list('id', flat=True)),
+                         set(expected.values_list('id', flat=True)))
+
+    def test_filters_use_their_indexes(self):
+        cases = [
+            ({'city': self.RARE_CITY}, ['founditem_query_city']),
+            ({'category': self.RARE_CATEGORY}, ['founditem_query_category']),
+            # Частое значение: планировщик вправе идти по found_at с конца и отсеивать строки
+            ({'city': 'Казань'}, ['founditem_query_city', found_at_index()]),
+            ({'category': 'Мебель'}, ['founditem_query_category', found_at_index()]),
+            ({'metro': 'Тверская'}, ['founditem_metro_keys_gin', 'founditem_query_feed', found_at_index()]),
+            ({'newness': 'today'}, ['founditem_query_feed', found_at_index()]),
+        ]
+        for params, indexes in cases:
+            with self.subTest(params=params):
+                page = sort_found_items(self.items(params), '-found_at')[:21]
+                self.assertUsesIndex(page, *indexes)
+                self.assertNoSeqScan(page)
+
+
+class TableSearchTests(FoundItemFeedTestCase):
+    """📊 Таблица поиска: два запроса на страницу, курсор идёт по индексу"""
+
+    ORDERING = ['-found_at', '-id']
+
+    def get(self, **params):
+        return api_get(table_search_api, self.user, **params)
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            response, data = self.get(per_page=200, **params, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            ids += [item['id'] for item in data['items']]
+            cursor = data['pagination']['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_two_queries_per_page(self):
+        with self.assertNumQueries(2):
+            data = self.get()[1]
+        with self.assertNumQueries(2):
+            self.get(cursor=data['pagination']['next_cursor'])
+
+    def test_cursor_pages_match_order_by(self):
+        items = FoundItem.objects.filter(search_query__user=self.user)
+        for sort in ['-found_at', 'price', '-profit']:
+            with self.subTest(sort=sort):
+                ordering = [sort, '-id' if sort.startswith('-') else 'id']
+                self.assertEqual(self.walk(sort=sort), list(items.order_by(*ordering).values_list('id', flat=True)))
+
+    def test_stats_cover_all_rows(self):
+        stats = self.get(profitable_only='true')[1]['stats']
+        items = FoundItem.objects.filter(search_query__user=self.user, profit__gt=0)
+        self.assertEqual(stats['total'], items.count())
+        self.assertEqual(stats['profitable'], stats['total'])
+
+    def test_cursor_page_is_index_range_scan(self):
+        cursor = self.get()[1]['pagination']['next_cursor']
+        values = decode_cursor(cursor, FoundItem, self.ORDERING)
+        page = (
+            FoundItem.objects.filter(search_query__user=self.user)
+            .values(*TABLE_COLUMNS).order_by(*self.ORDERING)
+            .filter(keyset_filter(self.ORDERING, values))[:51]
+        )
+        nodes = plan_nodes(page)
+        self.assertTrue(nodes)
+        self.assertNotIn('Seq Scan', {node['Node Type'] for node in nodes})
+        self.assertTrue(any('found_at <=' in node.get('Index Cond', '') for node in nodes))
+
+    def test_bad_cursor_is_400(self):
+        self.assertEqual(self.get(cursor='не курсор')[0].status_code, 400)
+
+
+def month_datetime(month, day=1):
+    return datetime(month.year, month.month, day, tzinfo=dt_timezone.utc)
+
+
+def partition_of(item_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT tableoid::regclass::text FROM {FoundItem._meta.db_table} WHERE id = %s", [item_id])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class FoundItemPartitionTests(TestCase):
+    """🗂️ ORM на секционированной FoundItem: уникальность url, перенос, архив"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('partitions')
+        cls.search_query = SearchQuery.objects.create(user=cls.user, name='iphone', target_price=0)
+
+    def create_item(self, url, found_at=None, **fields):
+        item = FoundItem.objects.create(search_query=self.search_query, title='Товар', price=100, url=url, **fields)
+        if found_at is not None:
+            FoundItem.objects.filter(pk=item.pk).update(found_at=found_at)
+        return item
+
+    def url_is_taken(self, url):
+        try:
+            with transaction.atomic():
+                self.create_item(url)
+                transaction.set_rollback(True)  # Проверка не должна занимать url
+        except IntegrityError:
+            return True
+        return False
+
+    def test_new_item_goes_to_current_month(self):
+        item = self.create_item('https://www.avito.ru/p/1')
+        self.assertEqual(partition_of(item.id), partitions.partition_name(partitions.month_start()))
+
+    def test_duplicate_url_raises_integrity_error(self):
+        self.create_item('https://www.avito.ru/p/1')
+        self.assertTrue(self.url_is_taken('https://www.avito.ru/p/1'))
+
+    def test_moved_item_keeps_url_and_delete_frees_it(self):
+        item = self.create_item('https://www.avito.ru/p/1')
+        partitions.create_partition(partitions.add_months(partitions.month_start(), -2))
+        FoundItem.objects.filter(pk=item.pk).update(found_at=timezone.now() - timedelta(days=40))
+        self.assertNotEqual(partition_of(item.id), partitions.partition_name(partitions.month_start()))
+        self.assertTrue(self.url_is_taken(item.url))
+
+        FoundItem.objects.filter(pk=item.pk).delete()
+        self.assertFalse(self.url_is_taken(item.url))
+
+    def test_create_partition_moves_rows_out_of_default(self):
+        future = partitions.add_months(partitions.month_start(), partitions.MONTHS_AHEAD + 2)
+        item = self.create_item('https://www.avito.ru/p/future', found_at=month_datetime(future, 15))
+        self.assertEqual(partition_of(item.id), partitions.DEFAULT_PARTITION)
+
+        partitions.create_partition(future)
+        self.assertEqual(partition_of(item.id), partitions.partition_name(future))
+        self.assertTrue(self.url_is_taken(item.url))
+
+    def test_archive_keeps_favorites_and_restores(self):
+        old = partitions.add_months(partitions.month_start(), -24)
+        partitions.create_partition(old)
+        plain = self.create_item('https://www.avito.ru/p/old', found_at=month_datetime(old, 10))
+        favorite = self.create_item('https://www.avito.ru/p/favorite', found_at=month_datetime(old, 11),
+                                    is_favorite=True)
+
+        # Отложенные проверки FK этих вставок не дают удалить партицию в той же транзакции
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            archived = partitions.archive_partitions(12, archive_dir)
+            self.assertEqual([path.name for path in archived], [f'{partitions.partition_name(old)}.csv.gz'])
+            with gzip.open(archived[0], 'rt') as archive:
+                self.assertEqual(sum(1 for _ in archive) - 1, 2)
+
+            self.assertNotIn(old, partitions.list_partitions())
+            self.assertFalse(FoundItem.objects.filter(pk=plain.pk).exists())
+            self.assertEqual(partition_of(favorite.id), partitions.DEFAULT_PARTITION)
+            self.assertFalse(self.url_is_taken(plain.url))
+            self.assertTrue(self.url_is_taken(favorite.url))
+
+            # Избранное уже в базе — вернётся только обычная строка
+            self.assertEqual(partitions.restore_archive(archived[0]), 1)
+
+        restored = FoundItem.objects.get(pk=plain.pk)
+        self.assertEqual(restored.url, plain.url)
+        self.assertEqual(partition_of(restored.id), partitions.DEFAULT_PARTITION)
+        self.assertTrue(self.url_is_taken(plain.url))
+
+    @override_settings(FOUND_ITEM_RETENTION_MONTHS=None)
+    def test_archive_command_needs_retention(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_found_items')
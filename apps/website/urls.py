@@ -11,7 +11,7 @@ from .views import (
     force_parser_check, debug_settings, todo_kanban, help_page, recalculate_balance,
     create_subscription_payment, ajax_save_settings, start_parser_with_settings,
     launch_parser_with_params, get_parser_status, debug_parser_settings,
-    found_item_detail, ml_stats_api, get_latest_items, vision_statistics,
+    found_item_detail, ml_stats_api, get_latest_items, live_stream, vision_statistics,
     favorites_list, toggle_favorite, check_favorite, favorites_count,
     parser_statistics, parser_stats_api, reset_parser_stats, export_parser_data,
     test_subscription_notifications, admin_users, edit_user, delete_user,
@@ -144,6 +144,7 @@ urlpatterns = [
     # -------------------- ML СТАТИСТИКА --------------------
     path('api/ml-stats/', ml_stats_api, name='ml_stats_api'),
     path('api/latest-items/', get_latest_items, name='latest_items_api'),
+    path('api/live/stream/', live_stream, name='live_stream'),
 
     # -------------------- VISION AI --------------------
     path('vision-statistics/', vision_statistics, name='vision_statistics'),
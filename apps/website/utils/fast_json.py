@@ -0,0 +1,37 @@
+"""
+⚡ БЫСТРЫЙ JSON-ОТВЕТ ДЛЯ ЧАСТО ОПРАШИВАЕМЫХ API
+
+orjson кодирует в разы быстрее json + DjangoJSONEncoder; без orjson
+ответ собирается обычным JsonResponse, формат тот же:
+
+    return fast_json_response({'status': 'success', 'items': rows})
+"""
+
+from decimal import Decimal
+
+from django.http import HttpResponse, JsonResponse
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(value):
+    # Как DjangoJSONEncoder: Decimal строкой, без потери точности
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def fast_json_response(payload, status=200):
+    """JsonResponse через orjson (если установлен)"""
+    if not ORJSON_AVAILABLE:
+        return JsonResponse(payload, status=status)
+    return HttpResponse(
+        orjson.dumps(payload, default=_default),
+        content_type='application/json',
+        status=status,
+    )
@@ -0,0 +1,129 @@
+"""
+🔍 ФИЛЬТРЫ СПИСКА НАЙДЕННЫХ ТОВАРОВ по индексированным ключам
+
+Город, метро и категория сравниваются не через icontains (перебор всех
+строк пользователя), а с колонками, которые заполняет триггер (миграция
+0014): city_key — город в нижнем регистре (индекс founditem_query_city),
+metro_keys — массив станций (GIN), product_category — id из справочника
+ProductCategory (founditem_query_category). «Сегодня» — диапазон found_at
+по founditem_query_feed вместо found_at__date:
+
+    items = filter_found_items(FoundItem.objects.filter(search_query__user=user), request.GET)
+    page = keyset_page(sort_found_items(items, sort_by), found_items_ordering(sort_by), cursor=...)
+
+Город и станция сравниваются целиком, без учёта регистра. Нижний регистр
+для запроса считает та же lower() PostgreSQL, что и триггер, — ключи
+совпадают при любой локали базы.
+"""
+
+from datetime import timedelta
+
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import Func, Q, TextField, Value
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
+
+# sort_by → (поля сортировки для keyset_page); последнее — уникальный id
+SORT_ORDERINGS = {
+    '-found_at': ['-found_at', '-id'],
+    'price': ['price', 'id'],
+    '-price': ['-price', '-id'],
+    '-profit': ['-profit', '-id'],
+    'category': ['category_sort', 'id'],
+    '-category': ['-category_sort', '-id'],
+    'posted_date': ['posted_date_sort', 'id'],
+    '-posted_date': ['-posted_date_sort', '-id'],
+}
+DEFAULT_SORT = '-found_at'
+
+
+def _key(value):
+    return Lower(Value(value.strip()))
+
+
+def newness_range(newness, now=None):
+    """(начало, конец или None) для фильтра новизны; None — фильтра нет"""
+    now = now or timezone.now()
+    if newness == 'today':
+        today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        return today, today + timedelta(days=1)
+    if newness == 'week':
+        return now - timedelta(days=7), None
+    if newness == 'month':
+        return now - timedelta(days=30), None
+    return None
+
+
+def filter_found_items(queryset, params):
+    """Фильтры формы списка товаров (GET-параметры) поверх queryset"""
+    if params.get('favorites') == '1':
+        queryset = queryset.filter(is_favorite=True)
+
+    category = (params.get('category') or '').strip()
+    if category and category != 'all':
+        queryset = queryset.filter(product_category__name=category)
+
+    for param, lookup in (('price_min', 'price__gte'), ('price_max', 'price__lte')):
+        if params.get(param):
+            try:
+                queryset = queryset.filter(**{lookup: float(params[param])})
+            except ValueError:
+                pass
+
+    # 👤 Тип продавца — совместимо со старыми (только reviews_count) и новыми данными
+    seller_type = params.get('seller_type')
+    if seller_type == 'private':
+        queryset = queryset.filter(
+            Q(reviews_count__lte=150) | Q(seller_type__icontains='част') |
+            Q(seller_type__icontains='private') | Q(seller_type='')
+        )
+    elif seller_type == 'reseller':
+        queryset = queryset.filter(
+            Q(reviews_count__gt=150) | Q(seller_type__icontains='компания') |
+            Q(seller_type__icontains='магазин') | Q(seller_type__icontains='reseller') |
+            Q(seller_type='Компания') | Q(seller_type='Магазин')
+        )
+
+    if params.get('profitable_only'):
+        queryset = queryset.filter(profit__gt=0)
+
+    condition = params.get('condition')
+    if condition == 'new':
+        queryset = queryset.filter(Q(condition__icontains='новый') | Q(condition__icontains='new'))
+    elif condition == 'used':
+        queryset = queryset.filter(Q(condition__icontains='б/у') | Q(condition__icontains='used'))
+    elif condition == 'like_new':
+        queryset = queryset.filter(Q(condition__icontains='как новый') | Q(condition__icontains='like new'))
+
+    city = (params.get('city') or '').strip()
+    if city:
+        queryset = queryset.filter(city_key=_key(city))
+
+    metro = (params.get('metro') or '').strip()
+    if metro:
+        station = Func(_key(metro), function='ARRAY', template='%(function)s[%(expressions)s]',
+                       output_field=ArrayField(TextField()))
+        queryset = queryset.filter(metro_keys__contains=station)
+
+    found_range = newness_range(params.get('newness'))
+    if found_range:
+        start, end = found_range
+        queryset = queryset.filter(found_at__gte=start)
+        if end:
+            queryset = queryset.filter(found_at__lt=end)
+
+    return queryset
+
+
+def found_items_ordering(sort_by):
+    return SORT_ORDERINGS.get(sort_by, SORT_ORDERINGS[DEFAULT_SORT])
+
+
+def sort_found_items(queryset, sort_by):
+    """Аннотации для сортировки по nullable-колонкам (keyset требует NOT NULL)"""
+    ordering = found_items_ordering(sort_by)
+    if any(name.lstrip('-') == 'category_sort' for name in ordering):
+        queryset = queryset.annotate(category_sort=Coalesce('category', Value('')))
+    if any(name.lstrip('-') == 'posted_date_sort' for name in ordering):
+        queryset = queryset.annotate(posted_date_sort=Coalesce('posted_date', Value('')))
+    return queryset.order_by(*ordering)
@@ -0,0 +1,114 @@
+"""
+📄 KEYSET-ПАГИНАЦИЯ: курсор вместо OFFSET
+
+Следующая страница начинается сразу после последней строки предыдущей
+(WHERE found_at < :found_at OR found_at = :found_at AND id < :id), поэтому
+страница 500 стоит столько же, сколько первая:
+
+    page = keyset_page(items.values(*columns), ['-found_at', '-id'],
+                       cursor=request.GET.get('cursor'), per_page=50)
+    page.rows, page.next_cursor, page.has_next
+
+Последнее поле сортировки должно быть уникальным (id), поля сортировки —
+NOT NULL и присутствовать в values() (или быть атрибутами моделей, если
+queryset без values(); nullable-колонку сортируют по annotate(Coalesce(...))).
+
+Число строк для заголовка без COUNT(*) по всей выборке:
+
+    total, exact = estimated_count(items)
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+EXACT_COUNT_BELOW = 1000  # Малые выборки считаем точно: COUNT(*) по ним дешёвый
+
+
+@dataclass
+class KeysetPage:
+    rows: List[dict]
+    next_cursor: Optional[str]
+    has_next: bool
+
+
+def _fields(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def encode_cursor(row, ordering):
+    """Курсор — значения полей сортировки строки в base64 (для URL)"""
+    values = [row[name] if isinstance(row, dict) else getattr(row, name) for name, _ in _fields(ordering)]
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """Значения из курсора, приведённые к типам полей; ValueError — курсор испорчен"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Некорректный курсор: {e}")
+
+    fields = _fields(ordering)
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError("Некорректный курсор")
+
+    try:
+        return [_to_python(model, name, value) for (name, _), value in zip(fields, values)]
+    except Exception as e:
+        raise ValueError(f"Некорректный курсор: {e}")
+
+
+def _to_python(model, name, value):
+    try:
+        return model._meta.get_field(name).to_python(value)
+    except FieldDoesNotExist:
+        return value  # Аннотация (строка/число) — JSON уже дал нужный тип
+
+
+def keyset_filter(ordering, values):
+    """Строки строго после курсора в порядке ordering"""
+    condition = Q()
+    equal = {}
+    for (name, descending), value in zip(_fields(ordering), values):
+        lookup = 'lt' if descending else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+
+    # Та же граница по первому полю отдельно: OR выше планировщик только
+    # фильтрует, а found_at <= :found_at становится условием индекса
+    (name, descending), value = _fields(ordering)[0], values[0]
+    return Q(**{f"{name}__{'lte' if descending else 'gte'}": value}) & condition
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=50):
+    """Страница values()-queryset'а после cursor (None — первая страница)"""
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    rows = list(queryset[:per_page + 1])
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    return KeysetPage(
+        rows=rows,
+        next_cursor=encode_cursor(rows[-1], ordering) if has_next else None,
+        has_next=has_next,
+    )
+
+
+def estimated_count(queryset):
+    """(число строк, точное ли) — оценка планировщика, для малых выборок COUNT(*)"""
+    plan = json.loads(queryset.order_by().explain(format='json'))[0]['Plan']
+    estimate = int(plan['Plan Rows'])
+    if estimate < EXACT_COUNT_BELOW:
+        return queryset.count(), True
+    return estimate, False
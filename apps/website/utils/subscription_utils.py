@@ -170,9 +170,8 @@ def send_telegram_notification(chat_id, message, reply_markup=None):
     Отправляет уведомление в личный чат пользователя через бота с поддержкой inline кнопок
     """
     try:
-        import asyncio
-        from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
         from telegram.error import TelegramError
+        from shared.utils.telegram_client import run_sync
         import logging
 
         logger = logging.getLogger('subscriptions')
@@ -190,14 +189,8 @@ def send_telegram_notification(chat_id, message, reply_markup=None):
             logger.error("❌ Chat ID не указан")
             return False
 
-        async def async_send_message():
+        async def async_send_message(bot):
             try:
-                bot = Bot(token=TELEGRAM_BOT_TOKEN)
-
-                # Проверяем что бот доступен
-                bot_info = await bot.get_me()
-                logger.info(f"✅ Бот: {bot_info.first_name} (@{bot_info.username})")
-
                 # Отправляем сообщение в личный чат пользователя
                 await bot.send_message(
                     chat_id=chat_id,
@@ -207,7 +200,7 @@ def send_telegram_notification(chat_id, message, reply_markup=None):
                     reply_markup=reply_markup
                 )
 
-                logger.info(f"✅ Сообщение с кнопками отправлено в чат {chat_id}")
+                logger.info(f"✅ Сообщение с кнопками отправлено в чат {chat_id} (бот @{bot.username})")
                 return True
 
             except TelegramError as e:
@@ -217,8 +210,8 @@ def send_telegram_notification(chat_id, message, reply_markup=None):
                 logger.error(f"❌ Ошибка отправки в чат {chat_id}: {e}")
                 return False
 
-        # Запускаем асинхронную отправку
-        success = asyncio.run(async_send_message())
+        # Отправка через общий Telegram-клиент процесса (соединения переиспользуются)
+        success = run_sync(async_send_message, TELEGRAM_BOT_TOKEN)
         return success
 
     except Exception as e:
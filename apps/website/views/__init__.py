@@ -36,6 +36,7 @@ from .core_views import (
     found_item_detail, test_database, direct_db_query, console_output,
     clear_console_view, console_update
 )
+from .stream_views import live_stream
 from .api_views import (
     get_latest_items, system_health_api, performance_metrics_api,
     ml_stats_api, user_parser_stats_api, get_cities_list
@@ -100,6 +101,7 @@ __all__ = [
 
     # API views
     'get_latest_items',
+    'live_stream',
     'system_health_api',
     'performance_metrics_api',
     'ml_stats_api',
@@ -16,6 +16,8 @@ from django.db import models, connection, IntegrityError
 from django.db.models import Avg, Sum, Q
 from django.db import transaction
 from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.contrib.auth.models import User
 from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.throttling import UserRateThrottle
@@ -30,7 +32,6 @@ import asyncio
 import pandas as pd
 from io import BytesIO
 from datetime import datetime, timedelta
-from telegram import Bot
 from telegram.error import TelegramError
 
 # ========== МОДЕЛИ И ФОРМЫ ==========
@@ -43,6 +44,8 @@ from apps.website.forms import ParserSettingsForm, CustomUserCreationForm
 # ========== УТИЛИТЫ И КОНСОЛЬ ==========
 from apps.website.console_manager import add_to_console, get_console_output, clear_console
 from apps.website.log_viewer import log_viewer
+from apps.website.live_feed import LATEST_ITEMS_FIELDS, found_item_row
+from apps.website.utils.fast_json import fast_json_response
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +64,9 @@ class TableUpdateThrottle(UserRateThrottle):
 
 # ========== API ДЛЯ ДИНАМИЧЕСКОЙ ТАБЛИЦЫ (РЕАЛЬНОЕ ВРЕМЯ) ==========
 
+LATEST_ITEMS_LIMIT = 10
+
+
 @api_view(['GET'])
 @throttle_classes([TableUpdateThrottle])
 @login_required
@@ -70,6 +76,8 @@ def get_latest_items(request):
     🔒 ТОЛЬКО для авторизованных пользователей
     📈 Возвращает 10 последних найденных товаров
     🎯 Поддерживает фильтрацию по источнику (avito/auto.ru)
+    🔁 since_id — только товары новее уже показанных (дельта)
+    💤 ETag/Last-Modified по последнему товару: без новых находок — 304
     🛡️ Включает security headers
     """
     try:
@@ -79,93 +87,57 @@ def get_latest_items(request):
                 'message': 'Требуется авторизация'
             }, status=401)
 
+        try:
+            since_id = int(request.GET.get('since_id') or 0)
+        except ValueError:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'since_id должен быть числом'
+            }, status=400)
+
         source_filter = request.GET.get('source')
-        items = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).select_related('search_query').order_by('-found_at')
 
+        items = FoundItem.objects.filter(search_query__user=request.user)
         if source_filter and source_filter != 'all':
             items = items.filter(source=source_filter)
+        items = items.order_by('-found_at', '-id')
 
-        items = items[:10]
-
-        items_data = []
-        for item in items:
-            posted_date_display = '—'
-            if item.posted_date:
-                try:
-                    if hasattr(item.posted_date, 'strftime'):
-                        posted_date_display = item.posted_date.strftime('%d.%m.%Y')
-                    else:
-                        posted_date_display = str(item.posted_date)[:20]
-                except:
-                    posted_date_display = str(item.posted_date)[:20]
-
-            created_at_display = '—'
-            if item.found_at:
-                try:
-                    if hasattr(item.found_at, 'strftime'):
-                        created_at_display = item.found_at.strftime('%d.%m.%Y %H:%M')
-                    else:
-                        created_at_display = str(item.found_at)
-                except:
-                    created_at_display = 'Ошибка даты'
-
-            items_data.append({
-                'id': item.id,
-                'product_id': item.product_id or item.id,
-                'title': item.title or 'Без названия',
-                'source': item.source or 'avito',
-                'image_url': item.image_url or '',
-                'seller_rating': float(item.seller_rating) if item.seller_rating else 0,
-                'reviews_count': item.reviews_count or 0,
-                'posted_date': posted_date_display,
-                'views_count': item.views_count or 0,
-                'condition': item.condition or '—',
-                'category': item.category or '—',
-                'city': item.city or '—',
-                'mileage': item.mileage or '—',
-                'year': item.year or '—',
-                'color': item.color or '—',
-                'price': int(item.price) if item.price else 0,
-                'profit': int(item.profit) if item.profit else 0,
-                'price_status': item.price_status or '—',
-                'created_at': created_at_display,
-                'is_favorite': bool(item.is_favorite),
-                'target_price': int(item.target_price) if item.target_price else 0,
-                'profit_percent': float(item.profit_percent) if item.profit_percent else 0,
-                'url': item.url or '',
-                'description': item.description or '',
-                'seller_name': item.seller_name or '',
-                'address': item.address or '',
-                'metro_stations': item.metro_stations or [],
-                'full_location': item.full_location or '',
-                'steering': item.steering or '—',
-                'transmission': item.transmission or '—',
-                'drive': item.drive or '—',
-                'engine': item.engine or '—',
-                'owners': item.owners or '—',
-                'pts': item.pts or '—',
-                'tax': item.tax or '—',
-                'customs': item.customs or '—',
-                'body': item.body or '—',
-                'package': item.package or '—',
-                'discount_price': int(item.discount_price) if item.discount_price else 0,
-                'views_today': item.views_today or 0,
-                'seller_avatar': item.seller_avatar or '',
-                'seller_profile_url': item.seller_profile_url or '',
-                'seller_type': getattr(item, 'seller_type', 'Не указано') or 'Не указано',
-            })
+        # Одна индексная выборка: последний товар определяет версию ответа
+        latest = items.values('id', 'found_at').first()
+        latest_id = latest['id'] if latest else 0
+
+        etag = quote_etag(f"{request.user.id}-{source_filter or 'all'}-{latest_id}")
+        last_modified = int(latest['found_at'].timestamp()) if latest else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
 
-        response = JsonResponse({
+        if since_id and since_id >= latest_id:
+            items_data = []  # Ничего нового — строки не читаем
+        else:
+            if since_id:
+                items = items.filter(id__gt=since_id)
+            items_data = [
+                found_item_row(item)
+                for item in items.values(*LATEST_ITEMS_FIELDS)[:LATEST_ITEMS_LIMIT]
+            ]
+
+        response = fast_json_response({
             'status': 'success',
             'items': items_data,
             'count': len(items_data),
             'source_filter': source_filter,
+            'since_id': since_id,
+            'latest_id': latest_id,
             'timestamp': timezone.now().isoformat(),
             'throttle_remaining': getattr(request, 'throttle_remaining', None)
         })
 
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+
         response['X-Content-Type-Options'] = 'nosniff'
         response['X-Frame-Options'] = 'DENY'
         response['X-XSS-Protection'] = '1; mode=block'
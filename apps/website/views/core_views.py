@@ -5,7 +5,7 @@ from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods, require_POST, require_GET
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Sum, Q
+from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 import json
 import logging
@@ -15,6 +15,11 @@ from apps.website.models import (
     Transaction, ParserSettings
 )
 from apps.website.console_manager import add_to_console
+from apps.website.dashboard_stats import get_user_dashboard_stats, invalidate_dashboard_stats
+from apps.website.utils.found_item_filters import (
+    DEFAULT_SORT, filter_found_items, found_items_ordering, sort_found_items
+)
+from apps.website.utils.pagination import estimated_count, keyset_page
 
 logger = logging.getLogger(__name__)
 
@@ -33,31 +38,16 @@ def dashboard(request):
     """
     user = request.user
 
-    total_items_count = FoundItem.objects.filter(search_query__user=user).count()
-    good_deals_count = FoundItem.objects.filter(
-        search_query__user=user,
-        profit__gt=0
-    ).count()
-    active_searches = SearchQuery.objects.filter(user=user, is_active=True).count()
-    today_items_count = FoundItem.objects.filter(
-        search_query__user=user,
-        found_at__date=timezone.now().date()
-    ).count()
-
-    total_searches_count = SearchQuery.objects.filter(user=user).count()
+    # Все счётчики — один агрегирующий запрос + ParserStats, с кэшем
+    stats = get_user_dashboard_stats(user)
+    total_items_count = stats['total_items']
+    good_deals_count = stats['good_deals']
+    active_searches = stats['active_searches']
+    today_items_count = stats['today_items']
+    total_searches_count = stats['total_searches']
     items_found_count = total_items_count
-
-    try:
-        from apps.website.models import ParserStats
-        parser_stats = ParserStats.objects.filter(user=user).latest('created_at')
-        duplicates_blocked_count = parser_stats.duplicates_blocked
-    except:
-        duplicates_blocked_count = 0
-
-    potential_profit = FoundItem.objects.filter(
-        search_query__user=user,
-        profit__gt=0
-    ).aggregate(total_profit=Sum('profit'))['total_profit'] or 0
+    duplicates_blocked_count = stats['duplicates_blocked']
+    potential_profit = stats['potential_profit']
 
     search_queries = SearchQuery.objects.filter(user=user).order_by('-created_at')[:10]
     found_items = FoundItem.objects.filter(search_query__user=user).order_by('-found_at')[:10]
@@ -160,13 +150,11 @@ def profile_view(request):
             'daily_price': 0
         }
 
-    found_items_count = FoundItem.objects.filter(search_query__user=request.user).count()
-    good_deals_count = FoundItem.objects.filter(search_query__user=request.user, profit__gt=0).count()
-    active_searches_count = SearchQuery.objects.filter(user=request.user, is_active=True).count()
-    today_items_count = FoundItem.objects.filter(
-        search_query__user=request.user,
-        found_at__date=timezone.now().date()
-    ).count()
+    stats = get_user_dashboard_stats(request.user)
+    found_items_count = stats['total_items']
+    good_deals_count = stats['good_deals']
+    active_searches_count = stats['active_searches']
+    today_items_count = stats['today_items']
 
     transactions = Transaction.objects.filter(user=request.user).order_by('-created_at')[:10]
 
@@ -798,424 +786,85 @@ def search_view(request):
 
 @login_required
 def found_items(request):
-    """📦 Просмотр найденных товаров с поддержкой избранного
-
-    🔍 Фильтрация по категории, цене, типу продавца, состоянию, городу, метро, новизне
-    💰 Сортировка по прибыли, цене, дате
-    ⭐ Режим избранного (только is_favorite=True)
-    📊 Статистика: общее количество, выгодные сделки, потенциальная прибыль
-    📤 Экспорт в Excel
-    """
-    # 📤 Экспорт в Excel
-    if request.GET.get('export') == 'excel':
-        from apps.website.utils.excel_export import ExcelExporterPRO
-        found_items_list = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).select_related('search_query')
-        exporter = ExcelExporterPRO(found_items_list)
-        return exporter.export()
-
-    # 🔍 Определяем режим избранного
-    is_favorites_view = request.GET.get('favorites') == '1'
-
-    # 📋 Получаем базовый QuerySet (ВСЕ товары пользователя) - ЭТО КРИТИЧЕСКИ ВАЖНО!
-    # ⚠️ Убедитесь, что у пользователя действительно есть товары!
-    all_items_qs = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).select_related('search_query')
-
-    # Получаем общее количество ВСЕХ товаров пользователя (для кнопки "Все объявления")
-    total_all_items = all_items_qs.count()
-
-    # ⭐ ФИЛЬТР ИЗБРАННОГО - ПЕРВОЕ И ВАЖНЕЙШЕЕ
-    if is_favorites_view:
-        found_items_list = all_items_qs.filter(is_favorite=True)
-        logger.info(f"⭐ Режим избранного: найдено {found_items_list.count()} товаров")
-    else:
-        found_items_list = all_items_qs
-
-    # 🔍 ВСЕ ФИЛЬТРЫ ИЗ GET-ПАРАМЕТРОВ
-    category_filter = request.GET.get('category')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
-    seller_type = request.GET.get('seller_type')
-    profitable_only = request.GET.get('profitable_only')
-    sort_by = request.GET.get('sort_by', '-found_at')
-
-    # 🔥 НОВЫЕ ФИЛЬТРЫ ДЛЯ МОДАЛЬНОГО ОКНА
-    condition_filter = request.GET.get('condition')
-    city_filter = request.GET.get('city')
-    metro_filter = request.GET.get('metro')
-    newness_filter = request.GET.get('newness')
-
-    # 📦 Фильтр по категории
-    if category_filter and category_filter != 'all':
-        found_items_list = found_items_list.filter(category__icontains=category_filter)
-
-    # 💰 Фильтр по цене
-    if price_min:
-        try:
-            found_items_list = found_items_list.filter(price__gte=float(price_min))
-        except ValueError:
-            pass
-
-    if price_max:
-        try:
-            found_items_list = found_items_list.filter(price__lte=float(price_max))
-        except ValueError:
-            pass
-
-    # 👤 Фильтр по типу продавца - СОВМЕСТИМОСТЬ со старыми и новыми данными
-    if seller_type:
-        if seller_type == 'private':
-            # Частные лица: или reviews_count <= 150, или seller_type содержит "част"
-            found_items_list = found_items_list.filter(
-                Q(reviews_count__lte=150) |
-                Q(seller_type__icontains='част') |
-                Q(seller_type__icontains='private') |
-                Q(seller_type='')
-            )
-        elif seller_type == 'reseller':
-            # Компании/магазины: или reviews_count > 150, или seller_type содержит "компания", "магазин"
-            found_items_list = found_items_list.filter(
-                Q(reviews_count__gt=150) |
-                Q(seller_type__icontains='компания') |
-                Q(seller_type__icontains='магазин') |
-                Q(seller_type__icontains='reseller') |
-                Q(seller_type='Компания') |
-                Q(seller_type='Магазин')
-            )
-
-    # 💵 Фильтр выгодных предложений
-    if profitable_only:
-        found_items_list = found_items_list.filter(profit__gt=0)
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Состояние товара
-    if condition_filter:
-        if condition_filter == 'new':
-            found_items_list = found_items_list.filter(
-                Q(condition__icontains='новый') |
-                Q(condition__icontains='new')
-            )
-        elif condition_filter == 'used':
-            found_items_list = found_items_list.filter(
-                Q(condition__icontains='б/у') |
-                Q(condition__icontains='used')
-            )
-        elif condition_filter == 'like_new':
-            found_items_list = found_items_list.filter(
-                Q(condition__icontains='как новый') |
-                Q(condition__icontains='like new')
-            )
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Город
-    if city_filter:
-        found_items_list = found_items_list.filter(
-            Q(city__icontains=city_filter) |
-            Q(full_location__icontains=city_filter)
-        )
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Метро
-    if metro_filter:
-        found_items_list = found_items_list.filter(
-            Q(metro_stations__icontains=metro_filter) |
-            Q(full_location__icontains=metro_filter)
-        )
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Новизна объявления
-    if newness_filter:
-        now = timezone.now()
-        if newness_filter == 'today':
-            found_items_list = found_items_list.filter(found_at__date=now.date())
-        elif newness_filter == 'week':
-            week_ago = now - timedelta(days=7)
-            found_items_list = found_items_list.filter(found_at__gte=week_ago)
-        elif newness_filter == 'month':
-            month_ago = now - timedelta(days=30)
-            found_items_list = found_items_list.filter(found_at__gte=month_ago)
-
-    # 🔄 Сортировка
-    if sort_by in ['price', '-price', 'category', '-category', 'posted_date', '-posted_date', '-found_at', '-profit']:
-        found_items_list = found_items_list.order_by(sort_by)
-    else:
-        found_items_list = found_items_list.order_by('-found_at')
-
-    # 📚 Категории для фильтра (только уникальные)
-    categories = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).exclude(category__isnull=True).exclude(category='').values_list('category', flat=True).distinct()
-
-    # 📊 Пагинация с поддержкой размера страницы
-    page_size = int(request.GET.get('page_size', 20))
-    paginator = Paginator(found_items_list, page_size)
-    page_number = request.GET.get('page')
-
-    try:
-        found_items_page = paginator.page(page_number)
-    except PageNotAnInteger:
-        found_items_page = paginator.page(1)
-    except EmptyPage:
-        found_items_page = paginator.page(paginator.num_pages)
-
-    # 📈 Статистика для текущих отфильтрованных товаров
-    total_filtered_items = found_items_list.count()
-    good_deals = found_items_list.filter(profit__gt=0).count()
-    potential_profit = found_items_list.aggregate(total_profit=Sum('profit'))['total_profit'] or 0
-
-    # ❤️ Количество избранных (ВСЕХ товаров пользователя)
-    favorites_count = FoundItem.objects.filter(
-        search_query__user=request.user,
-        is_favorite=True
-    ).count()
-
-    # 📊 ОТЛАДКА ДЛЯ ВЫЯВЛЕНИЯ ПРОБЛЕМЫ
-    import sys
-    print("\n" + "=" * 80, file=sys.stderr)
-    print("🔍 ДЕБАГ ИНФОРМАЦИЯ found_items VIEW:", file=sys.stderr)
-    print(f"  Пользователь: {request.user} (id: {request.user.id})", file=sys.stderr)
-    print(f"  is_favorites_view: {is_favorites_view}", file=sys.stderr)
-    print(f"  total_all_items (все товары): {total_all_items}", file=sys.stderr)
-    print(f"  favorites_count (все избранные): {favorites_count}", file=sys.stderr)
-    print(f"  total_filtered_items (после фильтров): {total_filtered_items}", file=sys.stderr)
-    print(f"  found_items.paginator.count: {found_items_page.paginator.count}", file=sys.stderr)
-
-    # Проверяем, действительно ли у пользователя есть товары
-    from django.db import connection
-    print("\n🔍 SQL запросы:", file=sys.stderr)
-    print(f"  SQL all_items_qs: {all_items_qs.query}", file=sys.stderr)
-    print(f"  Количество записей в БД для пользователя:", file=sys.stderr)
-
-    # Проверяем количество товаров прямо в БД
-    with connection.cursor() as cursor:
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM website_founditem fi 
-            JOIN website_searchquery sq ON fi.search_query_id = sq.id 
-            WHERE sq.user_id = %s
-        """, [request.user.id])
-        db_count = cursor.fetchone()[0]
-        print(f"  Прямой запрос к БД: {db_count} товаров", file=sys.stderr)
-
-    print("=" * 80 + "\n", file=sys.stderr)
-
-    context = {
-        'found_items': found_items_page,
-        'categories': categories,
-        'current_filters': {
-            'category': category_filter,
-            'price_min': price_min,
-            'price_max': price_max,
-            'seller_type': seller_type,
-            'profitable_only': profitable_only,
-            'sort_by': sort_by,
-            'condition': condition_filter,
-            'city': city_filter,
-            'metro': metro_filter,
-            'newness': newness_filter,
-        },
-        'stats': {
-            'total_items': total_filtered_items,  # Количество отфильтрованных товаров
-            'good_deals': good_deals,
-            'potential_profit': int(potential_profit)
-        },
-        'is_favorites_view': is_favorites_view,
-        'favorites_count': favorites_count,
-        'total_all_items': total_all_items,  # ✅ НОВОЕ: Общее количество всех товаров пользователя
-        'page_size': page_size,
-    }
-
-    logger.info(f"📊 Контекст отправлен в шаблон:")
-    logger.info(f"  - is_favorites_view: {is_favorites_view}")
-    logger.info(f"  - favorites_count: {favorites_count}")
-    logger.info(f"  - total_filtered_items: {total_filtered_items}")
-    logger.info(f"  - total_all_items: {total_all_items}")
-    logger.info(f"  - found_items count: {found_items_page.paginator.count}")
-
-    return render(request, 'dashboard/found_items.html', context)
+    """📦 Прежняя версия списка найденных товаров — теперь то же, что found_items_view"""
+    return found_items_view(request)
 
 
 @login_required
 def found_items_view(request):
     """📦 Просмотр найденных товаров с пагинацией, фильтрацией и сортировкой
 
-    🔍 Альтернативная версия с экспортом в Excel
-    📊 Идентичная фильтрация как в found_items()
+    🔍 Фильтры по индексированным ключам (utils.found_item_filters)
+    📄 Страницы по курсору (?cursor=) вместо OFFSET, число — оценка планировщика
     📤 Экспорт с применением всех фильтров
     """
-    # 🔍 Определяем режим избранного - ДОБАВЛЕНО
     is_favorites_view = request.GET.get('favorites') == '1'
+    sort_by = request.GET.get('sort_by', DEFAULT_SORT)
 
-    # 🔧 ПОЛУЧАЕМ РАЗМЕР СТРАНИЦЫ ИЗ ЗАПРОСА - ИСПРАВЛЕНИЕ
-    page_size_param = request.GET.get('page_size', '20')
+    # 🔧 Размер страницы: только допустимые значения
     try:
-        page_size = int(page_size_param)
-        # Ограничиваем допустимые значения
+        page_size = int(request.GET.get('page_size', '20'))
         if page_size not in [20, 50, 100]:
             page_size = 20
     except (ValueError, TypeError):
         page_size = 20
 
+    found_items_list = filter_found_items(
+        FoundItem.objects.filter(search_query__user=request.user).select_related('search_query'),
+        request.GET,
+    )
+
     if request.GET.get('export') == 'excel':
         from apps.website.utils.excel_export import ExcelExporterPRO
-
-        found_items_list = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).select_related('search_query')
-
-        # ⭐ ФИЛЬТР ИЗБРАННОГО ДЛЯ ЭКСПОРТА - ДОБАВЛЕНО
-        if is_favorites_view:
-            found_items_list = found_items_list.filter(is_favorite=True)
-
-        category_filter = request.GET.get('category')
-        price_min = request.GET.get('price_min')
-        price_max = request.GET.get('price_max')
-        seller_type = request.GET.get('seller_type')
-        profitable_only = request.GET.get('profitable_only')
-        sort_by = request.GET.get('sort_by', '-found_at')
-
-        if category_filter and category_filter != 'all':
-            found_items_list = found_items_list.filter(category__icontains=category_filter)
-
-        if price_min:
-            try:
-                found_items_list = found_items_list.filter(price__gte=float(price_min))
-            except ValueError:
-                pass
-
-        if price_max:
-            try:
-                found_items_list = found_items_list.filter(price__lte=float(price_max))
-            except ValueError:
-                pass
-
-        if seller_type == 'private':
-            found_items_list = found_items_list.filter(reviews_count__lte=150)
-        elif seller_type == 'reseller':
-            found_items_list = found_items_list.filter(reviews_count__gt=150)
-
-        if profitable_only:
-            found_items_list = found_items_list.filter(profit__gt=0)
-
-        if sort_by in ['price', '-price', 'category', '-category', 'posted_date', '-posted_date', '-found_at']:
-            found_items_list = found_items_list.order_by(sort_by)
-        else:
-            found_items_list = found_items_list.order_by('-priority_score', '-ml_freshness_score', '-found_at')
-
-        exporter = ExcelExporterPRO(found_items_list)
+        exporter = ExcelExporterPRO(sort_found_items(found_items_list, sort_by))
         return exporter.export()
 
-    # 🔍 НАЧАЛО ФИЛЬТРАЦИИ
-    found_items_list = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).select_related('search_query')
-
-    # ⭐ ФИЛЬТР ИЗБРАННОГО - САМОЕ ВАЖНОЕ - ДОБАВЛЕНО
-    if is_favorites_view:
-        found_items_list = found_items_list.filter(is_favorite=True)
-
-    # 🔥 ДЕБАГ ИНФОРМАЦИЯ - ДОБАВЛЕНО
-    print(f"🔥 DEBUG found_items_view:")
-    print(f"  - is_favorites_view: {is_favorites_view}")
-    print(f"  - page_size: {page_size}")
-    print(f"  - request.GET: {dict(request.GET)}")
-    print(f"  - Всего товаров до других фильтров: {found_items_list.count()}")
-
-    # ... существующий код логирования ...
-    add_to_console(f"🔍 Пользователь: {request.user}")
-    add_to_console(f"🔍 Найдено записей: {found_items_list.count()}")
-
-    # ... ОСТАЛЬНЫЕ ФИЛЬТРЫ (оставляем как было) ...
-    category_filter = request.GET.get('category')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
-    seller_type = request.GET.get('seller_type')
-    profitable_only = request.GET.get('profitable_only')
-    sort_by = request.GET.get('sort_by', '-found_at')
-
-    if category_filter and category_filter != 'all':
-        found_items_list = found_items_list.filter(category__icontains=category_filter)
-
-    if price_min:
-        try:
-            found_items_list = found_items_list.filter(price__gte=float(price_min))
-        except ValueError:
-            pass
-
-    if price_max:
-        try:
-            found_items_list = found_items_list.filter(price__lte=float(price_max))
-        except ValueError:
-            pass
-
-    if seller_type == 'private':
-        found_items_list = found_items_list.filter(reviews_count__lte=150)
-    elif seller_type == 'reseller':
-        found_items_list = found_items_list.filter(reviews_count__gt=150)
-
-    if profitable_only:
-        found_items_list = found_items_list.filter(profit__gt=0)
-
-    if sort_by in ['price', '-price', 'category', '-category', 'posted_date', '-posted_date', '-found_at']:
-        found_items_list = found_items_list.order_by(sort_by)
-    else:
-        found_items_list = found_items_list.order_by('-found_at')
-
-    # 🔥 ДЕБАГ ПОСЛЕ ВСЕХ ФИЛЬТРОВ - ДОБАВЛЕНО
-    print(f"🔥 DEBUG: После всех фильтров: {found_items_list.count()} товаров")
-
-    categories = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).exclude(category__isnull=True).exclude(category='').values_list('category', flat=True).distinct()
-
-    # 🔧 ИСПРАВЛЕНИЕ: Используем page_size из запроса вместо жесткого значения 20
-    paginator = Paginator(found_items_list, page_size)
-    page_number = request.GET.get('page')
-
+    ordering = found_items_ordering(sort_by)
+    cursor = request.GET.get('cursor')
     try:
-        found_items = paginator.page(page_number)
-    except PageNotAnInteger:
-        found_items = paginator.page(1)
-    except EmptyPage:
-        found_items = paginator.page(paginator.num_pages)
+        page = keyset_page(sort_found_items(found_items_list, sort_by), ordering, cursor=cursor, per_page=page_size)
+    except ValueError:
+        # Испорченный или устаревший курсор — с первой страницы
+        cursor = None
+        page = keyset_page(sort_found_items(found_items_list, sort_by), ordering, per_page=page_size)
 
-    total_items = found_items_list.count()
-    good_deals = found_items_list.filter(profit__gt=0).count()
-    potential_profit = found_items_list.aggregate(total_profit=Sum('profit'))['total_profit'] or 0
+    # Один подсчёт: оценка из EXPLAIN, точный COUNT(*) только для малых выборок
+    total_items, total_is_exact = estimated_count(found_items_list)
 
     favorites_count = FoundItem.objects.filter(
         search_query__user=request.user,
         is_favorite=True
     ).count()
 
-    # 🔥 ДЕБАГ ИНФОРМАЦИЯ В КОНТЕКСТЕ - ДОБАВЛЕНО
-    print(f"🔥 DEBUG Контекст:")
-    print(f"  - total_items: {total_items}")
-    print(f"  - favorites_count: {favorites_count}")
-    print(f"  - page_size: {page_size}")
-    print(f"  - found_items paginator count: {found_items.paginator.count}")
+    add_to_console(f"🔍 Пользователь: {request.user}, найдено записей: {'' if total_is_exact else '~'}{total_items}")
 
     context = {
-        'found_items': found_items,
-        'categories': categories,
+        'found_items': page.rows,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not cursor,
         'current_filters': {
-            'category': category_filter,
-            'price_min': price_min,
-            'price_max': price_max,
-            'seller_type': seller_type,
-            'profitable_only': profitable_only,
+            'category': request.GET.get('category'),
+            'price_min': request.GET.get('price_min'),
+            'price_max': request.GET.get('price_max'),
+            'seller_type': request.GET.get('seller_type'),
+            'profitable_only': request.GET.get('profitable_only'),
             'sort_by': sort_by,
+            'condition': request.GET.get('condition'),
+            'city': request.GET.get('city'),
+            'metro': request.GET.get('metro'),
+            'newness': request.GET.get('newness'),
         },
         'stats': {
             'total_items': total_items,
-            'good_deals': good_deals,
-            'potential_profit': int(potential_profit)
+            'total_is_estimate': not total_is_exact,
         },
         'favorites_count': favorites_count,
         'is_favorites_view': is_favorites_view,
-        'page_size': page_size,  # 🔧 ДОБАВЛЯЕМ page_size в контекст
+        'page_size': page_size,
     }
     return render(request, 'dashboard/found_items.html', context)
 
+
 @login_required
 def test_database(request):
     """🗄️ Тест подключения к базе данных
@@ -1624,6 +1273,7 @@ def add_from_telegram(request):
             )
 
             add_to_console(f"🔍 FOUND ITEM CREATED: {found_item.id}")
+            invalidate_dashboard_stats([request.user.id])
 
             return JsonResponse({'status': 'success', 'item_id': found_item.id})
 
@@ -3,10 +3,16 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
-from django.db.models import Q, Avg, Max, Min, Sum
+from django.db.models import Q, F, Avg, Count, Max, Sum, Case, When, Value, IntegerField
+from django.db.models.functions import Upper
+from django.contrib.postgres.search import (
+    SearchQuery as FullTextQuery, SearchRank, TrigramSimilarity, TrigramWordSimilarity
+)
 import json
 from datetime import datetime, timedelta
-from ..models import FoundItem, SearchQuery
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
+from ..models import FoundItem, FoundItemFacet, SearchQuery, found_item_search_text
+from ..utils.pagination import encode_cursor, keyset_page
 import logging
 import re
 
@@ -84,6 +90,37 @@ def extract_car_brand(title):
 
 # ========== БЫСТРЫЙ ПОИСК ДЛЯ ШАПКИ САЙТА (ИСПРАВЛЕННЫЙ) ==========
 
+HEADER_SEARCH_LIMIT = 10
+
+
+def _full_text_search(query, limit):
+    """Полнотекстовый поиск по FoundItem: GIN-индекс search_vector, ранжирование в БД
+
+    Каждое слово запроса ищется как префикс («айф» найдёт «айфон»),
+    точное совпадение ID объявления тоже попадает в выдачу.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return FoundItem.objects.none()
+
+    ts_query = FullTextQuery(
+        ' & '.join(f"{word}:*" for word in words),
+        search_type='raw',
+        config='russian'
+    )
+
+    return (
+        FoundItem.objects
+        .filter(Q(search_vector=ts_query) | Q(product_id=query))
+        .annotate(rank=SearchRank(F('search_vector'), ts_query))
+        .only(
+            'id', 'product_id', 'title', 'description', 'category', 'city', 'seller_name',
+            'price', 'profit', 'profit_percent', 'image_url', 'year', 'color', 'source'
+        )
+        .order_by('-rank', '-found_at')[:limit]
+    )
+
+
 @require_GET
 @login_required
 def header_search_api(request):
@@ -101,50 +138,9 @@ def header_search_api(request):
         })
 
     try:
-        # Берем ВСЕ товары из базы
-        all_items = FoundItem.objects.all()
-        print(f"📊 Всего товаров в базе: {all_items.count()}")
-
-        # Ищем ВРУЧНУЮ по всем полям
-        found_items = []
-
-        for item in all_items:
-            # Проверяем ВСЕ поля
-            if (item.title and query in item.title.lower()) or \
-                    (item.description and query in item.description.lower()) or \
-                    (item.category and query in item.category.lower()) or \
-                    (item.city and query in item.city.lower()) or \
-                    (item.seller_name and query in item.seller_name.lower()) or \
-                    (item.color and query in item.color.lower()) or \
-                    (item.body and query in item.body.lower()) or \
-                    (item.engine and query in item.engine.lower()) or \
-                    (item.transmission and query in item.transmission.lower()) or \
-                    (item.product_id and query in str(item.product_id).lower()) or \
-                    (str(item.year) and query in str(item.year).lower()):
-
-                found_items.append(item)
-                if len(found_items) >= 10:  # максимум 10 результатов
-                    break
-
+        found_items = list(_full_text_search(query, HEADER_SEARCH_LIMIT))
         print(f"✅ Найдено товаров: {len(found_items)}")
 
-        # Если ничего не нашли, пробуем найти ЛЮБОЕ совпадение
-        if len(found_items) == 0:
-            print("⚠️ Не найдено точных совпадений, ищем частичные...")
-
-            for item in all_items:
-                # Ищем в названии по словам
-                if item.title:
-                    words = item.title.lower().split()
-                    for word in words:
-                        if query in word or word in query:
-                            if item not in found_items:
-                                found_items.append(item)
-                                break
-
-                if len(found_items) >= 5:
-                    break
-
         # Формируем ответ
         pages = []
         for item in found_items:
@@ -292,12 +288,26 @@ def advanced_search_view(request):
 
 # ========== УНИВЕРСАЛЬНЫЙ ПОИСК ПО БАЗЕ ОБЪЯВЛЕНИЙ ==========
 
+UNIVERSAL_SEARCH_MAX_PER_PAGE = 100
+SEARCH_COUNT_CAP = 1000  # Дальше точное число не считаем — «1000+»
+
+# Вес совпадения запроса с полем: общий для calculate_search_score и search_score_expression
+SEARCH_SCORE_WEIGHTS = [
+    # Высокий приоритет: ID и название
+    ('product_id', 100), ('title', 50),
+    # Средний приоритет: категория, продавец, город
+    ('category', 30), ('seller_name', 20), ('city', 20),
+    # Низкий приоритет: остальные поля
+    ('description', 10), ('color', 10), ('year', 10), ('mileage', 10), ('engine', 10),
+    ('transmission', 10), ('body', 10), ('steering', 10), ('condition', 10),
+]
+
+
 @require_GET
 @login_required
 def universal_search_api(request):
     """🎯 Универсальный поиск по всем полям объявлений"""
     import traceback
-    from django.db.models import Q
     from django.utils import timezone
 
     print(f"\n" + "=" * 80)
@@ -307,7 +317,7 @@ def universal_search_api(request):
     print("=" * 80)
 
     query = request.GET.get('q', '').strip().lower()
-    per_page = int(request.GET.get('per_page', 50))
+    per_page = min(int(request.GET.get('per_page', 50)), UNIVERSAL_SEARCH_MAX_PER_PAGE)
 
     try:
         # Если запрос пустой - возвращаем пустой результат
@@ -323,40 +333,14 @@ def universal_search_api(request):
         # Ищем в реальной базе данных
         print(f"🔍 Ищем в реальной базе данных...")
 
-        # Создаем Q-объект для поиска
-        search_q = Q()
-
-        # Основные поля для поиска
-        search_q |= Q(title__icontains=query)
-        search_q |= Q(description__icontains=query)
-        search_q |= Q(product_id__icontains=query)
-        search_q |= Q(category__icontains=query)
-        search_q |= Q(seller_name__icontains=query)
-        search_q |= Q(city__icontains=query)
-        search_q |= Q(color__icontains=query)
-        search_q |= Q(body__icontains=query)
-        search_q |= Q(engine__icontains=query)
-        search_q |= Q(transmission__icontains=query)
-
-        # Поиск по году если это число
-        if query.isdigit():
-            try:
-                year_query = int(query)
-                if 1900 <= year_query <= 2100:
-                    search_q |= Q(year=year_query)
-            except:
-                pass
-
-        # Выполняем поиск (ТОЛЬКО РЕАЛЬНЫЕ ДАННЫЕ, БЕЗ ТЕСТОВЫХ)
-        items = FoundItem.objects.filter(search_q)
-        items_count = items.count()
-        print(f"📊 Найдено товаров: {items_count}")
-
-        # Сортируем по дате (новые сверху)
-        items = items.order_by('-found_at')
+        # Подстрока в любом из полей поиска или похожее слово (опечатки) —
+        # оба условия идут по trigram-индексу founditem_search_text_trgm
+        items = _universal_search(query)
+        total_found = items.order_by().values('pk')[:SEARCH_COUNT_CAP].count()
+        print(f"📊 Найдено товаров: {total_found}{'+' if total_found >= SEARCH_COUNT_CAP else ''}")
 
-        # Берем нужное количество
-        items = items[:per_page]
+        # Релевантность (как calculate_search_score), затем похожесть названия и свежесть
+        items = items.order_by('-search_score', '-title_similarity', '-found_at')[:per_page]
 
         # Форматируем результаты
         results = []
@@ -436,6 +420,8 @@ def universal_search_api(request):
             'status': 'success',
             'pages': results,
             'total': len(results),
+            'total_found': total_found,
+            'total_capped': total_found >= SEARCH_COUNT_CAP,
             'query': query
         })
 
@@ -456,34 +442,68 @@ def calculate_search_score(item, query):
     score = 0
     query_lower = query.lower()
 
-    # Высокий приоритет: ID и название
-    if item.product_id and query_lower in str(item.product_id).lower():
-        score += 100
-    if item.title and query_lower in item.title.lower():
-        score += 50
-
-    # Средний приоритет: категория, продавец, город
-    if item.category and query_lower in item.category.lower():
-        score += 30
-    if item.seller_name and query_lower in item.seller_name.lower():
-        score += 20
-    if item.city and query_lower in item.city.lower():
-        score += 20
-
-    # Низкий приоритет: остальные поля
-    fields = ['description', 'color', 'year', 'mileage', 'engine',
-              'transmission', 'body', 'steering', 'condition']
-
-    for field in fields:
+    for field, weight in SEARCH_SCORE_WEIGHTS:
         value = getattr(item, field, '')
         if value and query_lower in str(value).lower():
-            score += 10
+            score += weight
 
     return score
 
 
+def search_score_expression(query):
+    """calculate_search_score в SQL: сумма весов полей, содержащих запрос"""
+    cases = [
+        Case(
+            When(**{f'{field}__icontains': query}, then=Value(weight)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        for field, weight in SEARCH_SCORE_WEIGHTS
+    ]
+    return sum(cases[1:], cases[0])
+
+
+def _universal_search(query):
+    """Отбор и ранжирование для universal_search_api целиком в БД"""
+    search_q = (
+        Q(search_text__contains=Upper(Value(query))) |
+        Q(search_text__trigram_word_similar=query)
+    )
+
+    # Поиск по году если это число
+    if query.isdigit() and 1900 <= int(query) <= 2100:
+        search_q |= Q(year=int(query))
+
+    return (
+        FoundItem.objects
+        .alias(search_text=found_item_search_text())
+        .filter(search_q)
+        .annotate(
+            search_score=search_score_expression(query),
+            title_similarity=TrigramWordSimilarity(query, 'title'),
+        )
+    )
+
+
 # ========== ДРУГИЕ ФУНКЦИИ (без изменений) ==========
 
+TABLE_SORT_FIELDS = ['price', 'profit', 'profit_percent', 'seller_rating',
+                     'views_count', 'year', 'found_at', 'posted_date']
+# NOT NULL-поля: по ним работает курсор, по остальным — OFFSET
+TABLE_KEYSET_FIELDS = {'price', 'profit', 'profit_percent', 'views_count', 'found_at'}
+TABLE_MAX_PER_PAGE = 200
+
+# Только колонки, которые показывает таблица
+TABLE_COLUMNS = [
+    'id', 'product_id', 'title', 'source', 'image_url', 'seller_rating', 'reviews_count',
+    'posted_date', 'views_count', 'views_today', 'condition', 'category', 'city', 'mileage',
+    'year', 'color', 'price', 'profit', 'profit_percent', 'price_status', 'found_at',
+    'is_favorite', 'target_price', 'url', 'description', 'seller_name', 'seller_type',
+    'address', 'metro_stations', 'steering', 'transmission', 'drive', 'engine', 'owners',
+    'pts', 'tax', 'customs', 'body', 'package', 'discount_price',
+]
+
+
 @require_GET
 @login_required
 def table_search_api(request):
@@ -523,79 +543,91 @@ def table_search_api(request):
         items = FoundItem.objects.filter(
             search_query__user=request.user,
             **filters
-        ).select_related('search_query')
+        )
 
-        # Сортировка
+        # Сортировка (id — второй ключ, чтобы порядок и курсор были однозначны)
         sort_by = request.GET.get('sort', '-found_at')
         sort_field = sort_by.lstrip('-')
+        if sort_field not in TABLE_SORT_FIELDS:
+            sort_by, sort_field = '-found_at', 'found_at'
+        ordering = [sort_by, '-id' if sort_by.startswith('-') else 'id']
 
-        if sort_field in ['price', 'profit', 'profit_percent', 'seller_rating',
-                          'views_count', 'year', 'found_at', 'posted_date']:
-            items = items.order_by(sort_by)
-
-        # Пагинация
+        # Пагинация: курсор (keyset) вместо OFFSET
         page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 50))
-        start = (page - 1) * per_page
-        end = start + per_page
-
-        total_count = items.count()
-        items_page = items[start:end]
+        per_page = min(int(request.GET.get('per_page', 50)), TABLE_MAX_PER_PAGE)
+        cursor = request.GET.get('cursor')
+        rows = items.values(*TABLE_COLUMNS)
+
+        if sort_field in TABLE_KEYSET_FIELDS and (cursor or page == 1):
+            result = keyset_page(rows, ordering, cursor=cursor, per_page=per_page)
+            items_page, next_cursor, has_next = result.rows, result.next_cursor, result.has_next
+        else:
+            # page=N без курсора и сортировки по полям с NULL — по-старому, через OFFSET
+            start = (page - 1) * per_page
+            items_page = list(rows.order_by(*ordering)[start:start + per_page + 1])
+            has_next = len(items_page) > per_page
+            items_page = items_page[:per_page]
+            next_cursor = None
+            if has_next and sort_field in TABLE_KEYSET_FIELDS:
+                next_cursor = encode_cursor(items_page[-1], ordering)
 
         # Форматируем данные для таблицы
         data = []
         for item in items_page:
             data.append({
-                'id': item.id,
-                'product_id': item.product_id or item.id,
-                'title': item.title or 'Без названия',
-                'source': item.source or 'avito',
-                'image_url': item.image_url or item.photo or '',
-                'seller_rating': float(item.seller_rating) if item.seller_rating else 0,
-                'reviews_count': item.reviews_count or 0,
-                'posted_date': item.posted_date.strftime('%d.%m.%Y') if item.posted_date else '-',
-                'views_count': item.views_count or 0,
-                'views_today': item.views_today or 0,
-                'condition': item.condition or '-',
-                'category': item.category or '-',
-                'city': item.city or '-',
-                'mileage': item.mileage or '-',
-                'year': item.year or '-',
-                'color': item.color or '-',
-                'price': int(item.price) if item.price else 0,
-                'profit': int(item.profit) if item.profit else 0,
-                'profit_percent': float(item.profit_percent) if item.profit_percent else 0,
-                'price_status': item.price_status or '-',
-                'created_at': item.found_at.strftime('%d.%m.%Y %H:%M'),
-                'is_favorite': bool(item.is_favorite),
-                'target_price': int(item.target_price) if item.target_price else 0,
-                'url': item.url or '',
-                'description': item.description or '',
-                'seller_name': item.seller_name or '',
-                'seller_type': item.seller_type or 'Не указано',
-                'address': item.address or '',
-                'metro_stations': item.metro_stations or [],
-                'steering': item.steering or '-',
-                'transmission': item.transmission or '-',
-                'drive': item.drive or '-',
-                'engine': item.engine or '-',
-                'owners': item.owners or '-',
-                'pts': item.pts or '-',
-                'tax': item.tax or '-',
-                'customs': item.customs or '-',
-                'body': item.body or '-',
-                'package': item.package or '-',
-                'discount_price': int(item.discount_price) if item.discount_price else 0
+                'id': item['id'],
+                'product_id': item['product_id'] or item['id'],
+                'title': item['title'] or 'Без названия',
+                'source': item['source'] or 'avito',
+                'image_url': item['image_url'] or '',
+                'seller_rating': float(item['seller_rating']) if item['seller_rating'] else 0,
+                'reviews_count': item['reviews_count'] or 0,
+                'posted_date': item['posted_date'] or '-',
+                'views_count': item['views_count'] or 0,
+                'views_today': item['views_today'] or 0,
+                'condition': item['condition'] or '-',
+                'category': item['category'] or '-',
+                'city': item['city'] or '-',
+                'mileage': item['mileage'] or '-',
+                'year': item['year'] or '-',
+                'color': item['color'] or '-',
+                'price': int(item['price']) if item['price'] else 0,
+                'profit': int(item['profit']) if item['profit'] else 0,
+                'profit_percent': float(item['profit_percent']) if item['profit_percent'] else 0,
+                'price_status': item['price_status'] or '-',
+                'created_at': item['found_at'].strftime('%d.%m.%Y %H:%M'),
+                'is_favorite': bool(item['is_favorite']),
+                'target_price': int(item['target_price']) if item['target_price'] else 0,
+                'url': item['url'] or '',
+                'description': item['description'] or '',
+                'seller_name': item['seller_name'] or '',
+                'seller_type': item['seller_type'] or 'Не указано',
+                'address': item['address'] or '',
+                'metro_stations': item['metro_stations'] or [],
+                'steering': item['steering'] or '-',
+                'transmission': item['transmission'] or '-',
+                'drive': item['drive'] or '-',
+                'engine': item['engine'] or '-',
+                'owners': item['owners'] or '-',
+                'pts': item['pts'] or '-',
+                'tax': item['tax'] or '-',
+                'customs': item['customs'] or '-',
+                'body': item['body'] or '-',
+                'package': item['package'] or '-',
+                'discount_price': int(item['discount_price']) if item['discount_price'] else 0
             })
 
-        # Статистика
-        stats = {
-            'total': total_count,
-            'profitable': items.filter(profit__gt=0).count(),
-            'avg_price': items.aggregate(avg_price=Avg('price'))['avg_price'] or 0,
-            'avg_profit': items.aggregate(avg_profit=Avg('profit'))['avg_profit'] or 0,
-            'total_profit': items.aggregate(total_profit=Sum('profit'))['total_profit'] or 0
-        }
+        # Статистика — один проход по отфильтрованным строкам
+        stats = items.aggregate(
+            total=Count('id'),
+            profitable=Count('id', filter=Q(profit__gt=0)),
+            avg_price=Avg('price'),
+            avg_profit=Avg('profit'),
+            total_profit=Sum('profit'),
+        )
+        total_count = stats['total']
+        for key in ('avg_price', 'avg_profit', 'total_profit'):
+            stats[key] = stats[key] or 0
 
         return JsonResponse({
             'status': 'success',
@@ -605,10 +637,19 @@ def table_search_api(request):
                 'page': page,
                 'per_page': per_page,
                 'total': total_count,
-                'pages': (total_count + per_page - 1) // per_page
+                'pages': (total_count + per_page - 1) // per_page,
+                'has_next': has_next,
+                'next_cursor': next_cursor
             }
         })
 
+    except ValueError as e:
+        # Нечисловой фильтр или испорченный курсор
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+
     except Exception as e:
         logger.error(f"Ошибка поиска для таблицы: {e}")
         return JsonResponse({
@@ -617,6 +658,17 @@ def table_search_api(request):
         }, status=500)
 
 
+AUTOCOMPLETE_LIMIT = 10
+
+# Параметр field → колонка FoundItem (у каждой trigram-индекс, models.AUTOCOMPLETE_FIELDS)
+AUTOCOMPLETE_COLUMNS = {
+    'category': 'category',
+    'city': 'city',
+    'seller': 'seller_name',
+    'color': 'color',
+}
+
+
 @require_GET
 @login_required
 def autocomplete_api(request):
@@ -627,48 +679,20 @@ def autocomplete_api(request):
     if not field or not query or len(query) < 2:
         return JsonResponse({'results': []})
 
-    try:
-        results = []
-
-        if field == 'category':
-            categories = FoundItem.objects.filter(
-                search_query__user=request.user,
-                category__icontains=query
-            ).exclude(category__isnull=True).exclude(category='').values_list(
-                'category', flat=True
-            ).distinct().order_by('category')[:10]
-
-            results = [{'id': cat, 'text': cat} for cat in categories]
-
-        elif field == 'city':
-            cities = FoundItem.objects.filter(
-                search_query__user=request.user,
-                city__icontains=query
-            ).exclude(city__isnull=True).exclude(city='').values_list(
-                'city', flat=True
-            ).distinct().order_by('city')[:10]
-
-            results = [{'id': city, 'text': city} for city in cities]
-
-        elif field == 'seller':
-            sellers = FoundItem.objects.filter(
-                search_query__user=request.user,
-                seller_name__icontains=query
-            ).exclude(seller_name__isnull=True).exclude(seller_name='').values_list(
-                'seller_name', flat=True
-            ).distinct().order_by('seller_name')[:10]
-
-            results = [{'id': seller, 'text': seller} for seller in sellers]
+    column = AUTOCOMPLETE_COLUMNS.get(field)
+    if not column:
+        return JsonResponse({'results': []})
 
-        elif field == 'color':
-            colors = FoundItem.objects.filter(
-                search_query__user=request.user,
-                color__icontains=query
-            ).exclude(color__isnull=True).exclude(color='').values_list(
-                'color', flat=True
-            ).distinct().order_by('color')[:10]
+    try:
+        # icontains идёт по trigram-индексу UPPER(поле), ближайшие к запросу — первыми
+        values = FoundItem.objects.filter(
+            search_query__user=request.user,
+            **{f'{column}__icontains': query}
+        ).values(column).annotate(
+            similarity=Max(TrigramSimilarity(column, query))
+        ).order_by('-similarity', column)[:AUTOCOMPLETE_LIMIT]
 
-            results = [{'id': color, 'text': color} for color in colors]
+        results = [{'id': row[column], 'text': row[column]} for row in values]
 
         return JsonResponse({'results': results})
 
@@ -680,75 +704,13 @@ def autocomplete_api(request):
 @require_GET
 @login_required
 def search_filters_api(request):
-    """🎛️ Получение доступных фильтров для поиска"""
-    try:
-        # Уникальные категории
-        categories = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).exclude(category__isnull=True).exclude(category='').values_list(
-            'category', flat=True
-        ).distinct().order_by('category')
-
-        # Уникальные города
-        cities = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).exclude(city__isnull=True).exclude(city='').values_list(
-            'city', flat=True
-        ).distinct().order_by('city')
-
-        # Уникальные источники
-        sources = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).exclude(source__isnull=True).exclude(source='').values_list(
-            'source', flat=True
-        ).distinct().order_by('source')
-
-        # Уникальные типы продавцов
-        seller_types = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).exclude(seller_type__isnull=True).exclude(seller_type='').values_list(
-            'seller_type', flat=True
-        ).distinct().order_by('seller_type')
-
-        # Уникальные цвета
-        colors = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).exclude(color__isnull=True).exclude(color='').values_list(
-            'color', flat=True
-        ).distinct().order_by('color')
-
-        # Минимальные и максимальные значения
-        price_stats = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).aggregate(
-            min_price=Min('price'),
-            max_price=Max('price'),
-            avg_price=Avg('price')
-        )
-
-        year_stats = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).exclude(year__isnull=True).aggregate(
-            min_year=Min('year'),
-            max_year=Max('year')
-        )
+    """🎛️ Получение доступных фильтров для поиска
 
-        return JsonResponse({
-            'categories': list(categories),
-            'cities': list(cities),
-            'sources': list(sources),
-            'seller_types': list(seller_types),
-            'colors': list(colors),
-            'price_range': {
-                'min': price_stats['min_price'] or 0,
-                'max': price_stats['max_price'] or 1000000,
-                'avg': price_stats['avg_price'] or 0
-            },
-            'year_range': {
-                'min': year_stats['min_year'] or 2000,
-                'max': year_stats['max_year'] or datetime.now().year
-            }
-        })
+    Один запрос к сводке FoundItemFacet (обновляется раз в несколько минут);
+    ETag по содержимому — повторный запрос без изменений получает 304.
+    """
+    try:
+        filters = FoundItemFacet.summary(request.user)
 
     except Exception as e:
         logger.error(f"Ошибка получения фильтров: {e}")
@@ -762,6 +724,11 @@ def search_filters_api(request):
             'year_range': {'min': 2000, 'max': datetime.now().year}
         })
 
+    response = JsonResponse(filters)
+    patch_cache_control(response, private=True, no_cache=True)
+    set_response_etag(response)
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
 
 # ========== УПРАВЛЕНИЕ ПОИСКОВЫМИ ЗАПРОСАМИ ==========
 
@@ -0,0 +1,32 @@
+# website/views/stream_views.py
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from apps.notifications.views import event_stream_response
+from ..live_feed import CONSOLE_CHANNEL, found_items_channel
+from .api_views import is_admin
+
+
+# ========== ЖИВАЯ ЛЕНТА (SSE) ==========
+
+@require_GET
+@login_required
+def live_stream(request):
+    """📡 SSE: новые товары пользователя и строки консоли по мере появления
+
+    ?items=0 — без товаров, ?console=1 — со строками консоли (только
+    администраторам). События: found_item (строка таблицы, как в
+    /api/latest-items/) и console ({"message": ...}). После обрыва
+    EventSource переподключается с Last-Event-ID и получает пропущенное
+    из канала. Пока поток открыт, соединение с БД не занято.
+    """
+    channels = []
+    if request.GET.get('items', '1') != '0':
+        channels.append(found_items_channel(request.user.id))
+    if request.GET.get('console') == '1':
+        if not is_admin(request.user):
+            return HttpResponseForbidden('Консоль доступна только администраторам')
+        channels.append(CONSOLE_CHANNEL)
+
+    return event_stream_response(request, channels)
@@ -9,15 +9,14 @@ from django.db import transaction
 from django.contrib.auth import get_user_model
 import json
 import logging
-import asyncio
 import random
 from datetime import timedelta
-from telegram import Bot
 from telegram.error import TelegramError
 
 from apps.website.models import UserProfile
 from apps.website.console_manager import add_to_console
 from shared.utils.config import get_bot_token, get_chat_id
+from shared.utils.telegram_client import run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -56,12 +55,9 @@ def test_bot_connection(request):
                 'message': 'Chat ID не настроен. Проверьте utils/config.py'
             })
 
-        async def send_telegram_message():
+        async def send_telegram_message(bot):
             try:
-                bot = Bot(token=token)
-
-                bot_info = await bot.get_me()
-                logger.info(f"✅ Бот: {bot_info.first_name} (@{bot_info.username})")
+                logger.info(f"✅ Бот: {bot.first_name} (@{bot.username})")
 
                 message = "🎉 Ура мы работаем! Тестовое сообщение связи пришло!"
                 await bot.send_message(
@@ -80,7 +76,7 @@ def test_bot_connection(request):
                 logger.error(f"❌ Ошибка отправки: {e}")
                 return False
 
-        success = asyncio.run(send_telegram_message())
+        success = run_sync(send_telegram_message, token)
         logger.info(f"✅ Результат отправки: {success}")
 
         if success:
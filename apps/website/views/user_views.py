@@ -5,8 +5,7 @@ from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods, require_POST, require_GET
 from django.views.decorators.csrf import csrf_exempt
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q, Sum
+from django.core.paginator import Paginator
 from django.contrib.auth import update_session_auth_hash
 from datetime import timedelta
 import json
@@ -18,6 +17,7 @@ from apps.website.models import (
     Transaction, SubscriptionPlan
 )
 from apps.website.forms import CustomUserCreationForm
+from apps.website.dashboard_stats import get_user_dashboard_stats, invalidate_dashboard_stats
 
 logger = logging.getLogger(__name__)
 
@@ -26,427 +26,17 @@ logger = logging.getLogger(__name__)
 
 @login_required
 def found_items(request):
-    """📦 Просмотр найденных товаров с поддержкой избранного
-
-    🔍 Фильтрация по категории, цене, типу продавца, состоянию, городу, метро, новизне
-    💰 Сортировка по прибыли, цене, дате
-    ⭐ Режим избранного (только is_favorite=True)
-    📊 Статистика: общее количество, выгодные сделки, потенциальная прибыль
-    📤 Экспорт в Excel
-    """
-    # 📤 Экспорт в Excel
-    if request.GET.get('export') == 'excel':
-        from apps.website.utils.excel_export import ExcelExporterPRO
-        found_items_list = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).select_related('search_query')
-        exporter = ExcelExporterPRO(found_items_list)
-        return exporter.export()
-
-    # 🔍 Определяем режим избранного
-    is_favorites_view = request.GET.get('favorites') == '1'
-
-    # 📋 Получаем базовый QuerySet (ВСЕ товары пользователя) - ЭТО КРИТИЧЕСКИ ВАЖНО!
-    # ⚠️ Убедитесь, что у пользователя действительно есть товары!
-    all_items_qs = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).select_related('search_query')
-
-    # Получаем общее количество ВСЕХ товаров пользователя (для кнопки "Все объявления")
-    total_all_items = all_items_qs.count()
-
-    # ⭐ ФИЛЬТР ИЗБРАННОГО - ПЕРВОЕ И ВАЖНЕЙШЕЕ
-    if is_favorites_view:
-        found_items_list = all_items_qs.filter(is_favorite=True)
-        logger.info(f"⭐ Режим избранного: найдено {found_items_list.count()} товаров")
-    else:
-        found_items_list = all_items_qs
-
-    # 🔍 ВСЕ ФИЛЬТРЫ ИЗ GET-ПАРАМЕТРОВ
-    category_filter = request.GET.get('category')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
-    seller_type = request.GET.get('seller_type')
-    profitable_only = request.GET.get('profitable_only')
-    sort_by = request.GET.get('sort_by', '-found_at')
-
-    # 🔥 НОВЫЕ ФИЛЬТРЫ ДЛЯ МОДАЛЬНОГО ОКНА
-    condition_filter = request.GET.get('condition')
-    city_filter = request.GET.get('city')
-    metro_filter = request.GET.get('metro')
-    newness_filter = request.GET.get('newness')
-
-    # 📦 Фильтр по категории
-    if category_filter and category_filter != 'all':
-        found_items_list = found_items_list.filter(category__icontains=category_filter)
-
-    # 💰 Фильтр по цене
-    if price_min:
-        try:
-            found_items_list = found_items_list.filter(price__gte=float(price_min))
-        except ValueError:
-            pass
-
-    if price_max:
-        try:
-            found_items_list = found_items_list.filter(price__lte=float(price_max))
-        except ValueError:
-            pass
-
-    # 👤 Фильтр по типу продавца - СОВМЕСТИМОСТЬ со старыми и новыми данными
-    if seller_type:
-        if seller_type == 'private':
-            # Частные лица: или reviews_count <= 150, или seller_type содержит "част"
-            found_items_list = found_items_list.filter(
-                Q(reviews_count__lte=150) |
-                Q(seller_type__icontains='част') |
-                Q(seller_type__icontains='private') |
-                Q(seller_type='')
-            )
-        elif seller_type == 'reseller':
-            # Компании/магазины: или reviews_count > 150, или seller_type содержит "компания", "магазин"
-            found_items_list = found_items_list.filter(
-                Q(reviews_count__gt=150) |
-                Q(seller_type__icontains='компания') |
-                Q(seller_type__icontains='магазин') |
-                Q(seller_type__icontains='reseller') |
-                Q(seller_type='Компания') |
-                Q(seller_type='Магазин')
-            )
-
-    # 💵 Фильтр выгодных предложений
-    if profitable_only:
-        found_items_list = found_items_list.filter(profit__gt=0)
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Состояние товара
-    if condition_filter:
-        if condition_filter == 'new':
-            found_items_list = found_items_list.filter(
-                Q(condition__icontains='новый') |
-                Q(condition__icontains='new')
-            )
-        elif condition_filter == 'used':
-            found_items_list = found_items_list.filter(
-                Q(condition__icontains='б/у') |
-                Q(condition__icontains='used')
-            )
-        elif condition_filter == 'like_new':
-            found_items_list = found_items_list.filter(
-                Q(condition__icontains='как новый') |
-                Q(condition__icontains='like new')
-            )
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Город
-    if city_filter:
-        found_items_list = found_items_list.filter(
-            Q(city__icontains=city_filter) |
-            Q(full_location__icontains=city_filter)
-        )
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Метро
-    if metro_filter:
-        found_items_list = found_items_list.filter(
-            Q(metro_stations__icontains=metro_filter) |
-            Q(full_location__icontains=metro_filter)
-        )
-
-    # 🔥 НОВЫЙ ФИЛЬТР: Новизна объявления
-    if newness_filter:
-        now = timezone.now()
-        if newness_filter == 'today':
-            found_items_list = found_items_list.filter(found_at__date=now.date())
-        elif newness_filter == 'week':
-            week_ago = now - timedelta(days=7)
-            found_items_list = found_items_list.filter(found_at__gte=week_ago)
-        elif newness_filter == 'month':
-            month_ago = now - timedelta(days=30)
-            found_items_list = found_items_list.filter(found_at__gte=month_ago)
-
-    # 🔄 Сортировка
-    if sort_by in ['price', '-price', 'category', '-category', 'posted_date', '-posted_date', '-found_at', '-profit']:
-        found_items_list = found_items_list.order_by(sort_by)
-    else:
-        found_items_list = found_items_list.order_by('-found_at')
-
-    # 📚 Категории для фильтра (только уникальные)
-    categories = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).exclude(category__isnull=True).exclude(category='').values_list('category', flat=True).distinct()
-
-    # 📊 Пагинация с поддержкой размера страницы
-    page_size = int(request.GET.get('page_size', 20))
-    paginator = Paginator(found_items_list, page_size)
-    page_number = request.GET.get('page')
-
-    try:
-        found_items = paginator.page(page_number)
-    except PageNotAnInteger:
-        found_items = paginator.page(1)
-    except EmptyPage:
-        found_items = paginator.page(paginator.num_pages)
-
-    # 📈 Статистика для текущих отфильтрованных товаров
-    total_filtered_items = found_items_list.count()
-    good_deals = found_items_list.filter(profit__gt=0).count()
-    potential_profit = found_items_list.aggregate(total_profit=Sum('profit'))['total_profit'] or 0
-
-    # ❤️ Количество избранных (ВСЕХ товаров пользователя)
-    favorites_count = FoundItem.objects.filter(
-        search_query__user=request.user,
-        is_favorite=True
-    ).count()
-
-    # 📊 ОТЛАДКА ДЛЯ ВЫЯВЛЕНИЯ ПРОБЛЕМЫ
-    import sys
-    print("\n" + "=" * 80, file=sys.stderr)
-    print("🔍 ДЕБАГ ИНФОРМАЦИЯ found_items VIEW:", file=sys.stderr)
-    print(f"  Пользователь: {request.user} (id: {request.user.id})", file=sys.stderr)
-    print(f"  is_favorites_view: {is_favorites_view}", file=sys.stderr)
-    print(f"  total_all_items (все товары): {total_all_items}", file=sys.stderr)
-    print(f"  favorites_count (все избранные): {favorites_count}", file=sys.stderr)
-    print(f"  total_filtered_items (после фильтров): {total_filtered_items}", file=sys.stderr)
-    print(f"  found_items.paginator.count: {found_items.paginator.count}", file=sys.stderr)
-
-    # Проверяем, действительно ли у пользователя есть товары
-    from django.db import connection
-    print("\n🔍 SQL запросы:", file=sys.stderr)
-    print(f"  SQL all_items_qs: {all_items_qs.query}", file=sys.stderr)
-    print(f"  Количество записей в БД для пользователя:", file=sys.stderr)
-
-    # Проверяем количество товаров прямо в БД
-    with connection.cursor() as cursor:
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM website_founditem fi 
-            JOIN website_searchquery sq ON fi.search_query_id = sq.id 
-            WHERE sq.user_id = %s
-        """, [request.user.id])
-        db_count = cursor.fetchone()[0]
-        print(f"  Прямой запрос к БД: {db_count} товаров", file=sys.stderr)
-
-    print("=" * 80 + "\n", file=sys.stderr)
-
-    context = {
-        'found_items': found_items,
-        'categories': categories,
-        'current_filters': {
-            'category': category_filter,
-            'price_min': price_min,
-            'price_max': price_max,
-            'seller_type': seller_type,
-            'profitable_only': profitable_only,
-            'sort_by': sort_by,
-            'condition': condition_filter,
-            'city': city_filter,
-            'metro': metro_filter,
-            'newness': newness_filter,
-        },
-        'stats': {
-            'total_items': total_filtered_items,  # Количество отфильтрованных товаров
-            'good_deals': good_deals,
-            'potential_profit': int(potential_profit)
-        },
-        'is_favorites_view': is_favorites_view,
-        'favorites_count': favorites_count,
-        'total_all_items': total_all_items,  # ✅ НОВОЕ: Общее количество всех товаров пользователя
-        'page_size': page_size,
-    }
-
-    logger.info(f"📊 Контекст отправлен в шаблон:")
-    logger.info(f"  - is_favorites_view: {is_favorites_view}")
-    logger.info(f"  - favorites_count: {favorites_count}")
-    logger.info(f"  - total_filtered_items: {total_filtered_items}")
-    logger.info(f"  - total_all_items: {total_all_items}")
-    logger.info(f"  - found_items count: {found_items.paginator.count}")
-
-    return render(request, 'dashboard/found_items.html', context)
+    """📦 Прежняя версия списка найденных товаров — теперь то же, что core_views.found_items_view"""
+    from apps.website.views.core_views import found_items_view as core_found_items_view
+    return core_found_items_view(request)
 
 
 @login_required
 def found_items_view(request):
-    """📦 Просмотр найденных товаров с пагинацией, фильтрацией и сортировкой
-
-    🔍 Альтернативная версия с экспортом в Excel
-    📊 Идентичная фильтрация как в found_items()
-    📤 Экспорт с применением всех фильтров
-    """
-    # 🔍 Определяем режим избранного - ДОБАВЛЕНО
-    is_favorites_view = request.GET.get('favorites') == '1'
-
-    # 🔧 ПОЛУЧАЕМ РАЗМЕР СТРАНИЦЫ ИЗ ЗАПРОСА - ИСПРАВЛЕНИЕ
-    page_size_param = request.GET.get('page_size', '20')
-    try:
-        page_size = int(page_size_param)
-        # Ограничиваем допустимые значения
-        if page_size not in [20, 50, 100]:
-            page_size = 20
-    except (ValueError, TypeError):
-        page_size = 20
-
-    if request.GET.get('export') == 'excel':
-        from apps.website.utils.excel_export import ExcelExporterPRO
-
-        found_items_list = FoundItem.objects.filter(
-            search_query__user=request.user
-        ).select_related('search_query')
-
-        # ⭐ ФИЛЬТР ИЗБРАННОГО ДЛЯ ЭКСПОРТА - ДОБАВЛЕНО
-        if is_favorites_view:
-            found_items_list = found_items_list.filter(is_favorite=True)
+    """📦 Список найденных товаров: фильтры по ключам, keyset-пагинация (core_views.found_items_view)"""
+    from apps.website.views.core_views import found_items_view as core_found_items_view
+    return core_found_items_view(request)
 
-        category_filter = request.GET.get('category')
-        price_min = request.GET.get('price_min')
-        price_max = request.GET.get('price_max')
-        seller_type = request.GET.get('seller_type')
-        profitable_only = request.GET.get('profitable_only')
-        sort_by = request.GET.get('sort_by', '-found_at')
-
-        if category_filter and category_filter != 'all':
-            found_items_list = found_items_list.filter(category__icontains=category_filter)
-
-        if price_min:
-            try:
-                found_items_list = found_items_list.filter(price__gte=float(price_min))
-            except ValueError:
-                pass
-
-        if price_max:
-            try:
-                found_items_list = found_items_list.filter(price__lte=float(price_max))
-            except ValueError:
-                pass
-
-        if seller_type == 'private':
-            found_items_list = found_items_list.filter(reviews_count__lte=150)
-        elif seller_type == 'reseller':
-            found_items_list = found_items_list.filter(reviews_count__gt=150)
-
-        if profitable_only:
-            found_items_list = found_items_list.filter(profit__gt=0)
-
-        if sort_by in ['price', '-price', 'category', '-category', 'posted_date', '-posted_date', '-found_at']:
-            found_items_list = found_items_list.order_by(sort_by)
-        else:
-            found_items_list = found_items_list.order_by('-priority_score', '-ml_freshness_score', '-found_at')
-
-        exporter = ExcelExporterPRO(found_items_list)
-        return exporter.export()
-
-    # 🔍 НАЧАЛО ФИЛЬТРАЦИИ
-    found_items_list = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).select_related('search_query')
-
-    # ⭐ ФИЛЬТР ИЗБРАННОГО - САМОЕ ВАЖНОЕ - ДОБАВЛЕНО
-    if is_favorites_view:
-        found_items_list = found_items_list.filter(is_favorite=True)
-
-    # 🔥 ДЕБАГ ИНФОРМАЦИЯ - ДОБАВЛЕНО
-    print(f"🔥 DEBUG found_items_view:")
-    print(f"  - is_favorites_view: {is_favorites_view}")
-    print(f"  - page_size: {page_size}")
-    print(f"  - request.GET: {dict(request.GET)}")
-    print(f"  - Всего товаров до других фильтров: {found_items_list.count()}")
-
-    # ... существующий код логирования ...
-    from apps.website.console_manager import add_to_console
-    add_to_console(f"🔍 Пользователь: {request.user}")
-    add_to_console(f"🔍 Найдено записей: {found_items_list.count()}")
-
-    # ... ОСТАЛЬНЫЕ ФИЛЬТРЫ (оставляем как было) ...
-    category_filter = request.GET.get('category')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
-    seller_type = request.GET.get('seller_type')
-    profitable_only = request.GET.get('profitable_only')
-    sort_by = request.GET.get('sort_by', '-found_at')
-
-    if category_filter and category_filter != 'all':
-        found_items_list = found_items_list.filter(category__icontains=category_filter)
-
-    if price_min:
-        try:
-            found_items_list = found_items_list.filter(price__gte=float(price_min))
-        except ValueError:
-            pass
-
-    if price_max:
-        try:
-            found_items_list = found_items_list.filter(price__lte=float(price_max))
-        except ValueError:
-            pass
-
-    if seller_type == 'private':
-        found_items_list = found_items_list.filter(reviews_count__lte=150)
-    elif seller_type == 'reseller':
-        found_items_list = found_items_list.filter(reviews_count__gt=150)
-
-    if profitable_only:
-        found_items_list = found_items_list.filter(profit__gt=0)
-
-    if sort_by in ['price', '-price', 'category', '-category', 'posted_date', '-posted_date', '-found_at']:
-        found_items_list = found_items_list.order_by(sort_by)
-    else:
-        found_items_list = found_items_list.order_by('-found_at')
-
-    # 🔥 ДЕБАГ ПОСЛЕ ВСЕХ ФИЛЬТРОВ - ДОБАВЛЕНО
-    print(f"🔥 DEBUG: После всех фильтров: {found_items_list.count()} товаров")
-
-    categories = FoundItem.objects.filter(
-        search_query__user=request.user
-    ).exclude(category__isnull=True).exclude(category='').values_list('category', flat=True).distinct()
-
-    # 🔧 ИСПРАВЛЕНИЕ: Используем page_size из запроса вместо жесткого значения 20
-    paginator = Paginator(found_items_list, page_size)
-    page_number = request.GET.get('page')
-
-    try:
-        found_items = paginator.page(page_number)
-    except PageNotAnInteger:
-        found_items = paginator.page(1)
-    except EmptyPage:
-        found_items = paginator.page(paginator.num_pages)
-
-    total_items = found_items_list.count()
-    good_deals = found_items_list.filter(profit__gt=0).count()
-    potential_profit = found_items_list.aggregate(total_profit=Sum('profit'))['total_profit'] or 0
-
-    favorites_count = FoundItem.objects.filter(
-        search_query__user=request.user,
-        is_favorite=True
-    ).count()
-
-    # 🔥 ДЕБАГ ИНФОРМАЦИЯ В КОНТЕКСТЕ - ДОБАВЛЕНО
-    print(f"🔥 DEBUG Контекст:")
-    print(f"  - total_items: {total_items}")
-    print(f"  - favorites_count: {favorites_count}")
-    print(f"  - page_size: {page_size}")
-    print(f"  - found_items paginator count: {found_items.paginator.count}")
-
-    context = {
-        'found_items': found_items,
-        'categories': categories,
-        'current_filters': {
-            'category': category_filter,
-            'price_min': price_min,
-            'price_max': price_max,
-            'seller_type': seller_type,
-            'profitable_only': profitable_only,
-            'sort_by': sort_by,
-        },
-        'stats': {
-            'total_items': total_items,
-            'good_deals': good_deals,
-            'potential_profit': int(potential_profit)
-        },
-        'favorites_count': favorites_count,
-        'is_favorites_view': is_favorites_view,
-        'page_size': page_size,  # 🔧 ДОБАВЛЯЕМ page_size в контекст
-    }
-    return render(request, 'dashboard/found_items.html', context)
-
-
-# ========== ИЗБРАННОЕ ==========
 
 @require_POST
 @csrf_exempt
@@ -630,6 +220,7 @@ def search_queries_view(request):
                 target_price=target_price
             )
             search_query.save()
+            invalidate_dashboard_stats([request.user.id])
             messages.success(request, 'Поисковый запрос добавлен!')
             return redirect('search_queries')
 
@@ -647,6 +238,7 @@ def toggle_search_query(request, query_id):
     search_query = get_object_or_404(SearchQuery, id=query_id, user=request.user)
     search_query.is_active = not search_query.is_active
     search_query.save()
+    invalidate_dashboard_stats([request.user.id])
     messages.success(request, f'Запрос {"активирован" if search_query.is_active else "деактивирован"}')
     return redirect('search_queries')
 
@@ -660,6 +252,7 @@ def delete_search_query(request, query_id):
     """
     search_query = get_object_or_404(SearchQuery, id=query_id, user=request.user)
     search_query.delete()
+    invalidate_dashboard_stats([request.user.id])
     messages.success(request, 'Запрос удален')
     return redirect('search_queries')
 
@@ -799,13 +392,12 @@ def send_favorite_to_telegram(product_data, user):
 
             logger.info(f"📸 Валидных фото после фильтрации: {len(valid_image_urls)}")
 
-            from telegram import Bot, InputMediaPhoto
-            import asyncio
+            from telegram import InputMediaPhoto
+            from shared.utils.telegram_client import run_sync
 
             # Отправляем сообщение
-            async def send_async():
+            async def send_async(bot):
                 try:
-                    bot = Bot(token=token)
 
                     # 4. ОТПРАВЛЯЕМ МЕДИАГРУППУ ЕСЛИ ЕСТЬ ФОТО
                     if valid_image_urls and len(valid_image_urls) > 0:
@@ -892,14 +484,8 @@ def send_favorite_to_telegram(product_data, user):
                     traceback.print_exc()
                     return False
 
-            # Запускаем асинхронную отправку
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(send_async())
-                return result
-            finally:
-                loop.close()
+            # Запускаем асинхронную отправку через общий Telegram-клиент
+            return run_sync(send_async, token)
 
         except ImportError as e:
             logger.error(f"❌ Не удалось импортировать notification_sender: {e}")
@@ -971,13 +557,11 @@ def profile_view(request):
             'daily_price': 0
         }
 
-    found_items_count = FoundItem.objects.filter(search_query__user=request.user).count()
-    good_deals_count = FoundItem.objects.filter(search_query__user=request.user, profit__gt=0).count()
-    active_searches_count = SearchQuery.objects.filter(user=request.user, is_active=True).count()
-    today_items_count = FoundItem.objects.filter(
-        search_query__user=request.user,
-        found_at__date=timezone.now().date()
-    ).count()
+    stats = get_user_dashboard_stats(request.user)
+    found_items_count = stats['total_items']
+    good_deals_count = stats['good_deals']
+    active_searches_count = stats['active_searches']
+    today_items_count = stats['today_items']
 
     transactions = Transaction.objects.filter(user=request.user).order_by('-created_at')[:10]
 
@@ -1331,8 +915,8 @@ def send_fallback_telegram_notification(product_data, user):
     """📨 Fallback метод отправки в Telegram (упрощенная версия)"""
     try:
         from shared.utils.config import get_bot_token, get_chat_id
-        from telegram import Bot, InputMediaPhoto
-        import asyncio
+        from telegram import InputMediaPhoto
+        from shared.utils.telegram_client import run_sync
 
         token = get_bot_token()
         chat_id = get_chat_id()
@@ -1430,9 +1014,8 @@ def send_fallback_telegram_notification(product_data, user):
         message = "\n".join(message_lines)
 
         # Отправляем сообщение
-        async def send_async():
+        async def send_async(bot):
             try:
-                bot = Bot(token=token)
 
                 # 1. Пробуем отправить медиагруппу со всеми фото
                 image_urls = product_data.get('image_urls', [])
@@ -1501,13 +1084,7 @@ def send_fallback_telegram_notification(product_data, user):
                 logger.error(f"❌ Ошибка fallback отправки: {e}")
                 return False
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(send_async())
-            return result
-        finally:
-            loop.close()
+        return run_sync(send_async, token)
 
     except Exception as e:
         logger.error(f"❌ Ошибка fallback метода: {e}")
@@ -0,0 +1,17 @@
+"""
+Бенчмарки ML-моделей, разбора текста и поисковых API без боевой базы.
+
+Запуск:
+    python -m benchmarks.ml_benchmarks --rows 5000
+    python -m benchmarks.text_matching --rows 10000
+    python -m benchmarks.training_budget --rows 5000
+    python -m benchmarks.search_api --rows 100000  # нужен PostgreSQL
+    python -m benchmarks.latest_items --rows 100000  # нужен PostgreSQL
+    python -m benchmarks.feed_indexes --rows 200000  # нужен PostgreSQL
+    python -m benchmarks.sse_subscribers --subscribers 100
+    python -m benchmarks.found_item_partitions --rows 5000000  # нужен PostgreSQL
+    python -m benchmarks.dashboard_stats --rows 100000  # нужен PostgreSQL
+    python -m benchmarks.found_items_filters --rows 200000  # нужен PostgreSQL
+    python -m benchmarks.state_store --categories 1000
+    python -m benchmarks.notification_cache --lookups 1000  # нужен PostgreSQL
+"""
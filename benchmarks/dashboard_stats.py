@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК СЧЁТЧИКОВ ДАШБОРДА: get_user_dashboard_stats против прежних запросов.
+
+Пользователь с --rows товаров (по умолчанию 100 000). Меряются прежние
+семь отдельных count/aggregate/latest, сбор статистики одним запросом
+(промах кэша) и попадание в кэш. Число запросов и совпадение значений с
+прежними проверяет DashboardStatsTests в apps/website/tests.py.
+
+    python -m benchmarks.dashboard_stats --rows 100000  # нужен PostgreSQL
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from apps.website.dashboard_stats import collect_dashboard_stats, get_user_dashboard_stats
+from apps.website.models import FoundItem, ParserStats, SearchQuery
+from benchmarks.search_api import load_found_items
+
+REPEATS = 20
+
+
+def legacy_stats(user):
+    """Как было в core_views.dashboard: отдельный запрос на каждый счётчик"""
+    items = FoundItem.objects.filter(search_query__user=user)
+    try:
+        duplicates_blocked = ParserStats.objects.filter(user=user).latest('created_at').duplicates_blocked
+    except ParserStats.DoesNotExist:
+        duplicates_blocked = 0
+    return {
+        'total_items': items.count(),
+        'good_deals': items.filter(profit__gt=0).count(),
+        'active_searches': SearchQuery.objects.filter(user=user, is_active=True).count(),
+        'today_items': items.filter(found_at__date=timezone.localdate()).count(),
+        'total_searches': SearchQuery.objects.filter(user=user).count(),
+        'duplicates_blocked': duplicates_blocked,
+        'potential_profit': items.filter(profit__gt=0).aggregate(total=Sum('profit'))['total'] or 0,
+    }
+
+
+def median_ms(func):
+    func()  # Прогрев
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк счётчиков дашборда')
+    parser.add_argument('--rows', type=int, default=100000, help='Товаров у пользователя')
+    parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb, serialize=False)
+
+    try:
+        user = load_found_items(args.rows)
+        # Немного «выгодных», сегодняшних и неактивных запросов, чтобы счётчики были не нулевые
+        FoundItem.objects.filter(id__in=FoundItem.objects.order_by('id').values('id')[:args.rows // 4]).update(
+            profit=500
+        )
+        FoundItem.objects.filter(id__in=FoundItem.objects.order_by('-id').values('id')[:100]).update(
+            found_at=timezone.now()
+        )
+        SearchQuery.objects.get_or_create(user=user, name='bench off', defaults={'target_price': 0, 'is_active': False})
+        ParserStats.objects.create(user=user, duplicates_blocked=42)
+
+        cache.clear()
+        timings = [
+            ('legacy: 7 separate queries', median_ms(lambda: legacy_stats(user))),
+            ('collect_dashboard_stats (miss)', median_ms(lambda: collect_dashboard_stats(user))),
+            ('get_user_dashboard_stats (hit)', median_ms(lambda: get_user_dashboard_stats(user))),
+        ]
+
+        print(f"\n📊 Счётчики дашборда: {FoundItem.objects.filter(search_query__user=user).count()} товаров\n")
+        for name, ms in timings:
+            print(f"{name:<34} {ms:>10.2f} ms")
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+📊 ПРОВЕРКА ИНДЕКСОВ ЛЕНТЫ: EXPLAIN горячих запросов FoundItem.
+
+Заливает объявления нескольких пользователей (по умолчанию 200 000 строк
+на 100 пользователей, ~2% в избранном, ~25% выгодных), делает ANALYZE и
+для каждого запроса проверяет, что план идёт по ожидаемому индексу из
+миграции 0012 (те же проверки на малой выборке — FeedIndexTests в
+apps/website/tests.py). Код выхода 1 — какой-то запрос ушёл в Seq Scan
+или другой индекс (план печатается). Нужен PostgreSQL, база — тестовая.
+
+    python -m benchmarks.feed_indexes --rows 200000 --users 100
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from apps.website.models import FoundItem, SearchQuery
+from benchmarks.synthetic import generate_found_items
+
+BATCH_SIZE = 5000
+QUERIES_PER_USER = 3
+INDEX_NODES = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def load_feed_items(rows, users, seed=42):
+    """rows объявлений, раскиданных по поисковым запросам users пользователей"""
+    rng = random.Random(seed)
+    owners = [User.objects.create(username=f'feed{number}') for number in range(users)]
+    queries = SearchQuery.objects.bulk_create([
+        SearchQuery(user=owner, name=f'feed{number}', target_price=0)
+        for owner in owners for number in range(QUERIES_PER_USER)
+    ])
+
+    found_at = FoundItem._meta.get_field('found_at')
+    found_at.auto_now_add = False  # Сохраняем разброс found_at из генератора
+    try:
+        items = generate_found_items(rows, seed=seed)
+        for start in range(0, rows, BATCH_SIZE):
+            batch = []
+            for item in items[start:start + BATCH_SIZE]:
+                target_price = (item['price'] * Decimal(f"{rng.uniform(0.7, 1.1):.2f}")).quantize(Decimal('0.01'))
+                batch.append(FoundItem(
+                    search_query=rng.choice(queries),
+                    title=item['title'],
+                    price=item['price'],
+                    target_price=target_price,
+                    profit=target_price - item['price'],
+                    is_favorite=rng.random() < 0.02,
+                    category=item['category'],
+                    city=item['city'],
+                    metro_stations=item['metro_stations'],
+                    found_at=item['found_at'],
+                    url=f"https://www.avito.ru/feed/{item['id']}",
+                    product_id=str(item['id']),
+                ))
+            FoundItem.objects.bulk_create(batch)
+    finally:
+        found_at.auto_now_add = True
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {FoundItem._meta.db_table}')
+        cursor.execute(f'ANALYZE {SearchQuery._meta.db_table}')
+    return owners
+
+
+def partition_index_parents():
+    """Индекс партиции → индекс таблицы (с миграции 0013 план идёт по индексам партиций)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname, parent.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relkind = 'I'"
+        )
+        return dict(cursor.fetchall())
+
+
+def plan_indexes(plan, parents=None):
+    """Имена индексов во всех узлах плана (для партиций — имя индекса таблицы)"""
+    parents = partition_index_parents() if parents is None else parents
+    names = set()
+    if plan.get('Node Type') in INDEX_NODES:
+        name = plan.get('Index Name')
+        names.add(parents.get(name, name))
+    for child in plan.get('Plans', []):
+        names |= plan_indexes(child, parents)
+    return names
+
+
+def hot_queries(user, sample):
+    """(название, queryset, ожидаемый индекс) — как в core_views/user_views/боте/парсере"""
+    feed = FoundItem.objects.filter(search_query__user=user)
+    # Лента по пользователю с несколькими запросами идёт по found_at (см. FeedIndexTests)
+    query_feed = FoundItem.objects.filter(search_query=SearchQuery.objects.filter(user=user).first())
+    return [
+        ('feed: search_query, -found_at', query_feed.order_by('-found_at')[:50], 'founditem_query_feed'),
+        ('favorites: is_favorite=True, -found_at', feed.filter(is_favorite=True).order_by('-found_at')[:50],
+         'founditem_favorite_feed'),
+        ('good deals: profit__gt=0 count', feed.filter(profit__gt=0).order_by().values('pk'),
+         'founditem_good_deals'),
+        ('dedup: title + price exists', FoundItem.objects.filter(title=sample.title, price=sample.price)[:1],
+         'founditem_title_price'),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN горячих запросов ленты FoundItem')
+    parser.add_argument('--rows', type=int, default=200000, help='Строк FoundItem')
+    parser.add_argument('--users', type=int, default=100, help='Пользователей')
+    parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+
+    failed = 0
+    try:
+        if not FoundItem.objects.exists():
+            load_feed_items(args.rows, args.users)
+        user = User.objects.filter(username__startswith='feed').order_by('id').first()
+        sample = FoundItem.objects.order_by('id').first()
+
+        print(f"\n📊 EXPLAIN: {FoundItem.objects.count()} строк, {args.users} пользователей\n")
+        for name, queryset, expected in hot_queries(user, sample):
+            plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+            used = plan_indexes(plan)
+            ok = expected in used
+            failed += not ok
+            print(f"{'✅' if ok else '❌'} {name:<42} {', '.join(sorted(filter(None, used))) or 'Seq Scan'}")
+            if not ok:
+                print(queryset.explain())
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
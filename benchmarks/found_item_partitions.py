@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+📊 ПАРТИЦИИ FoundItem: запросы за последние дни до и после секционирования.
+
+В тестовой базе таблица откатывается к миграции 0012 (без партиций),
+заполняется --rows объявлениями за два года (свежих больше), меряются
+запросы окна --days; затем миграция 0013 секционирует таблицу (время
+переноса тоже печатается) и те же запросы меряются ещё раз. Поведение
+ORM на секционированной таблице проверяют тесты
+(apps.website.tests.FoundItemPartitionTests).
+
+    python -m benchmarks.found_item_partitions --rows 5000000
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg, Count, Sum
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from apps.website import partitions
+from apps.website.models import FoundItem, SearchQuery
+from benchmarks.feed_indexes import load_feed_items
+
+TEMPLATE_ROWS = 20000  # Через ORM; остальное — размножение в SQL
+REPEATS = 5
+
+
+def seed(rows, users):
+    """Шаблон через ORM, затем INSERT ... SELECT до rows строк с found_at за два года"""
+    load_feed_items(min(rows, TEMPLATE_ROWS), users)
+    copies = -(-rows // TEMPLATE_ROWS) - 1
+    if copies <= 0:
+        return
+
+    columns = [
+        field.column for field in FoundItem._meta.concrete_fields
+        if field.column not in ('id', 'url', 'found_at', 'search_vector')
+    ]
+    column_list = ', '.join(columns)
+    table = FoundItem._meta.db_table
+    with connection.cursor() as cursor:
+        # Вектор для бенчмарка не нужен — без триггера заливка в разы быстрее
+        cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}, url, found_at) "
+            f"SELECT {column_list}, url || '#' || copy, now() - power(random(), 3) * interval '730 days' "
+            f"FROM {table}, generate_series(1, %s) AS copy "
+            f"LIMIT %s",
+            [copies, rows - TEMPLATE_ROWS],
+        )
+        cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        cursor.execute(f"ANALYZE {table}")
+
+
+def recent_queries(user, days):
+    since = timezone.now() - timedelta(days=days)
+    recent = FoundItem.objects.filter(found_at__gte=since)
+    return [
+        ('feed: user, last days, -found_at', lambda: list(
+            recent.filter(search_query__user=user).order_by('-found_at')[:50])),
+        ('count: last days', lambda: recent.count()),
+        ('stats: by source', lambda: list(
+            recent.order_by().values('source').annotate(items=Count('id'), avg_price=Avg('price')))),
+        ('profit: sum over good deals', lambda: recent.filter(profit__gt=0).aggregate(total=Sum('profit'))),
+        ('url lookup (all partitions)', lambda: FoundItem.objects.filter(
+            url='https://www.avito.ru/feed/1').exists()),
+    ]
+
+
+def measure(queries):
+    results = {}
+    for name, func in queries:
+        func()  # Прогрев кэша
+        timings = []
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = statistics.median(timings)
+    return results
+
+
+def scanned_relations(queryset):
+    """Таблицы (партиции), которые читает план"""
+    def walk(plan):
+        names = {plan['Relation Name']} if 'Relation Name' in plan else set()
+        for child in plan.get('Plans', []):
+            names |= walk(child)
+        return names
+    return walk(json.loads(queryset.explain(format='json'))[0]['Plan'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Запросы FoundItem до и после секционирования')
+    parser.add_argument('--rows', type=int, default=5000000, help='Строк FoundItem')
+    parser.add_argument('--users', type=int, default=100, help='Пользователей')
+    parser.add_argument('--days', type=int, default=3, help='Окно «свежих» запросов, дней')
+    parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb, serialize=False)
+
+    try:
+        call_command('migrate', 'website', '0012_founditem_feed_indexes', verbosity=0)
+        if FoundItem.objects.count() < args.rows:
+            FoundItem.objects.all().delete()
+            SearchQuery.objects.filter(user__username__startswith='feed').delete()
+            User.objects.filter(username__startswith='feed').delete()
+            seed(args.rows, args.users)
+        user = User.objects.filter(username__startswith='feed').order_by('id').first()
+
+        before = measure(recent_queries(user, args.days))
+
+        started = time.perf_counter()
+        call_command('migrate', 'website', verbosity=0)
+        converted = time.perf_counter() - started
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {FoundItem._meta.db_table}')
+
+        after = measure(recent_queries(user, args.days))
+        recent = FoundItem.objects.filter(found_at__gte=timezone.now() - timedelta(days=args.days))
+
+        print(f"\n📊 FoundItem: {FoundItem.objects.count()} строк, окно {args.days} дн., "
+              f"партиций {len(partitions.list_partitions())}, перенос {converted:.1f}с")
+        print(f"   count() за окно читает: {', '.join(sorted(scanned_relations(recent.values('id'))))}\n")
+        print(f"{'query':<38} {'plain, ms':>10} {'partitioned, ms':>16}")
+        print('-' * 66)
+        for name in before:
+            print(f"{name:<38} {before[name]:>10.1f} {after[name]:>16.1f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == '__main__':
+    main()
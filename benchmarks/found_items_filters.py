@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+📊 ФИЛЬТРЫ СПИСКА ТОВАРОВ: EXPLAIN и задержка found_items_view до и после.
+
+Заливает объявления (load_feed_items, по умолчанию 200 000 строк на 100
+пользователей) и для каждого фильтра формы меряет прежний путь
+(icontains/found_at__date, Paginator: COUNT(*) и OFFSET, второй count())
+против нового (ключи 0014, keyset_page, estimated_count) — на первой
+странице и на странице --deep-page; в последней колонке — индексы плана.
+Индексы, порядок страниц и строки фильтров проверяет FoundItemsViewTests
+в apps/website/tests.py.
+
+    python -m benchmarks.found_items_filters --rows 200000 --deep-page 50  # нужен PostgreSQL
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Count, Q
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from apps.website.models import FoundItem
+from apps.website.utils.found_item_filters import (
+    filter_found_items, found_items_ordering, sort_found_items
+)
+from apps.website.utils.pagination import estimated_count, keyset_page
+from benchmarks.feed_indexes import load_feed_items, partition_index_parents, plan_indexes
+
+PAGE_SIZE = 20
+REPEATS = 5
+
+
+def legacy_filter(items, params):
+    """Как было в core_views.found_items: icontains по строкам и found_at__date"""
+    if params.get('category'):
+        items = items.filter(category__icontains=params['category'])
+    if params.get('city'):
+        items = items.filter(Q(city__icontains=params['city']) | Q(full_location__icontains=params['city']))
+    if params.get('metro'):
+        items = items.filter(Q(metro_stations__icontains=params['metro']) |
+                             Q(full_location__icontains=params['metro']))
+    if params.get('newness') == 'today':
+        items = items.filter(found_at__date=timezone.now().date())
+    return items.order_by('-found_at')
+
+
+def legacy_page(user, params, number):
+    items = legacy_filter(FoundItem.objects.filter(search_query__user=user).select_related('search_query'), params)
+    paginator = Paginator(items, PAGE_SIZE)
+    page = paginator.page(min(number, paginator.num_pages))
+    rows = list(page)
+    items.count()  # Второй подсчёт для статистики
+    return rows
+
+
+def new_items(user, params):
+    return filter_found_items(FoundItem.objects.filter(search_query__user=user).select_related('search_query'), params)
+
+
+def new_page(user, params, cursor=None):
+    items = new_items(user, params)
+    sort_by = params.get('sort_by', '-found_at')
+    page = keyset_page(sort_found_items(items, sort_by), found_items_ordering(sort_by),
+                       cursor=cursor, per_page=PAGE_SIZE)
+    estimated_count(items)
+    return page
+
+
+def cursor_for_page(user, params, number):
+    """Курсор страницы number — в интерфейсе его даёт ссылка «Дальше»"""
+    cursor = None
+    for _ in range(number - 1):
+        page = new_page(user, params, cursor)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    return cursor
+
+
+def median_ms(func):
+    func()  # Прогрев
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def page_plan(user, params):
+    sort_by = params.get('sort_by', '-found_at')
+    queryset = sort_found_items(new_items(user, params), sort_by)[:PAGE_SIZE + 1]
+    return json.loads(queryset.explain(format='json'))[0]['Plan']
+
+
+def pick_values(user):
+    """Самые частые категория, город и станция метро пользователя — худший случай для фильтра"""
+    items = FoundItem.objects.filter(search_query__user=user)
+    category = items.values('category').annotate(n=Count('id')).order_by('-n')[0]['category']
+    city = items.values('city').annotate(n=Count('id')).order_by('-n')[0]['city']
+    metro = items.exclude(metro_stations=[]).values_list('metro_stations', flat=True).first()[0]
+    return category, city, metro
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN и задержка фильтров списка товаров')
+    parser.add_argument('--rows', type=int, default=200000, help='Строк FoundItem')
+    parser.add_argument('--users', type=int, default=100, help='Пользователей')
+    parser.add_argument('--deep-page', type=int, default=50, help='Номер «глубокой» страницы')
+    parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb, serialize=False)
+
+    try:
+        if not FoundItem.objects.exists():
+            load_feed_items(args.rows, args.users)
+        # Самый «тяжёлый» пользователь — больше всего строк на фильтр
+        user = User.objects.filter(username__startswith='feed').annotate(
+            items=Count('searchquery__found_items')
+        ).order_by('-items').first()
+        category, city, metro = pick_values(user)
+
+        cases = [
+            ('no filters', {}),
+            ('category', {'category': category}),
+            ('city', {'city': city}),
+            ('metro', {'metro': metro}),
+            ('newness=today', {'newness': 'today'}),
+            ('city + metro + week', {'city': city, 'metro': metro, 'newness': 'week'}),
+            ('sort by price', {'sort_by': 'price'}),
+        ]
+
+        parents = partition_index_parents()
+        print(f"\n📊 FoundItem: {FoundItem.objects.count()} строк, у пользователя "
+              f"{FoundItem.objects.filter(search_query__user=user).count()}, страница {PAGE_SIZE}\n")
+        print(f"{'case':<22} {'legacy p1':>10} {'new p1':>8} {'legacy p' + str(args.deep_page):>12} "
+              f"{'new p' + str(args.deep_page):>9}  plan")
+        print('-' * 100)
+
+        for name, params in cases:
+            used = plan_indexes(page_plan(user, params), parents)
+            deep_cursor = cursor_for_page(user, params, args.deep_page)
+            legacy_params = {key: value for key, value in params.items() if key != 'sort_by'}
+            timings = [
+                median_ms(lambda: legacy_page(user, legacy_params, 1)),
+                median_ms(lambda: new_page(user, params)),
+                median_ms(lambda: legacy_page(user, legacy_params, args.deep_page)),
+                median_ms(lambda: new_page(user, params, deep_cursor)),
+            ]
+            print(f"{name:<22} {timings[0]:>10.1f} {timings[1]:>8.1f} {timings[2]:>12.1f} "
+                  f"{timings[3]:>9.1f}  {', '.join(sorted(filter(None, used))) or 'Seq Scan'}")
+
+        print()
+        total, exact = estimated_count(new_items(user, {}))
+        actual = new_items(user, {}).count()
+        print(f"ℹ️ estimated_count: {total} ({'точно' if exact else 'оценка'}), COUNT(*) = {actual}")
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК ОПРОСА ДИНАМИЧЕСКОЙ ТАБЛИЦЫ: запросов в секунду для get_latest_items.
+
+Сценарии открытого дашборда: полный ответ, since_id без новых товаров и
+повтор с If-None-Match (304). Для сравнения — прежняя сериализация из
+моделей целиком. Нужен PostgreSQL, база — тестовая, как в benchmarks.search_api.
+
+    python -m benchmarks.latest_items --rows 100000 --requests 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment
+
+from apps.website.models import FoundItem
+from apps.website.utils.fast_json import ORJSON_AVAILABLE
+from apps.website.views import api_views
+from benchmarks.search_api import load_found_items
+
+
+def legacy_latest_items(user):
+    """Как было: 10 моделей со всеми полями и search_query, json.dumps"""
+    items = FoundItem.objects.filter(search_query__user=user).select_related('search_query').order_by('-found_at')[:10]
+    rows = [{field.attname: getattr(item, field.attname) for field in FoundItem._meta.concrete_fields} for item in items]
+    return JsonResponse({'status': 'success', 'items': rows})
+
+
+def requests_per_second(func, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк опроса get_latest_items')
+    parser.add_argument('--rows', type=int, default=100000, help='Строк FoundItem')
+    parser.add_argument('--requests', type=int, default=2000, help='Запросов на сценарий')
+    parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+    # Меряем сам эндпоинт, а не троттлинг 30 запросов в минуту
+    api_views.TableUpdateThrottle.allow_request = lambda self, request, view: True
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+
+    try:
+        user = load_found_items(args.rows)
+        factory = RequestFactory()
+
+        def call(headers=None, **params):
+            request = factory.get('/api/latest-items/', params, **(headers or {}))
+            request.user = user
+            return api_views.get_latest_items(request)
+
+        first = call()
+        latest_id = json.loads(first.content)['latest_id']
+
+        cases = [
+            ('legacy: full models + JsonResponse', lambda: legacy_latest_items(user)),
+            ('full response (values + orjson)', lambda: call()),
+            ('since_id, nothing new', lambda: call(since_id=latest_id)),
+            ('If-None-Match → 304', lambda: call({'HTTP_IF_NONE_MATCH': first['ETag']})),
+        ]
+
+        print(f"\n📊 get_latest_items: {FoundItem.objects.count()} строк, "
+              f"orjson={'on' if ORJSON_AVAILABLE else 'off'}\n")
+        print(f"{'case':<40} {'req/sec':>10}")
+        print('-' * 52)
+        for name, func in cases:
+            print(f"{name:<40} {requests_per_second(func, args.requests):>10.0f}")
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == '__main__':
+    main()
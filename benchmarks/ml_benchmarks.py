@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК ML: извлечение фич, обучение, предсказание, загрузка моделей.
+
+Работает на синтетических FoundItem (benchmarks.synthetic), база не нужна.
+Модели в apps/parsing/ai/ml_models/ не перезаписываются.
+
+    python -m benchmarks.ml_benchmarks --rows 5000 --predict-rows 500
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import joblib
+import numpy as np
+import psutil
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from apps.parsing.ai.ml_freshness_predictor import MLFreshnessPredictor
+from apps.parsing.ai.ml_price_predictor import MLPricePredictor
+from benchmarks.synthetic import generate_found_items
+
+
+class PeakRSS:
+    """Пиковый RSS процесса за время блока (опрос в фоне)"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.baseline = self.process.memory_info().rss
+        self.peak = self.baseline
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def _poll(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+
+def run_case(name, rows, func, repeat=1):
+    """Прогоняет func() repeat раз, возвращает лучшую попытку"""
+    best = None
+    for _ in range(repeat):
+        with PeakRSS() as rss:
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+
+        result = {
+            'name': name,
+            'rows': rows,
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf'),
+            'peak_rss_mb': rss.peak / 2 ** 20,
+            'rss_delta_mb': (rss.peak - rss.baseline) / 2 ** 20,
+        }
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+
+    print(
+        f"{best['name']:<42} {best['rows']:>8} {best['seconds']:>9.3f} "
+        f"{best['rows_per_sec']:>12.0f} {best['peak_rss_mb']:>9.1f} {best['rss_delta_mb']:>+9.1f}"
+    )
+    return best
+
+
+def run_all(rows, predict_rows, repeat):
+    items = generate_found_items(rows)
+    sample = items[:predict_rows]
+    results = []
+
+    print(f"\n📊 ML бенчмарк: {rows} строк обучения, {predict_rows} строк предсказания\n")
+    print(f"{'case':<42} {'rows':>8} {'seconds':>9} {'rows/sec':>12} {'peak MB':>9} {'Δ MB':>9}")
+    print('-' * 94)
+
+    # 🔥 ИЗВЛЕЧЕНИЕ ФИЧ
+    price_predictor = MLPricePredictor()
+    freshness_predictor = MLFreshnessPredictor()
+
+    results.append(run_case(
+        'features: MLPricePredictor price', rows,
+        lambda: [price_predictor._extract_ultra_features(item) for item in items], repeat
+    ))
+    results.append(run_case(
+        'features: MLPricePredictor freshness', rows,
+        lambda: [price_predictor._extract_freshness_features(item) for item in items], repeat
+    ))
+    results.append(run_case(
+        'features: MLFreshnessPredictor', rows,
+        lambda: [freshness_predictor._extract_features(item) for item in items], repeat
+    ))
+
+    # 🔥 ОБУЧЕНИЕ
+    results.append(run_case(
+        'train: MLPricePredictor price (RF+GB, CV)', rows,
+        lambda: asyncio.run(price_predictor.train_price_model_on_items(items, save=False))
+    ))
+    results.append(run_case(
+        'train: MLPricePredictor freshness (RF, CV)', rows,
+        lambda: asyncio.run(price_predictor.train_freshness_model_on_items(items, save=False))
+    ))
+    results.append(run_case(
+        'train: MLFreshnessPredictor.train', rows,
+        lambda: asyncio.run(freshness_predictor.train(items, save=False))
+    ))
+
+    import train_real_freshness_model as real_freshness
+    X_real, y_real = real_freshness.create_realistic_dummy_dataset()
+    results.append(run_case(
+        'train: train_real_freshness_model RF', len(X_real),
+        lambda: real_freshness.build_freshness_model(verbose=0).fit(X_real, y_real)
+    ))
+
+    # 🔥 ПРЕДСКАЗАНИЕ
+    async def predict_one_by_one():
+        for item in sample:
+            await price_predictor.predict_price_ultra(item)
+
+    def predict_batch():
+        X = np.array([price_predictor._extract_ultra_features(item) for item in sample])
+        price_predictor.price_model.predict(price_predictor.scaler_price.transform(X))
+
+    results.append(run_case(
+        'predict: price single (predict_price_ultra)', predict_rows,
+        lambda: asyncio.run(predict_one_by_one()), repeat
+    ))
+    results.append(run_case('predict: price batch', predict_rows, predict_batch, repeat))
+    results.append(run_case(
+        'predict: MLFreshnessPredictor single', predict_rows,
+        lambda: [freshness_predictor.predict_freshness(item) for item in sample], repeat
+    ))
+
+    # 🔥 ЗАГРУЗКА МОДЕЛЕЙ
+    with tempfile.TemporaryDirectory() as tmp:
+        price_path = os.path.join(tmp, 'price.joblib')
+        freshness_path = os.path.join(tmp, 'freshness.joblib')
+        joblib.dump(price_predictor.price_model, price_path)
+        joblib.dump({'model': freshness_predictor.model, 'scaler': freshness_predictor.scaler}, freshness_path)
+
+        results.append(run_case('load: price model (joblib)', 1, lambda: joblib.load(price_path), repeat))
+        results.append(run_case('load: freshness model (joblib)', 1, lambda: joblib.load(freshness_path), repeat))
+
+        print(f"\n💾 Размер моделей: цена {os.path.getsize(price_path) / 2 ** 20:.1f} MB, "
+              f"свежесть {os.path.getsize(freshness_path) / 2 ** 20:.1f} MB")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк ML моделей на синтетических данных')
+    parser.add_argument('--rows', type=int, default=5000, help='Строк для обучения и фич')
+    parser.add_argument('--predict-rows', type=int, default=500, help='Строк для предсказания')
+    parser.add_argument('--repeat', type=int, default=3, help='Повторов для быстрых кейсов')
+    args = parser.parse_args()
+
+    # Логи предикторов на каждое предсказание сильно искажают замеры
+    logging.disable(logging.INFO)
+
+    run_all(args.rows, args.predict_rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
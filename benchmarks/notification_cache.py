@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК КЭША УВЕДОМЛЕНИЙ: 1 000 проверок и записей NotificationCache.
+
+В кэше --cached записей (десятая часть просрочена). Меряются --lookups
+проверок дубликатов прежним способом (clean_expired + exists на каждый
+товар), отдельными is_duplicate и одним filter_new на всю пачку, затем
+столько же записей прежним DELETE + INSERT и одним add_many. Для каждого
+способа выводятся время и число SQL-запросов. Число запросов проверяет
+NotificationCacheTests в apps/website/tests.py.
+
+    python -m benchmarks.notification_cache --lookups 1000  # нужен PostgreSQL
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.utils import timezone
+
+from apps.website.models import NotificationCache
+
+
+def url_for(product_id):
+    return f'https://www.avito.ru/moskva/telefony/item_{product_id}'
+
+
+def fill_cache(rows):
+    """rows записей, каждая десятая уже просрочена"""
+    now = timezone.now()
+    NotificationCache.objects.bulk_create([
+        NotificationCache(
+            product_id=str(index),
+            normalized_url=url_for(index),
+            product_name=f'item {index}',
+            expires_at=now + timedelta(hours=-1 if index % 10 == 0 else NotificationCache.CACHE_TTL_HOURS),
+        ) for index in range(rows)
+    ], batch_size=5000)
+
+
+def legacy_is_duplicate(product_id, normalized_url):
+    """Как было: очистка просроченных перед каждой проверкой"""
+    NotificationCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    return NotificationCache.objects.filter(
+        Q(product_id=product_id) | Q(normalized_url=normalized_url),
+        expires_at__gt=timezone.now()
+    ).exists()
+
+
+def legacy_add(product_id, normalized_url, product_name):
+    """Как было: DELETE + INSERT на каждый товар"""
+    NotificationCache.objects.filter(Q(product_id=product_id) | Q(normalized_url=normalized_url)).delete()
+    NotificationCache.objects.create(product_id=product_id, normalized_url=normalized_url, product_name=product_name)
+
+
+def measure(func):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+    return elapsed * 1000, len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк кэша уведомлений')
+    parser.add_argument('--lookups', type=int, default=1000, help='Товаров в пачке')
+    parser.add_argument('--cached', type=int, default=10000, help='Записей в кэше')
+    parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb, serialize=False)
+
+    try:
+        NotificationCache.objects.all().delete()
+        fill_cache(args.cached)
+
+        # Половина пачки уже в кэше, половина — новые товары
+        ids = [str(index) for index in range(args.cached - args.lookups // 2, args.cached + args.lookups // 2)]
+        urls = [url_for(product_id) for product_id in ids]
+
+        timings = [
+            ('legacy: clean_expired + exists', measure(
+                lambda: [legacy_is_duplicate(product_id, url) for product_id, url in zip(ids, urls)]
+            )),
+            ('is_duplicate per item', measure(
+                lambda: [NotificationCache.is_duplicate(product_id, url) for product_id, url in zip(ids, urls)]
+            )),
+            ('filter_new (one batch)', measure(lambda: NotificationCache.filter_new(ids, urls))),
+        ]
+
+        fresh = NotificationCache.filter_new(ids, urls)
+        legacy_entries = [(product_id, url_for(product_id), 'legacy') for product_id in fresh]
+        batch_entries = [(f'b{product_id}', url_for(f'b{product_id}'), 'batch') for product_id in fresh]
+        timings += [
+            ('legacy: DELETE + INSERT', measure(lambda: [legacy_add(*entry) for entry in legacy_entries])),
+            ('add_many (one upsert)', measure(lambda: NotificationCache.add_many(batch_entries))),
+        ]
+
+        print(f"\n📊 Кэш уведомлений: {args.cached} записей, пачка {len(ids)} товаров "
+              f"({len(fresh)} новых)\n")
+        for name, (ms, queries) in timings:
+            print(f"{name:<34} {ms:>10.1f} ms {queries:>7} queries")
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК ПОИСКОВЫХ API: время ответа эндпоинтов на большой таблице FoundItem.
+
+Нужен PostgreSQL из настроек проекта: скрипт создаёт отдельную тестовую базу
+(как `manage.py test`), применяет миграции, заливает синтетические объявления
+и удаляет базу в конце (--keepdb — оставить для повторных прогонов).
+
+    python -m benchmarks.search_api --rows 100000
+    python -m benchmarks.search_api --rows 1000000 --keepdb --legacy
+
+Для universal_search_api заодно проверяется, что порядок из SQL совпадает
+с calculate_search_score (тот же вес полей, что был в Python).
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment
+
+from apps.website.models import FoundItem, SearchQuery
+from apps.website.utils.pagination import encode_cursor
+from apps.website.views.search_views import (
+    _universal_search, autocomplete_api, calculate_search_score, header_search_api, table_search_api,
+    universal_search_api
+)
+from benchmarks.synthetic import generate_found_items
+
+QUERIES = ['iphone', 'iphone 13', 'macbook pro', 'samsung', 'диван', 'велосипед']
+AUTOCOMPLETE = [('city', 'мос'), ('city', 'санкт'), ('category', 'тел'), ('category', 'ноут')]
+TABLE_PAGES = [1, 50, 500]
+TABLE_PER_PAGE = 50
+BATCH_SIZE = 5000
+
+
+def load_found_items(rows):
+    """Заливает rows синтетических объявлений, если их ещё нет; возвращает пользователя"""
+    user, _ = User.objects.get_or_create(username='bench')
+    query, _ = SearchQuery.objects.get_or_create(
+        user=user, name='bench', defaults={'target_price': 0}
+    )
+    if FoundItem.objects.count() >= rows:
+        return user
+
+    FoundItem.objects.all().delete()
+    found_at = FoundItem._meta.get_field('found_at')
+    found_at.auto_now_add = False  # Сохраняем разброс found_at из генератора
+    try:
+        items = generate_found_items(rows)
+        for start in range(0, rows, BATCH_SIZE):
+            FoundItem.objects.bulk_create([
+                FoundItem(
+                    search_query=query,
+                    title=item['title'],
+                    description=item['description'],
+                    price=item['price'],
+                    target_price=item['price'],
+                    category=item['category'],
+                    city=item['city'],
+                    seller_rating=item['seller_rating'],
+                    reviews_count=item['reviews_count'],
+                    address=item['address'],
+                    metro_stations=item['metro_stations'],
+                    views_count=item['views_count'],
+                    found_at=item['found_at'],
+                    url=f"https://www.avito.ru/bench/{item['id']}",
+                    product_id=str(item['id']),
+                )
+                for item in items[start:start + BATCH_SIZE]
+            ])
+    finally:
+        found_at.auto_now_add = True
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {FoundItem._meta.db_table}')
+    return user
+
+
+def legacy_scan(query):
+    """Как было в header_search_api: все строки в Python и поиск подстрок"""
+    words = query.lower().split()
+    matches = []
+    for item in FoundItem.objects.all():
+        text = ' '.join(filter(None, [item.title, item.description, item.category, item.city])).lower()
+        if all(word in text for word in words):
+            matches.append(item)
+    return matches[:10]
+
+
+def check_ranking_parity(query, limit=50):
+    """search_score из SQL == calculate_search_score, порядок по убыванию"""
+    items = list(_universal_search(query).order_by('-search_score', '-title_similarity', '-found_at')[:limit])
+    python_scores = [calculate_search_score(item, query) for item in items]
+    return (
+        python_scores == [item.search_score for item in items]
+        and python_scores == sorted(python_scores, reverse=True)
+    )
+
+
+def table_cursor(user, page):
+    """Курсор, с которого начинается страница page таблицы (сортировка по умолчанию)"""
+    if page == 1:
+        return None
+    ordering = ['-found_at', '-id']
+    row = FoundItem.objects.filter(search_query__user=user).order_by(*ordering).values(
+        'found_at', 'id'
+    )[(page - 1) * TABLE_PER_PAGE - 1]
+    return encode_cursor(row, ordering)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def run_endpoint(view, user, params):
+    request = RequestFactory().get('/', params)
+    request.user = user
+    return view(request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк поисковых API на PostgreSQL')
+    parser.add_argument('--rows', type=int, default=100000, help='Строк FoundItem')
+    parser.add_argument('--repeat', type=int, default=20, help='Запросов на каждый поиск')
+    parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+    parser.add_argument('--legacy', action='store_true', help='Сравнить со старым перебором в Python')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+
+    try:
+        started = time.perf_counter()
+        user = load_found_items(args.rows)
+        print(f"\n📊 Поисковые API: {FoundItem.objects.count()} строк "
+              f"(подготовка {time.perf_counter() - started:.1f} с)\n")
+        print(f"{'case':<40} {'median ms':>10} {'max ms':>10}")
+        print('-' * 62)
+
+        for query in QUERIES:
+            median, worst = measure(lambda: run_endpoint(header_search_api, user, {'q': query}), args.repeat)
+            print(f"{'header_search ' + repr(query):<40} {median:>10.2f} {worst:>10.2f}")
+            if args.legacy:
+                median, worst = measure(lambda: legacy_scan(query), 1)
+                print(f"{'  legacy python scan':<40} {median:>10.2f} {worst:>10.2f}")
+
+        for query in QUERIES:
+            median, worst = measure(lambda: run_endpoint(universal_search_api, user, {'q': query}), args.repeat)
+            parity = '✅' if check_ranking_parity(query) else '❌ ранжирование расходится'
+            print(f"{'universal_search ' + repr(query):<40} {median:>10.2f} {worst:>10.2f} {parity}")
+
+        for field, query in AUTOCOMPLETE:
+            params = {'field': field, 'q': query}
+            median, worst = measure(lambda: run_endpoint(autocomplete_api, user, params), args.repeat)
+            print(f"{f'autocomplete {field}={query!r}':<40} {median:>10.2f} {worst:>10.2f}")
+
+        # Глубокие страницы: OFFSET (page=N) против курсора на той же позиции
+        for page in TABLE_PAGES:
+            offset_params = {'page': page, 'per_page': TABLE_PER_PAGE}
+            median, worst = measure(lambda: run_endpoint(table_search_api, user, offset_params), args.repeat)
+            print(f"{f'table_search page={page} offset':<40} {median:>10.2f} {worst:>10.2f}")
+
+            cursor = table_cursor(user, page)
+            if cursor:
+                cursor_params = {'cursor': cursor, 'per_page': TABLE_PER_PAGE}
+                median, worst = measure(lambda: run_endpoint(table_search_api, user, cursor_params), args.repeat)
+                print(f"{f'table_search page={page} cursor':<40} {median:>10.2f} {worst:>10.2f}")
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == '__main__':
+    main()
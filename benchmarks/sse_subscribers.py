@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+📊 НАГРУЗКА ЖИВОЙ ЛЕНТЫ: N открытых SSE-подписчиков /api/live/stream/
+
+Каждый подписчик — поток, читающий StreamingHttpResponse, как это делает
+WSGI-воркер. Меряем CPU процесса на простое (все ждут событий) и задержку
+доставки found_item от publish() до всех подписчиков. База не нужна —
+только cache из настроек.
+
+    python -m benchmarks.sse_subscribers --subscribers 100 --seconds 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+
+from apps.notifications import views as notification_views
+from apps.notifications.push import push_channel
+from apps.website.live_feed import found_items_channel
+from apps.website.views.stream_views import live_stream
+
+
+class Subscriber(threading.Thread):
+    """Читает SSE-поток и запоминает, когда пришло каждое событие"""
+
+    def __init__(self, user):
+        super().__init__(daemon=True)
+        request = RequestFactory().get('/api/live/stream/')
+        request.user = user
+        self.response = live_stream(request)
+        self.received = {}
+
+    def run(self):
+        for chunk in self.response.streaming_content:
+            text = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if text.startswith('id: '):
+                self.received[int(text.split('\n', 1)[0][4:])] = time.perf_counter()
+
+
+def cpu_percent(seconds):
+    started_cpu, started = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    return 100 * (time.process_time() - started_cpu) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузка SSE живой ленты')
+    parser.add_argument('--subscribers', type=int, default=100, help='Открытых потоков')
+    parser.add_argument('--seconds', type=float, default=20, help='Секунд простоя')
+    parser.add_argument('--events', type=int, default=20, help='Событий для замера задержки')
+    args = parser.parse_args()
+
+    # Поток живёт дольше замера; переподключения не меряем
+    notification_views.STREAM_DURATION = args.seconds + args.events + 30
+    user = User(id=1, username='benchmark')
+    channel = found_items_channel(user.id)
+
+    print(f"\n📊 SSE: {args.subscribers} подписчиков, cache опрашивается раз в "
+          f"{notification_views.POLL_INTERVAL}с\n")
+    print(f"{'idle CPU, no subscribers':<40} {cpu_percent(min(args.seconds, 5)):>8.1f} %")
+
+    subscribers = [Subscriber(user) for _ in range(args.subscribers)]
+    for subscriber in subscribers:
+        subscriber.start()
+    time.sleep(1)  # Первый read_since у всех
+
+    print(f"{'idle CPU, subscribers waiting':<40} {cpu_percent(args.seconds):>8.1f} %")
+
+    latencies = []
+    for number in range(args.events):
+        published = time.perf_counter()
+        event_id = push_channel.publish(channel, 'found_item', {'id': number, 'title': 'benchmark'})
+        deadline = published + 5
+        while time.perf_counter() < deadline and not all(event_id in s.received for s in subscribers):
+            time.sleep(0.001)
+        latencies.extend(s.received[event_id] - published for s in subscribers if event_id in s.received)
+        time.sleep(0.5)
+
+    delivered = len(latencies) / (args.events * args.subscribers)
+    print(f"{'delivered':<40} {100 * delivered:>8.1f} %")
+    if latencies:
+        latencies.sort()
+        print(f"{'latency median, ms':<40} {1000 * statistics.median(latencies):>8.1f}")
+        print(f"{'latency p95, ms':<40} {1000 * latencies[int(len(latencies) * 0.95) - 1]:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК ХРАНИЛИЩА СОСТОЯНИЯ: BinaryStateStore против brain_state.json
+
+Синтетический мозг из --categories категорий (часовые/дневные счётчики,
+хвосты паттернов свежести и цен, category_insights, seller_patterns) в
+том виде, в каком его сохраняет MLLearningSystem._save_brain_state.
+Меряются: прежнее сохранение в JSON (json.dump с indent=2), первое
+сохранение в хранилище, повторное сохранение после того, как изменилась
+доля --changed категорий (с changed — как у MLLearningSystem), и загрузка;
+затем размеры файлов на диске.
+База не нужна — всё пишется во временный каталог.
+
+    python -m benchmarks.state_store --categories 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append('.')
+
+from apps.parsing.utils.state_store import BinaryStateStore, load_legacy_json
+
+
+def build_brain(categories, patterns, seed=42):
+    """knowledge_base + stats как у MLLearningSystem"""
+    rng = random.Random(seed)
+    now_iso = datetime.now().isoformat()
+    knowledge = {
+        'freshness_patterns': {}, 'timing_patterns': {}, 'successful_queries': {},
+        'category_insights': {}, 'seller_patterns': {}, 'price_trends': {},
+    }
+
+    for index in range(categories):
+        category = f'category-{index}'
+        hourly = [rng.randint(0, 500) for _ in range(24)]
+        daily = [rng.randint(0, 3000) for _ in range(7)]
+        knowledge['timing_patterns'][category] = {
+            'hourly_counts': hourly,
+            'daily_counts': daily,
+            'best_hours': sorted(range(24), key=lambda h: hourly[h], reverse=True)[:3],
+            'best_days': sorted(range(7), key=lambda d: daily[d], reverse=True)[:2],
+        }
+        knowledge['freshness_patterns'][category] = [{
+            'hours_ago': rng.uniform(0, 72),
+            'freshness_score': rng.random(),
+            'has_urgency': rng.random() < 0.1,
+            'is_new': rng.random() < 0.2,
+            'seller_type': rng.choice(['Компания', 'Частное лицо']),
+        } for _ in range(patterns)]
+        knowledge['price_trends'][category] = [{
+            'price': float(rng.randint(1000, 150000)),
+            'timestamp': now_iso,
+            'freshness': rng.random(),
+        } for _ in range(patterns // 2)]
+        knowledge['category_insights'][category] = {
+            'total_items': rng.randint(1, 10000),
+            'avg_freshness': rng.random(),
+            'avg_price': rng.uniform(1000, 150000),
+            'success_rate': 0.0,
+            'priced_items': rng.randint(1, 10000),
+            'last_updated': now_iso,
+        }
+        knowledge['seller_patterns'][category] = {
+            'total_sellers': rng.randint(1, 1000),
+            'avg_rating': rng.uniform(3, 5),
+            'top_sellers': [],
+        }
+
+    stats = {
+        'total_learned': categories * 100,
+        'fresh_items_found': categories * 10,
+        'avg_freshness_score': 0.5,
+        'successful_searches': 0,
+        'last_learned_item_id': categories * 100,
+    }
+    return knowledge, stats
+
+
+def touch_categories(knowledge, share, seed=7):
+    """Изменения за один цикл обучения: новые счётчики и паттерны у части категорий"""
+    rng = random.Random(seed)
+    categories = list(knowledge['timing_patterns'])
+    touched = set(rng.sample(categories, max(1, int(len(categories) * share))))
+    for category in touched:
+        timing = knowledge['timing_patterns'][category]
+        timing['hourly_counts'][rng.randrange(24)] += 1
+        timing['daily_counts'][rng.randrange(7)] += 1
+        knowledge['freshness_patterns'][category] = knowledge['freshness_patterns'][category][1:] + [{
+            'hours_ago': rng.uniform(0, 72),
+            'freshness_score': rng.random(),
+            'has_urgency': False,
+            'is_new': True,
+            'seller_type': 'Частное лицо',
+        }]
+        knowledge['category_insights'][category]['total_items'] += 1
+    return touched
+
+
+RECORD_SECTIONS = ('freshness_patterns', 'successful_queries', 'category_insights', 'seller_patterns', 'price_trends')
+
+
+def split_state(knowledge, stats):
+    """То же разбиение на (counters, records), что в MLLearningSystem._save_brain_state"""
+    timing = knowledge['timing_patterns']
+    counters = {
+        'hourly_counts': {category: p['hourly_counts'] for category, p in timing.items()},
+        'daily_counts': {category: p['daily_counts'] for category, p in timing.items()},
+    }
+    records = {section: dict(knowledge[section]) for section in RECORD_SECTIONS}
+    records['stats'] = dict(stats, last_saved=datetime.now().isoformat())
+    return counters, records
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк хранилища состояния обучения')
+    parser.add_argument('--categories', type=int, default=1000, help='Категорий в мозге')
+    parser.add_argument('--patterns', type=int, default=20, help='Паттернов свежести на категорию')
+    parser.add_argument('--changed', type=float, default=0.05, help='Доля категорий, изменённых между сохранениями')
+    args = parser.parse_args()
+
+    knowledge, stats = build_brain(args.categories, args.patterns)
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'brain_state.json')
+
+        def save_json():
+            state = {'knowledge_base': knowledge, 'stats': stats, 'last_saved': datetime.now().isoformat()}
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+
+        store = BinaryStateStore(os.path.join(directory, 'brain_state'))
+
+        timings = [
+            ('legacy: json.dump', timed(save_json)[0]),
+            ('legacy: json.load', timed(lambda: load_legacy_json(json_path))[0]),
+            ('store: first save', timed(lambda: store.save(*split_state(knowledge, stats)))[0]),
+        ]
+        touched = touch_categories(knowledge, args.changed)
+        changed = {section: touched for section in (*RECORD_SECTIONS, 'hourly_counts', 'daily_counts')}
+        changed['stats'] = list(stats) + ['last_saved']
+        timings.append((
+            'store: incremental save', timed(lambda: store.save(*split_state(knowledge, stats), changed))[0]
+        ))
+        timings.append(('store: load', timed(BinaryStateStore(store.base_path).load)[0]))
+
+        print(f"\n📊 Состояние обучения: {args.categories} категорий, "
+              f"{args.patterns} паттернов, изменено {args.changed:.0%}\n")
+        for name, seconds in timings:
+            print(f"{name:<26} {seconds:>8.3f} s")
+
+        print()
+        for name, path in (('brain_state.json', json_path),
+                           ('brain_state.npz', store.snapshot_path),
+                           ('brain_state.sqlite3', store.index_path)):
+            print(f"{name:<26} {file_size(path) / 1024:>8.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
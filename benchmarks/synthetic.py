@@ -0,0 +1,105 @@
+"""
+🎲 Генератор синтетических FoundItem для бенчмарков.
+
+Строки имеют ту же форму, что и FoundItem.objects.values(...):
+Decimal-цены, aware-даты found_at, строковые posted_date, metro_stations списком.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+CATALOG = {
+    'Телефоны': [
+        ('iPhone {n} Pro Max {gb} ГБ', 40000, 140000),
+        ('iPhone {n} {gb} gb', 20000, 90000),
+        ('Samsung Galaxy S{n} Ultra', 25000, 110000),
+        ('Xiaomi Redmi Note {n}', 7000, 30000),
+    ],
+    'Ноутбуки': [
+        ('MacBook Pro {n} M2 {gb} ГБ', 90000, 250000),
+        ('Ноутбук Asus ROG Strix G{n}', 60000, 180000),
+        ('Lenovo ThinkPad T{n}', 20000, 70000),
+    ],
+    'Игровые приставки': [
+        ('Sony PlayStation 5 + {n} игр', 35000, 65000),
+        ('Xbox Series X {gb} gb', 35000, 55000),
+        ('Nintendo Switch OLED', 20000, 32000),
+    ],
+    'Обувь': [
+        ('Кроссовки Nike Air Max {n}', 3000, 15000),
+        ('Adidas Yeezy Boost {n}', 12000, 35000),
+        ('Кеды Adidas Stan Smith', 3000, 9000),
+    ],
+    'Аудио': [
+        ('AirPods Pro {n}', 8000, 22000),
+        ('Наушники Sony WH-1000XM{n}', 12000, 30000),
+    ],
+}
+
+CONDITIONS = [
+    'новый, не использовался, заводская упаковка',
+    'отличное состояние, как новый',
+    'хорошее состояние, небольшие следы использования',
+    'царапины и потертости, всё работает',
+    'требует ремонта, не работает экран',
+]
+
+EXTRAS = [
+    'Срочно! Сегодня отдам быстро.',
+    'Только что выставил, торг уместен.',
+    'Оригинал, с гарантией, чек есть.',
+    'Самовывоз от метро.',
+    '',
+]
+
+CITIES = ['Москва', 'Санкт-Петербург', 'Краснодар', 'Казань', 'Екатеринбург']
+METRO = ['Курская', 'Таганская', 'Арбатская', 'Динамо', 'Сокол', 'Выхино']
+POSTED_FORMATS = ['Сегодня {h:02d}:{m:02d}', 'Вчера {h:02d}:{m:02d}', '{d} дня назад', '{h} часов назад']
+
+
+def generate_found_items(count, seed=42, now=None):
+    """Возвращает список словарей, похожих на строки FoundItem"""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    items = []
+
+    for item_id in range(1, count + 1):
+        category = rng.choice(list(CATALOG))
+        template, low, high = rng.choice(CATALOG[category])
+        title = template.format(n=rng.randint(3, 16), gb=rng.choice([64, 128, 256, 512, 1024]))
+
+        condition_index = rng.randrange(len(CONDITIONS))
+        # Состояние заметно влияет на цену — модели есть что выучить
+        price = rng.uniform(low, high) * (1.15 - condition_index * 0.12)
+        hours_ago = rng.expovariate(1 / 30)
+        found_at = now - timedelta(hours=hours_ago)
+
+        description = ' '.join(filter(None, [
+            CONDITIONS[condition_index],
+            rng.choice(EXTRAS),
+            'Полный комплект.' * rng.randint(0, 3),
+        ]))
+
+        items.append({
+            'id': item_id,
+            'title': title,
+            'description': description,
+            'price': Decimal(f"{price:.2f}"),
+            'category': category,
+            'city': rng.choice(CITIES),
+            'seller_rating': Decimal(f"{rng.uniform(3.0, 5.0):.1f}"),
+            'reviews_count': int(rng.paretovariate(1.2)) % 2000,
+            'posted_date': rng.choice(POSTED_FORMATS).format(
+                h=rng.randint(0, 23), m=rng.randint(0, 59), d=rng.randint(2, 6)
+            ),
+            'found_at': found_at,
+            'ml_freshness_score': max(0.0, min(1.0, 1.0 - hours_ago / 168 + rng.gauss(0, 0.05))),
+            'views_count': rng.randint(0, 1500),
+            'address': f"{rng.choice(CITIES)}, ул. Ленина, {rng.randint(1, 150)}" if rng.random() > 0.3 else None,
+            'metro_stations': rng.sample(METRO, rng.randint(0, 2)),
+            # Для MLFreshnessPredictor
+            'time_listed': hours_ago,
+        })
+
+    return items
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК МАТЧИНГА КЛЮЧЕВЫХ СЛОВ: старые циклы `word in text` против KeywordMatcher.
+
+Словари — те же, что у MLPricePredictor, FreshnessLearningSystem и
+SeleniumAvitoParser; тексты — синтетические заголовки + описания.
+
+    python -m benchmarks.text_matching --rows 10000
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+sys.path.append('.')
+
+from benchmarks.synthetic import generate_found_items
+
+
+def _load_text_matcher():
+    # Модуль без зависимостей: грузим напрямую, минуя apps.parsing.__init__ (Selenium, Django)
+    path = os.path.join('apps', 'parsing', 'utils', 'text_matcher.py')
+    spec = importlib.util.spec_from_file_location('text_matcher', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+VOCABULARIES = {
+    'time_keywords': ['только что', 'сегодня', 'минут', 'час', 'свежий'],
+    'urgency_keywords': ['срочно', 'быстро', 'срочная продажа'],
+    'new_keywords': ['новый', 'не использовался', 'с гарантией', 'оригинал'],
+    'condition_perfect': ['новый', 'не использовался', 'с гарантией', 'оригинал', 'заводская упаковка'],
+    'condition_excellent': ['отличное состояние', 'как новый', 'почти не использовался', 'идеальное'],
+    'condition_good': ['хорошее состояние', 'небольшие следы', 'мягкие потертости', 'работает идеально'],
+    'condition_satisfactory': ['удовлетворительное', 'царапины', 'потертости', 'следы использования'],
+    'condition_bad': ['требует ремонта', 'не работает', 'сломан', 'б/у в плохом состоянии'],
+    'freshness': ['только что', 'сегодня', 'минут', 'час', 'только добавлен',
+                  'срочно', 'быстро', 'срочная продажа', 'новый', 'не использовался'],
+}
+BRANDS = ['iphone', 'macbook', 'samsung', 'sony']
+
+
+def naive_scan(texts):
+    """Как было: по циклу `in` на каждый словарь"""
+    for text in texts:
+        text = text.lower()
+        {name: {term for term in terms if term in text} for name, terms in VOCABULARIES.items()}
+
+
+def naive_brands(titles):
+    for title in titles:
+        any(brand in title.lower() for brand in BRANDS)
+
+
+def run_case(name, rows, func, repeat):
+    best = min(_timed(func) for _ in range(repeat))
+    print(f"{name:<40} {rows:>8} {best:>9.3f} {rows / best:>12.0f}")
+    return best
+
+
+def _timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк матчинга ключевых слов')
+    parser.add_argument('--rows', type=int, default=10000, help='Количество заголовков')
+    parser.add_argument('--repeat', type=int, default=5, help='Повторов (берётся лучший)')
+    args = parser.parse_args()
+
+    text_matcher = _load_text_matcher()
+    items = generate_found_items(args.rows)
+    titles = [item['title'] for item in items]
+    texts = [f"{item['title']} {item['description']}" for item in items]
+
+    started = time.perf_counter()
+    matcher = text_matcher.KeywordMatcher(VOCABULARIES)
+    brand_matcher = text_matcher.KeywordMatcher({'brands': BRANDS}, stem=False)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n📊 Матчинг ключевых слов: {args.rows} текстов, "
+          f"{sum(len(terms) for terms in VOCABULARIES.values())} терминов, компиляция {compile_ms:.1f} мс\n")
+    print(f"{'case':<40} {'rows':>8} {'seconds':>9} {'rows/sec':>12}")
+    print('-' * 72)
+
+    naive = run_case('vocabularies: naive `in` loops', args.rows, lambda: naive_scan(texts), args.repeat)
+    fast = run_case('vocabularies: KeywordMatcher.scan', args.rows,
+                    lambda: [matcher.scan(text) for text in texts], args.repeat)
+    naive_b = run_case('brands: naive any()', args.rows, lambda: naive_brands(titles), args.repeat)
+    fast_b = run_case('brands: KeywordMatcher.has_any', args.rows,
+                      lambda: [brand_matcher.has_any(title) for title in titles], args.repeat)
+
+    # Числа не обязаны совпадать: циклы ищут подстроки («новый» в «новинке»),
+    # матчер — целые слова, но со словоформами («новая», «срочная», «часа»)
+    naive_hits = sum(term in text.lower() for text in texts for terms in VOCABULARIES.values() for term in terms)
+    matcher_hits = sum(len(hits) for text in texts for hits in matcher.scan(text).values())
+
+    print(f"\n⚡ Ускорение: словари x{naive / fast:.2f}, бренды x{naive_b / fast_b:.2f}")
+    print(f"🔍 Совпадений: наивно {naive_hits} (подстроки), матчер {matcher_hits} (целые слова со словоформами)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+📊 БЕНЧМАРК БЮДЖЕТА CPU НА ОБУЧЕНИЕ: время обучения модели цены при разной доле ядер.
+
+Каждый прогон — MLPricePredictor.train_price_model_on_items с TrainingBudget(cpu_share=...):
+фолды КВ и финальное обучение в пуле TrainingPool. Модели не сохраняются.
+
+    python -m benchmarks.training_budget --rows 5000 --shares 0.25 0.5 0.75 1.0
+    python -m benchmarks.training_budget --rows 5000 --halving
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.append('.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apps.core.settings')
+
+import django
+
+django.setup()
+
+from apps.parsing.ai.ml_price_predictor import MLPricePredictor
+from apps.parsing.ai.training_pool import TrainingBudget
+from benchmarks.synthetic import generate_found_items
+
+
+def train_with_budget(items, budget):
+    predictor = MLPricePredictor()
+    predictor.training_budget = budget
+    started = time.perf_counter()
+    asyncio.run(predictor.train_price_model_on_items(items, save=False))
+    elapsed = time.perf_counter() - started
+    return elapsed, predictor.training_log[-1]['metrics']['r2'] if predictor.training_log else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк обучения при разном бюджете CPU')
+    parser.add_argument('--rows', type=int, default=5000, help='Строк для обучения')
+    parser.add_argument('--shares', type=float, nargs='+', default=[0.25, 0.5, 0.75, 1.0], help='Доли CPU')
+    parser.add_argument('--halving', action='store_true', help='Включить successive halving')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    items = generate_found_items(args.rows)
+
+    print(f"\n📊 Обучение модели цены: {args.rows} строк, {os.cpu_count()} ядер, "
+          f"halving={'on' if args.halving else 'off'}\n")
+    print(f"{'cpu share':>10} {'workers':>8} {'seconds':>9} {'speedup':>8} {'R²':>8}")
+    print('-' * 48)
+
+    # База — один процесс
+    baseline, r2 = train_with_budget(items, TrainingBudget(max_workers=1, successive_halving=args.halving))
+    print(f"{'1 proc':>10} {1:>8} {baseline:>9.2f} {1.0:>8.2f} {r2:>8.4f}")
+
+    for share in args.shares:
+        budget = TrainingBudget(cpu_share=share, successive_halving=args.halving)
+        elapsed, r2 = train_with_budget(items, budget)
+        print(f"{share:>10.2f} {budget.workers:>8} {elapsed:>9.2f} {baseline / elapsed:>8.2f} {r2:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
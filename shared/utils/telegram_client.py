@@ -0,0 +1,210 @@
+"""
+📡 ОБЩИЙ TELEGRAM-КЛИЕНТ ПРОЦЕССА
+
+Один долгоживущий Bot на event loop (и токен) с настроенным пулом HTTPX:
+соединения с api.telegram.org переиспользуются между сообщениями,
+TLS-рукопожатие и создание httpx-клиента происходят один раз.
+
+    bot = await get_bot()                       # из async-кода
+    run_sync(lambda bot: bot.send_message(...))  # из синхронного кода (Django views)
+
+Синхронный код работает через собственный фоновый loop фабрики, поэтому
+не создаёт новый Bot на каждый asyncio.run(). Bot'ы loop'а закрываются
+вместе с ним (asyncio.run и asgiref при завершении вызывают
+shutdown_asyncgens), при выходе процесса (atexit) или явным
+close_telegram_clients().
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+
+import httpx
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from .config import get_bot_token
+
+logger = logging.getLogger('bot.notifications')
+
+# Пул соединений: медиа-группы и сообщения из нескольких окон парсера идут параллельно
+CONNECTION_POOL_SIZE = 16
+KEEPALIVE_EXPIRY = 60.0  # секунд держим простаивающее соединение открытым
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 20.0
+WRITE_TIMEOUT = 20.0
+MEDIA_WRITE_TIMEOUT = 60.0
+POOL_TIMEOUT = 10.0  # ожидание свободного соединения из пула
+
+
+def _build_request():
+    return HTTPXRequest(
+        connection_pool_size=CONNECTION_POOL_SIZE,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        write_timeout=WRITE_TIMEOUT,
+        media_write_timeout=MEDIA_WRITE_TIMEOUT,
+        pool_timeout=POOL_TIMEOUT,
+        httpx_kwargs={
+            'limits': httpx.Limits(
+                max_connections=CONNECTION_POOL_SIZE,
+                max_keepalive_connections=CONNECTION_POOL_SIZE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        },
+    )
+
+
+class LoopClients:
+    """Bot'ы одного event loop и замок их инициализации"""
+
+    def __init__(self):
+        self.bots = {}  # token -> Bot
+        self.init_lock = asyncio.Lock()
+        self.guard = None  # Асинхронный генератор loop'а: закрывает Bot'ы при shutdown_asyncgens
+
+
+class TelegramClientFactory:
+    """🏭 Фабрика Bot: по одному экземпляру на (event loop, токен)
+
+    httpx-клиент привязан к loop, в котором открыл соединения, поэтому
+    клиенты разных loop'ов не смешиваются. Loop парсера живёт всё время
+    работы — его Bot и соединения тоже; короткие loop'ы (asyncio.run,
+    async_to_sync) закрывают своих клиентов сами при завершении.
+    """
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+        self._clients = {}  # loop -> LoopClients
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    async def get_bot(self, token=None):
+        """Bot для текущего event loop (создаётся и инициализируется один раз)"""
+        token = token or get_bot_token()
+        if not token:
+            raise ValueError("Токен бота не настроен")
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._forget_closed_loops()
+            clients = self._clients.get(loop)
+            new_loop = clients is None
+            if new_loop:
+                clients = self._clients[loop] = LoopClients()
+            bot = clients.bots.get(token)
+            if bot is None:
+                kwargs = {'base_url': self.base_url} if self.base_url else {}
+                bot = Bot(token=token, request=_build_request(), **kwargs)
+                clients.bots[token] = bot
+
+        if new_loop:
+            # Доходит до yield и ждёт там завершения loop'а
+            clients.guard = self._close_with_loop(clients)
+            await clients.guard.__anext__()
+
+        # get_me один раз на клиента: параллельные первые вызовы ждут один initialize()
+        async with clients.init_lock:
+            await bot.initialize()
+        return bot
+
+    def run_sync(self, func, token=None, timeout=None):
+        """Выполняет await func(bot) на фоновом loop фабрики из синхронного кода"""
+
+        async def call():
+            return await func(await self.get_bot(token))
+
+        future = asyncio.run_coroutine_threadsafe(call(), self._ensure_loop())
+        return future.result(timeout)
+
+    async def aclose(self):
+        """Закрывает клиентов текущего event loop"""
+        with self._lock:
+            clients = self._clients.pop(asyncio.get_running_loop(), None)
+        if clients is None:
+            return
+        guard, clients.guard = clients.guard, None
+        if guard is not None:
+            await guard.aclose()  # finally генератора закрывает Bot'ы
+        else:
+            await self._shutdown_all(clients)
+
+    def close(self):
+        """Закрывает всех клиентов и фоновый loop (при остановке процесса)"""
+        with self._lock:
+            loops = list(self._clients.items())
+            self._clients.clear()
+            background, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        for loop, clients in loops:
+            if loop.is_closed() or not loop.is_running():
+                continue
+            future = asyncio.run_coroutine_threadsafe(self._shutdown_all(clients), loop)
+            if loop is background:
+                future.result(timeout=10)
+
+        if background is not None:
+            background.call_soon_threadsafe(background.stop)
+            thread.join(timeout=10)
+            background.close()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name='telegram-client', daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _close_with_loop(self, clients):
+        """Живёт, пока жив loop; при его shutdown_asyncgens закрывает его Bot'ы"""
+        try:
+            yield
+        finally:
+            with self._lock:
+                loop = asyncio.get_running_loop()
+                if self._clients.get(loop) is clients:
+                    del self._clients[loop]
+            await self._shutdown_all(clients)
+
+    def _forget_closed_loops(self):
+        """Loop закрыт без shutdown_asyncgens — закрыть клиентов уже нельзя, только отпустить (под _lock)"""
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            logger.warning("⚠️ Event loop закрыт без shutdown_asyncgens — его Telegram-клиенты не закрыты")
+            del self._clients[loop]
+
+    async def _shutdown_all(self, clients):
+        bots, clients.bots = list(clients.bots.values()), {}
+        for bot in bots:
+            await self._shutdown(bot)
+
+    @staticmethod
+    async def _shutdown(bot):
+        try:
+            await bot.shutdown()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка закрытия Telegram-клиента: {e}")
+
+
+telegram_clients = TelegramClientFactory()
+atexit.register(telegram_clients.close)
+
+
+async def get_bot(token=None):
+    """Общий Bot процесса для текущего event loop"""
+    return await telegram_clients.get_bot(token)
+
+
+def run_sync(func, token=None, timeout=None):
+    """Синхронный вызов: run_sync(lambda bot: bot.send_message(...))"""
+    return telegram_clients.run_sync(func, token, timeout)
+
+
+async def close_telegram_clients():
+    """Закрывает клиентов текущего event loop (вызывать при остановке парсера)"""
+    await telegram_clients.aclose()
@@ -0,0 +1,142 @@
+"""
+🖼️ ПОВТОРНОЕ ИСПОЛЬЗОВАНИЕ ЗАГРУЖЕННЫХ ФОТО TELEGRAM
+
+Когда одну сделку получают несколько чатов, байты фото загружаются в
+Telegram только один раз: из ответа send_media_group берутся file_id,
+и следующие получатели отправляют уже их (без повторной загрузки).
+
+    messages = await send_media_group_cached(bot, chat_id, photos, caption)
+    results = await fan_out_media_group(bot, [chat_a, chat_b], photos, caption, limiter=telegram_rate_limiter)
+
+file_id живут в кэше недолго (MediaFileCache.TTL) — ключ кэша SHA-1 байтов
+фото. Если Telegram не принял file_id, запись удаляется и альбом
+уходит с байтами ещё раз.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from telegram import InputMediaPhoto
+from telegram.error import BadRequest
+
+logger = logging.getLogger('bot.notifications')
+
+
+class MediaFileCache:
+    """🗂️ SHA-1 байтов фото → file_id Telegram (LRU с TTL, потокобезопасно)"""
+
+    TTL = 3600.0  # Секунд храним file_id
+    MAX_ENTRIES = 2000
+
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (file_id, expires)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(photo) -> Optional[str]:
+        """Ключ для байтов фото (URL и file_id не кэшируются)"""
+        if isinstance(photo, (bytes, bytearray)):
+            return hashlib.sha1(photo).hexdigest()
+        return None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            file_id, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return file_id
+
+    def put(self, key, file_id):
+        with self._lock:
+            self._entries[key] = (file_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Один кэш на процесс — file_id привязаны к боту, а не к чату
+telegram_media_cache = MediaFileCache()
+
+
+def _build_media(photos, caption, parse_mode, cache, use_cache=True):
+    keys, media, cached = [], [], 0
+    for index, photo in enumerate(photos):
+        key = cache.key(photo)
+        file_id = cache.get(key) if key and use_cache else None
+        if file_id:
+            cached += 1
+        keys.append(key)
+        source = file_id or photo
+        if index == 0:
+            media.append(InputMediaPhoto(media=source, caption=caption, parse_mode=parse_mode))
+        else:
+            media.append(InputMediaPhoto(media=source))
+    return media, keys, cached
+
+
+def _remember(messages, keys, cache):
+    """file_id из ответа Telegram (самый большой размер каждого фото)"""
+    for message, key in zip(messages or [], keys):
+        if key and getattr(message, 'photo', None):
+            cache.put(key, message.photo[-1].file_id)
+
+
+async def send_media_group_cached(bot, chat_id, photos, caption=None, parse_mode='HTML',
+                                  cache=telegram_media_cache, **kwargs):
+    """send_media_group: уже загруженные фото уходят по file_id"""
+    media, keys, cached = _build_media(photos, caption, parse_mode, cache)
+    try:
+        messages = await bot.send_media_group(chat_id=chat_id, media=media, **kwargs)
+    except BadRequest as e:
+        if not cached:
+            raise
+        # file_id устарел или не принят — загружаем байты заново
+        logger.warning(f"⚠️ Telegram не принял file_id ({e}), загружаем фото заново")
+        cache.discard([key for key in keys if key])
+        media, keys, _ = _build_media(photos, caption, parse_mode, cache, use_cache=False)
+        messages = await bot.send_media_group(chat_id=chat_id, media=media, **kwargs)
+        cached = 0
+
+    if cached < len(photos):
+        _remember(messages, keys, cache)
+    if cached:
+        logger.debug(f"🗂️ {cached}/{len(photos)} фото отправлены по file_id в {chat_id}")
+    return messages
+
+
+async def fan_out_media_group(bot, chat_ids: List, photos, caption=None, parse_mode='HTML',
+                              cache=telegram_media_cache, limiter=None, **kwargs) -> Dict[str, bool]:
+    """Один альбом нескольким чатам: загрузка — только для первого успешного
+
+    limiter (telegram_rate_limiter) — перед каждым альбомом ждём места на все его фото.
+    """
+    results = {}
+    for chat_id in chat_ids:
+        try:
+            if limiter is not None:
+                await limiter.acquire(chat_id, len(photos))
+            await send_media_group_cached(bot, chat_id, photos, caption, parse_mode, cache, **kwargs)
+            results[str(chat_id)] = True
+        except Exception as e:
+            logger.error(f"❌ Не удалось отправить альбом в {chat_id}: {e}")
+            results[str(chat_id)] = False
+    return results
@@ -264,6 +264,21 @@ def create_realistic_dummy_dataset():
     return np.array(features), np.array(targets)
 
 
+def build_freshness_model(verbose=1):
+    """RandomForest с боевыми параметрами (используется и в бенчмарках)"""
+    return RandomForestRegressor(
+        n_estimators=200,  # Больше деревьев
+        max_depth=15,  # Глубже
+        min_samples_split=3,  # Меньше samples для split
+        min_samples_leaf=1,  # Меньше samples в листе
+        max_features='sqrt',  # Оптимальное количество фич
+        bootstrap=True,
+        random_state=42,
+        n_jobs=-1,
+        verbose=verbose
+    )
+
+
 def train_and_save_model():
     """Обучение и сохранение модели"""
     print("\n🎯 ОБУЧЕНИЕ МОДЕЛИ...")
@@ -292,17 +307,7 @@ def train_and_save_model():
     X_test_scaled = scaler.transform(X_test)
 
     # Обучаем модель с оптимальными параметрами
-    model = RandomForestRegressor(
-        n_estimators=200,  # Больше деревьев
-        max_depth=15,  # Глубже
-        min_samples_split=3,  # Меньше samples для split
-        min_samples_leaf=1,  # Меньше samples в листе
-        max_features='sqrt',  # Оптимальное количество фич
-        bootstrap=True,
-        random_state=42,
-        n_jobs=-1,
-        verbose=1
-    )
+    model = build_freshness_model()
 
     print("🌲 Обучаем RandomForest...")
     model.fit(X_train_scaled, y_train)